@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+"""
+Ingest Benchmark - Load generator simulating a fleet of senseBoxes
+Development tool; not imported by main.py
+
+Starts the API from main.py (uvicorn subprocess) against the Pinata
+stand-in (local_ipfs.py), the Horizon emulator (local_horizon.py) and a
+disposable PostgreSQL database, then sends
+a configurable fleet of devices at a fixed per-device rate against the
+ingest endpoints:
+
+- observe          POST /observe (main.py)
+- v2_observations  POST /api/v2/observations (phenomenological_api.py)
+- pheno_observe    POST /observe of phenomenological_app.py (separate app,
+                   only with --pheno-base-url)
+
+Load is open-loop: every device sends on its own schedule whether or not
+earlier requests finished, and latency is measured from the scheduled
+send time, so a slow server shows up as latency instead of a lower
+request rate. Results (p50/p95/p99 latency, throughput, error rates) are
+written as JSON for comparison between releases.
+
+Usage:
+    # Disposable database with the phenomenological schema loaded
+    python benchmark_ingest.py --database-url postgresql://localhost/ubec_bench \\
+        --devices 5000 --rate 1 --duration 300 --output bench.json
+
+    # Running server (no stand-ins, no seeding)
+    python benchmark_ingest.py --base-url http://localhost:8000 --targets observe
+
+Design Principles Applied:
+- Principle #5: Strict async operations
+- Principle #10: Clear separation of concerns
+
+Attribution: This project uses the services of Claude and Anthropic PBC.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+from local_horizon import LocalHorizon
+from local_ipfs import LocalIPFS
+
+logger = logging.getLogger("benchmark_ingest")
+
+TARGETS = {
+    "observe": "/observe",
+    "v2_observations": "/api/v2/observations",
+    "pheno_observe": "/observe",
+}
+
+
+@dataclass
+class FleetConfig:
+    """Shape of the simulated fleet"""
+    devices: int = 5000
+    rate_per_minute: float = 1.0  # Observations per device per minute
+    duration: float = 60.0  # Seconds of load
+    targets: List[str] = field(default_factory=lambda: ["observe", "v2_observations"])
+    max_in_flight: int = 1000  # Open client connections
+    device_prefix: str = "bench-sb"
+    seed: int = 42
+
+    @property
+    def target_rps(self) -> float:
+        return self.devices * self.rate_per_minute / 60.0
+
+
+# ============================================================
+# APPLICATION UNDER TEST
+# ============================================================
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def start_app(env: Dict[str, str], port: int, startup_timeout: float = 60.0) -> subprocess.Popen:
+    """Run main.py under uvicorn and wait until /status answers"""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app",
+         "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        env={**os.environ, **env}
+    )
+    deadline = time.monotonic() + startup_timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"API exited during startup (code {process.returncode})")
+            try:
+                async with session.get(f"http://127.0.0.1:{port}/status") as response:
+                    if response.status == 200:
+                        return process
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.5)
+
+    process.terminate()
+    raise RuntimeError(f"API did not become ready within {startup_timeout}s")
+
+
+async def seed_devices(database_url: str, config: FleetConfig, owner_address: str) -> int:
+    """
+    Register the simulated devices as observers (missing ones only)
+
+    Returns:
+        Number of observers created
+    """
+    from phenomenological_db import PhenomenologicalDB
+
+    db = PhenomenologicalDB(database_url)
+    await db.connect()
+    try:
+        async with db.pool.acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT external_identity->>'device_id' AS device_id
+                FROM phenomenological.observers
+                WHERE external_identity->>'device_id' LIKE $1
+            """, f"{config.device_prefix}-%")
+        existing = {row["device_id"] for row in rows}
+
+        created = 0
+        for device_id in device_ids(config):
+            if device_id in existing:
+                continue
+            await db.create_observer(
+                "device",
+                {"device_id": device_id},
+                {"owner_stellar": owner_address, "benchmark": True}
+            )
+            created += 1
+        return created
+    finally:
+        await db.close()
+
+
+def device_ids(config: FleetConfig) -> List[str]:
+    return [f"{config.device_prefix}-{index:05d}" for index in range(config.devices)]
+
+
+def observation_payload(device_id: str, rng: random.Random) -> Dict[str, Any]:
+    """senseBox-shaped observation"""
+    return {
+        "device_id": device_id,
+        "readings": {
+            "temperature": round(rng.uniform(-5, 30), 2),
+            "humidity": round(rng.uniform(20, 95), 1),
+            "pressure": round(rng.uniform(980, 1040), 1),
+            "pm25": round(rng.uniform(0, 60), 1),
+            "pm10": round(rng.uniform(0, 90), 1)
+        },
+        "location": {"lat": 52.34 + rng.uniform(-0.05, 0.05), "lon": 14.55 + rng.uniform(-0.05, 0.05)}
+    }
+
+
+# ============================================================
+# LOAD GENERATION
+# ============================================================
+
+@dataclass
+class TargetResult:
+    """Latencies and outcomes of one endpoint"""
+    target: str
+    latencies: List[float] = field(default_factory=list)
+    statuses: Dict[str, int] = field(default_factory=dict)
+    sent: int = 0
+
+    def record(self, status: str, latency: float) -> None:
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.latencies.append(latency)
+
+    def summary(self, elapsed: float, target_rps: float) -> Dict[str, Any]:
+        completed = len(self.latencies)
+        ok = sum(count for status, count in self.statuses.items() if status.startswith("2"))
+        ordered = sorted(self.latencies)
+        return {
+            "sent": self.sent,
+            "completed": completed,
+            "ok": ok,
+            "error_rate": round(1 - ok / completed, 6) if completed else None,
+            "statuses": dict(sorted(self.statuses.items())),
+            "target_rps": round(target_rps, 3),
+            "throughput_rps": round(ok / elapsed, 3) if elapsed else None,
+            "latency_ms": {
+                "p50": _percentile(ordered, 50),
+                "p95": _percentile(ordered, 95),
+                "p99": _percentile(ordered, 99),
+                "max": round(ordered[-1] * 1000, 3) if ordered else None,
+                "mean": round(sum(ordered) / completed * 1000, 3) if completed else None
+            }
+        }
+
+
+def _percentile(ordered: List[float], percent: float) -> Optional[float]:
+    """Nearest-rank percentile in milliseconds"""
+    if not ordered:
+        return None
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return round(ordered[int(rank) - 1] * 1000, 3)
+
+
+async def run_fleet(config: FleetConfig, urls: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Drive every target with the configured fleet
+
+    Each target gets the full fleet rate; targets run concurrently so
+    they compete for the same pools, as in production.
+    """
+    rng = random.Random(config.seed)
+    results = {target: TargetResult(target) for target in config.targets}
+    period = 60.0 / config.rate_per_minute
+
+    # (send offset, device, target) for the whole run, each device at a random phase
+    schedule = []
+    for device_id in device_ids(config):
+        for target in config.targets:
+            offset = rng.uniform(0, period)
+            while offset < config.duration:
+                schedule.append((offset, device_id, target))
+                offset += period
+    schedule.sort()
+
+    connector = aiohttp.TCPConnector(limit=config.max_in_flight)
+    timeout = aiohttp.ClientTimeout(total=120)
+    in_flight = set()
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        async def send(scheduled_at: float, device_id: str, target: str) -> None:
+            payload = observation_payload(device_id, rng)
+            url = urls[target] + TARGETS[target]
+            try:
+                async with session.post(url, json=payload) as response:
+                    await response.read()
+                    status = str(response.status)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                status = type(e).__name__
+            results[target].record(status, time.perf_counter() - scheduled_at)
+
+        started = time.perf_counter()
+        for offset, device_id, target in schedule:
+            delay = started + offset - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            results[target].sent += 1
+            task = asyncio.create_task(send(started + offset, device_id, target))
+            in_flight.add(task)
+            task.add_done_callback(in_flight.discard)
+
+        if in_flight:
+            await asyncio.gather(*in_flight)
+        elapsed = time.perf_counter() - started
+
+    return {
+        "elapsed_seconds": round(elapsed, 3),
+        "targets": {
+            target: result.summary(elapsed, config.target_rps)
+            for target, result in results.items()
+        }
+    }
+
+
+# ============================================================
+# ENTRY POINT
+# ============================================================
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    config = FleetConfig(
+        devices=args.devices,
+        rate_per_minute=args.rate,
+        duration=args.duration,
+        targets=args.targets,
+        max_in_flight=args.max_in_flight,
+        device_prefix=args.device_prefix,
+        seed=args.seed
+    )
+    if "pheno_observe" in config.targets and not args.pheno_base_url:
+        raise SystemExit("pheno_observe needs --pheno-base-url (phenomenological_app.py runs separately)")
+
+    stand_ins = []
+    process = None
+    seeded = 0
+    try:
+        base_url = args.base_url
+        if not base_url:
+            if not args.database_url:
+                raise SystemExit("--database-url is required unless --base-url is given")
+
+            from config import config as app_config
+            from stellar_sdk import Keypair
+
+            issuer = app_config.stellar.ubecrc_issuer_public
+            distributor = Keypair.random()
+            owner = Keypair.random()
+
+            pinata = LocalIPFS(
+                pin_latency=args.ipfs_latency,
+                rate_limit=args.ipfs_rate_limit,
+                rate_window=args.ipfs_rate_window,
+                seed=args.seed
+            )
+            horizon = LocalHorizon(
+                submit_latency=args.horizon_latency,
+                failure_rate=args.horizon_failure_rate,
+                seed=args.seed
+            )
+            horizon.create_account(issuer)
+            horizon.create_account(distributor.public_key, assets={("UBECrc", issuer): "1000000000"})
+            horizon.create_account(owner.public_key, assets={("UBECrc", issuer): "0"})
+            stand_ins = [pinata, horizon]
+            pinata_url = await pinata.start(port=_free_port())
+
+            env = {
+                "DATABASE_URL": args.database_url,
+                "PINATA_API_KEY": "benchmark",
+                "PINATA_SECRET_KEY": "benchmark",
+                "PINATA_JWT": "benchmark",
+                "PINATA_API_URL": pinata_url,
+                "IPFS_GATEWAY": pinata_url,
+                "STELLAR_NETWORK": "testnet",
+                "STELLAR_HORIZON_URL": await horizon.start(port=_free_port()),
+                "STELLAR_DISTRIBUTOR_PUBLIC": distributor.public_key,
+                "STELLAR_DISTRIBUTOR_SECRET": distributor.secret,
+                "STELLAR_ONBOARDING_ENABLED": "false",
+                "LOG_LEVEL": "WARNING",
+                **dict(item.split("=", 1) for item in args.env)
+            }
+
+            seeded = await seed_devices(args.database_url, config, owner.public_key)
+            port = _free_port()
+            process = await start_app(env, port)
+            base_url = f"http://127.0.0.1:{port}"
+
+        urls = {target: base_url for target in config.targets}
+        if args.pheno_base_url:
+            urls["pheno_observe"] = args.pheno_base_url
+
+        started_at = datetime.now(timezone.utc).isoformat()
+        run = await run_fleet(config, urls)
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=30)
+        for stand_in in stand_ins:
+            await stand_in.close()
+
+    return {
+        "benchmark": "ingest",
+        "started_at": started_at,
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "fleet": dict(asdict(config), target_rps=round(config.target_rps, 3)),
+        "devices_seeded": seeded,
+        "ipfs": pinata.stats() if stand_ins else None,
+        "horizon": horizon.stats() if stand_ins else None,
+        **run
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Ingest load benchmark (simulated senseBox fleet)")
+    parser.add_argument("--devices", type=int, default=5000)
+    parser.add_argument("--rate", type=float, default=1.0, help="observations per device per minute")
+    parser.add_argument("--duration", type=float, default=60.0, help="seconds of load")
+    parser.add_argument("--targets", nargs="+", choices=sorted(TARGETS),
+                        default=["observe", "v2_observations"])
+    parser.add_argument("--max-in-flight", type=int, default=1000)
+    parser.add_argument("--device-prefix", default="bench-sb")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database-url", help="disposable database (devices are seeded into it)")
+    parser.add_argument("--base-url", help="benchmark an already running API instead")
+    parser.add_argument("--pheno-base-url", help="running phenomenological_app.py for pheno_observe")
+    parser.add_argument("--ipfs-latency", type=float, default=0.0,
+                        help="emulated Pinata pin time (seconds)")
+    parser.add_argument("--ipfs-rate-limit", type=int, default=0,
+                        help="Pinata requests per window before 429 (0 = unlimited)")
+    parser.add_argument("--ipfs-rate-window", type=float, default=60.0)
+    parser.add_argument("--horizon-latency", type=float, default=0.0,
+                        help="emulated ledger close time per submit (seconds)")
+    parser.add_argument("--horizon-failure-rate", type=float, default=0.0,
+                        help="share of submits failing with 503")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="extra environment for the API (e.g. OBSERVATION_INGEST_MODE=async)")
+    parser.add_argument("--output", help="write JSON results to this file (default: stdout)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    logging.basicConfig(level=logging.INFO)
+    report = asyncio.run(benchmark(arguments))
+
+    text = json.dumps(report, indent=2)
+    if arguments.output:
+        with open(arguments.output, "w") as handle:
+            handle.write(text + "\n")
+        logger.info(f"Results written to {arguments.output}")
+    else:
+        print(text)
+
+
+"""
+Attribution: This project uses the services of Claude and Anthropic PBC
+to inform our decisions and recommendations.
+"""
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Channel Account Check - Parallel submission and sequence resync
+Development tool; not imported by main.py
+
+Runs StellarReciprocalNetwork with N channel accounts against the Horizon
+emulator (local_horizon.py) and sends a burst of concurrent payouts.
+Before the burst one channel's sequence is advanced behind the pool's
+back (another client used the account), so its next submit is rejected
+with tx_bad_seq.
+
+Checks:
+- every payout succeeds and lands in the emulated ledger
+- submits overlap: the emulator saw more than one submit open at once
+  (up to one per channel) and the burst took well under the serial time
+- exactly one tx_bad_seq, answered by one resync of that channel only
+- afterwards each channel's local sequence equals the ledger's
+- a batched transaction that is applied but answered with a 504
+  (fail_next("timeout")) is settled by hash: every payout in it
+  succeeds and is paid exactly once
+
+Usage:
+    python check_stellar_channels.py --channels 4 --payments 40 --submit-latency 0.2
+
+Exits with status 1 if a check fails.
+
+Design Principles Applied:
+- Principle #5: Strict async operations
+- Principle #10: Clear separation of concerns
+
+Attribution: This project uses the services of Claude and Anthropic PBC.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import socket
+import sys
+import time
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from stellar_sdk import Keypair
+
+from local_horizon import LocalHorizon
+from stellar_integration import StellarReciprocalNetwork
+
+logger = logging.getLogger("check_stellar_channels")
+
+ASSET_CODE = "UBECrc"
+PAYOUT = Decimal("7.14")
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def run_check(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run the burst and return the report (report["passed"] is the verdict)"""
+    issuer = Keypair.random()
+    distributor = Keypair.random()
+    channels = [Keypair.random() for _ in range(args.channels)]
+    destinations = [Keypair.random() for _ in range(args.destinations)]
+    asset = (ASSET_CODE, issuer.public_key)
+
+    horizon = LocalHorizon(submit_latency=args.submit_latency, seed=args.seed)
+    horizon.create_account(issuer.public_key)
+    horizon.create_account(distributor.public_key, assets={asset: "1000000"})
+    for channel in channels:
+        horizon.create_account(channel.public_key)
+    for destination in destinations:
+        horizon.create_account(destination.public_key, assets={asset: "0"})
+
+    stellar = None
+    try:
+        stellar = StellarReciprocalNetwork({
+            "stellar_horizon_url": await horizon.start(port=_free_port()),
+            "stellar_network": "testnet",
+            "ubecrc_asset_code": ASSET_CODE,
+            "ubecrc_issuer": issuer.public_key,
+            "ubecrc_distributor": distributor.public_key,
+            "ubecrc_distributor_secret": distributor.secret,
+            "channel_secrets": [channel.secret for channel in channels]
+        })
+        await stellar.connect()
+        if not stellar.channel_pool or len(stellar.channel_pool) != args.channels:
+            raise SystemExit("Channel pool did not come up with every channel")
+
+        # Another client uses the first channel: its cached sequence is stale
+        stale = channels[0].public_key
+        horizon.bump_sequence(stale)
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(
+            stellar.send_ubecrc_payment(
+                destination=destinations[index % len(destinations)].public_key,
+                amount=str(PAYOUT),
+                memo=f"chk:{index}"
+            )
+            for index in range(args.payments)
+        ))
+        elapsed = time.perf_counter() - started
+
+        # One multi-operation batch applied behind a 504
+        batcher = stellar.enable_payment_batching(
+            max_batch_size=args.batch_payments, window_seconds=0.05
+        )
+        injected = horizon.counts["injected"]
+        horizon.fail_next("timeout")
+        batch_results = await asyncio.gather(*(
+            batcher.submit(
+                destination=destinations[index % len(destinations)].public_key,
+                amount=str(PAYOUT),
+                memo=f"chk-batch:{index}"
+            )
+            for index in range(args.batch_payments)
+        ))
+        timeout_injected = horizon.counts["injected"] - injected == 1
+
+        pool = {channel.public_key: channel for channel in stellar.channel_pool.channels}
+        resyncs = {
+            key: channel.sequence_manager.resyncs for key, channel in pool.items()
+        }
+        sequences_match = all(
+            channel.sequence_manager.stats()["current"] == horizon.accounts[key].sequence
+            for key, channel in pool.items()
+        )
+    finally:
+        if stellar:
+            await stellar.close()
+        await horizon.close()
+
+    succeeded = sum(1 for result in results if result and result.get("success"))
+    batch_hashes = {result.get("transaction_hash") for result in batch_results}
+    received = sum(
+        horizon.accounts[destination.public_key].balances[asset] for destination in destinations
+    )
+    paid = args.payments + args.batch_payments
+    serial_time = args.payments * args.submit_latency
+
+    checks = {
+        "all_payouts_succeeded": succeeded == args.payments,
+        "ledger_balances_match": received == PAYOUT * paid,
+        "submits_overlapped": horizon.peak_in_flight > 1,
+        "faster_than_serial": elapsed < serial_time / 2,
+        "one_bad_seq": horizon.counts["bad_seq"] == 1,
+        "one_resync_of_stale_channel": (
+            resyncs[stale] == 1 and sum(resyncs.values()) == 1
+        ),
+        "sequences_match_ledger": sequences_match,
+        "timeout_batch_settled": (
+            timeout_injected
+            and all(result.get("success") for result in batch_results)
+            and len(batch_hashes) == 1
+        )
+    }
+
+    return {
+        "check": "stellar_channels",
+        "channels": args.channels,
+        "payments": args.payments,
+        "batch_payments": args.batch_payments,
+        "submit_latency": args.submit_latency,
+        "elapsed_seconds": round(elapsed, 3),
+        "serial_seconds": round(serial_time, 3),
+        "peak_in_flight": horizon.peak_in_flight,
+        "resyncs": sum(resyncs.values()),
+        "horizon": horizon.stats(),
+        "checks": checks,
+        "passed": all(checks.values())
+    }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Channel account parallelism and resync check")
+    parser.add_argument("--channels", type=int, default=4)
+    parser.add_argument("--payments", type=int, default=40)
+    parser.add_argument("--batch-payments", type=int, default=20,
+                        help="payouts in the batch whose submit times out")
+    parser.add_argument("--destinations", type=int, default=5)
+    parser.add_argument("--submit-latency", type=float, default=0.2,
+                        help="emulated ledger close time per submit (seconds)")
+    parser.add_argument("--seed", type=int, default=42)
+    arguments = parser.parse_args(argv)
+    if arguments.channels < 2:
+        parser.error("--channels must be at least 2 to observe parallel submits")
+    if arguments.payments < 2 * arguments.channels:
+        parser.error("--payments must be at least twice --channels")
+    if not 1 <= arguments.batch_payments <= 100:
+        parser.error("--batch-payments must be 1-100 (one transaction)")
+    return arguments
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    report = asyncio.run(run_check(arguments))
+
+    print(json.dumps(report, indent=2))
+    for name, ok in report["checks"].items():
+        if not ok:
+            logger.error(f"Check failed: {name}")
+    sys.exit(0 if report["passed"] else 1)
+
+
+"""
+Attribution: This project uses the services of Claude and Anthropic PBC
+to inform our decisions and recommendations.
+"""
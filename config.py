@@ -131,6 +131,11 @@ class IPFSConfig:
         self.rate_limit_requests = int(os.getenv('IPFS_RATE_LIMIT_REQUESTS', '180'))
         self.rate_limit_window_seconds = int(os.getenv('IPFS_RATE_LIMIT_WINDOW', '60'))
         self.cid_version = int(os.getenv('IPFS_CID_VERSION', '1'))
+        
+        # Batch pinning: one pinned document per window instead of one pin per observation
+        self.batch_enabled = os.getenv('IPFS_BATCH_ENABLED', 'false').lower() in ('true', '1', 'yes')
+        self.batch_window_seconds = float(os.getenv('IPFS_BATCH_WINDOW', '60'))
+        self.batch_max_items = int(os.getenv('IPFS_BATCH_MAX_ITEMS', '500'))
     
     @property
     def is_configured(self) -> bool:
@@ -159,6 +164,18 @@ class StellarConfig:
             'STELLAR_HORIZON_URL',
             'https://horizon.stellar.org' if self.network == 'MAINNET' else 'https://horizon-testnet.stellar.org'
         )
+        
+        # Channel accounts (comma-separated secrets) for parallel submission
+        self.channel_secrets = [
+            secret.strip()
+            for secret in os.getenv('STELLAR_CHANNEL_SECRETS', '').split(',')
+            if secret.strip()
+        ]
+        
+        # Multi-operation payment batching (Stellar allows 100 ops per tx)
+        self.payment_batch_enabled = os.getenv('STELLAR_PAYMENT_BATCH_ENABLED', 'false').lower() in ('true', '1', 'yes')
+        self.payment_batch_size = min(int(os.getenv('STELLAR_PAYMENT_BATCH_SIZE', '100')), 100)
+        self.payment_batch_window = float(os.getenv('STELLAR_PAYMENT_BATCH_WINDOW', '2.0'))
     
     @property
     def is_configured(self) -> bool:
@@ -221,6 +238,179 @@ class StellarOnboardingConfig:
         return f"<StellarOnboardingConfig enabled={self.enabled} configured={self.is_configured}>"
 
 
+class HTTPClientConfig:
+    """
+    Outbound HTTP client configuration.
+    
+    Applies to the long-lived aiohttp sessions shared by the Pinata, IPFS
+    and Stellar services (one session per upstream).
+    """
+    
+    def __init__(self):
+        self.pool_limit = int(os.getenv('HTTP_POOL_LIMIT', '100'))
+        self.pool_limit_per_host = int(os.getenv('HTTP_POOL_LIMIT_PER_HOST', '20'))
+        self.dns_cache_ttl = int(os.getenv('HTTP_DNS_CACHE_TTL', '300'))
+        self.keepalive_timeout = float(os.getenv('HTTP_KEEPALIVE_TIMEOUT', '30'))
+        self.total_timeout = float(os.getenv('HTTP_TOTAL_TIMEOUT', '30'))
+        self.connect_timeout = float(os.getenv('HTTP_CONNECT_TIMEOUT', '10'))
+    
+    def __repr__(self):
+        """Return string representation"""
+        return (
+            f"<HTTPClientConfig limit={self.pool_limit} "
+            f"per_host={self.pool_limit_per_host} timeout={self.total_timeout}s>"
+        )
+
+
+class IngestConfig:
+    """
+    Observation ingest configuration.
+    
+    In 'sync' mode /observe waits for IPFS, Stellar and the database.
+    In 'async' mode the observation is recorded first, the device gets
+    202 Accepted immediately, and a background worker pool finishes the
+    IPFS pin and payment.
+    """
+    
+    def __init__(self):
+        self.mode = os.getenv('OBSERVATION_INGEST_MODE', 'sync').lower()
+        self.workers = int(os.getenv('INGEST_WORKERS', '4'))
+        self.queue_size = int(os.getenv('INGEST_QUEUE_SIZE', '10000'))
+        self.max_retries = int(os.getenv('INGEST_MAX_RETRIES', '5'))
+        self.retry_base_delay = float(os.getenv('INGEST_RETRY_BASE_DELAY', '2.0'))
+        self.status_retention = int(os.getenv('INGEST_STATUS_RETENTION', '10000'))
+        # Accepted observations stay reserved for their process this long
+        # (renewed when a worker picks them up); recovery only claims
+        # observations whose lease has expired
+        self.lease_seconds = float(os.getenv('INGEST_LEASE_SECONDS', '600'))
+        self.recovery_interval = float(os.getenv('INGEST_RECOVERY_INTERVAL', '60'))
+    
+    @property
+    def is_async(self) -> bool:
+        """Check if async ingest is the default mode"""
+        return self.mode == 'async'
+    
+    def __repr__(self):
+        """Return string representation"""
+        return f"<IngestConfig mode={self.mode} workers={self.workers}>"
+
+
+class OutboxConfig:
+    """
+    Durable outbox configuration.
+    
+    Failed IPFS pins and UBECrc payouts are recorded in
+    phenomenological.observation_outbox (observation_outbox_migration.sql)
+    and retried in the background with exponential backoff. Completed
+    tasks are deleted after the retention period.
+    """
+    
+    def __init__(self):
+        self.enabled = os.getenv('OUTBOX_ENABLED', 'true').lower() in ('true', '1', 'yes')
+        self.batch_size = int(os.getenv('OUTBOX_BATCH_SIZE', '100'))
+        self.concurrency = int(os.getenv('OUTBOX_CONCURRENCY', '10'))
+        self.poll_interval = float(os.getenv('OUTBOX_POLL_INTERVAL', '5'))
+        self.max_attempts = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '10'))
+        self.base_delay = float(os.getenv('OUTBOX_BASE_DELAY', '30'))
+        self.max_delay = float(os.getenv('OUTBOX_MAX_DELAY', '3600'))
+        self.completed_retention_hours = float(os.getenv('OUTBOX_COMPLETED_RETENTION_HOURS', '168'))
+        self.prune_interval = float(os.getenv('OUTBOX_PRUNE_INTERVAL', '3600'))
+    
+    def __repr__(self):
+        """Return string representation"""
+        return f"<OutboxConfig enabled={self.enabled} batch={self.batch_size}>"
+
+
+class VerificationCacheConfig:
+    """
+    Verification result cache configuration.
+    
+    Successful verifications are cached in memory and in
+    phenomenological.verification_cache (verification_cache_migration.sql)
+    until re-verified by policy.
+    """
+    
+    def __init__(self):
+        self.enabled = os.getenv('VERIFICATION_CACHE_ENABLED', 'true').lower() in ('true', '1', 'yes')
+        self.memory_size = int(os.getenv('VERIFICATION_CACHE_MEMORY_SIZE', '10000'))
+        self.reverify_after_days = float(os.getenv('VERIFICATION_REVERIFY_AFTER_DAYS', '30'))
+        self.purge_interval = float(os.getenv('VERIFICATION_CACHE_PURGE_INTERVAL', '3600'))
+    
+    def __repr__(self):
+        """Return string representation"""
+        return (
+            f"<VerificationCacheConfig enabled={self.enabled} "
+            f"reverify_after_days={self.reverify_after_days}>"
+        )
+
+
+class PartitionConfig:
+    """
+    Observation partition maintenance configuration.
+    
+    Applies once observations_partitioning_migration.sql has partitioned
+    phenomenological.observations by month. Retention detaches old
+    months (they stay in the database as plain tables); 0 keeps all.
+    """
+    
+    def __init__(self):
+        self.enabled = os.getenv('OBSERVATION_PARTITIONS_ENABLED', 'true').lower() in ('true', '1', 'yes')
+        self.months_ahead = int(os.getenv('OBSERVATION_PARTITIONS_AHEAD', '3'))
+        self.retention_months = int(os.getenv('OBSERVATION_RETENTION_MONTHS', '0'))
+        self.interval_seconds = float(os.getenv('OBSERVATION_PARTITION_INTERVAL', '21600'))
+    
+    def __repr__(self):
+        """Return string representation"""
+        return (
+            f"<PartitionConfig enabled={self.enabled} ahead={self.months_ahead} "
+            f"retention={self.retention_months}>"
+        )
+
+
+class SystemStatsConfig:
+    """
+    System stats snapshot configuration.
+    
+    /api/v2/system/stats answers from an in-process snapshot that is
+    refreshed in the background every REFRESH_INTERVAL seconds, from the
+    counters of system_stats_migration.sql when present.
+    /api/v2/system/stats/stream pushes a changed snapshot to every
+    subscriber, so REFRESH_INTERVAL is also the shortest gap between pushes.
+    """
+    
+    def __init__(self):
+        self.refresh_interval = float(os.getenv('SYSTEM_STATS_REFRESH_INTERVAL', '5'))
+        self.max_subscribers = int(os.getenv('SYSTEM_STATS_MAX_SUBSCRIBERS', '1000'))
+        self.keepalive_interval = float(os.getenv('SYSTEM_STATS_KEEPALIVE', '15'))
+    
+    def __repr__(self):
+        """Return string representation"""
+        return (
+            f"<SystemStatsConfig refresh_interval={self.refresh_interval}s "
+            f"max_subscribers={self.max_subscribers}>"
+        )
+
+
+class DeviceCacheConfig:
+    """
+    Device lookup cache configuration.
+    
+    ObservationService keeps resolved devices (observer id and payment
+    address) in a bounded LRU cache. Registering a device through this
+    process invalidates its entry; the TTLs bound how long a registration
+    made by another process can go unnoticed.
+    """
+    
+    def __init__(self):
+        self.size = int(os.getenv('DEVICE_CACHE_SIZE', '10000'))
+        self.ttl = float(os.getenv('DEVICE_CACHE_TTL', '300'))
+        self.unpaid_ttl = float(os.getenv('DEVICE_CACHE_UNPAID_TTL', '30'))
+    
+    def __repr__(self):
+        """Return string representation"""
+        return f"<DeviceCacheConfig size={self.size} ttl={self.ttl}s>"
+
+
 class Config:
     """
     Configuration class for the UBEC system.
@@ -253,6 +443,8 @@ class Config:
         # API Configuration
         self.API_HOST: str = os.getenv('API_HOST', '0.0.0.0')
         self.API_PORT: int = int(os.getenv('API_PORT', '8000'))
+        # Seconds to wait for open connections (e.g. SSE streams) on shutdown
+        self.API_GRACEFUL_SHUTDOWN_TIMEOUT: int = int(os.getenv('API_GRACEFUL_SHUTDOWN_TIMEOUT', '10'))
         
         # CORS Configuration
         cors_str = os.getenv('CORS_ORIGINS', '*')
@@ -270,6 +462,27 @@ class Config:
         # Stellar Onboarding Configuration (nested object)
         self.stellar_onboarding = StellarOnboardingConfig()
         
+        # Observation Ingest Configuration (nested object)
+        self.ingest = IngestConfig()
+        
+        # Durable Outbox Configuration (nested object)
+        self.outbox = OutboxConfig()
+        
+        # Verification Cache Configuration (nested object)
+        self.verification_cache = VerificationCacheConfig()
+        
+        # Device Lookup Cache Configuration (nested object)
+        self.device_cache = DeviceCacheConfig()
+        
+        # Observation Partition Maintenance Configuration (nested object)
+        self.partitions = PartitionConfig()
+        
+        # System Stats Snapshot Configuration (nested object)
+        self.system_stats = SystemStatsConfig()
+        
+        # Outbound HTTP Client Configuration (nested object)
+        self.http = HTTPClientConfig()
+        
         # ============================================================
         # Legacy flat attributes for backward compatibility
         # ============================================================
@@ -430,6 +643,9 @@ if __name__ == "__main__":
     print(f"  - Configured: {config.stellar.is_configured}")
     print(f"  - Network: {config.stellar.network}")
     print(f"  - Horizon: {config.stellar.horizon_url}")
+    print(f"  - Channel accounts: {len(config.stellar.channel_secrets)}")
+    print(f"  - Payment batching: {config.stellar.payment_batch_enabled} "
+          f"({config.stellar.payment_batch_size} ops, {config.stellar.payment_batch_window}s window)")
     
     print(f"\nStellar Onboarding:")
     print(f"  - Enabled: {config.stellar_onboarding.enabled}")
@@ -437,6 +653,20 @@ if __name__ == "__main__":
     print(f"  - Funding per wallet: {config.stellar_onboarding.total_funding_amount} XLM")
     print(f"  - Rate limit: {config.stellar_onboarding.rate_limit_per_hour} wallets/hour")
     
+    print(f"\nOutbound HTTP:")
+    print(f"  - Pool limit: {config.http.pool_limit} ({config.http.pool_limit_per_host} per host)")
+    print(f"  - Timeouts: {config.http.total_timeout}s total, {config.http.connect_timeout}s connect")
+    
+    print(f"\nOutbox:")
+    print(f"  - Enabled: {config.outbox.enabled}")
+    print(f"  - Max attempts: {config.outbox.max_attempts} (backoff {config.outbox.base_delay}s - {config.outbox.max_delay}s)")
+    print(f"  - Completed tasks kept: {config.outbox.completed_retention_hours}h")
+    
+    print(f"\nObservation Ingest:")
+    print(f"  - Mode: {config.ingest.mode}")
+    print(f"  - Workers: {config.ingest.workers}")
+    print(f"  - Max retries: {config.ingest.max_retries}")
+    
     print("\nExample: Get qualified table names")
     print(f"  - Devices: {config.database.get_qualified_table('devices')}")
     print(f"  - Observers: {config.database.get_qualified_table('observers')}")
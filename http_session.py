@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+HTTP Session Factory - Pooled aiohttp sessions for outbound services
+One long-lived ClientSession per upstream (Pinata, IPFS node, Horizon)
+
+Creating a ClientSession per call means a new TCP and TLS handshake for
+every request. A shared session keeps connections alive, caps connections
+per host and caches DNS lookups.
+
+Every session carries a TraceConfig that records request latency and
+status class per upstream into the metrics registry (see metrics.py).
+
+Design Principles Applied:
+- Principle #5: Strict async operations
+- Principle #12: Method singularity - one place configures HTTP clients
+
+Attribution: This project uses the services of Claude and Anthropic PBC.
+"""
+
+import logging
+import time
+from typing import Any, Dict, Optional
+
+import aiohttp
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Defaults used when a service creates its own session (no config passed)
+DEFAULT_LIMIT = 100
+DEFAULT_LIMIT_PER_HOST = 20
+DEFAULT_DNS_CACHE_TTL = 300
+DEFAULT_KEEPALIVE_TIMEOUT = 30.0
+DEFAULT_TOTAL_TIMEOUT = 30.0
+DEFAULT_CONNECT_TIMEOUT = 10.0
+
+UPSTREAM_SECONDS = metrics.histogram(
+    "ubec_upstream_request_seconds",
+    "Outbound HTTP request latency until response headers (or error)",
+    ["upstream"]
+)
+UPSTREAM_REQUESTS = metrics.counter(
+    "ubec_upstream_requests_total",
+    "Outbound HTTP requests by status class (error = no response)",
+    ["upstream", "status"]
+)
+_STATUS_CLASSES = ("1xx", "2xx", "3xx", "4xx", "5xx", "error")
+
+
+def _upstream_trace_config(upstream: str) -> aiohttp.TraceConfig:
+    """TraceConfig recording latency and status for one upstream"""
+    seconds = UPSTREAM_SECONDS.labels(upstream=upstream)
+    requests = {
+        status: UPSTREAM_REQUESTS.labels(upstream=upstream, status=status)
+        for status in _STATUS_CLASSES
+    }
+    failed = requests["error"]
+
+    async def on_request_start(session, context, params):
+        context.started = time.perf_counter()
+
+    async def on_request_end(session, context, params):
+        seconds.observe(time.perf_counter() - context.started)
+        requests.get(f"{params.response.status // 100}xx", failed).inc()
+
+    async def on_request_exception(session, context, params):
+        seconds.observe(time.perf_counter() - context.started)
+        failed.inc()
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_exception.append(on_request_exception)
+    return trace_config
+
+
+def create_client_session(
+    http_config: Optional[Any] = None,
+    headers: Optional[Dict[str, str]] = None,
+    upstream: str = "http"
+) -> aiohttp.ClientSession:
+    """
+    Create a pooled ClientSession
+
+    Must be called from a running event loop (e.g. the FastAPI lifespan or
+    the first request of a service).
+
+    Args:
+        http_config: HTTPClientConfig from config.py (defaults if None)
+        headers: Default headers sent with every request
+        upstream: Metrics label for this session (pinata, ipfs, horizon)
+
+    Returns:
+        aiohttp.ClientSession with keep-alive, per-host limits and DNS cache
+    """
+    limit = getattr(http_config, 'pool_limit', DEFAULT_LIMIT)
+    limit_per_host = getattr(http_config, 'pool_limit_per_host', DEFAULT_LIMIT_PER_HOST)
+    dns_cache_ttl = getattr(http_config, 'dns_cache_ttl', DEFAULT_DNS_CACHE_TTL)
+    keepalive_timeout = getattr(http_config, 'keepalive_timeout', DEFAULT_KEEPALIVE_TIMEOUT)
+    total_timeout = getattr(http_config, 'total_timeout', DEFAULT_TOTAL_TIMEOUT)
+    connect_timeout = getattr(http_config, 'connect_timeout', DEFAULT_CONNECT_TIMEOUT)
+
+    connector = aiohttp.TCPConnector(
+        limit=limit,
+        limit_per_host=limit_per_host,
+        ttl_dns_cache=dns_cache_ttl,
+        keepalive_timeout=keepalive_timeout
+    )
+    timeout = aiohttp.ClientTimeout(total=total_timeout, connect=connect_timeout)
+
+    logger.debug(
+        f"HTTP session created (limit={limit}, per_host={limit_per_host}, "
+        f"dns_ttl={dns_cache_ttl}s, timeout={total_timeout}s)"
+    )
+
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=timeout,
+        headers=headers,
+        trace_configs=[_upstream_trace_config(upstream)]
+    )
+
+
+"""
+Attribution: This project uses the services of Claude and Anthropic PBC
+to inform our decisions and recommendations.
+"""
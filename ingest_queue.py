@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+"""
+Ingest Queue - Asynchronous Observation Processing
+Decouples device-facing /observe requests from IPFS and Stellar latency
+
+The observation is first recorded in the database with ingest_status
+'pending', so it survives a restart. The device receives the observation_id
+immediately, and a bounded pool of background workers completes the IPFS
+pin and UBECrc payment, retrying with exponential backoff.
+
+Each accepted observation carries an ingest lease (ingest_lease_until in
+its payload), renewed when a worker picks it up. Recovery runs at startup
+and then every recovery_interval seconds, and only claims pending rows
+whose lease has expired, so several app processes sharing one database
+never pick up each other's live observations while an observation left
+by a stopped (or stalled) process is still finished. A job that waited
+past its lease may be claimed elsewhere; its lease check then drops it.
+
+Design Principles Applied:
+- Principle #2: Service pattern - no standalone execution
+- Principle #5: Strict async operations
+- Principle #10: Clear separation of concerns
+
+Attribution: This project uses the services of Claude and Anthropic PBC.
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Optional, List
+
+from observation_service import ObservationResult
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class IngestJob:
+    """Background processing state of one accepted observation"""
+    observation_id: str
+    device_id: str
+    result: ObservationResult
+    observation_data: Dict[str, Any]
+    status: str = "queued"  # queued, processing, retrying, completed, deferred, failed
+    attempts: int = 0
+    last_error: Optional[str] = None
+    updated_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+
+    def to_dict(self) -> dict:
+        """Convert to dictionary for API responses"""
+        return {
+            "observation_id": self.observation_id,
+            "device_id": self.device_id,
+            "status": self.status,
+            "attempts": self.attempts,
+            "last_error": self.last_error,
+            "updated_at": self.updated_at,
+            "ipfs_cid": self.result.ipfs_cid,
+            "content_cid": self.observation_data.get("content_cid"),
+            "stellar_tx_hash": self.result.stellar_tx_hash,
+            "stellar_op_index": self.result.stellar_op_index,
+            "tokens_distributed": str(self.result.tokens_distributed)
+        }
+
+
+class IngestQueue:
+    """
+    Background worker pool for observation processing
+
+    Flow:
+    1. submit() records the observation (ingest_status 'pending') and queues it
+    2. A worker runs the IPFS and payment stages via ObservationService
+    3. Failed stages are retried with exponential backoff up to max_retries,
+       then handed to the durable outbox (if configured)
+    4. The database row is updated with the final CID, tx hash and status;
+       if that write fails it is retried without repeating finished stages
+    """
+
+    def __init__(
+        self,
+        observation_service: Any,
+        workers: int = 4,
+        queue_size: int = 10000,
+        max_retries: int = 5,
+        retry_base_delay: float = 2.0,
+        status_retention: int = 10000,
+        lease_seconds: float = 600.0,
+        recovery_interval: float = 60.0
+    ):
+        """
+        Initialize ingest queue
+
+        Args:
+            observation_service: ObservationService instance
+            workers: Number of concurrent background workers
+            queue_size: Maximum number of queued jobs before backpressure
+            max_retries: Attempts before a job is marked failed
+            retry_base_delay: Base delay in seconds for exponential backoff
+            status_retention: Number of recent jobs kept for status polling
+            lease_seconds: How long an accepted observation stays reserved
+                for this process (renewed when a worker picks it up)
+            recovery_interval: Seconds between scans for pending
+                observations whose lease has expired
+        """
+        self.observation_service = observation_service
+        self.worker_count = max(1, workers)
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.status_retention = status_retention
+        self.lease_seconds = lease_seconds
+        self.recovery_interval = recovery_interval
+
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._jobs: "OrderedDict[str, IngestJob]" = OrderedDict()
+        self._workers: List[asyncio.Task] = []
+        self._retry_tasks: set = set()
+        self._recovery_task: Optional[asyncio.Task] = None
+        self._running = False
+
+        logger.info(f"Ingest queue initialized ({self.worker_count} workers, max {queue_size} queued)")
+
+    async def start(self) -> None:
+        """Start the worker pool and re-queue observations left pending"""
+        if self._running:
+            return
+
+        self._running = True
+        for index in range(self.worker_count):
+            self._workers.append(asyncio.create_task(self._worker(index)))
+
+        recovered = await self._recover_pending()
+        if recovered:
+            logger.info(f"Re-queued {recovered} pending observations from database")
+        self._recovery_task = asyncio.create_task(self._recovery_loop())
+
+    @property
+    def is_accepting(self) -> bool:
+        """Check if new observations can be queued without blocking"""
+        return self._running and not self._queue.full()
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of jobs waiting for a worker"""
+        return self._queue.qsize()
+
+    async def submit(
+        self,
+        device_id: str,
+        readings: Dict[str, float],
+        location: Dict[str, float],
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Optional[IngestJob]:
+        """
+        Durably record an observation and queue it for background processing
+
+        Args:
+            device_id: Sensor or observer identifier
+            readings: Environmental measurements
+            location: Geographic coordinates
+            metadata: Additional observation metadata
+
+        Returns:
+            IngestJob, or None if the observation could not be recorded
+            or the queue is full (caller should fall back to sync processing)
+        """
+        if not self.is_accepting:
+            logger.warning("Ingest queue not accepting - falling back to synchronous processing")
+            return None
+
+        result, observation_data = self.observation_service._prepare_observation(
+            device_id, readings, location, metadata
+        )
+        observation_data["ingest_status"] = "pending"
+        observation_data["ingest_lease_until"] = (
+            datetime.now(timezone.utc) + timedelta(seconds=self.lease_seconds)
+        ).isoformat()
+
+        if not await self.observation_service.record_observation(observation_data):
+            logger.warning(f"Could not durably record observation from {device_id}")
+            return None
+
+        job = IngestJob(
+            observation_id=result.observation_id,
+            device_id=device_id,
+            result=result,
+            observation_data=observation_data
+        )
+        self._track(job)
+        self._enqueue(job)
+
+        return job
+
+    def _enqueue(self, job: IngestJob) -> None:
+        """Queue a recorded job, waiting for room if the queue is full"""
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            # Filled up while the row was written or claimed - the observation
+            # is recorded, so queue it once there is room instead of dropping it
+            logger.warning(f"Ingest queue full - {job.observation_id} waits for room")
+            task = asyncio.create_task(self._queue.put(job))
+            self._retry_tasks.add(task)
+            task.add_done_callback(self._retry_tasks.discard)
+
+    def get_status(self, observation_id: str) -> Optional[dict]:
+        """
+        Get in-memory processing status of a recent job
+
+        Args:
+            observation_id: Observation UUID
+
+        Returns:
+            Status dictionary or None if not tracked
+        """
+        job = self._jobs.get(observation_id)
+        return job.to_dict() if job else None
+
+    def stats(self) -> dict:
+        """Summary of queue state for health and status endpoints"""
+        counts: Dict[str, int] = {}
+        for job in self._jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+
+        return {
+            "running": self._running,
+            "workers": self.worker_count,
+            "queue_depth": self._queue.qsize(),
+            "retrying": len(self._retry_tasks),
+            "tracked_jobs": counts
+        }
+
+    def collect_metrics(self, registry) -> None:
+        """Report queue depth and job states (called per /metrics scrape)"""
+        registry.gauge(
+            "ubec_ingest_queue_depth",
+            "Accepted observations waiting for a worker"
+        ).set(self._queue.qsize())
+        registry.gauge(
+            "ubec_ingest_retrying",
+            "Observations waiting for a retry"
+        ).set(len(self._retry_tasks))
+
+        jobs = registry.gauge(
+            "ubec_ingest_jobs",
+            "Tracked ingest jobs by status",
+            ["status"]
+        )
+        jobs.clear()
+        for status, count in self.stats()["tracked_jobs"].items():
+            jobs.set(count, status=status)
+
+    async def _worker(self, index: int) -> None:
+        """Process jobs from the queue until cancelled"""
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._process(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ingest worker {index} failed on {job.observation_id}: {e}", exc_info=True)
+                job.last_error = str(e)
+                self._schedule_retry(job)
+            finally:
+                self._queue.task_done()
+
+    async def _process(self, job: IngestJob) -> None:
+        """Run the outstanding stages of a job and persist the outcome"""
+        held = await self._hold_lease(job)
+        if held is None:
+            # Ownership unknown (database unreachable) - try again later
+            job.attempts += 1
+            job.last_error = "lease_renewal_failed"
+            self._schedule_retry(job)
+            return
+        if not held:
+            logger.warning(f"{job.observation_id} was claimed by another process - dropping it")
+            self._set_status(job, "released")
+            return
+
+        job.attempts += 1
+        self._set_status(job, "processing")
+
+        # Stages with a result (CID, tx hash) are skipped, so a retry after
+        # a failed write below stores and pays nothing twice
+        complete = await self.observation_service.complete_observation(
+            job.result, job.observation_data
+        )
+
+        if complete:
+            job.observation_data["ingest_status"] = "completed"
+            if await self.observation_service.update_observation_record(job.observation_data):
+                self._set_status(job, "completed")
+                logger.info(f"Async ingest complete for {job.observation_id} (attempt {job.attempts})")
+                return
+            job.last_error = "record_failed"
+        else:
+            job.last_error = "upstream stage failed"
+        self._schedule_retry(job)
+
+    async def _hold_lease(self, job: IngestJob) -> Optional[bool]:
+        """
+        Renew the job's lease once less than half of it is left
+
+        Returns:
+            True if the lease is held, False if another process claimed
+            the observation, None if the database could not be asked
+        """
+        lease_until = job.observation_data.get("ingest_lease_until")
+        if lease_until:
+            remaining = (
+                datetime.fromisoformat(lease_until) - datetime.now(timezone.utc)
+            ).total_seconds()
+            if remaining > self.lease_seconds / 2:
+                return True
+
+        return await self.observation_service.renew_ingest_lease(
+            job.observation_data, self.lease_seconds
+        )
+
+    def _schedule_retry(self, job: IngestJob) -> None:
+        """Retry a job with exponential backoff, or hand it to the outbox"""
+        if job.attempts >= self.max_retries:
+            outbox = getattr(self.observation_service, "outbox", None)
+            status = "deferred" if outbox else "failed"
+            job.observation_data["ingest_status"] = status
+            self._set_status(job, status)
+            logger.error(f"Async ingest gave up on {job.observation_id} after {job.attempts} attempts")
+            task = asyncio.create_task(self._finish_exhausted(job, outbox))
+        else:
+            delay = self.retry_base_delay * (2 ** (job.attempts - 1))
+            job.observation_data["ingest_status"] = "retrying"
+            self._set_status(job, "retrying")
+            logger.info(f"Retrying {job.observation_id} in {delay:.1f}s (attempt {job.attempts})")
+            task = asyncio.create_task(self._requeue_later(job, delay))
+
+        self._retry_tasks.add(task)
+        task.add_done_callback(self._retry_tasks.discard)
+
+    async def _finish_exhausted(self, job: IngestJob, outbox: Optional[Any]) -> None:
+        """
+        Persist an exhausted job and defer its missing stages to the outbox
+        
+        If the job itself cannot be written, finished stages are deferred
+        too; the outbox then only records their results.
+        """
+        recorded = await self.observation_service.update_observation_record(job.observation_data)
+        
+        if not outbox:
+            return
+        
+        service = self.observation_service
+        deferred = []
+        if service.ipfs_available and not (recorded and job.result.ipfs_cid):
+            deferred.append((job.observation_data, "ipfs_pin", job.last_error))
+        if service.stellar_available and not (recorded and job.result.stellar_tx_hash):
+            deferred.append((job.observation_data, "stellar_payment", job.last_error))
+        
+        if deferred:
+            await outbox.enqueue_many(deferred)
+    
+    async def _requeue_later(self, job: IngestJob, delay: float) -> None:
+        """Put a job back on the queue after a delay"""
+        await asyncio.sleep(delay)
+        await self._queue.put(job)
+
+    async def _recovery_loop(self) -> None:
+        """Claim expired pending observations every recovery_interval seconds"""
+        while self._running:
+            await asyncio.sleep(self.recovery_interval)
+            try:
+                recovered = await self._recover_pending()
+                if recovered:
+                    logger.info(f"Recovered {recovered} pending observations with expired leases")
+            except Exception as e:
+                logger.error(f"Ingest recovery failed: {e}")
+
+    async def _recover_pending(self) -> int:
+        """Claim and queue observations whose ingest lease has expired"""
+        limit = (self._queue.maxsize - self._queue.qsize()) if self._queue.maxsize else 1000
+        if limit <= 0:
+            return 0
+
+        pending = await self.observation_service.claim_pending_observations(
+            limit=limit,
+            lease_seconds=self.lease_seconds
+        )
+
+        for observation_data in pending:
+            result = ObservationResult.from_observation_data(observation_data)
+            job = IngestJob(
+                observation_id=result.observation_id,
+                device_id=observation_data["device_id"],
+                result=result,
+                observation_data=observation_data
+            )
+            self._track(job)
+            self._enqueue(job)
+
+        return len(pending)
+
+    def _track(self, job: IngestJob) -> None:
+        """Remember a job for status polling, evicting the oldest entries"""
+        self._jobs[job.observation_id] = job
+        self._jobs.move_to_end(job.observation_id)
+        while len(self._jobs) > self.status_retention:
+            self._jobs.popitem(last=False)
+
+    def _set_status(self, job: IngestJob, status: str) -> None:
+        """Update job status and timestamp"""
+        job.status = status
+        job.updated_at = datetime.now(timezone.utc).isoformat()
+
+    async def close(self) -> None:
+        """Stop workers; unfinished jobs stay pending in the database"""
+        self._running = False
+
+        tasks = self._workers + list(self._retry_tasks)
+        if self._recovery_task:
+            tasks.append(self._recovery_task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        self._workers.clear()
+        self._retry_tasks.clear()
+        self._recovery_task = None
+        logger.info("Ingest queue closed")
+
+
+"""
+Attribution: This project uses the services of Claude and Anthropic PBC
+to inform our decisions and recommendations.
+"""
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+IPFS CID Utilities - Local CIDv1 computation for JSON content
+Lets the system know an observation's CID before (or without) uploading it
+
+Observations are serialized to canonical JSON (sorted keys, compact
+separators, UTF-8) and uploaded as exactly those bytes. A single-block
+file added with CIDv1 gets a raw-codec CID:
+
+    "b" + base32( varint(1) | varint(0x55 raw) | 0x12 sha2-256 | 0x20 | digest )
+
+so the CID can be computed locally and recomputed from retrieved content.
+Content larger than one block (256 KiB) is chunked by IPFS into a DAG and
+has no locally computable CID; the functions return None in that case.
+
+Design Principles Applied:
+- Principle #10: Clear separation of concerns
+- Principle #12: Method singularity - one canonical serialization
+
+Attribution: This project uses the services of Claude and Anthropic PBC.
+"""
+
+import base64
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+CID_VERSION = 1
+RAW_CODEC = 0x55
+SHA2_256 = 0x12
+SHA2_256_LENGTH = 0x20
+MAX_RAW_BLOCK_SIZE = 256 * 1024  # IPFS default chunk size
+
+# Every CIDv1 / raw / sha2-256 CID in base32 starts with this prefix
+RAW_SHA256_CID_PREFIX = "bafkrei"
+
+
+def canonical_json_bytes(data: Any) -> bytes:
+    """
+    Serialize JSON data deterministically
+
+    Args:
+        data: JSON-serializable object
+
+    Returns:
+        UTF-8 bytes with sorted keys and no insignificant whitespace
+    """
+    return json.dumps(
+        data,
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False
+    ).encode("utf-8")
+
+
+def compute_cid(content: bytes) -> Optional[str]:
+    """
+    Compute the CIDv1 (raw codec, sha2-256, base32) of a single-block file
+
+    Args:
+        content: Exact bytes that are (or will be) uploaded
+
+    Returns:
+        CID string, or None if the content exceeds one block
+    """
+    if len(content) > MAX_RAW_BLOCK_SIZE:
+        return None
+
+    digest = hashlib.sha256(content).digest()
+    cid_bytes = bytes([CID_VERSION, RAW_CODEC, SHA2_256, SHA2_256_LENGTH]) + digest
+    return "b" + base64.b32encode(cid_bytes).decode("ascii").lower().rstrip("=")
+
+
+def compute_json_cid(data: Any) -> Optional[str]:
+    """
+    Compute the CID of JSON data in its canonical serialization
+
+    Args:
+        data: JSON-serializable object
+
+    Returns:
+        CID string, or None if the content exceeds one block
+    """
+    return compute_cid(canonical_json_bytes(data))
+
+
+def verify_json_cid(cid: str, data: Any) -> Optional[bool]:
+    """
+    Recompute a CID from JSON content and compare
+
+    Args:
+        cid: Stored CID
+        data: Retrieved or locally held content
+
+    Returns:
+        True/False for raw-codec sha2-256 CIDs, None if the CID was not
+        produced from canonical single-block content (e.g. legacy CIDv0)
+    """
+    if not cid.startswith(RAW_SHA256_CID_PREFIX):
+        return None
+
+    expected = compute_json_cid(data)
+    if expected is None:
+        return None
+
+    return expected == cid
+
+
+def split_observation_ref(ref: str) -> Tuple[str, Optional[int]]:
+    """
+    Split an observation reference into CID and batch index
+
+    Batch-pinned observations are referenced as "<batch_cid>#<index>";
+    individually pinned observations are a plain CID.
+
+    Args:
+        ref: Stored IPFS reference
+
+    Returns:
+        (cid, index) - index is None for plain CIDs
+    """
+    cid, _, fragment = ref.partition("#")
+    return cid, int(fragment) if fragment.isdigit() else None
+
+
+class RecentCIDs:
+    """Bounded set of CIDs known to be pinned (skips duplicate uploads)"""
+
+    def __init__(self, capacity: int = 10000):
+        self.capacity = capacity
+        self._cids: "OrderedDict[str, None]" = OrderedDict()
+
+    def __contains__(self, cid: str) -> bool:
+        return cid in self._cids
+
+    def add(self, cid: str) -> None:
+        """Remember a pinned CID, evicting the oldest entries"""
+        self._cids[cid] = None
+        self._cids.move_to_end(cid)
+        while len(self._cids) > self.capacity:
+            self._cids.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._cids)
+
+
+"""
+Attribution: This project uses the services of Claude and Anthropic PBC
+to inform our decisions and recommendations.
+"""
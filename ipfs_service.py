@@ -15,10 +15,15 @@ import json
 import logging
 import aiohttp
 import asyncio
-from typing import Dict, Any, Optional, List
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime
 from dataclasses import dataclass, asdict
 
+from http_session import create_client_session
+from ipfs_cid import MAX_RAW_BLOCK_SIZE, RecentCIDs, canonical_json_bytes, compute_cid, split_observation_ref
+
 logger = logging.getLogger(__name__)
 
 
@@ -36,13 +41,69 @@ class ObservationData:
         return asdict(self)
 
 
+async def pin_canonical_json(
+    data: dict,
+    metadata: Optional[dict],
+    upload: Any,
+    pinned_cids: RecentCIDs
+) -> Optional[str]:
+    """
+    Upload JSON as canonical bytes, skipping content pinned recently
+    
+    Args:
+        data: Dictionary to store
+        metadata: Backend metadata passed through to upload
+        upload: Backend add_bytes coroutine function
+        pinned_cids: CIDs already pinned by this backend
+        
+    Returns:
+        CID if successful, None otherwise
+    """
+    content = canonical_json_bytes(data)
+    expected_cid = compute_cid(content)
+    
+    if expected_cid and expected_cid in pinned_cids:
+        logger.debug(f"Content already pinned: {expected_cid}")
+        return expected_cid
+    
+    cid = await upload(content, metadata)
+    
+    if cid:
+        if expected_cid and cid != expected_cid:
+            logger.warning(f"Backend CID {cid} differs from local CID {expected_cid}")
+        pinned_cids.add(cid)
+    
+    return cid
+
+
+def select_batch_item(document: Optional[dict], index: Optional[int]) -> Optional[dict]:
+    """Return one observation from a batch document (or the document itself)"""
+    if index is None or document is None:
+        return document
+    
+    observations = document.get("observations", [])
+    if 0 <= index < len(observations):
+        return observations[index]
+    
+    logger.error(f"Batch index {index} out of range ({len(observations)} observations)")
+    return None
+
+
 class PinataService:
     """
     Pinata IPFS service for permanent data storage
     Handles all IPFS operations through Pinata's API
     """
     
-    def __init__(self, api_key: str, secret_key: str, jwt: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: str,
+        secret_key: str,
+        jwt: Optional[str] = None,
+        session: Optional[aiohttp.ClientSession] = None,
+        api_url: str = "https://api.pinata.cloud",
+        gateway_url: str = "https://gateway.pinata.cloud"
+    ):
         """
         Initialize Pinata service
         
@@ -50,32 +111,70 @@ class PinataService:
             api_key: Pinata API key
             secret_key: Pinata secret key
             jwt: Optional JWT token for enhanced security
+            session: Shared pooled HTTP session (see http_session.py)
+            api_url: Pinata API base URL (PINATA_API_URL, e.g. a local stand-in)
+            gateway_url: Gateway used for reads (IPFS_GATEWAY)
         """
         self.api_key = api_key
         self.secret_key = secret_key
         self.jwt = jwt
-        self.base_url = "https://api.pinata.cloud"
-        self.gateway_url = "https://gateway.pinata.cloud"
+        self.base_url = api_url.rstrip("/")
+        self.gateway_url = gateway_url.rstrip("/")
         
         # Rate limiting
         self._rate_limit_semaphore = asyncio.Semaphore(10)
         
+        # Long-lived HTTP session (keep-alive, per-host limits, DNS cache)
+        self._session = session
+        
+        # CIDs pinned by this process (duplicate uploads are skipped)
+        self._pinned_cids = RecentCIDs()
+        
         logger.info("PinataService initialized")
     
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Shared HTTP session for Pinata (created lazily if none was injected)"""
+        if self._session is None or self._session.closed:
+            self._session = create_client_session(upstream="pinata")
+        return self._session
+    
     async def add_json(self, data: dict, metadata: Optional[dict] = None) -> Optional[str]:
         """
         Pin JSON data to IPFS via Pinata
         
+        The data is uploaded as canonical JSON bytes, so its CID is known
+        locally (see ipfs_cid.py) and content pinned recently is not
+        uploaded again.
+        
         Args:
             data: Dictionary to store on IPFS
             metadata: Optional Pinata metadata
             
+        Returns:
+            IPFS hash (CID) if successful, None otherwise
+        """
+        return await pin_canonical_json(data, metadata, self.add_bytes, self._pinned_cids)
+    
+    async def add_bytes(
+        self,
+        content: bytes,
+        metadata: Optional[dict] = None,
+        filename: str = "data.json"
+    ) -> Optional[str]:
+        """
+        Pin exact bytes to IPFS via Pinata (CIDv1)
+        
+        Args:
+            content: File content
+            metadata: Optional Pinata metadata
+            filename: File name shown in Pinata
+            
         Returns:
             IPFS hash (CID) if successful, None otherwise
         """
         try:
             async with self._rate_limit_semaphore:
-                url = f"{self.base_url}/pinning/pinJSONToIPFS"
+                url = f"{self.base_url}/pinning/pinFileToIPFS"
                 
                 headers = {
                     "pinata_api_key": self.api_key,
@@ -85,27 +184,26 @@ class PinataService:
                 if self.jwt:
                     headers = {"Authorization": f"Bearer {self.jwt}"}
                 
-                pin_data = {
-                    "pinataContent": data,
-                    "pinataOptions": {
-                        "cidVersion": 1
-                    }
-                }
+                form_data = aiohttp.FormData()
+                form_data.add_field('file', content,
+                                  filename=filename,
+                                  content_type='application/json')
+                form_data.add_field('pinataOptions', json.dumps({"cidVersion": 1}))
                 
                 if metadata:
-                    pin_data["pinataMetadata"] = metadata
+                    form_data.add_field('pinataMetadata', json.dumps(metadata))
                 
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(url, json=pin_data, headers=headers) as response:
-                        if response.status == 200:
-                            result = await response.json()
-                            cid = result.get("IpfsHash")
-                            logger.info(f"Successfully pinned to IPFS: {cid}")
-                            return cid
-                        else:
-                            error_text = await response.text()
-                            logger.error(f"Pinata error ({response.status}): {error_text}")
-                            return None
+                session = self._get_session()
+                async with session.post(url, data=form_data, headers=headers) as response:
+                    if response.status == 200:
+                        result = await response.json()
+                        cid = result.get("IpfsHash")
+                        logger.info(f"Successfully pinned to IPFS: {cid}")
+                        return cid
+                    else:
+                        error_text = await response.text()
+                        logger.error(f"Pinata error ({response.status}): {error_text}")
+                        return None
                             
         except Exception as e:
             logger.error(f"Failed to pin to IPFS: {e}")
@@ -116,23 +214,25 @@ class PinataService:
         Retrieve JSON data from IPFS via Pinata gateway
         
         Args:
-            cid: IPFS Content Identifier
+            cid: IPFS Content Identifier, or "<batch_cid>#<index>" for a
+                batch-pinned observation
             
         Returns:
             Retrieved data as dictionary, or None if failed
         """
         try:
+            cid, index = split_observation_ref(cid)
             url = f"{self.gateway_url}/ipfs/{cid}"
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        logger.debug(f"Retrieved data from IPFS: {cid}")
-                        return data
-                    else:
-                        logger.error(f"Failed to retrieve from IPFS: {response.status}")
-                        return None
+            session = self._get_session()
+            async with session.get(url) as response:
+                if response.status == 200:
+                    data = await response.json(content_type=None)
+                    logger.debug(f"Retrieved data from IPFS: {cid}")
+                    return select_batch_item(data, index)
+                else:
+                    logger.error(f"Failed to retrieve from IPFS: {response.status}")
+                    return None
                         
         except Exception as e:
             logger.error(f"Error retrieving from IPFS: {e}")
@@ -188,14 +288,14 @@ class PinataService:
                 "pageLimit": limit
             }
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers, params=params) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        return result.get("rows", [])
-                    else:
-                        logger.error(f"Failed to get pin list: {response.status}")
-                        return []
+            session = self._get_session()
+            async with session.get(url, headers=headers, params=params) as response:
+                if response.status == 200:
+                    result = await response.json()
+                    return result.get("rows", [])
+                else:
+                    logger.error(f"Failed to get pin list: {response.status}")
+                    return []
                         
         except Exception as e:
             logger.error(f"Error getting pin list: {e}")
@@ -222,14 +322,14 @@ class PinataService:
             if self.jwt:
                 headers = {"Authorization": f"Bearer {self.jwt}"}
             
-            async with aiohttp.ClientSession() as session:
-                async with session.delete(url, headers=headers) as response:
-                    if response.status == 200:
-                        logger.info(f"Successfully unpinned: {cid}")
-                        return True
-                    else:
-                        logger.error(f"Failed to unpin: {response.status}")
-                        return False
+            session = self._get_session()
+            async with session.delete(url, headers=headers) as response:
+                if response.status == 200:
+                    logger.info(f"Successfully unpinned: {cid}")
+                    return True
+                else:
+                    logger.error(f"Failed to unpin: {response.status}")
+                    return False
                         
         except Exception as e:
             logger.error(f"Error unpinning: {e}")
@@ -237,7 +337,7 @@ class PinataService:
     
     def get_ipfs_url(self, cid: str) -> str:
         """Get public gateway URL for a CID"""
-        return f"{self.gateway_url}/ipfs/{cid}"
+        return f"{self.gateway_url}/ipfs/{split_observation_ref(cid)[0]}"
     
     @property
     def is_available(self) -> bool:
@@ -269,7 +369,9 @@ class PinataService:
             }
     
     async def close(self):
-        """Cleanup (compatibility method)"""
+        """Close the HTTP session"""
+        if self._session and not self._session.closed:
+            await self._session.close()
         logger.info("PinataService closing")
 
 
@@ -281,48 +383,87 @@ class IPFSService:
     Implements the same interface as PinataService for interoperability.
     """
     
-    def __init__(self, api_url: str = "http://localhost:5001"):
+    def __init__(
+        self,
+        api_url: str = "http://localhost:5001",
+        session: Optional[aiohttp.ClientSession] = None
+    ):
         """
         Initialize IPFS service for local node
         
         Args:
             api_url: IPFS API endpoint URL
+            session: Shared pooled HTTP session (see http_session.py)
         """
         self.api_url = api_url
         self.gateway_url = "http://localhost:8080"
         
+        # Long-lived HTTP session (keep-alive, per-host limits, DNS cache)
+        self._session = session
+        
+        # CIDs pinned by this process (duplicate uploads are skipped)
+        self._pinned_cids = RecentCIDs()
+        
         logger.info(f"IPFSService initialized with {api_url}")
     
-    async def add_json(self, data: dict) -> Optional[str]:
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Shared HTTP session for the IPFS node (created lazily if none was injected)"""
+        if self._session is None or self._session.closed:
+            self._session = create_client_session(upstream="ipfs")
+        return self._session
+    
+    async def add_json(self, data: dict, metadata: Optional[dict] = None) -> Optional[str]:
         """
         Add JSON data to local IPFS node
         
+        The data is uploaded as canonical JSON bytes, so its CID is known
+        locally (see ipfs_cid.py) and content added recently is not
+        uploaded again.
+        
         Args:
             data: Dictionary to store
+            metadata: Ignored (Pinata-only), accepted for interface compatibility
             
         Returns:
             IPFS CID if successful
         """
-        try:
-            url = f"{self.api_url}/api/v0/add"
+        return await pin_canonical_json(data, metadata, self.add_bytes, self._pinned_cids)
+    
+    async def add_bytes(
+        self,
+        content: bytes,
+        metadata: Optional[dict] = None,
+        filename: str = "data.json"
+    ) -> Optional[str]:
+        """
+        Add exact bytes to local IPFS node (CIDv1, raw leaves)
+        
+        Args:
+            content: File content
+            metadata: Ignored (Pinata-only), accepted for interface compatibility
+            filename: File name for the multipart upload
             
-            json_str = json.dumps(data)
+        Returns:
+            IPFS CID if successful
+        """
+        try:
+            url = f"{self.api_url}/api/v0/add?cid-version=1&raw-leaves=true&pin=true"
             
             form_data = aiohttp.FormData()
-            form_data.add_field('file', json_str, 
-                              filename='data.json',
+            form_data.add_field('file', content, 
+                              filename=filename,
                               content_type='application/json')
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, data=form_data) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        cid = result.get("Hash")
-                        logger.info(f"Added to IPFS: {cid}")
-                        return cid
-                    else:
-                        logger.error(f"IPFS add failed: {response.status}")
-                        return None
+            session = self._get_session()
+            async with session.post(url, data=form_data) as response:
+                if response.status == 200:
+                    result = await response.json(content_type=None)
+                    cid = result.get("Hash")
+                    logger.info(f"Added to IPFS: {cid}")
+                    return cid
+                else:
+                    logger.error(f"IPFS add failed: {response.status}")
+                    return None
                         
         except Exception as e:
             logger.error(f"Failed to add to IPFS: {e}")
@@ -333,22 +474,24 @@ class IPFSService:
         Retrieve JSON from local IPFS node
         
         Args:
-            cid: IPFS Content Identifier
+            cid: IPFS Content Identifier, or "<batch_cid>#<index>" for a
+                batch-pinned observation
             
         Returns:
             Retrieved data as dictionary
         """
         try:
+            cid, index = split_observation_ref(cid)
             url = f"{self.api_url}/api/v0/cat?arg={cid}"
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url) as response:
-                    if response.status == 200:
-                        text = await response.text()
-                        return json.loads(text)
-                    else:
-                        logger.error(f"IPFS cat failed: {response.status}")
-                        return None
+            session = self._get_session()
+            async with session.post(url) as response:
+                if response.status == 200:
+                    text = await response.text()
+                    return select_batch_item(json.loads(text), index)
+                else:
+                    logger.error(f"IPFS cat failed: {response.status}")
+                    return None
                         
         except Exception as e:
             logger.error(f"Failed to retrieve from IPFS: {e}")
@@ -389,7 +532,7 @@ class IPFSService:
     
     def get_ipfs_url(self, cid: str) -> str:
         """Get local gateway URL for a CID"""
-        return f"{self.gateway_url}/ipfs/{cid}"
+        return f"{self.gateway_url}/ipfs/{split_observation_ref(cid)[0]}"
     
     @property
     def is_available(self) -> bool:
@@ -405,16 +548,16 @@ class IPFSService:
         """Check service health"""
         try:
             url = f"{self.api_url}/api/v0/version"
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, timeout=aiohttp.ClientTimeout(total=5)) as response:
-                    if response.status == 200:
-                        version = await response.json()
-                        return {
-                            "status": "healthy",
-                            "service": "ipfs_local",
-                            "available": True,
-                            "version": version.get("Version")
-                        }
+            session = self._get_session()
+            async with session.post(url, timeout=aiohttp.ClientTimeout(total=5)) as response:
+                if response.status == 200:
+                    version = await response.json()
+                    return {
+                        "status": "healthy",
+                        "service": "ipfs_local",
+                        "available": True,
+                        "version": version.get("Version")
+                    }
             return {
                 "status": "unhealthy",
                 "service": "ipfs_local",
@@ -429,10 +572,214 @@ class IPFSService:
             }
     
     async def close(self):
-        """Cleanup (compatibility method)"""
+        """Close the HTTP session"""
+        if self._session and not self._session.closed:
+            await self._session.close()
         logger.info("IPFSService closing")
 
 
+class ObservationPinBatcher:
+    """
+    Time-windowed batch pinning in front of PinataService or IPFSService
+    
+    Observations are collected for window_seconds or until max_items are
+    waiting, then pinned together as one JSON document:
+    
+        {"type": "observation_batch", "count": N, "observations": [...]}
+    
+    Each observation is referenced as "<batch_cid>#<index>". A batch
+    larger than one IPFS block (256 KiB) is split, so every batch CID can
+    be recomputed from its document during verification. get_json()
+    resolves such references (recently pinned batches are served from
+    memory); all other calls are passed through to the wrapped backend.
+    """
+    
+    batches_pins = True  # lets callers skip per-call concurrency limits
+    
+    def __init__(
+        self,
+        backend: Any,
+        window_seconds: float = 60.0,
+        max_items: int = 500,
+        document_cache_size: int = 32
+    ):
+        """
+        Initialize batch pinner
+        
+        Args:
+            backend: PinataService or IPFSService used for pinning and reads
+            window_seconds: Longest time an observation waits for its batch
+            max_items: Observations per batch document
+            document_cache_size: Recently pinned/read batch documents kept in memory
+        """
+        self.backend = backend
+        self.window_seconds = window_seconds
+        self.max_items = max(1, max_items)
+        self.document_cache_size = document_cache_size
+        
+        self._pending: List[Tuple[dict, asyncio.Future]] = []
+        self._batch_ready = asyncio.Event()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._inflight: set = set()
+        self._documents: "OrderedDict[str, dict]" = OrderedDict()
+        
+        self.batches_pinned = 0
+        self.observations_pinned = 0
+        
+        logger.info(f"IPFS batch pinning enabled ({self.max_items} items / {self.window_seconds}s window)")
+    
+    def __getattr__(self, name: str) -> Any:
+        """Delegate everything not batching-related to the backend"""
+        return getattr(self.backend, name)
+    
+    async def store_observation(self, observation: ObservationData) -> Optional[str]:
+        """
+        Queue an observation for the next batch and wait for its pin
+        
+        Args:
+            observation: ObservationData object
+            
+        Returns:
+            "<batch_cid>#<index>" reference, or None if the batch pin failed
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((observation.to_dict(), future))
+        
+        if len(self._pending) >= self.max_items:
+            self._batch_ready.set()
+        
+        if not self._flush_task or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+        
+        return await future
+    
+    async def get_json(self, cid: str) -> Optional[dict]:
+        """
+        Retrieve a single observation or any other JSON object
+        
+        Args:
+            cid: Plain CID or "<batch_cid>#<index>" reference
+            
+        Returns:
+            Retrieved data as dictionary, or None if failed
+        """
+        batch_cid, index = split_observation_ref(cid)
+        if index is None:
+            return await self.backend.get_json(cid)
+        
+        document = self._documents.get(batch_cid)
+        if document is None:
+            document = await self.backend.get_json(batch_cid)
+            if document is None:
+                return None
+            self._remember(batch_cid, document)
+        
+        return select_batch_item(document, index)
+    
+    @property
+    def pending_count(self) -> int:
+        """Observations waiting for a batch"""
+        return len(self._pending)
+    
+    async def _flush_loop(self) -> None:
+        """Pin batches until no observations are pending"""
+        while self._pending:
+            try:
+                await asyncio.wait_for(self._batch_ready.wait(), timeout=self.window_seconds)
+            except asyncio.TimeoutError:
+                pass
+            
+            self._batch_ready.clear()
+            batch = self._pending[:self.max_items]
+            del self._pending[:self.max_items]
+            if len(self._pending) >= self.max_items:
+                self._batch_ready.set()
+            
+            if batch:
+                task = asyncio.create_task(self._pin_batch(batch))
+                self._inflight.add(task)
+                task.add_done_callback(self._inflight.discard)
+    
+    async def _pin_batch(self, batch: List[Tuple[dict, asyncio.Future]]) -> None:
+        """Pin one batch document and resolve each observation's future"""
+        started = time.monotonic()
+        created_at = datetime.utcnow().isoformat() + "Z"
+        document = {
+            "type": "observation_batch",
+            "created_at": created_at,
+            "count": len(batch),
+            "observations": [observation for observation, _ in batch]
+        }
+        
+        if len(batch) > 1 and len(canonical_json_bytes(document)) > MAX_RAW_BLOCK_SIZE:
+            middle = len(batch) // 2
+            await asyncio.gather(self._pin_batch(batch[:middle]), self._pin_batch(batch[middle:]))
+            return
+        
+        metadata = {
+            "name": f"observation_batch_{created_at}",
+            "keyvalues": {
+                "type": "environmental_observation_batch",
+                "count": str(len(batch))
+            }
+        }
+        
+        try:
+            batch_cid = await self.backend.add_json(document, metadata)
+        except Exception as e:
+            logger.error(f"Batch pin failed: {e}")
+            batch_cid = None
+        
+        if batch_cid:
+            self._remember(batch_cid, document)
+            self.batches_pinned += 1
+            self.observations_pinned += len(batch)
+            logger.info(
+                f"Pinned batch of {len(batch)} observations: {batch_cid} "
+                f"({time.monotonic() - started:.2f}s)"
+            )
+        
+        for index, (_, future) in enumerate(batch):
+            if not future.done():
+                future.set_result(f"{batch_cid}#{index}" if batch_cid else None)
+    
+    def _remember(self, batch_cid: str, document: dict) -> None:
+        """Keep a batch document for fast single-observation reads"""
+        self._documents[batch_cid] = document
+        self._documents.move_to_end(batch_cid)
+        while len(self._documents) > self.document_cache_size:
+            self._documents.popitem(last=False)
+    
+    async def health_check(self) -> dict:
+        """Backend health plus batching state"""
+        health = await self.backend.health_check()
+        health["batching"] = {
+            "pending": len(self._pending),
+            "batches_pinned": self.batches_pinned,
+            "observations_pinned": self.observations_pinned,
+            "window_seconds": self.window_seconds,
+            "max_items": self.max_items
+        }
+        return health
+    
+    def collect_metrics(self, registry) -> None:
+        """Report batching backlog (called per /metrics scrape)"""
+        registry.gauge(
+            "ubec_ipfs_batch_pending",
+            "Observations waiting for a batch pin"
+        ).set(len(self._pending))
+    
+    async def close(self):
+        """Pin pending observations, then close the backend"""
+        if self._pending:
+            self._batch_ready.set()
+        if self._flush_task:
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        await self.backend.close()
+
+
 """
 Attribution: This project uses the services of Claude and Anthropic PBC
 to inform our decisions and recommendations.
@@ -0,0 +1,657 @@
+#!/usr/bin/env python3
+"""
+Local Horizon - In-process Horizon emulator for offline payment testing
+Development tool; not imported by main.py
+
+Serves the subset of the Horizon API used by stellar_integration.py and
+stellar_onboarding_service.py, backed by an in-memory ledger:
+
+- GET  /                               ledger summary (health checks)
+- GET  /accounts/{id}                  sequence, balances, data entries
+- GET  /accounts/{id}/transactions     paged, order/limit/cursor
+- POST /transactions                   XDR decode, signature and sequence
+                                       checks, payment / create account /
+                                       change trust / manage data ops
+- GET  /transactions/{hash}
+- GET  /transactions/{hash}/operations
+
+Like the real network, a transaction with a failing operation consumes
+its sequence number and fee (tx_failed) and changes nothing else, while
+tx_bad_seq and tx_bad_auth consume nothing.
+
+Latency and failures are injectable, so payment batching, sequence
+management and channel accounts can be exercised without the network:
+
+    horizon = LocalHorizon(submit_latency=0.5, failure_rate=0.05)
+    horizon.create_account(distributor.public_key, assets={("UBECrc", issuer): "1000000"})
+    url = await horizon.start(port=8001)      # or: python local_horizon.py --port 8001
+    ...
+    horizon.fail_next("timeout")              # next submit: applied, but 504
+    horizon.bump_sequence(channel.public_key) # next submit from it: tx_bad_seq
+    await horizon.close()
+
+Design Principles Applied:
+- Principle #5: Strict async operations
+- Principle #10: Clear separation of concerns
+
+Attribution: This project uses the services of Claude and Anthropic PBC.
+"""
+
+import argparse
+import asyncio
+import base64
+import logging
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiohttp import web
+from stellar_sdk import (
+    ChangeTrust, CreateAccount, Keypair, ManageData, Network, Payment, TransactionEnvelope
+)
+from stellar_sdk.exceptions import BadSignatureError
+
+logger = logging.getLogger(__name__)
+
+STROOP = Decimal("0.0000001")
+BASE_RESERVE = Decimal("0.5")
+
+# Injectable submit failures
+FAILURE_KINDS = (
+    "unavailable",  # 503, transaction not applied
+    "timeout",      # 504, transaction applied anyway (Horizon's worst case)
+    "rate_limited"  # 429, transaction not applied
+)
+
+AssetKey = Tuple[str, str]  # (code, issuer); ("XLM", "") for native
+
+
+@dataclass
+class EmulatedAccount:
+    """Ledger entry of one account"""
+    account_id: str
+    sequence: int
+    balances: Dict[AssetKey, Decimal] = field(default_factory=dict)
+    data: Dict[str, bytes] = field(default_factory=dict)
+
+    def to_horizon(self) -> Dict[str, Any]:
+        balances = [
+            {
+                "asset_type": "credit_alphanum4" if len(code) <= 4 else "credit_alphanum12",
+                "asset_code": code,
+                "asset_issuer": issuer,
+                "balance": _amount(balance)
+            }
+            for (code, issuer), balance in self.balances.items() if issuer
+        ]
+        balances.append({
+            "asset_type": "native",
+            "balance": _amount(self.balances.get(("XLM", ""), Decimal(0)))
+        })
+        return {
+            "id": self.account_id,
+            "account_id": self.account_id,
+            "sequence": str(self.sequence),
+            "subentry_count": len(balances) - 1 + len(self.data),
+            "balances": balances,
+            "data": {name: base64.b64encode(value).decode() for name, value in self.data.items()},
+            "thresholds": {"low_threshold": 0, "med_threshold": 0, "high_threshold": 0},
+            "flags": {"auth_required": False, "auth_revocable": False}
+        }
+
+
+class _OperationFailed(Exception):
+    """An operation result code other than op_success"""
+
+
+class LocalHorizon:
+    """
+    In-memory Horizon emulator
+
+    Request handling has no await between validating and applying a
+    transaction, so submits are atomic on the event loop; injected latency
+    happens before that point and reorders submits like a real network.
+    """
+
+    def __init__(
+        self,
+        network_passphrase: str = Network.TESTNET_NETWORK_PASSPHRASE,
+        latency: float = 0.0,
+        submit_latency: float = 0.0,
+        jitter: float = 0.0,
+        failure_rate: float = 0.0,
+        failure_kind: str = "unavailable",
+        seed: Optional[int] = None
+    ):
+        """
+        Initialize emulator
+
+        Args:
+            network_passphrase: Passphrase transactions are signed for
+            latency: Seconds added to every read
+            submit_latency: Seconds added to every submit (ledger close)
+            jitter: Up to this many seconds added at random to each request
+            failure_rate: Probability of an injected submit failure
+            failure_kind: Kind used for random failures (see FAILURE_KINDS)
+            seed: Random seed for reproducible jitter and failures
+        """
+        if failure_kind not in FAILURE_KINDS:
+            raise ValueError(f"failure_kind must be one of {FAILURE_KINDS}")
+
+        self.network_passphrase = network_passphrase
+        self.latency = latency
+        self.submit_latency = submit_latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.failure_kind = failure_kind
+
+        self.accounts: Dict[str, EmulatedAccount] = {}
+        self.transactions: Dict[str, Dict[str, Any]] = {}
+        self._history: List[Tuple[set, str]] = []  # (participants, hash) in ledger order
+        self._forced_failures: List[str] = []
+        self._random = random.Random(seed)
+        self._runner: Optional[web.AppRunner] = None
+
+        self.ledger = 1
+        self.counts = {"submitted": 0, "successful": 0, "failed": 0,
+                       "bad_seq": 0, "bad_auth": 0, "injected": 0}
+        self.in_flight = 0
+        self.peak_in_flight = 0  # Most submits open at once
+
+    # ------------------------------------------------------------
+    # Setup and control
+    # ------------------------------------------------------------
+
+    def create_account(
+        self,
+        account_id: str,
+        xlm: str = "10000",
+        sequence: Optional[int] = None,
+        assets: Optional[Dict[AssetKey, str]] = None
+    ) -> EmulatedAccount:
+        """
+        Add a funded account, optionally with trustlines and balances
+
+        Args:
+            account_id: G... address
+            xlm: Native balance
+            sequence: Starting sequence (default: ledger-based, like Stellar)
+            assets: {(code, issuer): balance}; "0" creates an empty trustline
+        """
+        account = EmulatedAccount(
+            account_id=account_id,
+            sequence=sequence if sequence is not None else self.ledger << 32
+        )
+        account.balances[("XLM", "")] = Decimal(xlm)
+        for key, balance in (assets or {}).items():
+            account.balances[key] = Decimal(balance)
+        self.accounts[account_id] = account
+        return account
+
+    def fail_next(self, kind: str = "unavailable", count: int = 1) -> None:
+        """Force the next `count` submits to fail with `kind`"""
+        if kind not in FAILURE_KINDS:
+            raise ValueError(f"kind must be one of {FAILURE_KINDS}")
+        self._forced_failures.extend([kind] * count)
+
+    def bump_sequence(self, account_id: str, by: int = 1) -> int:
+        """
+        Advance an account's sequence as if another client had used it
+
+        The next submit built from a locally cached sequence is then
+        rejected with tx_bad_seq.
+
+        Returns:
+            New sequence
+        """
+        account = self.accounts[account_id]
+        account.sequence += by
+        return account.sequence
+
+    def build_app(self) -> web.Application:
+        """aiohttp application (for in-process test clients)"""
+        app = web.Application()
+        app.router.add_get("/", self._root)
+        app.router.add_get("/accounts/{account_id}", self._get_account)
+        app.router.add_get("/accounts/{account_id}/transactions", self._account_transactions)
+        app.router.add_post("/transactions", self._submit)
+        app.router.add_get("/transactions/{tx_hash}", self._get_transaction)
+        app.router.add_get("/transactions/{tx_hash}/operations", self._transaction_operations)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8001) -> str:
+        """
+        Serve on localhost
+
+        Returns:
+            Base URL to use as STELLAR_HORIZON_URL
+        """
+        self._runner = web.AppRunner(self.build_app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        url = f"http://{host}:{port}"
+        logger.info(f"Local Horizon listening on {url}")
+        return url
+
+    async def close(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"ledger": self.ledger, "accounts": len(self.accounts),
+                "peak_in_flight": self.peak_in_flight, **self.counts}
+
+    # ------------------------------------------------------------
+    # Handlers
+    # ------------------------------------------------------------
+
+    async def _root(self, request: web.Request) -> web.Response:
+        await self._delay(self.latency)
+        return web.json_response({
+            "horizon_version": "local",
+            "network_passphrase": self.network_passphrase,
+            "history_latest_ledger": self.ledger,
+            "core_latest_ledger": self.ledger
+        })
+
+    async def _get_account(self, request: web.Request) -> web.Response:
+        await self._delay(self.latency)
+        account = self.accounts.get(request.match_info["account_id"])
+        if not account:
+            return _problem(404, "not_found", "Resource Missing")
+        return web.json_response(account.to_horizon())
+
+    async def _account_transactions(self, request: web.Request) -> web.Response:
+        await self._delay(self.latency)
+        account_id = request.match_info["account_id"]
+        if account_id not in self.accounts:
+            return _problem(404, "not_found", "Resource Missing")
+
+        order = request.query.get("order", "asc")
+        limit = min(max(int(request.query.get("limit", 10)), 1), 200)
+        cursor = request.query.get("cursor")
+
+        tokens = [
+            index for index, (participants, _) in enumerate(self._history)
+            if account_id in participants
+        ]
+        if order == "desc":
+            tokens.reverse()
+        if cursor:
+            cursor = int(cursor)
+            tokens = [t for t in tokens if (t < cursor if order == "desc" else t > cursor)]
+
+        records = [self.transactions[self._history[t][1]] for t in tokens[:limit]]
+        return web.json_response({
+            "_links": {"self": {"href": request.path_qs}},
+            "_embedded": {"records": records}
+        })
+
+    async def _get_transaction(self, request: web.Request) -> web.Response:
+        await self._delay(self.latency)
+        record = self.transactions.get(request.match_info["tx_hash"])
+        if not record:
+            return _problem(404, "not_found", "Resource Missing")
+        return web.json_response(record)
+
+    async def _transaction_operations(self, request: web.Request) -> web.Response:
+        await self._delay(self.latency)
+        record = self.transactions.get(request.match_info["tx_hash"])
+        if not record:
+            return _problem(404, "not_found", "Resource Missing")
+
+        tx = TransactionEnvelope.from_xdr(record["envelope_xdr"], self.network_passphrase).transaction
+        records = [
+            _operation_record(op, index, tx.source.account_id, record)
+            for index, op in enumerate(tx.operations)
+        ]
+        if request.query.get("order") == "desc":
+            records.reverse()
+        return web.json_response({
+            "_links": {"self": {"href": request.path_qs}},
+            "_embedded": {"records": records}
+        })
+
+    async def _submit(self, request: web.Request) -> web.Response:
+        form = await request.post()
+        tx_xdr = form.get("tx")
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await self._delay(self.submit_latency)
+        finally:
+            self.in_flight -= 1
+        self.counts["submitted"] += 1
+
+        try:
+            envelope = TransactionEnvelope.from_xdr(str(tx_xdr), self.network_passphrase)
+        except Exception as e:
+            return _problem(400, "transaction_malformed", "Transaction Malformed", detail=str(e))
+
+        failure = self._next_failure()
+        if failure == "unavailable":
+            return _problem(503, "stale_history", "Service Unavailable")
+        if failure == "rate_limited":
+            return _problem(429, "rate_limit_exceeded", "Rate Limit Exceeded")
+
+        status, body = self._apply(envelope, str(tx_xdr))
+        if failure == "timeout":
+            # Applied, but the client never learns the outcome
+            return _problem(504, "timeout", "Timeout")
+        return web.json_response(body, status=status)
+
+    # ------------------------------------------------------------
+    # Ledger
+    # ------------------------------------------------------------
+
+    def _apply(self, envelope: TransactionEnvelope, tx_xdr: str) -> Tuple[int, Dict[str, Any]]:
+        """Validate and apply one transaction (no awaits: atomic)"""
+        tx = envelope.transaction
+        source = self.accounts.get(tx.source.account_id)
+        if source is None:
+            return self._rejected("tx_no_source_account", tx_xdr)
+
+        if tx.sequence != source.sequence + 1:
+            self.counts["bad_seq"] += 1
+            return self._rejected("tx_bad_seq", tx_xdr)
+
+        signers = {tx.source.account_id}
+        signers.update(op.source.account_id for op in tx.operations if op.source)
+        if not self._signed_by(envelope, signers):
+            self.counts["bad_auth"] += 1
+            return self._rejected("tx_bad_auth", tx_xdr)
+
+        # Sequence and fee are consumed from here on, even if an operation fails
+        source.sequence = tx.sequence
+        source.balances[("XLM", "")] -= tx.fee * STROOP
+        self.ledger += 1
+
+        staged = {
+            account_id: dict(account.balances)
+            for account_id, account in self.accounts.items()
+        }
+        created: Dict[str, EmulatedAccount] = {}
+        data_changes: List[Tuple[EmulatedAccount, str, Optional[bytes]]] = []
+        codes = []
+        for op in tx.operations:
+            op_source = op.source.account_id if op.source else tx.source.account_id
+            try:
+                self._apply_operation(op, op_source, staged, created, data_changes)
+                codes.append("op_success")
+            except _OperationFailed as e:
+                codes.append(str(e))
+
+        successful = all(code == "op_success" for code in codes)
+        if successful:
+            for account_id, account in created.items():
+                self.accounts[account_id] = account
+            for account_id, balances in staged.items():
+                self.accounts[account_id].balances = balances
+            for account, name, value in data_changes:
+                if value is None:
+                    account.data.pop(name, None)
+                else:
+                    account.data[name] = value
+
+        record = self._record(envelope, tx_xdr, successful)
+        if not successful:
+            self.counts["failed"] += 1
+            return 400, _problem_body(
+                400, "transaction_failed", "Transaction Failed",
+                extras={
+                    "envelope_xdr": tx_xdr,
+                    "result_codes": {"transaction": "tx_failed", "operations": codes}
+                }
+            )
+
+        self.counts["successful"] += 1
+        return 200, record
+
+    def _apply_operation(self, op, op_source: str, staged, created, data_changes) -> None:
+        """Apply one operation to the staged balances or raise _OperationFailed"""
+        if op_source not in staged and op_source not in created:
+            raise _OperationFailed("op_no_source_account")
+
+        if isinstance(op, Payment):
+            asset = _asset_key(op.asset)
+            amount = Decimal(op.amount)
+            destination = op.destination.account_id
+            source_balances = staged[op_source]
+
+            if destination not in staged:
+                raise _OperationFailed("op_no_destination")
+            if asset not in staged[destination] and asset[1] != destination:
+                raise _OperationFailed("op_no_trust")
+            if asset[1] != op_source:  # issuers mint without a balance
+                if source_balances.get(asset, Decimal(0)) < amount:
+                    raise _OperationFailed("op_underfunded")
+                source_balances[asset] -= amount
+            if asset[1] != destination:
+                staged[destination][asset] = staged[destination].get(asset, Decimal(0)) + amount
+
+        elif isinstance(op, CreateAccount):
+            amount = Decimal(op.starting_balance)
+            if op.destination in staged or op.destination in created:
+                raise _OperationFailed("op_already_exists")
+            if amount < 2 * BASE_RESERVE:
+                raise _OperationFailed("op_low_reserve")
+            if staged[op_source].get(("XLM", ""), Decimal(0)) < amount:
+                raise _OperationFailed("op_underfunded")
+            staged[op_source][("XLM", "")] -= amount
+            created[op.destination] = EmulatedAccount(
+                account_id=op.destination, sequence=self.ledger << 32
+            )
+            staged[op.destination] = {("XLM", ""): amount}
+
+        elif isinstance(op, ChangeTrust):
+            asset = _asset_key(op.asset)
+            if Decimal(op.limit) == 0:
+                if staged[op_source].get(asset, Decimal(0)) != 0:
+                    raise _OperationFailed("op_invalid_limit")
+                staged[op_source].pop(asset, None)
+            else:
+                staged[op_source].setdefault(asset, Decimal(0))
+
+        elif isinstance(op, ManageData):
+            account = created.get(op_source) or self.accounts[op_source]
+            data_changes.append((account, op.data_name, op.data_value))
+
+        else:
+            raise _OperationFailed("op_not_supported")
+
+    def _signed_by(self, envelope: TransactionEnvelope, account_ids: set) -> bool:
+        """Check each account has a valid signature on the envelope"""
+        tx_hash = envelope.hash()
+        for account_id in account_ids:
+            keypair = Keypair.from_public_key(account_id)
+            hint = keypair.signature_hint()
+            signed = False
+            for signature in envelope.signatures:
+                if signature.signature_hint != hint:
+                    continue
+                try:
+                    keypair.verify(tx_hash, signature.signature)
+                    signed = True
+                    break
+                except BadSignatureError:
+                    continue
+            if not signed:
+                return False
+        return True
+
+    def _record(self, envelope: TransactionEnvelope, tx_xdr: str, successful: bool) -> Dict[str, Any]:
+        """Store the transaction for /transactions/{hash} and account history"""
+        tx = envelope.transaction
+        tx_hash = envelope.hash_hex()
+        memo_text = getattr(tx.memo, "memo_text", None)
+
+        participants = {tx.source.account_id}
+        for op in tx.operations:
+            if op.source:
+                participants.add(op.source.account_id)
+            destination = getattr(op, "destination", None)
+            if destination is not None:
+                participants.add(getattr(destination, "account_id", destination))
+
+        paging_token = str(len(self._history))
+        record = {
+            "id": tx_hash,
+            "paging_token": paging_token,
+            "hash": tx_hash,
+            "ledger": self.ledger,
+            "created_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "source_account": tx.source.account_id,
+            "source_account_sequence": str(tx.sequence),
+            "fee_charged": str(tx.fee),
+            "operation_count": len(tx.operations),
+            "memo_type": "text" if memo_text is not None else "none",
+            "successful": successful,
+            "envelope_xdr": tx_xdr
+        }
+        if memo_text is not None:
+            record["memo"] = memo_text.decode("utf-8", errors="replace")
+
+        self.transactions[tx_hash] = record
+        self._history.append((participants, tx_hash))
+        return record
+
+    def _rejected(self, code: str, tx_xdr: str) -> Tuple[int, Dict[str, Any]]:
+        return 400, _problem_body(
+            400, "transaction_failed", "Transaction Failed",
+            extras={"envelope_xdr": tx_xdr, "result_codes": {"transaction": code}}
+        )
+
+    def _next_failure(self) -> Optional[str]:
+        if self._forced_failures:
+            self.counts["injected"] += 1
+            return self._forced_failures.pop(0)
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            self.counts["injected"] += 1
+            return self.failure_kind
+        return None
+
+    async def _delay(self, base: float) -> None:
+        delay = base + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def _asset_key(asset) -> AssetKey:
+    if asset.is_native():
+        return ("XLM", "")
+    return (asset.code, asset.issuer)
+
+
+def _operation_record(op, index: int, tx_source: str, tx_record: Dict[str, Any]) -> Dict[str, Any]:
+    """Horizon operation resource for one operation of a recorded transaction"""
+    source = op.source.account_id if op.source else tx_source
+    operation_id = str((int(tx_record["paging_token"]) << 12) + index + 1)
+    record = {
+        "id": operation_id,
+        "paging_token": operation_id,
+        "transaction_hash": tx_record["hash"],
+        "transaction_successful": tx_record["successful"],
+        "source_account": source,
+        "created_at": tx_record["created_at"]
+    }
+
+    if isinstance(op, Payment):
+        record.update(type="payment", type_i=1, amount=_amount(Decimal(op.amount)),
+                      **{"from": source, "to": op.destination.account_id})
+        if op.destination.account_muxed_id is not None:
+            record.update(to_muxed=op.destination.account_muxed,
+                          to_muxed_id=str(op.destination.account_muxed_id))
+        record.update(_asset_fields(op.asset))
+    elif isinstance(op, CreateAccount):
+        record.update(type="create_account", type_i=0, funder=source, account=op.destination,
+                      starting_balance=_amount(Decimal(op.starting_balance)))
+    elif isinstance(op, ChangeTrust):
+        record.update(type="change_trust", type_i=6, trustor=source,
+                      limit=_amount(Decimal(op.limit)), **_asset_fields(op.asset))
+    elif isinstance(op, ManageData):
+        record.update(type="manage_data", type_i=10, name=op.data_name,
+                      value=base64.b64encode(op.data_value).decode() if op.data_value else "")
+    return record
+
+
+def _asset_fields(asset) -> Dict[str, str]:
+    if asset.is_native():
+        return {"asset_type": "native"}
+    return {
+        "asset_type": "credit_alphanum4" if len(asset.code) <= 4 else "credit_alphanum12",
+        "asset_code": asset.code,
+        "asset_issuer": asset.issuer
+    }
+
+
+def _amount(value: Decimal) -> str:
+    return f"{value.quantize(STROOP):f}"
+
+
+def _problem_body(status: int, kind: str, title: str, **fields) -> Dict[str, Any]:
+    return {
+        "type": f"https://stellar.org/horizon-errors/{kind}",
+        "title": title,
+        "status": status,
+        **fields
+    }
+
+
+def _problem(status: int, kind: str, title: str, **fields) -> web.Response:
+    return web.json_response(_problem_body(status, kind, title, **fields), status=status)
+
+
+# ============================================================
+# LOCALHOST ENTRY POINT
+# ============================================================
+
+async def _serve_forever(args: argparse.Namespace) -> None:
+    horizon = LocalHorizon(
+        network_passphrase=(
+            Network.PUBLIC_NETWORK_PASSPHRASE if args.public else Network.TESTNET_NETWORK_PASSPHRASE
+        ),
+        latency=args.latency,
+        submit_latency=args.submit_latency,
+        jitter=args.jitter,
+        failure_rate=args.failure_rate,
+        failure_kind=args.failure_kind
+    )
+    for spec in args.account:
+        # G...[:xlm[:CODE:ISSUER:balance]]
+        parts = spec.split(":")
+        assets = {(parts[2], parts[3]): parts[4]} if len(parts) >= 5 else None
+        horizon.create_account(parts[0], xlm=parts[1] if len(parts) > 1 else "10000", assets=assets)
+
+    await horizon.start(args.host, args.port)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await horizon.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Horizon emulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--public", action="store_true", help="use the public network passphrase")
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--submit-latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--failure-kind", choices=FAILURE_KINDS, default="unavailable")
+    parser.add_argument("--account", action="append", default=[],
+                        metavar="G...[:XLM[:CODE:ISSUER:BALANCE]]")
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(_serve_forever(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+"""
+Attribution: This project uses the services of Claude and Anthropic PBC
+to inform our decisions and recommendations.
+"""
@@ -0,0 +1,487 @@
+#!/usr/bin/env python3
+"""
+Local IPFS - Pinata and IPFS node stand-in for offline testing
+Development tool; not imported by main.py
+
+One server answers the three HTTP surfaces ipfs_service.py talks to, so
+PinataService (PINATA_API_URL, IPFS_GATEWAY) and IPFSService
+(IPFS_API_URL) can both point at it:
+
+- Pinata API   POST   /pinning/pinFileToIPFS, /pinning/pinJSONToIPFS
+               GET    /data/pinList, /data/testAuthentication
+               DELETE /pinning/unpin/{cid}
+- Gateway      GET    /ipfs/{cid}
+- Kubo RPC     POST   /api/v0/add, /api/v0/cat, /api/v0/version
+
+Content is stored in memory or in a directory (one file per CID) and
+addressed by its real CIDv1 (raw leaves, see ipfs_cid.py), so CIDs match
+what the services compute locally and what verification recomputes.
+Content larger than one block has no locally computable CID and is
+rejected with 413.
+
+Pinata's rate limit (requests per window, 429 with Retry-After), latency
+and failures are injectable, so the pin path and the ingest queue /
+outbox retry with backoff can be benchmarked without the network:
+
+    ipfs = LocalIPFS(pin_latency=0.2, rate_limit=180, rate_window=60)
+    url = await ipfs.start(port=8002)     # or: python local_ipfs.py --port 8002
+    ...
+    ipfs.fail_next("timeout")             # next pin: stored, but 504
+    await ipfs.close()
+
+Design Principles Applied:
+- Principle #5: Strict async operations
+- Principle #10: Clear separation of concerns
+
+Attribution: This project uses the services of Claude and Anthropic PBC.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+from ipfs_cid import MAX_RAW_BLOCK_SIZE, canonical_json_bytes, compute_cid
+
+logger = logging.getLogger(__name__)
+
+# Injectable pin/add failures
+FAILURE_KINDS = (
+    "rate_limited",  # 429 with Retry-After, content not stored
+    "unavailable",   # 503, content not stored
+    "timeout"        # 504, content stored anyway (client retries a duplicate)
+)
+
+MAX_PAGE_LIMIT = 1000  # Pinata's pageLimit maximum
+
+
+@dataclass
+class Pin:
+    """Pin record as listed by /data/pinList"""
+    cid: str
+    size: int
+    metadata: Dict[str, Any] = field(default_factory=dict)
+    date_pinned: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    date_unpinned: Optional[datetime] = None
+
+    def to_pinata(self) -> Dict[str, Any]:
+        return {
+            "id": self.cid,
+            "ipfs_pin_hash": self.cid,
+            "size": self.size,
+            "date_pinned": self.date_pinned.isoformat(),
+            "date_unpinned": self.date_unpinned.isoformat() if self.date_unpinned else None,
+            "metadata": {
+                "name": self.metadata.get("name"),
+                "keyvalues": self.metadata.get("keyvalues")
+            }
+        }
+
+
+class LocalIPFS:
+    """
+    In-memory (or on-disk) Pinata / IPFS node stand-in
+
+    The rate limit is a fixed window over all API requests (gateway reads
+    excluded), like Pinata's per-key limit. Injected latency happens before
+    a request is handled; pins and adds use pin_latency, everything else
+    latency.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        pin_latency: float = 0.0,
+        jitter: float = 0.0,
+        rate_limit: int = 0,
+        rate_window: float = 60.0,
+        failure_rate: float = 0.0,
+        failure_kind: str = "unavailable",
+        storage_dir: Optional[str] = None,
+        require_auth: bool = True,
+        seed: Optional[int] = None
+    ):
+        """
+        Initialize stand-in
+
+        Args:
+            latency: Seconds added to every read and listing
+            pin_latency: Seconds added to every pin / add
+            jitter: Up to this many seconds added at random to each request
+            rate_limit: API requests allowed per window (0 = unlimited)
+            rate_window: Rate limit window in seconds
+            failure_rate: Probability of an injected pin/add failure
+            failure_kind: Kind used for random failures (see FAILURE_KINDS)
+            storage_dir: Keep content in this directory instead of memory
+            require_auth: Reject Pinata API calls without credentials (401)
+            seed: Random seed for reproducible jitter and failures
+        """
+        if failure_kind not in FAILURE_KINDS:
+            raise ValueError(f"failure_kind must be one of {FAILURE_KINDS}")
+
+        self.latency = latency
+        self.pin_latency = pin_latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.failure_rate = failure_rate
+        self.failure_kind = failure_kind
+        self.storage_dir = storage_dir
+        self.require_auth = require_auth
+
+        if storage_dir:
+            os.makedirs(storage_dir, exist_ok=True)
+
+        self.pins: Dict[str, Pin] = {}
+        self._blocks: Dict[str, bytes] = {}
+        self._forced_failures: List[str] = []
+        self._random = random.Random(seed)
+        self._runner: Optional[web.AppRunner] = None
+
+        self._window_started = time.monotonic()
+        self._window_requests = 0
+
+        self.counts = {"requests": 0, "pinned": 0, "duplicates": 0, "unpinned": 0,
+                       "reads": 0, "not_found": 0, "rate_limited": 0, "injected": 0}
+
+    # ------------------------------------------------------------
+    # Setup and control
+    # ------------------------------------------------------------
+
+    def add(self, content: bytes, metadata: Optional[Dict[str, Any]] = None) -> str:
+        """Store and pin content directly (fixtures); returns its CID"""
+        cid = compute_cid(content)
+        if cid is None:
+            raise ValueError(f"Content larger than {MAX_RAW_BLOCK_SIZE} bytes is not supported")
+        self._store(cid, content, metadata)
+        return cid
+
+    def fail_next(self, kind: str = "unavailable", count: int = 1) -> None:
+        """Force the next `count` pins / adds to fail with `kind`"""
+        if kind not in FAILURE_KINDS:
+            raise ValueError(f"kind must be one of {FAILURE_KINDS}")
+        self._forced_failures.extend([kind] * count)
+
+    def build_app(self) -> web.Application:
+        """aiohttp application (for in-process test clients)"""
+        app = web.Application(
+            client_max_size=4 * MAX_RAW_BLOCK_SIZE,
+            middlewares=[self._rate_limit_middleware]
+        )
+        app.router.add_post("/pinning/pinFileToIPFS", self._pin_file)
+        app.router.add_post("/pinning/pinJSONToIPFS", self._pin_json)
+        app.router.add_delete("/pinning/unpin/{cid}", self._unpin)
+        app.router.add_get("/data/pinList", self._pin_list)
+        app.router.add_get("/data/testAuthentication", self._test_authentication)
+        app.router.add_get("/ipfs/{cid}", self._gateway)
+        app.router.add_post("/api/v0/add", self._kubo_add)
+        app.router.add_post("/api/v0/cat", self._kubo_cat)
+        app.router.add_post("/api/v0/version", self._kubo_version)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8002) -> str:
+        """
+        Serve on localhost
+
+        Returns:
+            Base URL to use as PINATA_API_URL, IPFS_GATEWAY and IPFS_API_URL
+        """
+        self._runner = web.AppRunner(self.build_app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        url = f"http://{host}:{port}"
+        logger.info(f"Local IPFS listening on {url}")
+        return url
+
+    async def close(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def stats(self) -> Dict[str, Any]:
+        pinned = [pin for pin in self.pins.values() if pin.date_unpinned is None]
+        return {
+            "pins": len(pinned),
+            "bytes_pinned": sum(pin.size for pin in pinned),
+            **self.counts
+        }
+
+    # ------------------------------------------------------------
+    # Pinata API
+    # ------------------------------------------------------------
+
+    async def _pin_file(self, request: web.Request) -> web.Response:
+        self._check_auth(request)
+        content = None
+        metadata: Dict[str, Any] = {}
+        async for part in await request.multipart():
+            if part.name == "file":
+                content = await part.read()
+            elif part.name == "pinataMetadata":
+                metadata = json.loads(await part.text())
+        if content is None:
+            return _error(400, "No file provided")
+        return await self._pin(content, metadata, self._pinata_result)
+
+    async def _pin_json(self, request: web.Request) -> web.Response:
+        self._check_auth(request)
+        try:
+            body = await request.json()
+        except json.JSONDecodeError:
+            return _error(400, "Invalid JSON body")
+        content = canonical_json_bytes(body.get("pinataContent", body))
+        return await self._pin(content, body.get("pinataMetadata") or {}, self._pinata_result)
+
+    async def _unpin(self, request: web.Request) -> web.Response:
+        self._check_auth(request)
+        await self._delay(self.latency)
+        pin = self.pins.get(request.match_info["cid"])
+        if pin is None or pin.date_unpinned is not None:
+            return _error(404, "Current user has not pinned the cid")
+        pin.date_unpinned = datetime.now(timezone.utc)
+        self.counts["unpinned"] += 1
+        return web.Response(text="OK")
+
+    async def _pin_list(self, request: web.Request) -> web.Response:
+        self._check_auth(request)
+        await self._delay(self.latency)
+        status = request.query.get("status", "all")
+        limit = min(int(request.query.get("pageLimit", 10)), MAX_PAGE_LIMIT)
+        offset = int(request.query.get("pageOffset", 0))
+        contains = request.query.get("hashContains")
+
+        pins = sorted(self.pins.values(), key=lambda pin: pin.date_pinned, reverse=True)
+        if status == "pinned":
+            pins = [pin for pin in pins if pin.date_unpinned is None]
+        elif status == "unpinned":
+            pins = [pin for pin in pins if pin.date_unpinned is not None]
+        if contains:
+            pins = [pin for pin in pins if contains in pin.cid]
+
+        return web.json_response({
+            "count": len(pins),
+            "rows": [pin.to_pinata() for pin in pins[offset:offset + limit]]
+        })
+
+    async def _test_authentication(self, request: web.Request) -> web.Response:
+        self._check_auth(request)
+        return web.json_response({"message": "Congratulations! You are communicating with the Pinata API!"})
+
+    def _pinata_result(self, cid: str, size: int, duplicate: bool) -> web.Response:
+        return web.json_response({
+            "IpfsHash": cid,
+            "PinSize": size,
+            "Timestamp": self.pins[cid].date_pinned.isoformat(),
+            "isDuplicate": duplicate
+        })
+
+    def _check_auth(self, request: web.Request) -> None:
+        if not self.require_auth:
+            return
+        headers = request.headers
+        if headers.get("Authorization", "").startswith("Bearer ") or (
+            headers.get("pinata_api_key") and headers.get("pinata_secret_api_key")
+        ):
+            return
+        raise web.HTTPUnauthorized(
+            text=json.dumps({"error": {"reason": "NO_AUTH", "details": "No authentication provided"}}),
+            content_type="application/json"
+        )
+
+    # ------------------------------------------------------------
+    # Gateway and Kubo RPC
+    # ------------------------------------------------------------
+
+    async def _gateway(self, request: web.Request) -> web.Response:
+        await self._delay(self.latency)
+        content = self._read(request.match_info["cid"])
+        if content is None:
+            return _error(404, "Not found")
+        return web.Response(body=content, content_type=_content_type(content))
+
+    async def _kubo_add(self, request: web.Request) -> web.Response:
+        content = None
+        name = ""
+        async for part in await request.multipart():
+            if part.name == "file":
+                content = await part.read()
+                name = part.filename or ""
+        if content is None:
+            return _kubo_error("file argument 'path' is required")
+
+        def result(cid: str, size: int, duplicate: bool) -> web.Response:
+            return web.json_response({"Name": name or cid, "Hash": cid, "Size": str(size)})
+
+        return await self._pin(content, {"name": name}, result)
+
+    async def _kubo_cat(self, request: web.Request) -> web.Response:
+        await self._delay(self.latency)
+        cid = request.query.get("arg", "").removeprefix("/ipfs/")
+        content = self._read(cid)
+        if content is None:
+            return _kubo_error(f"block was not found locally (offline): {cid}")
+        return web.Response(body=content, content_type="text/plain")
+
+    async def _kubo_version(self, request: web.Request) -> web.Response:
+        await self._delay(self.latency)
+        return web.json_response({"Version": "local", "Commit": "", "Repo": "local", "System": "local"})
+
+    # ------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------
+
+    async def _pin(self, content: bytes, metadata: Dict[str, Any], respond) -> web.Response:
+        """Store content under its CID, honouring injected latency and failures"""
+        await self._delay(self.pin_latency)
+
+        cid = compute_cid(content)
+        if cid is None:
+            return _error(413, f"Content larger than {MAX_RAW_BLOCK_SIZE} bytes is not supported")
+
+        failure = self._next_failure()
+        if failure == "rate_limited":
+            return self._too_many_requests(self.rate_window)
+        if failure == "unavailable":
+            return _error(503, "Service Unavailable")
+
+        duplicate = self._store(cid, content, metadata)
+        if failure == "timeout":
+            # Stored, but the client never learns the outcome
+            return _error(504, "Gateway Timeout")
+        return respond(cid, len(content), duplicate)
+
+    def _store(self, cid: str, content: bytes, metadata: Optional[Dict[str, Any]]) -> bool:
+        """Write content and (re)pin it; returns True if it was already pinned"""
+        pin = self.pins.get(cid)
+        duplicate = pin is not None and pin.date_unpinned is None
+        if duplicate:
+            self.counts["duplicates"] += 1
+            return True
+
+        if self.storage_dir:
+            with open(os.path.join(self.storage_dir, cid), "wb") as handle:
+                handle.write(content)
+        else:
+            self._blocks[cid] = content
+        self.pins[cid] = Pin(cid=cid, size=len(content), metadata=metadata or {})
+        self.counts["pinned"] += 1
+        return False
+
+    def _read(self, cid: str) -> Optional[bytes]:
+        self.counts["reads"] += 1
+        content = self._blocks.get(cid)
+        if content is None and self.storage_dir and cid in self.pins:
+            with open(os.path.join(self.storage_dir, cid), "rb") as handle:
+                content = handle.read()
+        if content is None:
+            self.counts["not_found"] += 1
+        return content
+
+    # ------------------------------------------------------------
+    # Rate limiting and failure injection
+    # ------------------------------------------------------------
+
+    @web.middleware
+    async def _rate_limit_middleware(self, request: web.Request, handler) -> web.StreamResponse:
+        self.counts["requests"] += 1
+        if self.rate_limit and not request.path.startswith("/ipfs/"):
+            now = time.monotonic()
+            if now - self._window_started >= self.rate_window:
+                self._window_started = now
+                self._window_requests = 0
+            if self._window_requests >= self.rate_limit:
+                return self._too_many_requests(self.rate_window - (now - self._window_started))
+            self._window_requests += 1
+        return await handler(request)
+
+    def _too_many_requests(self, retry_after: float) -> web.Response:
+        self.counts["rate_limited"] += 1
+        response = _error(429, "Rate limit exceeded")
+        response.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+        return response
+
+    def _next_failure(self) -> Optional[str]:
+        if self._forced_failures:
+            self.counts["injected"] += 1
+            return self._forced_failures.pop(0)
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            self.counts["injected"] += 1
+            return self.failure_kind
+        return None
+
+    async def _delay(self, base: float) -> None:
+        delay = base + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def _content_type(content: bytes) -> str:
+    try:
+        json.loads(content)
+        return "application/json"
+    except ValueError:
+        return "application/octet-stream"
+
+
+def _error(status: int, reason: str) -> web.Response:
+    return web.json_response({"error": {"reason": reason}}, status=status)
+
+
+def _kubo_error(message: str) -> web.Response:
+    return web.json_response({"Message": message, "Code": 0, "Type": "error"}, status=500)
+
+
+# ============================================================
+# LOCALHOST ENTRY POINT
+# ============================================================
+
+async def _serve_forever(args: argparse.Namespace) -> None:
+    ipfs = LocalIPFS(
+        latency=args.latency,
+        pin_latency=args.pin_latency,
+        jitter=args.jitter,
+        rate_limit=args.rate_limit,
+        rate_window=args.rate_window,
+        failure_rate=args.failure_rate,
+        failure_kind=args.failure_kind,
+        storage_dir=args.storage_dir
+    )
+    await ipfs.start(args.host, args.port)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await ipfs.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Pinata / IPFS node stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8002)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--pin-latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=int, default=0, help="API requests per window (0 = unlimited)")
+    parser.add_argument("--rate-window", type=float, default=60.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--failure-kind", choices=FAILURE_KINDS, default="unavailable")
+    parser.add_argument("--storage-dir", help="keep content on disk instead of in memory")
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(_serve_forever(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+"""
+Attribution: This project uses the services of Claude and Anthropic PBC
+to inform our decisions and recommendations.
+"""
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+LRU Cache with Time-To-Live
+Small in-process cache shared by services that memoize lookups
+
+Entries are evicted least-recently-used once maxsize is reached and
+expire after their TTL (per entry or the cache default). Hit and miss
+counters are kept for status reporting; named caches also count them in
+ubec_cache_lookups_total{cache,result} on /metrics.
+
+Design Principles Applied:
+- Principle #10: Clear separation of concerns
+- Principle #12: Method singularity - one cache implementation
+
+Attribution: This project uses the services of Claude and Anthropic PBC.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+from metrics import metrics
+
+_MISSING = object()
+
+CACHE_LOOKUPS = metrics.counter(
+    "ubec_cache_lookups_total",
+    "In-process cache lookups by result (hit or miss)",
+    ["cache", "result"]
+)
+
+
+class TTLCache:
+    """
+    Bounded LRU mapping whose entries expire after a time-to-live
+
+    Not thread-safe; intended for use from a single asyncio event loop.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: Optional[float] = None, name: Optional[str] = None):
+        """
+        Initialize cache
+
+        Args:
+            maxsize: Maximum number of entries
+            ttl: Default time-to-live in seconds (None = no expiry)
+            name: Metrics label; unnamed caches are not reported on /metrics
+        """
+        self.maxsize = max(1, maxsize)
+        self.ttl = ttl
+        self.name = name
+        self._entries: "OrderedDict[Hashable, Tuple[Any, Optional[float]]]" = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+        self._hit_counter = CACHE_LOOKUPS.labels(cache=name, result="hit") if name else None
+        self._miss_counter = CACHE_LOOKUPS.labels(cache=name, result="miss") if name else None
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Look up a value
+
+        Args:
+            key: Cache key
+            default: Returned when the key is missing or expired
+
+        Returns:
+            Cached value or default
+        """
+        entry = self._entries.get(key, _MISSING)
+        if entry is not _MISSING:
+            value, expires_at = entry
+            if expires_at is None or expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                if self._hit_counter:
+                    self._hit_counter.inc()
+                return value
+            del self._entries[key]
+
+        self.misses += 1
+        if self._miss_counter:
+            self._miss_counter.inc()
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store a value
+
+        Args:
+            key: Cache key
+            value: Value to cache
+            ttl: Time-to-live in seconds (default: the cache's ttl)
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> bool:
+        """
+        Remove one entry
+
+        Returns:
+            True if the key was cached
+        """
+        return self._entries.pop(key, _MISSING) is not _MISSING
+
+    def clear(self) -> None:
+        """Remove all entries"""
+        self._entries.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        """Size and hit ratio for status endpoints"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+    def collect_metrics(self, registry) -> None:
+        """Report the current size (called per /metrics scrape)"""
+        if self.name:
+            registry.gauge(
+                "ubec_cache_entries",
+                "Entries held by an in-process cache",
+                ["cache"]
+            ).set(len(self._entries), cache=self.name)
+
+
+"""
+Attribution: This project uses the services of Claude and Anthropic PBC
+to inform our decisions and recommendations.
+"""
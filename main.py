@@ -18,10 +18,11 @@ Version: 3.1.0 (Added Wallet Security System)
 
 import os
 import sys
+import time
 import asyncio
 import uvicorn
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import FileResponse, HTMLResponse, Response
+from fastapi.responses import FileResponse, HTMLResponse, Response, JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
@@ -35,6 +36,8 @@ from config import config, SENSOR_SCHEMA, PHENOMENOLOGICAL_SCHEMA
 
 # Import the service registry
 from service_registry import ServiceRegistry
+from http_session import create_client_session
+from metrics import metrics, PROMETHEUS_CONTENT_TYPE
 
 # Configure logging
 logging.basicConfig(
@@ -133,6 +136,9 @@ async def lifespan(app: FastAPI):
         
         # 3. Stellar Reciprocal Network
         app.state.stellar = None
+        
+        # One pooled Horizon session shared by payments and onboarding
+        app.state.horizon_session = create_client_session(config.http, upstream="horizon")
         if config.stellar.is_configured:
             try:
                 logger.info("Initializing UBEC reciprocal network...")
@@ -144,8 +150,9 @@ async def lifespan(app: FastAPI):
                     'ubecrc_asset_code': 'UBECrc',
                     'ubecrc_issuer': config.stellar.ubecrc_issuer_public,
                     'ubecrc_distributor': config.stellar.distributor_public,
-                    'ubecrc_distributor_secret': config.stellar.distributor_secret
-                })
+                    'ubecrc_distributor_secret': config.stellar.distributor_secret,
+                    'channel_secrets': config.stellar.channel_secrets
+                }, session=app.state.horizon_session)
                 await app.state.stellar.connect()
                 
                 # Check health
@@ -153,6 +160,13 @@ async def lifespan(app: FastAPI):
                 if health.get('can_send_payments'):
                     logger.info("✓ UBEC reciprocal network connected (payments enabled)")
                     logger.info(f"  UBECrc balance: {health.get('distributor_ubecrc_balance', '0')}")
+                    
+                    if config.stellar.payment_batch_enabled:
+                        app.state.stellar.enable_payment_batching(
+                            max_batch_size=config.stellar.payment_batch_size,
+                            window_seconds=config.stellar.payment_batch_window
+                        )
+                        logger.info(f"  Payment batching: up to {config.stellar.payment_batch_size} ops/tx")
                 else:
                     logger.info("✓ Stellar network connected (view only mode)")
             except Exception as e:
@@ -179,18 +193,39 @@ async def lifespan(app: FastAPI):
                     app.state.ipfs = PinataService(
                         api_key=pinata_api_key,
                         secret_key=pinata_secret,
-                        jwt=pinata_jwt
+                        jwt=pinata_jwt,
+                        session=create_client_session(config.http, upstream="pinata"),
+                        api_url=config.ipfs.api_url,
+                        gateway_url=config.ipfs.gateway_url
                     )
                     logger.info("✓ IPFS service initialized (Pinata)")
-                    logger.info(f"  Gateway: https://gateway.pinata.cloud")
+                    logger.info(f"  Gateway: {config.ipfs.gateway_url}")
                 else:
                     # Fallback to local IPFS
                     ipfs_api_url = os.getenv('IPFS_API_URL', 'http://localhost:5001')
                     from ipfs_service import IPFSService
-                    app.state.ipfs = IPFSService(ipfs_api_url)
+                    app.state.ipfs = IPFSService(
+                        ipfs_api_url,
+                        session=create_client_session(config.http, upstream="ipfs")
+                    )
                     logger.info("✓ IPFS service initialized (local)")
                     logger.info(f"  API: {ipfs_api_url}")
                     
+                
+                if config.ipfs.batch_enabled:
+                    from ipfs_service import ObservationPinBatcher
+                    app.state.ipfs = ObservationPinBatcher(
+                        app.state.ipfs,
+                        window_seconds=config.ipfs.batch_window_seconds,
+                        max_items=config.ipfs.batch_max_items
+                    )
+                    logger.info(
+                        f"  Batch pinning: {config.ipfs.batch_max_items} items / "
+                        f"{config.ipfs.batch_window_seconds}s window"
+                    )
+                    if not config.ingest.is_async:
+                        logger.warning("  ⚠️  Batch pinning with sync ingest - /observe waits for the batch window")
+                    
             except Exception as e:
                 logger.warning(f"IPFS initialization failed: {e}")
                 logger.info("⚠️  Continuing without IPFS")
@@ -206,10 +241,138 @@ async def lifespan(app: FastAPI):
             ipfs_service=app.state.ipfs,
             stellar_service=app.state.stellar,
             database=app.state.db,
-            phenomenological_db=app.state.db
+            phenomenological_db=app.state.db,
+            device_cache_size=config.device_cache.size,
+            device_cache_ttl=config.device_cache.ttl,
+            device_cache_unpaid_ttl=config.device_cache.unpaid_ttl
         )
         logger.info("✓ Observation service initialized")
         
+        # 5a. Durable Outbox (retry of failed IPFS pins and payouts)
+        app.state.outbox = None
+        if app.state.db and config.outbox.enabled:
+            try:
+                async with app.state.db.pool.acquire() as conn:
+                    outbox_table = await conn.fetchval(
+                        "SELECT to_regclass('phenomenological.observation_outbox')"
+                    )
+                
+                if outbox_table:
+                    from outbox_service import OutboxService
+                    
+                    app.state.outbox = OutboxService(
+                        database=app.state.db,
+                        observation_service=app.state.observation_service,
+                        batch_size=config.outbox.batch_size,
+                        concurrency=config.outbox.concurrency,
+                        poll_interval=config.outbox.poll_interval,
+                        max_attempts=config.outbox.max_attempts,
+                        base_delay=config.outbox.base_delay,
+                        max_delay=config.outbox.max_delay,
+                        completed_retention=config.outbox.completed_retention_hours * 3600,
+                        prune_interval=config.outbox.prune_interval
+                    )
+                    await app.state.outbox.start()
+                    app.state.observation_service.outbox = app.state.outbox
+                    logger.info("✓ Outbox retry worker started")
+                else:
+                    logger.warning("⚠️  Outbox table missing - run observation_outbox_migration.sql")
+            except Exception as e:
+                logger.warning(f"Outbox initialization failed: {e}")
+                app.state.outbox = None
+        
+        # 5a2. Observation partition maintenance (monthly partitions ahead of time)
+        app.state.partition_maintenance = None
+        if app.state.db and config.partitions.enabled:
+            try:
+                from partition_service import PartitionMaintenanceService
+                
+                if await PartitionMaintenanceService.is_partitioned(app.state.db):
+                    app.state.partition_maintenance = PartitionMaintenanceService(
+                        database=app.state.db,
+                        months_ahead=config.partitions.months_ahead,
+                        retention_months=config.partitions.retention_months,
+                        interval_seconds=config.partitions.interval_seconds
+                    )
+                    await app.state.partition_maintenance.start()
+                    logger.info("✓ Partition maintenance started")
+                else:
+                    logger.info("⚠️  Observations not partitioned - see observations_partitioning_migration.sql")
+            except Exception as e:
+                logger.warning(f"Partition maintenance initialization failed: {e}")
+                app.state.partition_maintenance = None
+        
+        # 5a3. System stats snapshot (served by /api/v2/system/stats)
+        app.state.system_stats = None
+        if app.state.db:
+            try:
+                from system_stats import SystemStatsService
+                
+                app.state.system_stats = SystemStatsService(
+                    database=app.state.db,
+                    refresh_interval=config.system_stats.refresh_interval,
+                    max_subscribers=config.system_stats.max_subscribers,
+                    keepalive_interval=config.system_stats.keepalive_interval
+                )
+                await app.state.system_stats.start()
+                logger.info("✓ System stats snapshot started")
+            except Exception as e:
+                logger.warning(f"System stats initialization failed: {e}")
+                app.state.system_stats = None
+        
+        # 5a4. Verification (read-only integrity checks, results cached)
+        app.state.verification = None
+        app.state.verification_cache = None
+        if app.state.ipfs and app.state.stellar:
+            try:
+                from verification_service import VerificationService
+                
+                if config.verification_cache.enabled:
+                    from verification_cache import VerificationCache
+                    
+                    app.state.verification_cache = VerificationCache(
+                        database=app.state.db,
+                        memory_size=config.verification_cache.memory_size,
+                        reverify_after_days=config.verification_cache.reverify_after_days,
+                        purge_interval=config.verification_cache.purge_interval
+                    )
+                    await app.state.verification_cache.start()
+                
+                app.state.verification = VerificationService(
+                    ipfs_service=app.state.ipfs,
+                    stellar_service=app.state.stellar,
+                    database=app.state.observation_service,
+                    cache=app.state.verification_cache,
+                    archive_db=app.state.db
+                )
+                logger.info("✓ Verification service ready")
+            except Exception as e:
+                logger.warning(f"Verification initialization failed: {e}")
+                app.state.verification = None
+        
+        # 5b. Async Ingest Queue (background IPFS + payment processing)
+        logger.info("Initializing ingest queue...")
+        from ingest_queue import IngestQueue
+        
+        # Workers wait for the batch window when pins are batched, so run
+        # enough of them to fill a whole batch
+        ingest_workers = config.ingest.workers
+        if getattr(app.state.ipfs, 'batches_pins', False):
+            ingest_workers = max(ingest_workers, config.ipfs.batch_max_items)
+        
+        app.state.ingest_queue = IngestQueue(
+            observation_service=app.state.observation_service,
+            workers=ingest_workers,
+            queue_size=config.ingest.queue_size,
+            max_retries=config.ingest.max_retries,
+            retry_base_delay=config.ingest.retry_base_delay,
+            status_retention=config.ingest.status_retention,
+            lease_seconds=config.ingest.lease_seconds,
+            recovery_interval=config.ingest.recovery_interval
+        )
+        await app.state.ingest_queue.start()
+        logger.info(f"✓ Ingest queue started (default mode: {config.ingest.mode})")
+        
         # 6. Stellar Onboarding Service (Wallet Creation)
         app.state.stellar_onboarding = None
         if hasattr(config, 'stellar_onboarding') and config.stellar_onboarding.is_configured:
@@ -235,7 +398,8 @@ async def lifespan(app: FastAPI):
                     ubecrc_asset_code='UBECrc',
                     ubecrc_issuer=config.stellar.ubecrc_issuer_public,
                     min_funding_amount=config.stellar_onboarding.total_funding_amount,
-                    database=app.state.db
+                    database=app.state.db,
+                    session=app.state.horizon_session
                 )
                 
                 # Check funding capacity
@@ -268,6 +432,15 @@ async def lifespan(app: FastAPI):
         if app.state.ipfs:
             registry.register("ipfs", app.state.ipfs)
         registry.register("observation_service", app.state.observation_service)
+        registry.register("ingest_queue", app.state.ingest_queue)
+        if app.state.outbox:
+            registry.register("outbox", app.state.outbox)
+        if app.state.partition_maintenance:
+            registry.register("partition_maintenance", app.state.partition_maintenance)
+        if app.state.system_stats:
+            registry.register("system_stats", app.state.system_stats)
+        if app.state.verification:
+            registry.register("verification", app.state.verification)
         if app.state.stellar_onboarding:
             registry.register("stellar_onboarding", app.state.stellar_onboarding)
         if app.state.wallet_security_service:
@@ -337,22 +510,51 @@ async def lifespan(app: FastAPI):
     # Graceful shutdown
     logger.info("Shutting down UBEC reciprocal system...")
     
-    if hasattr(app.state, 'wallet_security_service') and app.state.wallet_security_service:
-        await app.state.wallet_security_service.close()
-        logger.info("✓ Wallet security service closed")
+    # Producers first, then the batchers they feed (which still write to
+    # Horizon and IPFS), then everything else; the database goes last
+    if hasattr(app.state, 'ingest_queue') and app.state.ingest_queue:
+        await app.state.ingest_queue.close()
+        logger.info("✓ Ingest queue stopped")
     
-    if hasattr(app.state, 'db'):
-        await app.state.db.close()
-        logger.info("✓ Database connection closed")
+    if hasattr(app.state, 'outbox') and app.state.outbox:
+        await app.state.outbox.close()
+        logger.info("✓ Outbox worker stopped")
     
     if hasattr(app.state, 'stellar') and app.state.stellar:
         await app.state.stellar.close()
         logger.info("✓ Stellar connection closed")
     
+    if hasattr(app.state, 'ipfs') and app.state.ipfs:
+        await app.state.ipfs.close()
+        logger.info("✓ IPFS service closed")
+    
+    if hasattr(app.state, 'partition_maintenance') and app.state.partition_maintenance:
+        await app.state.partition_maintenance.close()
+        logger.info("✓ Partition maintenance stopped")
+    
+    if hasattr(app.state, 'system_stats') and app.state.system_stats:
+        await app.state.system_stats.close()
+        logger.info("✓ System stats snapshot stopped")
+    
+    if hasattr(app.state, 'verification_cache') and app.state.verification_cache:
+        await app.state.verification_cache.close()
+        logger.info("✓ Verification cache purge stopped")
+    
+    if hasattr(app.state, 'wallet_security_service') and app.state.wallet_security_service:
+        await app.state.wallet_security_service.close()
+        logger.info("✓ Wallet security service closed")
+    
     if hasattr(app.state, 'stellar_onboarding') and app.state.stellar_onboarding:
         await app.state.stellar_onboarding.close()
         logger.info("✓ Stellar onboarding service closed")
     
+    if hasattr(app.state, 'horizon_session') and not app.state.horizon_session.closed:
+        await app.state.horizon_session.close()
+    
+    if hasattr(app.state, 'db'):
+        await app.state.db.close()
+        logger.info("✓ Database connection closed")
+    
     logger.info("System shutdown complete")
 
 
@@ -422,6 +624,36 @@ app.add_middleware(
     expose_headers=["*"]
 )
 
+# ==================================================
+# REQUEST METRICS MIDDLEWARE
+# ==================================================
+
+HTTP_REQUESTS = metrics.counter(
+    "ubec_http_requests_total",
+    "API requests by method, route template and status",
+    ["method", "route", "status"]
+)
+HTTP_REQUEST_SECONDS = metrics.histogram(
+    "ubec_http_request_seconds",
+    "API request duration until response headers",
+    ["route"]
+)
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Count requests per route template (not raw path, to bound label cardinality)"""
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", "unmatched")
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, route=route_path)
+        HTTP_REQUESTS.inc(method=request.method, route=route_path, status=status)
+
 # ==================================================
 # STATIC FILES - REGISTRATION PORTAL
 # ==================================================
@@ -679,6 +911,14 @@ async def status():
         "debug": config.DEBUG
     }
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Metrics of all registered services in Prometheus text format"""
+    return PlainTextResponse(
+        await registry.render_metrics(),
+        media_type=PROMETHEUS_CONTENT_TYPE
+    )
+
 @app.get("/awareness")
 async def awareness_check():
     """Phenomenological awareness check"""
@@ -703,123 +943,45 @@ async def get_system_stats():
     """
     Get system-wide statistics from the phenomenological database
     Returns counts of observers, observations, devices, and UBEC distributed
+    
+    Served from the in-memory snapshot of SystemStatsService (refreshed in
+    the background), so the cost per request does not depend on table sizes.
     """
-    try:
-        # Initialize stats with zeros
-        stats = {
-            "total_observers": 0,
-            "total_observations": 0,
-            "total_devices": 0,
-            "total_ubec": 0,
-            "active_patterns": 0,
-            "security_stats": {
-                "total_wallets_created": 0,
-                "total_blocked_attempts": 0,
-                "pending_approvals": 0
-            }
-        }
-        
-        # Check if database is available
-        if not hasattr(app.state, 'db'):
-            logger.warning("Database not available for stats")
-            return stats
-        
-        db = app.state.db
-        
-        # Use asyncpg connection pool pattern
-        async with db.pool.acquire() as conn:
-            # Count total observers (both human and device)
-            observer_query = """
-                SELECT COUNT(*) as count 
-                FROM phenomenological.observers
-            """
-            result = await conn.fetchrow(observer_query)
-            if result:
-                stats["total_observers"] = result['count']
-            
-            # Count devices specifically
-            device_query = """
-                SELECT COUNT(*) as count 
-                FROM phenomenological.observers
-                WHERE observer_type = 'device'
-            """
-            result = await conn.fetchrow(device_query)
-            if result:
-                stats["total_devices"] = result['count']
-            
-            # Count total observations
-            obs_query = """
-                SELECT COUNT(*) as count 
-                FROM phenomenological.observations
-            """
-            result = await conn.fetchrow(obs_query)
-            if result:
-                stats["total_observations"] = result['count']
-            
-            # Calculate total UBEC distributed (7.14 per observation)
-            if stats["total_observations"] > 0:
-                stats["total_ubec"] = round(stats["total_observations"] * 7.14, 2)
-            
-            # Count active patterns (if patterns table exists)
-            try:
-                pattern_query = """
-                    SELECT COUNT(*) as count 
-                    FROM phenomenological.patterns
-                    WHERE active = true
-                """
-                result = await conn.fetchrow(pattern_query)
-                if result:
-                    stats["active_patterns"] = result['count']
-            except Exception:
-                stats["active_patterns"] = 0
-            
-            # Security stats (if security tables exist)
-            try:
-                wallet_count_query = """
-                    SELECT COUNT(*) as count 
-                    FROM phenomenological.wallet_security_log
-                """
-                result = await conn.fetchrow(wallet_count_query)
-                if result:
-                    stats["security_stats"]["total_wallets_created"] = result['count']
-                
-                blocked_query = """
-                    SELECT COUNT(*) as count 
-                    FROM phenomenological.wallet_failed_attempts
-                """
-                result = await conn.fetchrow(blocked_query)
-                if result:
-                    stats["security_stats"]["total_blocked_attempts"] = result['count']
-                
-                pending_query = """
-                    SELECT COUNT(*) as count 
-                    FROM phenomenological.wallet_approval_queue
-                    WHERE status = 'pending'
-                """
-                result = await conn.fetchrow(pending_query)
-                if result:
-                    stats["security_stats"]["pending_approvals"] = result['count']
-            except Exception:
-                pass  # Security tables don't exist yet
-        
-        logger.info(f"System stats retrieved: {stats}")
-        return stats
-        
-    except Exception as e:
-        logger.error(f"Error fetching system stats: {e}", exc_info=True)
-        # Return zeros on error so the page doesn't break
-        return {
-            "total_observers": 0,
-            "total_observations": 0,
-            "total_devices": 0,
-            "total_ubec": 0,
-            "active_patterns": 0,
-            "security_stats": {
-                "total_wallets_created": 0,
-                "total_blocked_attempts": 0,
-                "pending_approvals": 0
-            }
+    from system_stats import build_stats
+    
+    system_stats = getattr(app.state, 'system_stats', None)
+    if not system_stats:
+        logger.warning("System stats not available")
+        # Zeros so the page doesn't break
+        return build_stats({})
+    
+    return system_stats.snapshot()
+
+@app.get("/api/v2/system/stats/stream")
+async def stream_system_stats():
+    """
+    Server-Sent Events stream of system statistics
+    
+    Sends the current snapshot, then every changed snapshot (at most once
+    per refresh interval). Clients that get 503 fall back to polling
+    /api/v2/system/stats.
+    """
+    system_stats = getattr(app.state, 'system_stats', None)
+    if not system_stats:
+        raise HTTPException(status_code=503, detail="System stats not available")
+    
+    queue = system_stats.subscribe()
+    if queue is None:
+        raise HTTPException(status_code=503, detail="Too many stats subscribers")
+    
+    return StreamingResponse(
+        system_stats.events(queue),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # nginx: do not buffer the stream
         }
+    )
 
 # ==================================================
 # DIAGNOSTIC ENDPOINTS
@@ -996,6 +1158,10 @@ async def submit_observation(request: Request):
     """
     Simple observation endpoint for Arduino/SenseBox devices
     Compatible with existing sensor infrastructure
+    
+    With ?mode=async (or OBSERVATION_INGEST_MODE=async) the observation is
+    recorded and 202 Accepted is returned right away; IPFS storage and
+    payment complete in the background. Poll /observe/status/{observation_id}.
     """
     try:
         data = await request.json()
@@ -1008,6 +1174,30 @@ async def submit_observation(request: Request):
         if not device_id or not readings:
             raise HTTPException(status_code=400, detail="Missing device_id or readings")
         
+        # Async ingest: record now, finish IPFS/Stellar in the background
+        mode = request.query_params.get('mode', config.ingest.mode).lower()
+        ingest_queue = getattr(app.state, 'ingest_queue', None)
+        if mode == 'async' and ingest_queue:
+            job = await ingest_queue.submit(
+                device_id=device_id,
+                readings=readings,
+                location=location,
+                metadata=data.get('metadata', {})
+            )
+            if job:
+                return JSONResponse(
+                    status_code=202,
+                    content={
+                        "success": True,
+                        "observation_id": job.observation_id,
+                        "status": job.status,
+                        "content_cid": job.observation_data.get("content_cid"),
+                        "status_url": f"/observe/status/{job.observation_id}",
+                        "message": "Observation accepted for processing"
+                    }
+                )
+            # Queue full or database unavailable - process synchronously
+        
         # Use observation service if available
         if hasattr(app.state, 'observation_service'):
             # Process observation through service
@@ -1023,6 +1213,7 @@ async def submit_observation(request: Request):
                 "observation_id": result.observation_id,
                 "ipfs_cid": result.ipfs_cid,
                 "stellar_tx_hash": result.stellar_tx_hash,
+                "stellar_op_index": result.stellar_op_index,
                 "tokens_distributed": str(result.tokens_distributed),
                 "blockchain_verified": result.blockchain_verified,
                 "reciprocal_value": float(result.tokens_distributed),
@@ -1039,6 +1230,113 @@ async def submit_observation(request: Request):
         logger.error(f"Error in observation submission: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/observe/status/{observation_id}")
+async def get_observation_status(observation_id: str):
+    """
+    Processing status of an observation accepted in async mode
+    
+    Recent jobs are answered from the ingest queue; older ones from the
+    database record.
+    """
+    ingest_queue = getattr(app.state, 'ingest_queue', None)
+    if ingest_queue:
+        status = ingest_queue.get_status(observation_id)
+        if status:
+            return status
+    
+    if hasattr(app.state, 'observation_service'):
+        try:
+            status = await app.state.observation_service.get_observation_status(observation_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid observation_id")
+        if status:
+            return status
+    
+    raise HTTPException(status_code=404, detail=f"Observation {observation_id} not found")
+
+@app.get("/observe/verify/{observation_id}")
+async def verify_observation(observation_id: str, fresh: bool = False):
+    """
+    Independently verify an observation against IPFS and Stellar
+    
+    Results for unchanged references are served from the verification
+    cache; ?fresh=true forces a new check.
+    """
+    verification = getattr(app.state, 'verification', None)
+    if not verification:
+        raise HTTPException(status_code=503, detail="Verification unavailable (IPFS and Stellar required)")
+    
+    result = await verification.verify_observation(observation_id, use_cache=not fresh)
+    return result.to_dict()
+
+@app.post("/observe/batch")
+async def submit_observation_batch(request: Request):
+    """
+    Batch observation endpoint for many readings in one request
+
+    Accepts either a list of observations or an object with an
+    'observations' list. When a top-level device_id is given (a senseBox
+    flushing its offline buffer), items without their own device_id
+    inherit it.
+
+    Returns per-item results; a failing item does not fail the batch.
+    """
+    try:
+        data = await request.json()
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON payload: {str(e)}")
+
+    try:
+        if isinstance(data, list):
+            observations = data
+            default_device_id = None
+        elif isinstance(data, dict):
+            observations = data.get('observations')
+            default_device_id = data.get('device_id')
+        else:
+            observations = None
+            default_device_id = None
+
+        if not isinstance(observations, list) or not observations:
+            raise HTTPException(status_code=400, detail="Missing or empty 'observations' list")
+
+        if not hasattr(app.state, 'observation_service'):
+            return {
+                "success": True,
+                "message": "Observations received",
+                "total": len(observations)
+            }
+
+        service = app.state.observation_service
+        if len(observations) > service.MAX_BATCH_SIZE:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Batch too large: {len(observations)} items (max {service.MAX_BATCH_SIZE})"
+            )
+
+        if default_device_id:
+            for item in observations:
+                if isinstance(item, dict) and not item.get('device_id'):
+                    item['device_id'] = default_device_id
+
+        results = await service.process_observation_batch(observations)
+        accepted = sum(1 for r in results if r and r.get("success"))
+
+        return {
+            "success": accepted == len(observations),
+            "total": len(observations),
+            "accepted": accepted,
+            "failed": len(observations) - accepted,
+            "results": results,
+            "message": f"{accepted} of {len(observations)} observations processed"
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in batch observation submission: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 # ==================================================
 # MAIN ENTRY POINT
 # ==================================================
@@ -1092,7 +1390,9 @@ def main():
         port=config.API_PORT,
         reload=config.AUTO_RELOAD if hasattr(config, 'AUTO_RELOAD') else False,
         log_level=config.LOG_LEVEL.lower(),
-        access_log=True
+        access_log=True,
+        # Bounded wait for long-lived connections such as the stats stream
+        timeout_graceful_shutdown=config.API_GRACEFUL_SHUTDOWN_TIMEOUT
     )
 
 if __name__ == "__main__":
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+Metrics - In-process counters, gauges and histograms
+Rendered in the Prometheus text exposition format at /metrics
+
+Dependency-free on purpose: services record into the module-level
+registry (``metrics``) and main.py renders it on scrape. Label values are
+passed as keyword arguments, or bound once for hot paths:
+
+    STAGE_SECONDS = metrics.histogram(
+        "ubec_example_seconds", "Example duration", ["stage"]
+    )
+    STAGE_SECONDS.observe(0.12, stage="ipfs_store")
+
+    _PAYMENT_SECONDS = STAGE_SECONDS.labels(stage="payment")
+    with _PAYMENT_SECONDS.time():
+        ...
+
+Recording is a plain attribute update on the event loop thread - no locks
+and no allocation per event. Point-in-time values (pool usage, queue
+depth) are not tracked on the hot path at all; services expose
+collect_metrics(), which ServiceRegistry calls on each scrape.
+
+Design Principles Applied:
+- Principle #10: Clear separation of concerns
+- Principle #12: Method singularity - one metrics registry
+
+Attribution: This project uses the services of Claude and Anthropic PBC.
+"""
+
+import bisect
+import math
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Seconds; Prometheus defaults extended for batching windows and slow upstreams
+DEFAULT_BUCKETS = (
+    0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0
+)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text format"""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value (integers without a trailing .0)"""
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    """Common label handling for all metric types"""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[LabelValues, Any] = {}
+
+    def labels(self, **labels):
+        """
+        Child series for one label set
+
+        Hot paths should bind children once (at import or construction) and
+        call inc()/observe() on them - no per-call key building or allocation.
+        """
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects labels {list(self.labelnames)}, got {sorted(labels)}"
+            )
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            child = self._new_child()
+            self._children[key] = child
+        return child
+
+    def clear(self) -> None:
+        """Drop all series (for gauges rebuilt on every scrape)"""
+        self._children.clear()
+
+    def render(self) -> List[str]:
+        """Text exposition lines for this metric"""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}"
+        ]
+        for key, child in sorted(self._children.items()):
+            lines.extend(self._samples(key, child))
+        return lines
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self, key: LabelValues, child) -> Iterator[str]:
+        raise NotImplementedError
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        self.value += amount
+
+
+class _GaugeChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = float(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # +Inf last
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    @contextmanager
+    def time(self):
+        """Observe the duration of a with-block"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count (e.g. successes per stage)"""
+
+    type_name = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        """Increase the counter (amount must not be negative)"""
+        self.labels(**labels).inc(amount)
+
+    def value(self, **labels) -> float:
+        """Current value for one label set"""
+        return self.labels(**labels).value
+
+    def _samples(self, key, child) -> Iterator[str]:
+        yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+
+
+class Gauge(_Metric):
+    """Value that goes up and down (e.g. queue depth)"""
+
+    type_name = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float, **labels) -> None:
+        self.labels(**labels).set(value)
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        self.labels(**labels).inc(amount)
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.labels(**labels).dec(amount)
+
+    def value(self, **labels) -> float:
+        """Current value for one label set"""
+        return self.labels(**labels).value
+
+    def _samples(self, key, child) -> Iterator[str]:
+        yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (e.g. stage latency in seconds)"""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets if not math.isinf(b)))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float, **labels) -> None:
+        """Record one observation"""
+        self.labels(**labels).observe(value)
+
+    def time(self, **labels):
+        """Observe the duration of a with-block"""
+        return self.labels(**labels).time()
+
+    def count(self, **labels) -> int:
+        """Number of observations for one label set"""
+        return self.labels(**labels).count
+
+    def _samples(self, key, child) -> Iterator[str]:
+        bucket_names = self.labelnames + ("le",)
+        bounds = [_format_value(b) for b in self.buckets] + ["+Inf"]
+
+        cumulative = 0
+        for bound, bucket_count in zip(bounds, child.counts):
+            cumulative += bucket_count
+            labels = _format_labels(bucket_names, key + (bound,))
+            yield f"{self.name}_bucket{labels} {cumulative}"
+
+        labels = _format_labels(self.labelnames, key)
+        yield f"{self.name}_sum{labels} {_format_value(child.sum)}"
+        yield f"{self.name}_count{labels} {child.count}"
+
+
+class MetricsRegistry:
+    """
+    Named collection of metrics
+
+    counter()/gauge()/histogram() return the existing metric when the
+    name is already registered, so modules can declare their metrics at
+    import time without coordinating.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines: List[str] = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].render())
+        return "\n".join(lines) + "\n"
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = cls(name, documentation, labelnames, **kwargs)
+            self._metrics[name] = metric
+        elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+            raise ValueError(f"Metric {name} already registered with a different type or labels")
+        return metric
+
+
+# Process-wide registry rendered by GET /metrics
+metrics = MetricsRegistry()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# ============================================================
+# DATABASE POOL INSTRUMENTATION
+# ============================================================
+
+POOL_ACQUIRE_SECONDS = metrics.histogram(
+    "ubec_db_pool_acquire_seconds",
+    "Time spent waiting for a database connection from the pool",
+    ["pool"]
+)
+
+
+class InstrumentedPool:
+    """
+    asyncpg pool wrapper that records connection acquire wait time
+
+    Supports the ``async with pool.acquire() as conn`` form used across the
+    code base; every other attribute is delegated to the wrapped pool.
+    """
+
+    def __init__(self, pool: Any, name: str = "default"):
+        self._pool = pool
+        self.name = name
+        self._acquire_seconds = POOL_ACQUIRE_SECONDS.labels(pool=name)
+
+    @asynccontextmanager
+    async def acquire(self, *, timeout: Optional[float] = None):
+        started = time.perf_counter()
+        conn = await self._pool.acquire(timeout=timeout)
+        self._acquire_seconds.observe(time.perf_counter() - started)
+        try:
+            yield conn
+        finally:
+            await self._pool.release(conn)
+
+    def collect_metrics(self, registry: "MetricsRegistry") -> None:
+        """Record pool saturation (connections in use vs. maximum)"""
+        size = self._pool.get_size()
+        idle = self._pool.get_idle_size()
+        connections = registry.gauge(
+            "ubec_db_pool_connections",
+            "Open database connections by state",
+            ["pool", "state"]
+        )
+        connections.set(size - idle, pool=self.name, state="in_use")
+        connections.set(idle, pool=self.name, state="idle")
+        registry.gauge(
+            "ubec_db_pool_max_connections",
+            "Configured maximum pool size",
+            ["pool"]
+        ).set(self._pool.get_max_size(), pool=self.name)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._pool, name)
+
+
+"""
+Attribution: This project uses the services of Claude and Anthropic PBC
+to inform our decisions and recommendations.
+"""
@@ -0,0 +1,50 @@
+-- ============================================================
+-- Observation Outbox Migration
+-- Durable retry queue for failed or deferred IPFS pins and
+-- UBECrc payouts (see outbox_service.py)
+--
+-- Run once:
+--   psql "$DATABASE_URL" -f observation_outbox_migration.sql
+--
+-- Attribution: This project uses the services of Claude and Anthropic PBC.
+-- ============================================================
+
+SET search_path TO phenomenological, public;
+
+CREATE TABLE IF NOT EXISTS phenomenological.observation_outbox (
+    outbox_id       bigserial PRIMARY KEY,
+    observation_id  uuid NOT NULL,
+    task_type       text NOT NULL
+                    CHECK (task_type IN ('ipfs_pin', 'stellar_payment')),
+    payload         jsonb NOT NULL,
+    status          text NOT NULL DEFAULT 'pending'
+                    CHECK (status IN ('pending', 'processing', 'completed', 'dead')),
+    attempts        integer NOT NULL DEFAULT 0,
+    max_attempts    integer NOT NULL DEFAULT 10,
+    next_attempt_at timestamptz NOT NULL DEFAULT now(),
+    locked_until    timestamptz,
+    last_error      text,
+    created_at      timestamptz NOT NULL DEFAULT now(),
+    updated_at      timestamptz NOT NULL DEFAULT now(),
+    completed_at    timestamptz,
+
+    -- One open task per observation and stage
+    CONSTRAINT observation_outbox_task_unique UNIQUE (observation_id, task_type)
+);
+
+COMMENT ON TABLE phenomenological.observation_outbox IS
+    'Pending IPFS pins and UBECrc payouts, retried with exponential backoff; status dead = gave up';
+
+-- Claim query: due pending tasks in order of next attempt
+CREATE INDEX IF NOT EXISTS idx_observation_outbox_due
+    ON phenomenological.observation_outbox (next_attempt_at)
+    WHERE status IN ('pending', 'processing');
+
+-- Depth metrics and dead-letter inspection
+CREATE INDEX IF NOT EXISTS idx_observation_outbox_status
+    ON phenomenological.observation_outbox (status, task_type);
+
+-- Pruning of completed tasks past their retention
+CREATE INDEX IF NOT EXISTS idx_observation_outbox_completed
+    ON phenomenological.observation_outbox (completed_at)
+    WHERE status = 'completed';
@@ -13,15 +13,136 @@ Attribution: This project uses the services of Claude and Anthropic PBC.
 """
 
 import logging
+import asyncio
+import functools
+import time
 import uuid
 import json
-from typing import Dict, Any, Optional
-from datetime import datetime, timezone
+from typing import Dict, Any, Optional, List, Set
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 from dataclasses import dataclass, asdict
 
+from ipfs_cid import compute_json_cid
+from lru_cache import TTLCache
+from metrics import metrics
+
 logger = logging.getLogger(__name__)
 
+# Pipeline metrics (rendered at /metrics). Stage durations include any
+# batching window the stage waits in - the latency a caller actually sees.
+STAGE_SECONDS = metrics.histogram(
+    "ubec_observation_stage_seconds",
+    "Duration of one observation pipeline stage",
+    ["stage"]
+)
+STAGE_TOTAL = metrics.counter(
+    "ubec_observation_stage_total",
+    "Observation pipeline stage outcomes (failure = raised or returned no result)",
+    ["stage", "outcome"]
+)
+PIPELINE_SECONDS = metrics.histogram(
+    "ubec_observation_pipeline_seconds",
+    "End-to-end duration of process_observation / process_observation_batch",
+    ["mode"]
+)
+_SINGLE_SECONDS = PIPELINE_SECONDS.labels(mode="single")
+_BATCH_SECONDS = PIPELINE_SECONDS.labels(mode="batch")
+
+# Observer id and payment addresses of devices, creating observers for
+# unknown devices in the same statement. Where a device has several
+# observer rows (before observer_device_id_migration.sql), the newest one
+# with a payment address wins. A device created concurrently by another
+# request conflicts on the unique device_id index and is left out of the
+# result; the caller looks it up again.
+_RESOLVE_DEVICES_SQL = """
+    WITH wanted AS (
+        SELECT DISTINCT unnest($1::text[]) AS device_id
+    ),
+    existing AS (
+        SELECT DISTINCT ON (external_identity->>'device_id')
+            external_identity->>'device_id' AS device_id,
+            id,
+            essence
+        FROM phenomenological.observers
+        WHERE external_identity->>'device_id' = ANY($1::text[])
+        ORDER BY
+            external_identity->>'device_id',
+            COALESCE(essence->>'device_muxed_wallet', essence->>'owner_stellar') IS NULL,
+            created_at DESC
+    ),
+    created AS (
+        INSERT INTO phenomenological.observers (
+            observer_type,
+            external_identity,
+            essence,
+            sensory_capacities
+        )
+        SELECT
+            'device',
+            jsonb_build_object('device_id', wanted.device_id, 'type', 'sensor'),
+            $2::jsonb,
+            $3::jsonb
+        FROM wanted
+        WHERE NOT EXISTS (
+            SELECT 1 FROM existing WHERE existing.device_id = wanted.device_id
+        )
+        ON CONFLICT DO NOTHING
+        RETURNING external_identity->>'device_id' AS device_id, id, essence
+    )
+    SELECT
+        device_id,
+        id,
+        essence->>'device_muxed_wallet' AS muxed_wallet,
+        essence->>'owner_stellar' AS owner_stellar,
+        false AS created
+    FROM existing
+    UNION ALL
+    SELECT
+        device_id,
+        id,
+        essence->>'device_muxed_wallet',
+        essence->>'owner_stellar',
+        true
+    FROM created
+"""
+
+
+def _timed_stage(stage: str):
+    """Record duration and outcome of an async pipeline stage method"""
+    seconds = STAGE_SECONDS.labels(stage=stage)
+    succeeded = STAGE_TOTAL.labels(stage=stage, outcome="success")
+    failed = STAGE_TOTAL.labels(stage=stage, outcome="failure")
+    
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            outcome = failed
+            try:
+                result = await func(*args, **kwargs)
+                if result:
+                    outcome = succeeded
+                return result
+            finally:
+                seconds.observe(time.perf_counter() - started)
+                outcome.inc()
+        return wrapper
+    return decorator
+
+
+@dataclass
+class DeviceRecord:
+    """Observer row and payment addresses of one device"""
+    observer_id: str
+    muxed_wallet: Optional[str] = None
+    owner_stellar: Optional[str] = None
+    
+    @property
+    def payment_address(self) -> Optional[str]:
+        """Muxed address, or the owner's base address as fallback"""
+        return self.muxed_wallet or self.owner_stellar
+
 
 @dataclass
 class ObservationResult:
@@ -33,6 +154,7 @@ class ObservationResult:
     blockchain_verified: bool
     timestamp: str
     muxed_address: Optional[str] = None  # The muxed address used for payment
+    stellar_op_index: Optional[int] = None  # Operation index within a batched payment tx
     
     def to_dict(self) -> dict:
         """Convert to dictionary for API responses"""
@@ -43,8 +165,25 @@ class ObservationResult:
             "tokens_distributed": str(self.tokens_distributed),
             "blockchain_verified": self.blockchain_verified,
             "timestamp": self.timestamp,
-            "muxed_address": self.muxed_address
+            "muxed_address": self.muxed_address,
+            "stellar_op_index": self.stellar_op_index
         }
+    
+    @classmethod
+    def from_observation_data(cls, observation_data: dict) -> "ObservationResult":
+        """Rebuild a result from a stored observation payload (for retries)"""
+        return cls(
+            observation_id=observation_data["observation_id"],
+            ipfs_cid=observation_data.get("ipfs_cid"),
+            stellar_tx_hash=observation_data.get("stellar_tx_hash"),
+            tokens_distributed=Decimal(observation_data.get("tokens_distributed", "0")),
+            blockchain_verified=bool(
+                observation_data.get("ipfs_cid") or observation_data.get("stellar_tx_hash")
+            ),
+            timestamp=observation_data["timestamp"],
+            muxed_address=observation_data.get("muxed_address"),
+            stellar_op_index=observation_data.get("stellar_op_index")
+        )
 
 
 class ObservationService:
@@ -63,12 +202,19 @@ class ObservationService:
     BASE_OBSERVATION_VALUE = Decimal("7.44")  # Base value per observation
     SENSOR_BONUS = Decimal("0.50")  # Additional for sensor data
     
+    # Batch ingest limits
+    MAX_BATCH_SIZE = 500  # Maximum readings accepted per batch request
+    BATCH_CONCURRENCY = 10  # Concurrent IPFS/Stellar calls per batch
+    
     def __init__(
         self,
         ipfs_service: Optional[Any] = None,
         stellar_service: Optional[Any] = None,
         database: Optional[Any] = None,
-        phenomenological_db: Optional[Any] = None
+        phenomenological_db: Optional[Any] = None,
+        device_cache_size: int = 10000,
+        device_cache_ttl: float = 300.0,
+        device_cache_unpaid_ttl: float = 30.0
     ):
         """
         Initialize observation service
@@ -78,6 +224,10 @@ class ObservationService:
             stellar_service: Stellar network service instance
             database: Database connection
             phenomenological_db: Phenomenological database (can be same as database)
+            device_cache_size: Resolved devices kept in memory (LRU)
+            device_cache_ttl: Seconds a resolved device is reused
+            device_cache_unpaid_ttl: Seconds for devices without a payment
+                address (registrations in other processes show up sooner)
         """
         self.ipfs = ipfs_service
         self.stellar = stellar_service
@@ -89,16 +239,21 @@ class ObservationService:
         self.stellar_available = stellar_service is not None and getattr(stellar_service, 'can_send_payments', False)
         self.db_available = database is not None or phenomenological_db is not None
         
-        # Cache for observer and phenomenon IDs
-        self._observer_cache = {}
+        # Resolved devices (observer + payment address) and phenomenon ID
+        self._device_cache = TTLCache(maxsize=device_cache_size, ttl=device_cache_ttl, name="device")
+        self._device_cache_unpaid_ttl = device_cache_unpaid_ttl
         self._default_phenomenon_id = None
         
+        # Durable retry of failed stages (OutboxService, attached by main.py)
+        self.outbox = None
+        
         mode = "Reciprocal Economy Mode" if self.stellar_available else "Observation Mode"
         logger.info(f"Observation Service initialized ({mode})")
         logger.info(f"  IPFS: {'✓' if self.ipfs_available else '✗'}")
         logger.info(f"  Stellar: {'✓' if self.stellar_available else '✗'}")
         logger.info(f"  Database: {'✓' if self.db_available else '✗'}")
     
+    @_timed_stage("muxed_lookup")
     async def _get_device_muxed_address(self, device_id: str) -> Optional[str]:
         """
         Look up the muxed Stellar address for a device
@@ -107,97 +262,114 @@ class ObservationService:
             device_id: Device identifier
             
         Returns:
-            Muxed address (M...) if found, None otherwise
+            Muxed address (M...), or the owner's base address as fallback;
+            None if the device has no payment address configured
         """
-        if not self.db_available:
-            return None
+        record = (await self._resolve_devices({device_id})).get(device_id)
         
-        try:
-            async with self.db.pool.acquire() as conn:
-                # Look up device's muxed address from observers table
-                result = await conn.fetchrow("""
-                    SELECT 
-                        essence->>'device_muxed_wallet' as muxed_wallet,
-                        essence->>'owner_stellar' as owner_stellar
-                    FROM phenomenological.observers
-                    WHERE external_identity->>'device_id' = $1
-                    LIMIT 1
-                """, device_id)
-                
-                if result:
-                    muxed_wallet = result['muxed_wallet']
-                    owner_stellar = result['owner_stellar']
-                    
-                    if muxed_wallet:
-                        logger.info(f"Found muxed address for device {device_id}: {muxed_wallet[:15]}...")
-                        return muxed_wallet
-                    elif owner_stellar:
-                        logger.info(f"Found base address for device {device_id}: {owner_stellar[:10]}...")
-                        return owner_stellar
-                    else:
-                        logger.warning(f"Device {device_id} has no payment address configured")
-                else:
-                    logger.warning(f"Device {device_id} not found in database")
-                    
-        except Exception as e:
-            logger.error(f"Error looking up device address: {e}")
+        if record and record.payment_address:
+            logger.debug(f"Payment address for device {device_id}: {record.payment_address[:15]}...")
+            return record.payment_address
         
+        if record:
+            logger.warning(f"Device {device_id} has no payment address configured")
         return None
     
+    @_timed_stage("muxed_lookup_batch")
+    async def _get_device_muxed_addresses(self, device_ids: Set[str]) -> Dict[str, str]:
+        """
+        Look up payment addresses for many devices in a single query
+        
+        Args:
+            device_ids: Device identifiers
+            
+        Returns:
+            Mapping of device_id to muxed address (or base address as fallback)
+        """
+        records = await self._resolve_devices(device_ids)
+        addresses = {
+            device_id: record.payment_address
+            for device_id, record in records.items() if record.payment_address
+        }
+        
+        missing = len(device_ids) - len(addresses)
+        if missing:
+            logger.info(f"{missing} of {len(device_ids)} devices have no payment address configured")
+        
+        return addresses
+    
     async def _get_or_create_observer(self, device_id: str) -> Optional[str]:
         """Get or create an observer record for the device"""
-        if not self.db_available:
-            return None
+        record = (await self._resolve_devices({device_id})).get(device_id)
+        return record.observer_id if record else None
+    
+    async def _resolve_devices(self, device_ids: Set[str]) -> Dict[str, DeviceRecord]:
+        """
+        Resolve devices to observer and payment addresses in one round trip
         
-        # Check cache first
-        if device_id in self._observer_cache:
-            return self._observer_cache[device_id]
+        Unknown devices get an observer row in the same statement. Records
+        are cached for device_cache_ttl (device_cache_unpaid_ttl without a
+        payment address); register_observer calls invalidate_device(), so
+        a wallet registered through this process is used right away.
         
-        schema = "phenomenological"
+        Args:
+            device_ids: Device identifiers
+            
+        Returns:
+            Mapping of device_id to DeviceRecord (devices that could not
+            be resolved are missing)
+        """
+        if not self.db_available or not hasattr(self.db, 'pool') or not device_ids:
+            return {}
+        
+        records = {}
+        unresolved = []
+        for device_id in device_ids:
+            record = self._device_cache.get(device_id)
+            if record is None:
+                unresolved.append(device_id)
+            else:
+                records[device_id] = record
+        if not unresolved:
+            return records
         
+        essence = json.dumps({"capabilities": ["environmental_monitoring"]})
+        sensory_capacities = json.dumps({"sensors": ["temperature", "humidity"]})
         try:
-            if hasattr(self.db, 'pool'):
-                async with self.db.pool.acquire() as conn:
-                    # First try to find existing observer by device_id in external_identity
-                    existing = await conn.fetchrow(f"""
-                        SELECT id FROM {schema}.observers 
-                        WHERE external_identity->>'device_id' = $1
-                        LIMIT 1
-                    """, device_id)
-                    
-                    if existing:
-                        observer_id = str(existing['id'])
-                        self._observer_cache[device_id] = observer_id
-                        return observer_id
-                    
-                    # Create new observer
-                    new_observer = await conn.fetchrow(f"""
-                        INSERT INTO {schema}.observers (
-                            observer_type,
-                            external_identity,
-                            essence,
-                            sensory_capacities
-                        ) VALUES (
-                            'device',
-                            $1::jsonb,
-                            $2::jsonb,
-                            $3::jsonb
-                        )
-                        RETURNING id
-                    """, 
-                    json.dumps({"device_id": device_id, "type": "sensor"}),
-                    json.dumps({"capabilities": ["environmental_monitoring"]}),
-                    json.dumps({"sensors": ["temperature", "humidity"]})
-                    )
-                    
-                    observer_id = str(new_observer['id'])
-                    self._observer_cache[device_id] = observer_id
-                    logger.info(f"Created new observer for device {device_id}")
-                    return observer_id
-                    
+            async with self.db.pool.acquire() as conn:
+                rows = await conn.fetch(_RESOLVE_DEVICES_SQL, unresolved, essence, sensory_capacities)
+                
+                # Lost a first-contact race: the other insert is committed now
+                raced = set(unresolved) - {row['device_id'] for row in rows}
+                if raced:
+                    rows += await conn.fetch(_RESOLVE_DEVICES_SQL, list(raced), essence, sensory_capacities)
         except Exception as e:
-            logger.error(f"Failed to get/create observer: {e}")
-            return None
+            logger.error(f"Failed to resolve devices: {e}")
+            return records
+        
+        for row in rows:
+            record = DeviceRecord(
+                observer_id=str(row['id']),
+                muxed_wallet=row['muxed_wallet'],
+                owner_stellar=row['owner_stellar']
+            )
+            records[row['device_id']] = record
+            self._device_cache.set(
+                row['device_id'], record,
+                ttl=None if record.payment_address else self._device_cache_unpaid_ttl
+            )
+            if row['created']:
+                logger.info(f"Created new observer for device {row['device_id']}")
+        
+        return records
+    
+    def invalidate_device(self, device_id: str) -> None:
+        """Forget the cached observer and payment address of a device"""
+        self._device_cache.invalidate(device_id)
+    
+    def collect_metrics(self, registry) -> None:
+        """Report device cache size (called per /metrics scrape)"""
+        self._device_cache.collect_metrics(registry)
     
     async def _get_or_create_phenomenon(self) -> Optional[str]:
         """Get or create a default environmental phenomenon"""
@@ -270,6 +442,218 @@ class ObservationService:
         Returns:
             ObservationResult with processing details
         """
+        with _SINGLE_SECONDS.time():
+            return await self._process_observation(
+                device_id, readings, location, metadata
+            )
+    
+    async def _process_observation(
+        self,
+        device_id: str,
+        readings: Dict[str, float],
+        location: Dict[str, float],
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> ObservationResult:
+        """Pipeline body of process_observation"""
+        result, observation_data = self._prepare_observation(
+            device_id, readings, location, metadata
+        )
+        
+        deferred = []  # Failed stages handed to the outbox
+        
+        # Step 1: Store on IPFS (permanent storage)
+        if self.ipfs_available:
+            if not await self._store_on_ipfs(result, observation_data):
+                deferred.append((observation_data, "ipfs_pin", "ipfs_storage_failed"))
+        
+        # Step 2: Look up muxed address and send reciprocal tokens
+        if self.stellar_available:
+            try:
+                # Look up the device's muxed address from database
+                muxed_address = await self._get_device_muxed_address(device_id)
+                
+                if muxed_address:
+                    if not await self._distribute_tokens(result, observation_data, muxed_address):
+                        deferred.append((observation_data, "stellar_payment", "payment_failed"))
+                else:
+                    logger.info(f"No muxed address found for device {device_id} - skipping payment")
+                    logger.info(f"  Register the device via /api/v2/observers/register to enable payments")
+                    
+            except Exception as e:
+                logger.error(f"Token distribution failed: {e}", exc_info=True)
+        
+        # Step 3: Record in database (for queries and analysis)
+        if self.db_available:
+            try:
+                if await self.record_observation(observation_data):
+                    logger.info(f"Observation recorded in database: {result.observation_id}")
+                    
+                    # Step 4: Defer failed stages for background retry
+                    if deferred and self.outbox:
+                        await self.outbox.enqueue_many(deferred)
+            except Exception as e:
+                logger.error(f"Database recording failed: {e}")
+        
+        return result
+    
+    async def process_observation_batch(
+        self,
+        observations: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Process many observations in one call
+        
+        Readings may come from many devices or from a single senseBox
+        flushing its offline buffer. Payment addresses are resolved with a
+        single query, IPFS pins and payments run with bounded concurrency,
+        and all rows are written to the database over one connection.
+        
+        Args:
+            observations: List of dicts with device_id, readings, location
+                and optional metadata
+            
+        Returns:
+            Per-item results in input order. Each item carries its index,
+            a success flag and either the ObservationResult fields or an error.
+            Non-fatal problems (IPFS, payment, database) are listed in 'errors'.
+        """
+        with _BATCH_SECONDS.time():
+            return await self._process_observation_batch(observations)
+    
+    async def _process_observation_batch(
+        self,
+        observations: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Pipeline body of process_observation_batch"""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(observations)
+        prepared = []
+        
+        # Step 0: Validate items and prepare observation payloads
+        for index, item in enumerate(observations):
+            if not isinstance(item, dict):
+                results[index] = {"index": index, "success": False, "error": "Item must be an object"}
+                continue
+            
+            device_id = item.get('device_id')
+            readings = item.get('readings')
+            
+            if not device_id or not readings or not isinstance(readings, dict):
+                results[index] = {"index": index, "success": False, "error": "Missing device_id or readings"}
+                continue
+            
+            result, observation_data = self._prepare_observation(
+                device_id,
+                readings,
+                item.get('location') or {},
+                item.get('metadata')
+            )
+            prepared.append((index, result, observation_data, []))
+        
+        if not prepared:
+            return results
+        
+        # Step 1: Resolve payment addresses for all devices at once
+        muxed_addresses = {}
+        if self.stellar_available:
+            device_ids = {observation_data["device_id"] for _, _, observation_data, _ in prepared}
+            muxed_addresses = await self._get_device_muxed_addresses(device_ids)
+        
+        # Step 2: IPFS storage and token distribution with bounded concurrency
+        # (batch pinners and payment batchers bound their own upstream calls, so
+        # those stages skip the semaphore and can fill whole batches)
+        semaphore = asyncio.Semaphore(self.BATCH_CONCURRENCY)
+        ipfs_semaphore = None if getattr(self.ipfs, "batches_pins", False) else semaphore
+        payment_semaphore = (
+            None if getattr(self.stellar, "payment_batcher", None) else semaphore
+        )
+        
+        async def process_item(result, observation_data, errors):
+            if self.ipfs_available:
+                if ipfs_semaphore:
+                    async with ipfs_semaphore:
+                        stored = await self._store_on_ipfs(result, observation_data)
+                else:
+                    stored = await self._store_on_ipfs(result, observation_data)
+                
+                if not stored:
+                    errors.append("ipfs_storage_failed")
+            
+            if self.stellar_available:
+                muxed_address = muxed_addresses.get(observation_data["device_id"])
+                if not muxed_address:
+                    errors.append("no_payment_address")
+                    return
+                
+                if payment_semaphore:
+                    async with payment_semaphore:
+                        paid = await self._distribute_tokens(result, observation_data, muxed_address)
+                else:
+                    paid = await self._distribute_tokens(result, observation_data, muxed_address)
+                
+                if not paid:
+                    errors.append("payment_failed")
+        
+        outcomes = await asyncio.gather(
+            *(process_item(result, observation_data, errors)
+              for _, result, observation_data, errors in prepared),
+            return_exceptions=True
+        )
+        
+        # Step 3: Record all observations in the database
+        recorded: Set[str] = set()
+        if self.db_available:
+            recorded = await self.record_observations(
+                [observation_data for _, _, observation_data, _ in prepared]
+            )
+        
+        deferred = []  # Failed stages handed to the outbox
+        for (index, result, observation_data, errors), outcome in zip(prepared, outcomes):
+            if isinstance(outcome, Exception):
+                logger.error(f"Batch item {index} failed: {outcome}")
+                results[index] = {"index": index, "success": False, "error": str(outcome)}
+                if self.outbox and result.observation_id in recorded:
+                    # Recorded with unfinished stages - the outbox finishes them
+                    if self.ipfs_available and not result.ipfs_cid:
+                        deferred.append((observation_data, "ipfs_pin", str(outcome)))
+                    if (self.stellar_available and not result.stellar_tx_hash
+                            and muxed_addresses.get(observation_data["device_id"])):
+                        deferred.append((observation_data, "stellar_payment", str(outcome)))
+                continue
+            
+            if self.db_available and result.observation_id not in recorded:
+                errors.append("database_recording_failed")
+            elif self.outbox:
+                if "ipfs_storage_failed" in errors:
+                    deferred.append((observation_data, "ipfs_pin", "ipfs_storage_failed"))
+                if "payment_failed" in errors:
+                    deferred.append((observation_data, "stellar_payment", "payment_failed"))
+            
+            item_result = {"index": index, "success": True}
+            item_result.update(result.to_dict())
+            item_result["errors"] = errors
+            results[index] = item_result
+        
+        if deferred:
+            await self.outbox.enqueue_many(deferred)
+        
+        succeeded = sum(1 for r in results if r and r["success"])
+        logger.info(f"Batch processed: {succeeded}/{len(observations)} observations accepted")
+        
+        return results
+    
+    def _prepare_observation(
+        self,
+        device_id: str,
+        readings: Dict[str, float],
+        location: Dict[str, float],
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> tuple:
+        """
+        Create the initial result and observation payload for a reading
+        
+        Returns:
+            Tuple of (ObservationResult, observation_data dict)
+        """
         observation_id = str(uuid.uuid4())
         timestamp = datetime.now(timezone.utc).isoformat()
         
@@ -297,88 +681,200 @@ class ObservationService:
             }
         }
         
-        # Step 1: Store on IPFS (permanent storage)
-        if self.ipfs_available:
-            try:
-                from ipfs_service import ObservationData
-                
-                ipfs_obs = ObservationData(
-                    device_id=device_id,
-                    timestamp=timestamp,
-                    readings=readings,
-                    location=location,
-                    metadata=observation_data["metadata"]
-                )
-                
-                result.ipfs_cid = await self.ipfs.store_observation(ipfs_obs)
-                if result.ipfs_cid:
-                    logger.info(f"Observation stored on IPFS: {result.ipfs_cid}")
-                    observation_data["ipfs_cid"] = result.ipfs_cid
-                    result.blockchain_verified = True
-            except Exception as e:
-                logger.error(f"IPFS storage failed: {e}")
+        # CID of the IPFS document, known before anything is uploaded
+        observation_data["content_cid"] = compute_json_cid(
+            self._ipfs_document(observation_data).to_dict()
+        )
         
-        # Step 2: Look up muxed address and send reciprocal tokens
-        if self.stellar_available:
-            try:
-                # Look up the device's muxed address from database
-                muxed_address = await self._get_device_muxed_address(device_id)
-                
-                if muxed_address:
-                    result.muxed_address = muxed_address
-                    
-                    # Calculate token amount
-                    token_amount = self.BASE_OBSERVATION_VALUE
-                    if "sensor" in device_id.lower() or "sb" in device_id.lower():
-                        token_amount += self.SENSOR_BONUS
-                    
-                    # Send UBECrc tokens to muxed address
-                    logger.info(f"Sending {token_amount} UBECrc to muxed address {muxed_address[:15]}...")
-                    
-                    tx_result = await self.stellar.send_ubecrc_payment(
-                        destination=muxed_address,
-                        amount=str(token_amount),
-                        memo=f"obs:{observation_id[:8]}"
+        return result, observation_data
+    
+    def _ipfs_document(self, observation_data: dict) -> Any:
+        """Build the ObservationData document that is pinned to IPFS"""
+        from ipfs_service import ObservationData
+        
+        return ObservationData(
+            device_id=observation_data["device_id"],
+            timestamp=observation_data["timestamp"],
+            readings=observation_data["readings"],
+            location=observation_data["location"],
+            metadata=observation_data["metadata"]
+        )
+    
+    def _calculate_token_amount(self, device_id: str) -> Decimal:
+        """Calculate UBECrc reward for an observation from this device"""
+        token_amount = self.BASE_OBSERVATION_VALUE
+        if "sensor" in device_id.lower() or "sb" in device_id.lower():
+            token_amount += self.SENSOR_BONUS
+        return token_amount
+    
+    @_timed_stage("ipfs_store")
+    async def _store_on_ipfs(self, result: ObservationResult, observation_data: dict) -> bool:
+        """
+        Store observation on IPFS and update result/payload with the CID
+        
+        Returns:
+            True if a CID was obtained
+        """
+        try:
+            ipfs_obs = self._ipfs_document(observation_data)
+            
+            result.ipfs_cid = await self.ipfs.store_observation(ipfs_obs)
+            if result.ipfs_cid:
+                logger.info(f"Observation stored on IPFS: {result.ipfs_cid}")
+                observation_data["ipfs_cid"] = result.ipfs_cid
+                result.blockchain_verified = True
+                return True
+        except Exception as e:
+            logger.error(f"IPFS storage failed: {e}")
+        
+        return False
+    
+    @_timed_stage("payment")
+    async def _distribute_tokens(
+        self,
+        result: ObservationResult,
+        observation_data: dict,
+        muxed_address: str,
+        recorded: bool = False
+    ) -> bool:
+        """
+        Send UBECrc tokens for an observation to the device's muxed address
+        
+        The hash of each signed payment transaction is kept in
+        observation_data["stellar_pending_tx"] (and, for a recorded
+        observation, written to the database before the submit). While it
+        is there the payout may already be applied: a retry looks it up
+        instead of paying again, until Horizon shows it can no longer be.
+        
+        Args:
+            recorded: The observation row exists (retry paths), so the
+                pending transaction is persisted before submitting
+        
+        Returns:
+            True if the payment succeeded
+        """
+        result.muxed_address = muxed_address
+        
+        try:
+            # Calculate token amount
+            token_amount = self._calculate_token_amount(observation_data["device_id"])
+            
+            pending = observation_data.get("stellar_pending_tx")
+            if pending:
+                tx_result = await self.stellar.confirm_transaction(pending, wait=False)
+                if tx_result.get("success"):
+                    tx_result["op_index"] = pending.get("op_index")
+                    logger.info(f"Earlier payment {pending['transaction_hash'][:16]}... was applied")
+                    return self._payment_sent(
+                        result, observation_data, muxed_address, token_amount, tx_result
                     )
-                    
-                    if tx_result and tx_result.get("success"):
-                        result.stellar_tx_hash = tx_result.get("transaction_hash")
-                        result.tokens_distributed = token_amount
-                        result.blockchain_verified = True
-                        logger.info(f"✓ Distributed {token_amount} UBECrc to {muxed_address[:15]}...")
-                        logger.info(f"  TX: {result.stellar_tx_hash[:16]}...")
-                        
-                        observation_data["stellar_tx_hash"] = result.stellar_tx_hash
-                        observation_data["tokens_distributed"] = str(token_amount)
-                        observation_data["muxed_address"] = muxed_address
-                    else:
-                        logger.warning(f"Payment failed: {tx_result}")
-                else:
-                    logger.info(f"No muxed address found for device {device_id} - skipping payment")
-                    logger.info(f"  Register the device via /api/v2/observers/register to enable payments")
-                    
-            except Exception as e:
-                logger.error(f"Token distribution failed: {e}", exc_info=True)
+                if tx_result.get("pending"):
+                    logger.warning(
+                        f"Payment {pending['transaction_hash'][:16]}... still unresolved - not paying again"
+                    )
+                    return False
+                # Never applied and never will be: safe to build a new transaction
+                observation_data.pop("stellar_pending_tx", None)
+            
+            async def on_signed(envelope: dict) -> None:
+                observation_data["stellar_pending_tx"] = envelope
+                if recorded:
+                    await self._save_pending_payment(observation_data)
+            
+            # Send UBECrc tokens to muxed address
+            logger.info(f"Sending {token_amount} UBECrc to muxed address {muxed_address[:15]}...")
+            
+            # Batched payouts share one multi-operation transaction
+            send = (
+                self.stellar.payment_batcher.submit
+                if getattr(self.stellar, "payment_batcher", None)
+                else self.stellar.send_ubecrc_payment
+            )
+            tx_result = await send(
+                destination=muxed_address,
+                amount=str(token_amount),
+                memo=f"obs:{result.observation_id[:8]}",
+                on_signed=on_signed
+            )
+            
+            if tx_result and tx_result.get("success"):
+                return self._payment_sent(
+                    result, observation_data, muxed_address, token_amount, tx_result
+                )
+            
+            if not (tx_result and tx_result.get("pending")):
+                # Definitely rejected (or never submitted)
+                observation_data.pop("stellar_pending_tx", None)
+            logger.warning(f"Payment failed: {tx_result}")
+        except Exception as e:
+            logger.error(f"Token distribution failed: {e}", exc_info=True)
         
-        # Step 3: Record in database (for queries and analysis)
-        if self.db_available:
-            try:
-                await self.record_observation(observation_data)
-                logger.info(f"Observation recorded in database: {observation_id}")
-            except Exception as e:
-                logger.error(f"Database recording failed: {e}")
+        return False
+    
+    def _payment_sent(
+        self,
+        result: ObservationResult,
+        observation_data: dict,
+        muxed_address: str,
+        token_amount: Decimal,
+        tx_result: dict
+    ) -> bool:
+        """Store a confirmed payment in the result and payload"""
+        result.stellar_tx_hash = tx_result.get("transaction_hash")
+        result.stellar_op_index = tx_result.get("op_index")
+        result.tokens_distributed = token_amount
+        result.blockchain_verified = True
+        logger.info(f"✓ Distributed {token_amount} UBECrc to {muxed_address[:15]}...")
+        logger.info(f"  TX: {result.stellar_tx_hash[:16]}...")
         
-        return result
+        observation_data.pop("stellar_pending_tx", None)
+        observation_data["stellar_tx_hash"] = result.stellar_tx_hash
+        if result.stellar_op_index is not None:
+            observation_data["stellar_op_index"] = result.stellar_op_index
+        observation_data["tokens_distributed"] = str(token_amount)
+        observation_data["muxed_address"] = muxed_address
+        return True
+    
+    async def _save_pending_payment(self, observation_data: dict) -> None:
+        """
+        Write a signed, not yet submitted payment to the database
+        
+        Stored in the observation and its open payment retry task, so a
+        retry after a crash looks the transaction up instead of paying
+        again. Raises if the write fails, which cancels the submit.
+        """
+        pending = json.dumps({"stellar_pending_tx": observation_data["stellar_pending_tx"]})
+        observation_id = uuid.UUID(observation_data["observation_id"])
+        
+        async with self.db.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute("""
+                    UPDATE phenomenological.observations
+                    SET perception = perception || $2::jsonb
+                    WHERE observation_id = $1
+                """, observation_id, pending)
+                await conn.execute("""
+                    UPDATE phenomenological.observation_outbox
+                    SET payload = payload || $2::jsonb,
+                        updated_at = now()
+                    WHERE observation_id = $1
+                      AND task_type = 'stellar_payment'
+                      AND status <> 'completed'
+                """, observation_id, pending)
     
-    async def record_observation(self, observation_data: dict) -> None:
+    @_timed_stage("db_record")
+    async def record_observation(self, observation_data: dict) -> bool:
         """
         Record observation in the phenomenological database
         
         Args:
             observation_data: Complete observation data
+            
+        Returns:
+            True if the row was written
         """
         if not self.db_available:
-            return
+            return False
         
         try:
             schema = "phenomenological"
@@ -389,14 +885,14 @@ class ObservationService:
             
             if not observer_id:
                 logger.warning("Could not create observer - skipping database record")
-                return
+                return False
             
             # Get or create phenomenon
             phenomenon_id = await self._get_or_create_phenomenon()
             
             if not phenomenon_id:
                 logger.warning("Could not create phenomenon - skipping database record")
-                return
+                return False
             
             # Create observation record
             if hasattr(self.db, 'pool'):
@@ -407,22 +903,387 @@ class ObservationService:
                             phenomenon_id,
                             perception,
                             attention_quality,
-                            clarity
+                            clarity,
+                            observation_id,
+                            ipfs_hash,
+                            stellar_tx_hash
                         ) VALUES (
                             $1::uuid,
                             $2::uuid,
                             $3::jsonb,
                             0.8,
-                            0.7
+                            0.7,
+                            $4::uuid,
+                            $5,
+                            $6
                         )
                     """,
                     uuid.UUID(observer_id),
                     uuid.UUID(phenomenon_id),
-                    json.dumps(observation_data)
+                    json.dumps(observation_data),
+                    uuid.UUID(observation_data["observation_id"]),
+                    observation_data.get("ipfs_cid"),
+                    observation_data.get("stellar_tx_hash")
                     )
+                return True
                     
         except Exception as e:
             logger.error(f"Failed to record observation in database: {e}")
+        
+        return False
+    
+    async def complete_observation(
+        self,
+        result: ObservationResult,
+        observation_data: dict
+    ) -> bool:
+        """
+        Run the IPFS and payment stages for an already recorded observation
+        
+        Stages that already succeeded (CID or transaction hash present)
+        are skipped, so the call is safe to repeat on retry.
+        
+        Args:
+            result: ObservationResult being completed
+            observation_data: Observation payload as recorded
+            
+        Returns:
+            True if no stage needs to be retried
+        """
+        complete = True
+        
+        if self.ipfs_available and not result.ipfs_cid:
+            if not await self._store_on_ipfs(result, observation_data):
+                complete = False
+        
+        if self.stellar_available and not result.stellar_tx_hash:
+            muxed_address = await self._get_device_muxed_address(observation_data["device_id"])
+            if muxed_address:
+                if not await self._distribute_tokens(
+                    result, observation_data, muxed_address, recorded=True
+                ):
+                    complete = False
+            else:
+                logger.info(f"No muxed address found for device {observation_data['device_id']} - skipping payment")
+        
+        return complete
+    
+    async def update_observation_record(self, observation_data: dict) -> bool:
+        """
+        Update a recorded observation with its IPFS CID, payment and status
+        
+        Args:
+            observation_data: Observation payload including observation_id
+            
+        Returns:
+            True if a row was updated
+        """
+        if not self.db_available or not hasattr(self.db, 'pool'):
+            return False
+        
+        try:
+            async with self.db.pool.acquire() as conn:
+                status = await conn.execute("""
+                    UPDATE phenomenological.observations
+                    SET perception = $2::jsonb,
+                        ipfs_hash = $3,
+                        stellar_tx_hash = $4
+                    WHERE observation_id = $1::uuid
+                """,
+                uuid.UUID(observation_data["observation_id"]),
+                json.dumps(observation_data),
+                observation_data.get("ipfs_cid"),
+                observation_data.get("stellar_tx_hash")
+                )
+                return status.endswith(" 1")
+        except Exception as e:
+            logger.error(f"Failed to update observation record: {e}")
+            return False
+    
+    async def record_stage_results(self, stage_results: List[tuple]) -> bool:
+        """
+        Write completed retry stages back to their observations
+        
+        Only the columns and payload fields of the given stage are changed,
+        so an IPFS retry and a payment retry for the same observation do
+        not overwrite each other. When the other stage has no open outbox
+        task or already has its result, ingest_status becomes 'completed'.
+        
+        Args:
+            stage_results: List of (task_type, observation_data) with
+                task_type 'ipfs_pin' or 'stellar_payment'
+            
+        Returns:
+            True if the updates were written
+        """
+        if not self.db_available or not hasattr(self.db, 'pool'):
+            return False
+        
+        pins = [
+            (uuid.UUID(data["observation_id"]), data.get("ipfs_cid"),
+             json.dumps({"ipfs_cid": data.get("ipfs_cid")}))
+            for task_type, data in stage_results if task_type == "ipfs_pin"
+        ]
+        payments = [
+            (uuid.UUID(data["observation_id"]), data.get("stellar_tx_hash"),
+             json.dumps({
+                 key: data.get(key)
+                 for key in ("stellar_tx_hash", "stellar_op_index", "tokens_distributed", "muxed_address")
+                 if data.get(key) is not None
+             }))
+            for task_type, data in stage_results if task_type == "stellar_payment"
+        ]
+        
+        try:
+            async with self.db.pool.acquire() as conn:
+                async with conn.transaction():
+                    if pins:
+                        await conn.executemany("""
+                            UPDATE phenomenological.observations AS o
+                            SET ipfs_hash = $2,
+                                perception = o.perception || $3::jsonb || CASE
+                                    WHEN o.stellar_tx_hash IS NULL AND EXISTS (
+                                        SELECT 1 FROM phenomenological.observation_outbox x
+                                        WHERE x.observation_id = o.observation_id
+                                          AND x.task_type = 'stellar_payment'
+                                          AND x.status <> 'completed'
+                                    ) THEN '{}'::jsonb
+                                    ELSE '{"ingest_status": "completed"}'::jsonb
+                                END
+                            WHERE o.observation_id = $1
+                        """, pins)
+                    if payments:
+                        # Runs after the pins, so a pin recorded above counts as done
+                        await conn.executemany("""
+                            UPDATE phenomenological.observations AS o
+                            SET stellar_tx_hash = $2,
+                                perception = (o.perception - 'stellar_pending_tx') || $3::jsonb || CASE
+                                    WHEN o.ipfs_hash IS NULL AND EXISTS (
+                                        SELECT 1 FROM phenomenological.observation_outbox x
+                                        WHERE x.observation_id = o.observation_id
+                                          AND x.task_type = 'ipfs_pin'
+                                          AND x.status <> 'completed'
+                                    ) THEN '{}'::jsonb
+                                    ELSE '{"ingest_status": "completed"}'::jsonb
+                                END
+                            WHERE o.observation_id = $1
+                        """, payments)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to record retried stages: {e}")
+            return False
+    
+    async def get_observation_status(self, observation_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Read the stored processing state of an observation
+        
+        Args:
+            observation_id: Observation UUID
+            
+        Returns:
+            Dict with ingest status, IPFS CID, transaction hash and the
+            payout's operation index within it, or None
+            
+        Raises:
+            ValueError: If observation_id is not a valid UUID
+        """
+        observation_uuid = uuid.UUID(observation_id)
+        
+        if not self.db_available or not hasattr(self.db, 'pool'):
+            return None
+        
+        try:
+            async with self.db.pool.acquire() as conn:
+                row = await conn.fetchrow("""
+                    SELECT 
+                        ipfs_hash,
+                        stellar_tx_hash,
+                        perception->>'ingest_status' as ingest_status,
+                        perception->>'tokens_distributed' as tokens_distributed,
+                        (perception->>'stellar_op_index')::int as stellar_op_index,
+                        perception->>'muxed_address' as muxed_address
+                    FROM phenomenological.observations
+                    WHERE observation_id = $1::uuid
+                    LIMIT 1
+                """, observation_uuid)
+        except Exception as e:
+            logger.error(f"Failed to read observation status: {e}")
+            return None
+        
+        if not row:
+            return None
+        
+        return {
+            "observation_id": observation_id,
+            "status": row['ingest_status'] or "completed",
+            "ipfs_cid": row['ipfs_hash'],
+            "stellar_tx_hash": row['stellar_tx_hash'],
+            "stellar_op_index": row['stellar_op_index'],
+            "muxed_address": row['muxed_address'],
+            "tokens_distributed": row['tokens_distributed'] or "0"
+        }
+    
+    async def claim_pending_observations(
+        self,
+        limit: int = 1000,
+        lease_seconds: float = 600.0
+    ) -> List[dict]:
+        """
+        Claim observations accepted for async ingest but not yet completed
+        
+        Only rows whose ingest lease has expired (or that never had one)
+        are claimed, so observations still queued by a live process are
+        left alone. FOR UPDATE SKIP LOCKED keeps processes that recover at
+        the same time from claiming the same rows; each claimed row gets a
+        new lease.
+        
+        Args:
+            limit: Maximum number of observations to claim
+            lease_seconds: Length of the new lease
+            
+        Returns:
+            List of observation payloads (with their new ingest_lease_until)
+        """
+        if not self.db_available or not hasattr(self.db, 'pool'):
+            return []
+        
+        try:
+            async with self.db.pool.acquire() as conn:
+                rows = await conn.fetch("""
+                    UPDATE phenomenological.observations AS o
+                    SET perception = o.perception || jsonb_build_object(
+                        'ingest_lease_until',
+                        to_char((now() + make_interval(secs => $2)) AT TIME ZONE 'UTC',
+                                'YYYY-MM-DD"T"HH24:MI:SS.US"+00:00"')
+                    )
+                    FROM (
+                        SELECT observation_id, perceived_at
+                        FROM phenomenological.observations
+                        WHERE perception->>'ingest_status' IN ('pending', 'retrying')
+                          AND (perception->>'ingest_lease_until' IS NULL
+                               OR (perception->>'ingest_lease_until')::timestamptz < now())
+                        ORDER BY perceived_at
+                        LIMIT $1
+                        FOR UPDATE SKIP LOCKED
+                    ) AS due
+                    WHERE o.observation_id = due.observation_id
+                      AND o.perceived_at = due.perceived_at
+                    RETURNING o.perception
+                """, limit, float(lease_seconds))
+        except Exception as e:
+            logger.error(f"Failed to claim pending observations: {e}")
+            return []
+        
+        pending = []
+        for row in rows:
+            perception = row['perception']
+            if isinstance(perception, str):
+                perception = json.loads(perception)
+            pending.append(perception)
+        return pending
+    
+    async def renew_ingest_lease(
+        self,
+        observation_data: dict,
+        lease_seconds: float
+    ) -> Optional[bool]:
+        """
+        Extend the ingest lease of an observation this process still holds
+        
+        The lease held (observation_data["ingest_lease_until"]) is the
+        ownership token: the row is only updated if it still carries it.
+        
+        Args:
+            observation_data: Observation payload including its lease
+            lease_seconds: Length of the new lease
+            
+        Returns:
+            True if the lease was renewed, False if another process
+            claimed the observation, None if the database could not be
+            asked (ownership unknown)
+        """
+        if not self.db_available or not hasattr(self.db, 'pool'):
+            return None
+        
+        lease_until = (
+            datetime.now(timezone.utc) + timedelta(seconds=lease_seconds)
+        ).isoformat()
+        try:
+            async with self.db.pool.acquire() as conn:
+                status = await conn.execute("""
+                    UPDATE phenomenological.observations
+                    SET perception = perception || jsonb_build_object('ingest_lease_until', $3::text)
+                    WHERE observation_id = $1::uuid
+                      AND perception->>'ingest_lease_until' = $2
+                """,
+                uuid.UUID(observation_data["observation_id"]),
+                observation_data.get("ingest_lease_until"),
+                lease_until
+                )
+        except Exception as e:
+            logger.error(f"Failed to renew ingest lease: {e}")
+            return None
+        
+        if status.endswith(" 1"):
+            observation_data["ingest_lease_until"] = lease_until
+            return True
+        return False
+    
+    @_timed_stage("db_record_batch")
+    async def record_observations(self, observations: List[dict]) -> Set[str]:
+        """
+        Record many observations in the phenomenological database
+        
+        Observers for all devices are resolved in one query and all rows
+        are written with one binary COPY (create_observations_bulk).
+        Observations whose device has no observer are skipped.
+        
+        Args:
+            observations: List of complete observation data dicts
+            
+        Returns:
+            observation_ids of the rows written (empty if the write failed)
+        """
+        if not self.db_available or not observations:
+            return set()
+        
+        try:
+            # Resolve observers for all devices in one query
+            devices = await self._resolve_devices({obs.get("device_id") for obs in observations})
+            observer_ids = {device_id: record.observer_id for device_id, record in devices.items()}
+            
+            phenomenon_id = await self._get_or_create_phenomenon()
+            
+            if not phenomenon_id:
+                logger.warning("Could not create phenomenon - skipping database record")
+                return set()
+            
+            rows = []
+            for obs in observations:
+                observer_id = observer_ids.get(obs.get("device_id"))
+                if not observer_id:
+                    logger.warning(f"Could not create observer for {obs.get('device_id')} - skipping row")
+                    continue
+                rows.append({
+                    "observer_id": uuid.UUID(observer_id),
+                    "phenomenon_id": uuid.UUID(phenomenon_id),
+                    "perception": obs,
+                    "attention_quality": 0.8,
+                    "clarity": 0.7,
+                    "observation_id": uuid.UUID(obs["observation_id"]),
+                    "ipfs_hash": obs.get("ipfs_cid"),
+                    "stellar_tx_hash": obs.get("stellar_tx_hash")
+                })
+            
+            if rows:
+                await self.db.create_observations_bulk(rows)
+                logger.info(f"Recorded {len(rows)} observations in database")
+            
+            return {str(row["observation_id"]) for row in rows}
+            
+        except Exception as e:
+            logger.error(f"Failed to record observations in database: {e}")
+            return set()
     
     async def close(self):
         """Cleanup resources"""
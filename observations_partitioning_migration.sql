@@ -0,0 +1,253 @@
+-- ============================================================
+-- Observations Partitioning Migration
+-- Monthly range partitions on perceived_at, one index per access path
+--
+-- phenomenological.observations was a single heap carrying thirteen
+-- indexes, several of them duplicates (idx_observations_time,
+-- idx_perceived_at and idx_observations_perceived_at all index
+-- perceived_at). Every insert maintained all of them.
+--
+-- After this migration:
+-- - observations is partitioned by month (UTC) on perceived_at, plus a
+--   default partition for readings outside the prepared months
+-- - time-bounded queries prune partitions; old months can be detached
+--   (detach_observation_partitions) instead of deleted row by row
+-- - each partition carries seven indexes:
+--     PRIMARY KEY (id, perceived_at)
+--     UNIQUE (observation_id, perceived_at)   lookups and keyset paging by observation_id
+--     idx_observations_perceived_at           time ranges, latest-first listings
+--     idx_observations_observer               (observer_id, perceived_at) per-observer history
+--     idx_observations_phenomenon             phenomenon_id (FK cascades)
+--     idx_observations_ipfs_hash              partial, verification
+--     idx_observations_stellar_tx             partial, verification
+--   dropped: idx_observations_time, idx_perceived_at, idx_observer,
+--   idx_observations_ipfs, idx_observations_observation_id,
+--   idx_observations_quality (no query filters on it), unique_observation
+--
+-- Unique keys of a partitioned table must contain the partition key, so
+-- observation_id is unique per perceived_at rather than globally; it is
+-- generated with gen_random_uuid() and never supplied twice.
+--
+-- The app keeps partitions ahead of time (PartitionMaintenanceService,
+-- OBSERVATION_PARTITIONS_* settings); ensure_observation_partitions()
+-- can also be run by hand or from cron.
+--
+-- Run once, during a quiet period (the copy holds an exclusive lock on
+-- observations until it commits):
+--   psql "$DATABASE_URL" -f observations_partitioning_migration.sql
+-- The original table is kept as observations_unpartitioned; drop it
+-- once the new table is verified.
+--
+-- Attribution: This project uses the services of Claude and Anthropic PBC.
+-- ============================================================
+
+\set ON_ERROR_STOP on
+
+SET search_path TO phenomenological, public;
+
+BEGIN;
+
+LOCK TABLE phenomenological.observations IN ACCESS EXCLUSIVE MODE;
+
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_partitioned_table
+        WHERE partrelid = 'phenomenological.observations'::regclass
+    ) THEN
+        RAISE EXCEPTION 'phenomenological.observations is already partitioned';
+    END IF;
+END $$;
+
+-- ------------------------------------------------------------
+-- 1. Move the heap aside (index names are schema-wide, so rename them)
+-- ------------------------------------------------------------
+
+ALTER TABLE phenomenological.observations RENAME TO observations_unpartitioned;
+
+DO $$
+DECLARE
+    idx record;
+BEGIN
+    FOR idx IN
+        SELECT c.relname
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = 'phenomenological.observations_unpartitioned'::regclass
+    LOOP
+        EXECUTE format(
+            'ALTER INDEX phenomenological.%I RENAME TO %I',
+            idx.relname, left(idx.relname, 50) || '_unpart'
+        );
+    END LOOP;
+END $$;
+
+UPDATE phenomenological.observations_unpartitioned
+SET perceived_at = COALESCE(created_at, now())
+WHERE perceived_at IS NULL;
+
+-- ------------------------------------------------------------
+-- 2. Partitioned table
+-- ------------------------------------------------------------
+
+CREATE TABLE phenomenological.observations (
+    LIKE phenomenological.observations_unpartitioned
+    INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING COMMENTS INCLUDING STORAGE
+) PARTITION BY RANGE (perceived_at);
+
+ALTER TABLE phenomenological.observations
+    ALTER COLUMN perceived_at SET NOT NULL,
+    ADD CONSTRAINT observations_pkey PRIMARY KEY (id, perceived_at),
+    ADD CONSTRAINT unique_observation UNIQUE (observation_id, perceived_at),
+    ADD CONSTRAINT observations_observer_id_fkey
+        FOREIGN KEY (observer_id) REFERENCES phenomenological.observers (id) ON DELETE CASCADE,
+    ADD CONSTRAINT observations_phenomenon_id_fkey
+        FOREIGN KEY (phenomenon_id) REFERENCES phenomenological.phenomena (id) ON DELETE CASCADE;
+
+CREATE INDEX idx_observations_perceived_at
+    ON phenomenological.observations (perceived_at);
+CREATE INDEX idx_observations_observer
+    ON phenomenological.observations (observer_id, perceived_at);
+CREATE INDEX idx_observations_phenomenon
+    ON phenomenological.observations (phenomenon_id);
+CREATE INDEX idx_observations_ipfs_hash
+    ON phenomenological.observations (ipfs_hash) WHERE ipfs_hash IS NOT NULL;
+CREATE INDEX idx_observations_stellar_tx
+    ON phenomenological.observations (stellar_tx_hash) WHERE stellar_tx_hash IS NOT NULL;
+
+CREATE TABLE phenomenological.observations_default
+    PARTITION OF phenomenological.observations DEFAULT;
+
+-- ------------------------------------------------------------
+-- 3. Partition maintenance
+-- ------------------------------------------------------------
+
+-- Create the partition for the month containing p_month (UTC). Rows of
+-- that month already in the default partition are moved into it.
+-- Returns false if the partition exists.
+CREATE OR REPLACE FUNCTION phenomenological.create_observation_partition(p_month date)
+RETURNS boolean
+LANGUAGE plpgsql AS $$
+DECLARE
+    month_start timestamp := date_trunc('month', p_month::timestamp);
+    lower_bound timestamptz := month_start AT TIME ZONE 'UTC';
+    upper_bound timestamptz := (month_start + interval '1 month') AT TIME ZONE 'UTC';
+    partition_name text := 'observations_' || to_char(month_start, '"y"YYYY"m"MM');
+BEGIN
+    IF to_regclass('phenomenological.' || partition_name) IS NOT NULL THEN
+        RETURN false;
+    END IF;
+
+    EXECUTE format(
+        'CREATE TABLE phenomenological.%I
+         (LIKE phenomenological.observations INCLUDING DEFAULTS INCLUDING CONSTRAINTS)',
+        partition_name
+    );
+    EXECUTE format(
+        'WITH moved AS (
+             DELETE FROM phenomenological.observations_default
+             WHERE perceived_at >= $1 AND perceived_at < $2
+             RETURNING *
+         )
+         INSERT INTO phenomenological.%I SELECT * FROM moved',
+        partition_name
+    ) USING lower_bound, upper_bound;
+    EXECUTE format(
+        'ALTER TABLE phenomenological.observations
+         ATTACH PARTITION phenomenological.%I FOR VALUES FROM (%L) TO (%L)',
+        partition_name, lower_bound, upper_bound
+    );
+    RETURN true;
+END $$;
+
+-- Make sure partitions exist from the current month through
+-- months_ahead months ahead. Returns the number created.
+CREATE OR REPLACE FUNCTION phenomenological.ensure_observation_partitions(months_ahead integer DEFAULT 3)
+RETURNS integer
+LANGUAGE plpgsql AS $$
+DECLARE
+    this_month timestamp := date_trunc('month', now() AT TIME ZONE 'UTC');
+    month timestamp;
+    created integer := 0;
+BEGIN
+    FOR month IN
+        SELECT generate_series(this_month, this_month + make_interval(months => months_ahead), interval '1 month')
+    LOOP
+        IF phenomenological.create_observation_partition(month::date) THEN
+            created := created + 1;
+        END IF;
+    END LOOP;
+    RETURN created;
+END $$;
+
+-- Detach monthly partitions that ended more than keep_months months
+-- before the current month. Detached partitions stay in the schema as
+-- plain tables (archive, dump or drop them). Returns their names.
+-- Their rows are subtracted from the observations counter when
+-- system_stats_migration.sql is in place (no DELETE trigger fires).
+CREATE OR REPLACE FUNCTION phenomenological.detach_observation_partitions(keep_months integer)
+RETURNS SETOF text
+LANGUAGE plpgsql AS $$
+DECLARE
+    cutoff timestamp := date_trunc('month', now() AT TIME ZONE 'UTC') - make_interval(months => keep_months);
+    part record;
+    detached_rows bigint;
+BEGIN
+    IF keep_months < 1 THEN
+        RAISE EXCEPTION 'keep_months must be at least 1';
+    END IF;
+
+    FOR part IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'phenomenological.observations'::regclass
+          AND c.relname ~ '^observations_y[0-9]{4}m[0-9]{2}$'
+        ORDER BY c.relname
+    LOOP
+        IF to_timestamp(substring(part.relname FROM 15), 'YYYY"m"MM')::timestamp
+               + interval '1 month' <= cutoff THEN
+            IF to_regprocedure('phenomenological.bump_system_counter(text,bigint)') IS NOT NULL THEN
+                EXECUTE format('SELECT count(*) FROM phenomenological.%I', part.relname)
+                    INTO detached_rows;
+                PERFORM phenomenological.bump_system_counter('observations', -detached_rows);
+            END IF;
+            EXECUTE format(
+                'ALTER TABLE phenomenological.observations DETACH PARTITION phenomenological.%I',
+                part.relname
+            );
+            RETURN NEXT part.relname;
+        END IF;
+    END LOOP;
+END $$;
+
+-- ------------------------------------------------------------
+-- 4. Partitions for existing data (at most three years back; older
+--    readings stay in the default partition) and the next months
+-- ------------------------------------------------------------
+
+SELECT phenomenological.create_observation_partition(month::date)
+FROM generate_series(
+    GREATEST(
+        date_trunc('month', COALESCE(
+            (SELECT min(perceived_at) FROM phenomenological.observations_unpartitioned),
+            now()
+        ) AT TIME ZONE 'UTC'),
+        date_trunc('month', now() AT TIME ZONE 'UTC') - interval '36 months'
+    ),
+    date_trunc('month', now() AT TIME ZONE 'UTC'),
+    interval '1 month'
+) AS month;
+
+SELECT phenomenological.ensure_observation_partitions(3);
+
+-- ------------------------------------------------------------
+-- 5. Copy
+-- ------------------------------------------------------------
+
+INSERT INTO phenomenological.observations
+SELECT * FROM phenomenological.observations_unpartitioned;
+
+COMMIT;
+
+ANALYZE phenomenological.observations;
@@ -0,0 +1,109 @@
+-- ============================================================
+-- Observer Device ID Migration
+-- One observer per device, found by index instead of a scan
+--
+-- Every hot-path lookup filters observers on
+-- external_identity->>'device_id' (observation_service.py,
+-- phenomenological_db.py, phenomenological_api.py). The generic
+-- idx_observers_external_identity index does not serve that
+-- expression, so each lookup scanned the table, and concurrent first
+-- contact could create the same device twice.
+--
+-- This migration:
+-- 1. Merges duplicate observers per device_id. The survivor is the
+--    newest row with a payment address (else the newest row), the
+--    same row the observation pipeline already resolves to. Foreign
+--    keys pointing at a duplicate are moved to the survivor; the
+--    duplicate is kept, detached (its device_id moves to
+--    merged_device_id) and marked presence_continues = false.
+-- 2. Adds a unique btree expression index on the device_id, which the
+--    existing queries use as written and which create_observer and the
+--    observation pipeline rely on for their upserts.
+--
+-- Run once (CONCURRENTLY cannot run inside a transaction block):
+--   psql "$DATABASE_URL" -f observer_device_id_migration.sql
+-- If a device is created twice while it runs, the index build fails
+-- and leaves an invalid index: DROP INDEX idx_observers_device_id and
+-- run the file again.
+--
+-- Attribution: This project uses the services of Claude and Anthropic PBC.
+-- ============================================================
+
+SET search_path TO phenomenological, public;
+
+-- ------------------------------------------------------------
+-- 1. Merge duplicates
+-- ------------------------------------------------------------
+
+CREATE TEMP TABLE observer_device_merge AS
+SELECT id AS duplicate_id, survivor_id, device_id
+FROM (
+    SELECT
+        id,
+        external_identity->>'device_id' AS device_id,
+        first_value(id) OVER w AS survivor_id,
+        row_number() OVER w AS rank
+    FROM phenomenological.observers
+    WHERE external_identity->>'device_id' IS NOT NULL
+    WINDOW w AS (
+        PARTITION BY external_identity->>'device_id'
+        ORDER BY
+            COALESCE(essence->>'device_muxed_wallet', essence->>'owner_stellar') IS NULL,
+            created_at DESC
+    )
+) ranked
+WHERE rank > 1;
+
+DO $$
+DECLARE
+    ref record;
+    merged integer;
+BEGIN
+    SELECT count(*) INTO merged FROM observer_device_merge;
+    RAISE NOTICE 'Merging % duplicate observer row(s)', merged;
+
+    -- Repoint every single-column foreign key that references observers(id)
+    FOR ref IN
+        SELECT
+            c.conrelid::regclass AS table_name,
+            a.attname AS column_name
+        FROM pg_constraint c
+        JOIN pg_attribute a
+          ON a.attrelid = c.conrelid AND a.attnum = c.conkey[1]
+        WHERE c.contype = 'f'
+          AND c.confrelid = 'phenomenological.observers'::regclass
+          AND array_length(c.conkey, 1) = 1
+    LOOP
+        EXECUTE format(
+            'UPDATE %s t SET %I = m.survivor_id
+             FROM observer_device_merge m
+             WHERE t.%I = m.duplicate_id',
+            ref.table_name, ref.column_name, ref.column_name
+        );
+    END LOOP;
+END $$;
+
+UPDATE phenomenological.observers o
+SET external_identity = (o.external_identity - 'device_id')
+        || jsonb_build_object(
+            'merged_device_id', m.device_id,
+            'merged_into', m.survivor_id::text
+        ),
+    presence_continues = false
+FROM observer_device_merge m
+WHERE o.id = m.duplicate_id;
+
+DROP TABLE observer_device_merge;
+
+-- ------------------------------------------------------------
+-- 2. Unique device_id index
+-- ------------------------------------------------------------
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS idx_observers_device_id
+    ON phenomenological.observers ((external_identity->>'device_id'))
+    WHERE external_identity->>'device_id' IS NOT NULL;
+
+COMMENT ON INDEX phenomenological.idx_observers_device_id IS
+    'One observer per device; serves external_identity->>''device_id'' lookups and the ON CONFLICT of create_observer';
+
+ANALYZE phenomenological.observers;
@@ -0,0 +1,537 @@
+#!/usr/bin/env python3
+"""
+Outbox Service - Durable Retry of IPFS Pins and UBECrc Payouts
+Catches up observations whose upstream stages failed
+
+When Pinata or Horizon fails, the observation is still recorded, and the
+failed stage is written to the observation_outbox table (see
+observation_outbox_migration.sql). A background worker claims due tasks
+in bulk with FOR UPDATE SKIP LOCKED, retries them with exponential
+backoff, writes successful results back to the observation, and moves
+tasks that keep failing to the 'dead' state for inspection. Completed
+tasks are deleted once they are older than the retention period.
+
+Design Principles Applied:
+- Principle #2: Service pattern - no standalone execution
+- Principle #5: Strict async operations
+- Principle #10: Clear separation of concerns
+
+Attribution: This project uses the services of Claude and Anthropic PBC.
+"""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from typing import Dict, Any, Optional, List, Tuple
+
+from observation_service import ObservationResult
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxService:
+    """
+    DB-backed outbox for failed or deferred observation stages
+
+    Task types:
+    - ipfs_pin: store the observation document on IPFS
+    - stellar_payment: send the UBECrc payout to the device
+
+    Flow:
+    1. enqueue() records a task (never blocks on an upstream)
+    2. The worker claims due tasks in bulk and runs them concurrently
+    3. Success updates the observation row and completes the task
+    4. Failure schedules the next attempt (base_delay * 2^(attempts-1),
+       capped at max_delay) or marks the task dead after max_attempts
+    5. Every prune_interval the drain loop deletes tasks completed more
+       than completed_retention seconds ago
+    """
+
+    TASK_TYPES = ("ipfs_pin", "stellar_payment")
+
+    def __init__(
+        self,
+        database: Any,
+        observation_service: Any,
+        batch_size: int = 100,
+        concurrency: int = 10,
+        poll_interval: float = 5.0,
+        max_attempts: int = 10,
+        base_delay: float = 30.0,
+        max_delay: float = 3600.0,
+        lease_seconds: float = 300.0,
+        completed_retention: float = 7 * 86400.0,
+        prune_interval: float = 3600.0
+    ):
+        """
+        Initialize outbox service
+
+        Args:
+            database: PhenomenologicalDB instance (uses its pool)
+            observation_service: ObservationService that runs the stages
+            batch_size: Tasks claimed per drain cycle
+            concurrency: Tasks processed in parallel
+            poll_interval: Seconds between polls when the outbox is idle
+            max_attempts: Attempts before a task is dead-lettered
+            base_delay: Backoff base in seconds
+            max_delay: Backoff ceiling in seconds
+            lease_seconds: How long a claimed task stays locked to this worker
+            completed_retention: Seconds completed tasks are kept
+            prune_interval: Seconds between deletions of old completed tasks
+        """
+        self.db = database
+        self.observation_service = observation_service
+        self.batch_size = batch_size
+        self.concurrency = max(1, concurrency)
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.lease_seconds = lease_seconds
+        self.completed_retention = completed_retention
+        self.prune_interval = prune_interval
+
+        self._worker: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._running = False
+        self._next_prune = 0.0
+
+        # Counters since start (queue depth is read from the table)
+        self.enqueued = 0
+        self.completed = 0
+        self.retried = 0
+        self.dead_lettered = 0
+        self.pruned = 0
+
+        logger.info(
+            f"Outbox service initialized (batch {batch_size}, "
+            f"concurrency {self.concurrency}, max {max_attempts} attempts)"
+        )
+
+    async def start(self) -> None:
+        """Start the background drain worker"""
+        if self._running:
+            return
+
+        self._running = True
+        self._worker = asyncio.create_task(self._run())
+
+    async def enqueue(
+        self,
+        observation_data: dict,
+        task_type: str,
+        error: Optional[str] = None
+    ) -> bool:
+        """
+        Record one failed or deferred stage
+
+        Args:
+            observation_data: Observation payload (as recorded)
+            task_type: 'ipfs_pin' or 'stellar_payment'
+            error: Reason the stage did not complete
+
+        Returns:
+            True if the task was recorded
+        """
+        return await self.enqueue_many([(observation_data, task_type, error)]) > 0
+
+    async def enqueue_many(
+        self,
+        tasks: List[Tuple[dict, str, Optional[str]]]
+    ) -> int:
+        """
+        Record several failed or deferred stages in one round trip
+
+        An open task for the same observation and stage is reset to run
+        again rather than duplicated (a dead task with a fresh attempt
+        budget); a task a worker is processing right now is left to that
+        worker.
+
+        Args:
+            tasks: List of (observation_data, task_type, error)
+
+        Returns:
+            Number of tasks recorded
+        """
+        rows = [
+            (
+                uuid.UUID(observation_data["observation_id"]),
+                task_type,
+                json.dumps(observation_data),
+                self.max_attempts,
+                error
+            )
+            for observation_data, task_type, error in tasks
+            if task_type in self.TASK_TYPES
+        ]
+        if not rows:
+            return 0
+
+        try:
+            async with self.db.pool.acquire() as conn:
+                await conn.executemany("""
+                    INSERT INTO phenomenological.observation_outbox (
+                        observation_id, task_type, payload, max_attempts, last_error
+                    ) VALUES ($1, $2, $3::jsonb, $4, $5)
+                    ON CONFLICT (observation_id, task_type) DO UPDATE
+                    SET payload = EXCLUDED.payload,
+                        last_error = EXCLUDED.last_error,
+                        status = 'pending',
+                        attempts = CASE
+                            WHEN observation_outbox.status = 'dead' THEN 0
+                            ELSE observation_outbox.attempts
+                        END,
+                        next_attempt_at = now(),
+                        updated_at = now()
+                    WHERE observation_outbox.status NOT IN ('completed', 'processing')
+                """, rows)
+
+            self.enqueued += len(rows)
+            self._wakeup.set()
+            logger.info(f"Outbox: deferred {len(rows)} stage(s) for retry")
+            return len(rows)
+
+        except Exception as e:
+            logger.error(f"Failed to write outbox tasks: {e}")
+            return 0
+
+    async def drain_once(self) -> int:
+        """
+        Claim and process one batch of due tasks
+
+        Returns:
+            Number of tasks claimed
+        """
+        claimed = await self._claim()
+        if not claimed:
+            return 0
+
+        # Batch pinners and payment batchers bound their own upstream calls;
+        # their stages skip the semaphore so a drain fills whole batches
+        # instead of waiting out one batch window per `concurrency` tasks
+        service = self.observation_service
+        batched = {
+            "ipfs_pin": getattr(service.ipfs, "batches_pins", False),
+            "stellar_payment": bool(getattr(service.stellar, "payment_batcher", None))
+        }
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def run(row):
+            if batched.get(row["task_type"]):
+                return await self._process(row)
+            async with semaphore:
+                return await self._process(row)
+
+        # Keep the claim while the drain runs, so a slow drain is not
+        # reclaimed (and paid again) by another worker
+        heartbeat = asyncio.create_task(
+            self._extend_leases([row["outbox_id"] for row in claimed])
+        )
+        try:
+            outcomes = await asyncio.gather(*(run(row) for row in claimed), return_exceptions=True)
+        finally:
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+
+        succeeded: List[dict] = []
+        failed: List[Tuple[dict, str]] = []
+        for row, outcome in zip(claimed, outcomes):
+            if isinstance(outcome, Exception):
+                failed.append((row, str(outcome)))
+            elif outcome[0]:
+                succeeded.append(row)
+            else:
+                failed.append((row, outcome[1]))
+
+        unrecorded = await self._complete(succeeded)
+        await self._reschedule(failed + unrecorded)
+
+        logger.info(
+            f"Outbox drain: {len(succeeded) - len(unrecorded)} completed, "
+            f"{len(failed) + len(unrecorded)} failed of {len(claimed)}"
+        )
+        return len(claimed)
+
+    async def prune_completed(self) -> int:
+        """
+        Delete tasks completed more than completed_retention seconds ago
+
+        Returns:
+            Number of tasks deleted
+        """
+        try:
+            async with self.db.pool.acquire() as conn:
+                status = await conn.execute("""
+                    DELETE FROM phenomenological.observation_outbox
+                    WHERE status = 'completed'
+                      AND completed_at < now() - make_interval(secs => $1)
+                """, float(self.completed_retention))
+            deleted = int(status.split()[-1])
+        except Exception as e:
+            logger.error(f"Failed to prune completed outbox tasks: {e}")
+            return 0
+
+        if deleted:
+            self.pruned += deleted
+            logger.info(f"Outbox: pruned {deleted} completed task(s)")
+        return deleted
+
+    async def get_depth(self) -> Dict[str, Dict[str, int]]:
+        """
+        Current outbox depth by status and task type
+
+        Returns:
+            {"pending": {"ipfs_pin": n, ...}, "dead": {...}, ...}
+        """
+        depth: Dict[str, Dict[str, int]] = {}
+        try:
+            async with self.db.pool.acquire() as conn:
+                rows = await conn.fetch("""
+                    SELECT status, task_type, COUNT(*) AS count
+                    FROM phenomenological.observation_outbox
+                    WHERE status <> 'completed'
+                    GROUP BY status, task_type
+                """)
+            for row in rows:
+                depth.setdefault(row["status"], {})[row["task_type"]] = row["count"]
+        except Exception as e:
+            logger.error(f"Failed to read outbox depth: {e}")
+        return depth
+
+    def stats(self) -> dict:
+        """Counters since start"""
+        return {
+            "running": self._running,
+            "enqueued": self.enqueued,
+            "completed": self.completed,
+            "retried": self.retried,
+            "dead_lettered": self.dead_lettered,
+            "pruned": self.pruned
+        }
+
+    async def collect_metrics(self, registry) -> None:
+        """Report outbox depth by status and task (called per /metrics scrape)"""
+        depth = registry.gauge(
+            "ubec_outbox_tasks",
+            "Open outbox tasks by status and task type",
+            ["status", "task_type"]
+        )
+        depth.clear()
+        for status, tasks in (await self.get_depth()).items():
+            for task_type, count in tasks.items():
+                depth.set(count, status=status, task_type=task_type)
+
+    async def health_check(self) -> dict:
+        """Check outbox health (depth and counters)"""
+        depth = await self.get_depth()
+        dead = sum(depth.get("dead", {}).values())
+        return {
+            "status": "healthy" if self._running else "unhealthy",
+            "service": "outbox",
+            "depth": depth,
+            "pending": sum(depth.get("pending", {}).values()),
+            "dead": dead,
+            **self.stats()
+        }
+
+    async def _run(self) -> None:
+        """Drain continuously while work is due, otherwise poll"""
+        while self._running:
+            try:
+                claimed = await self.drain_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Outbox drain failed: {e}", exc_info=True)
+                claimed = 0
+
+            if time.monotonic() >= self._next_prune:
+                self._next_prune = time.monotonic() + self.prune_interval
+                await self.prune_completed()
+
+            # A full batch means a backlog - keep draining without waiting
+            if claimed >= self.batch_size:
+                continue
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _claim(self) -> List[dict]:
+        """Lock a batch of due tasks (expired leases are reclaimed)"""
+        async with self.db.pool.acquire() as conn:
+            rows = await conn.fetch("""
+                UPDATE phenomenological.observation_outbox AS o
+                SET status = 'processing',
+                    attempts = o.attempts + 1,
+                    locked_until = now() + make_interval(secs => $2),
+                    updated_at = now()
+                FROM (
+                    SELECT outbox_id
+                    FROM phenomenological.observation_outbox
+                    WHERE (status = 'pending' AND next_attempt_at <= now())
+                       OR (status = 'processing' AND locked_until < now())
+                    ORDER BY next_attempt_at
+                    LIMIT $1
+                    FOR UPDATE SKIP LOCKED
+                ) AS due
+                WHERE o.outbox_id = due.outbox_id
+                RETURNING o.outbox_id, o.task_type, o.payload, o.attempts, o.max_attempts
+            """, self.batch_size, float(self.lease_seconds))
+
+        claimed = []
+        for row in rows:
+            payload = row["payload"]
+            if isinstance(payload, str):
+                payload = json.loads(payload)
+            claimed.append({
+                "outbox_id": row["outbox_id"],
+                "task_type": row["task_type"],
+                "payload": payload,
+                "attempts": row["attempts"],
+                "max_attempts": row["max_attempts"]
+            })
+        return claimed
+
+    async def _extend_leases(self, outbox_ids: List[int]) -> None:
+        """Renew the lease of claimed tasks every third of lease_seconds"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                async with self.db.pool.acquire() as conn:
+                    await conn.execute("""
+                        UPDATE phenomenological.observation_outbox
+                        SET locked_until = now() + make_interval(secs => $2),
+                            updated_at = now()
+                        WHERE outbox_id = ANY($1::bigint[])
+                          AND status = 'processing'
+                    """, outbox_ids, float(self.lease_seconds))
+            except Exception as e:
+                logger.error(f"Failed to extend outbox leases: {e}")
+
+    async def _process(self, row: dict) -> Tuple[bool, Any]:
+        """
+        Run one stage
+
+        Returns:
+            (True, observation_data) on success, (False, error) otherwise
+        """
+        observation_data = row["payload"]
+        result = ObservationResult.from_observation_data(observation_data)
+        service = self.observation_service
+
+        # A stage completed on an earlier attempt only needs recording
+        if row["task_type"] == "ipfs_pin":
+            if result.ipfs_cid:
+                return True, observation_data
+            if not service.ipfs_available:
+                return False, "ipfs_unavailable"
+            if await service._store_on_ipfs(result, observation_data):
+                return True, observation_data
+            return False, "ipfs_storage_failed"
+
+        if result.stellar_tx_hash:
+            return True, observation_data
+        if not service.stellar_available:
+            return False, "stellar_unavailable"
+
+        muxed_address = await service._get_device_muxed_address(observation_data["device_id"])
+        if not muxed_address:
+            return False, "no_payment_address"
+        if await service._distribute_tokens(result, observation_data, muxed_address, recorded=True):
+            return True, observation_data
+        if observation_data.get("stellar_pending_tx"):
+            return False, "payment_unconfirmed"
+        return False, "payment_failed"
+
+    async def _complete(self, succeeded: List[dict]) -> List[Tuple[dict, str]]:
+        """
+        Write stage results back to observations and close the tasks
+
+        Returns:
+            (row, error) for tasks whose results could not be written; they
+            are retried with the results kept in their payload, so the
+            retry only writes them (an IPFS CID or transaction hash in the
+            payload skips the stage)
+        """
+        if not succeeded:
+            return []
+
+        recorded = await self.observation_service.record_stage_results(
+            [(row["task_type"], row["payload"]) for row in succeeded]
+        )
+        if not recorded:
+            logger.warning(f"Outbox: could not record {len(succeeded)} stage result(s) - retrying")
+            return [(row, "record_failed") for row in succeeded]
+
+        async with self.db.pool.acquire() as conn:
+            await conn.execute("""
+                UPDATE phenomenological.observation_outbox
+                SET status = 'completed',
+                    locked_until = NULL,
+                    last_error = NULL,
+                    completed_at = now(),
+                    updated_at = now()
+                WHERE outbox_id = ANY($1::bigint[])
+            """, [row["outbox_id"] for row in succeeded])
+
+        self.completed += len(succeeded)
+        return []
+
+    async def _reschedule(self, failed: List[Tuple[dict, str]]) -> None:
+        """
+        Back off failed tasks or move them to the dead-letter state
+
+        The payload is saved with the task, so results of stages that did
+        complete (e.g. a transaction hash) are not produced twice.
+        """
+        if not failed:
+            return
+
+        rows = []
+        for row, error in failed:
+            dead = row["attempts"] >= row["max_attempts"]
+            delay = min(self.base_delay * (2 ** (row["attempts"] - 1)), self.max_delay)
+            rows.append((
+                row["outbox_id"], "dead" if dead else "pending", float(delay), error,
+                json.dumps(row["payload"])
+            ))
+            if dead:
+                self.dead_lettered += 1
+                logger.error(
+                    f"Outbox task {row['outbox_id']} ({row['task_type']}) dead after "
+                    f"{row['attempts']} attempts: {error}"
+                )
+            else:
+                self.retried += 1
+
+        async with self.db.pool.acquire() as conn:
+            await conn.executemany("""
+                UPDATE phenomenological.observation_outbox
+                SET status = $2,
+                    next_attempt_at = now() + make_interval(secs => $3),
+                    locked_until = NULL,
+                    last_error = $4,
+                    payload = $5::jsonb,
+                    updated_at = now()
+                WHERE outbox_id = $1
+            """, rows)
+
+    async def close(self) -> None:
+        """Stop the worker; claimed tasks are reclaimed after their lease"""
+        self._running = False
+        if self._worker:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+        logger.info("Outbox service closed")
+
+
+"""
+Attribution: This project uses the services of Claude and Anthropic PBC
+to inform our decisions and recommendations.
+"""
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Partition Maintenance Service - Keeps monthly observation partitions ready
+Background upkeep for the partitioned observations table
+
+observations_partitioning_migration.sql partitions
+phenomenological.observations by month on perceived_at. This service
+calls its maintenance functions periodically:
+
+- ensure_observation_partitions(months_ahead): next months exist before
+  readings arrive, so inserts never land in the default partition
+- detach_observation_partitions(retention_months): optional; months
+  older than the retention window are detached (kept as plain tables,
+  not deleted)
+
+Running the functions from several app instances at once is safe; they
+skip partitions that already exist or are already detached.
+
+Design Principles Applied:
+- Principle #2: Service pattern - no standalone execution
+- Principle #5: Strict async operations
+- Principle #10: Clear separation of concerns
+
+Attribution: This project uses the services of Claude and Anthropic PBC.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PartitionMaintenanceService:
+    """
+    Periodic partition creation (and optional detachment) for observations
+    """
+
+    def __init__(
+        self,
+        database: Any,
+        months_ahead: int = 3,
+        retention_months: int = 0,
+        interval_seconds: float = 21600.0
+    ):
+        """
+        Initialize partition maintenance
+
+        Args:
+            database: PhenomenologicalDB instance (uses its pool)
+            months_ahead: Months prepared beyond the current one
+            retention_months: Detach months older than this (0 = keep all)
+            interval_seconds: Seconds between maintenance runs
+        """
+        self.db = database
+        self.months_ahead = months_ahead
+        self.retention_months = retention_months
+        self.interval_seconds = interval_seconds
+
+        self._worker: Optional[asyncio.Task] = None
+        self._running = False
+
+        self.partitions_created = 0
+        self.partitions_detached: List[str] = []
+        self.last_run_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+        logger.info(
+            f"Partition maintenance initialized ({months_ahead} months ahead, "
+            f"retention {retention_months or 'unlimited'} months)"
+        )
+
+    @staticmethod
+    async def is_partitioned(database: Any) -> bool:
+        """True once observations_partitioning_migration.sql has run"""
+        async with database.pool.acquire() as conn:
+            return bool(await conn.fetchval("""
+                SELECT EXISTS (
+                    SELECT 1 FROM pg_partitioned_table
+                    WHERE partrelid = to_regclass('phenomenological.observations')
+                )
+            """))
+
+    async def start(self) -> None:
+        """Run maintenance now and then every interval_seconds"""
+        if self._running:
+            return
+
+        self._running = True
+        self._worker = asyncio.create_task(self._run())
+
+    async def run_once(self) -> int:
+        """
+        Create upcoming partitions and detach expired ones
+
+        Returns:
+            Number of partitions created
+        """
+        async with self.db.pool.acquire() as conn:
+            created = await conn.fetchval(
+                "SELECT phenomenological.ensure_observation_partitions($1)",
+                self.months_ahead
+            )
+            detached = []
+            if self.retention_months > 0:
+                detached = [
+                    row[0] for row in await conn.fetch(
+                        "SELECT phenomenological.detach_observation_partitions($1)",
+                        self.retention_months
+                    )
+                ]
+
+        self.partitions_created += created
+        self.partitions_detached.extend(detached)
+        self.last_run_at = time.time()
+        self.last_error = None
+
+        if created:
+            logger.info(f"Created {created} observation partition(s)")
+        if detached:
+            logger.info(f"Detached observation partitions: {', '.join(detached)}")
+        return created
+
+    async def get_partitions(self) -> List[dict]:
+        """Attached partitions with their bounds and estimated row counts"""
+        async with self.db.pool.acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT
+                    c.relname AS name,
+                    pg_get_expr(c.relpartbound, c.oid) AS bounds,
+                    c.reltuples::bigint AS estimated_rows
+                FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = 'phenomenological.observations'::regclass
+                ORDER BY c.relname
+            """)
+        return [dict(row) for row in rows]
+
+    def stats(self) -> dict:
+        """Counters since start"""
+        return {
+            "running": self._running,
+            "months_ahead": self.months_ahead,
+            "retention_months": self.retention_months,
+            "partitions_created": self.partitions_created,
+            "partitions_detached": self.partitions_detached,
+            "last_run_at": self.last_run_at,
+            "last_error": self.last_error
+        }
+
+    async def collect_metrics(self, registry) -> None:
+        """Report partition count and default partition size (called per /metrics scrape)"""
+        try:
+            partitions = await self.get_partitions()
+        except Exception as e:
+            logger.error(f"Failed to read observation partitions: {e}")
+            return
+
+        registry.gauge(
+            "ubec_observation_partitions",
+            "Attached partitions of phenomenological.observations"
+        ).set(len(partitions))
+        registry.gauge(
+            "ubec_observation_default_partition_rows",
+            "Estimated rows in the default partition (readings outside prepared months)"
+        ).set(next(
+            (max(p["estimated_rows"], 0) for p in partitions if p["name"] == "observations_default"), 0
+        ))
+        if self.last_run_at:
+            registry.gauge(
+                "ubec_partition_maintenance_last_run_timestamp_seconds",
+                "Unix time of the last successful partition maintenance run"
+            ).set(self.last_run_at)
+
+    async def health_check(self) -> dict:
+        """Check maintenance health"""
+        return {
+            "status": "healthy" if self._running and not self.last_error else "unhealthy",
+            "service": "partition_maintenance",
+            **self.stats()
+        }
+
+    async def _run(self) -> None:
+        """Maintenance loop"""
+        while self._running:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"Partition maintenance failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    async def close(self) -> None:
+        """Stop the maintenance loop"""
+        self._running = False
+        if self._worker:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+        logger.info("Partition maintenance service closed")
+
+
+"""
+Attribution: This project uses the services of Claude and Anthropic PBC
+to inform our decisions and recommendations.
+"""
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Pattern State - Rolling per-observer windows for pattern recognition
+Constant work per observation instead of re-reading history
+
+PhenomenologicalDB.check_for_patterns used to fetch an observer's last
+20 observations (joined with phenomena) on every call and re-parse and
+rescan all of them. ObserverPatternState keeps the same window
+incrementally:
+
+- the last WINDOW_SIZE temperature and humidity values (at most
+  WINDOW_AGE old), in arrival order
+- counts of rising and falling steps between consecutive temperatures,
+  adjusted for the step that enters and the step that leaves the window
+- monotonic deques for the window minimum and maximum
+- a running humidity sum
+
+so push() and detect() are O(1) (amortized for the min/max deques).
+The windows serialize to JSON (to_dict / from_dict) for the
+observer_pattern_state table of pattern_state_migration.sql.
+
+Design Principles Applied:
+- Principle #10: Clear separation of concerns
+- Principle #12: Method singularity - one pattern detector
+
+Attribution: This project uses the services of Claude and Anthropic PBC.
+"""
+
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+# Same window the history query used: last 20 readings of the past 7 days
+WINDOW_SIZE = 20
+WINDOW_AGE = 7 * 24 * 3600.0
+
+# Strength above which a pattern is recorded
+PATTERN_THRESHOLD = 0.6
+
+
+class RollingSeries:
+    """
+    Sliding window of (timestamp, value) with step counts, min, max and sum
+    """
+
+    def __init__(self, size: int = WINDOW_SIZE, max_age: float = WINDOW_AGE):
+        self.size = size
+        self.max_age = max_age
+        self.values: Deque[Tuple[float, float]] = deque()
+        self.ups = 0
+        self.downs = 0
+        self.total = 0.0
+        # (sequence number, value); values increasing / decreasing
+        self._min: Deque[Tuple[int, float]] = deque()
+        self._max: Deque[Tuple[int, float]] = deque()
+        self._first_seq = 0
+        self._next_seq = 0
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @property
+    def latest(self) -> float:
+        return self.values[-1][1]
+
+    @property
+    def minimum(self) -> float:
+        return self._min[0][1]
+
+    @property
+    def maximum(self) -> float:
+        return self._max[0][1]
+
+    @property
+    def mean(self) -> float:
+        return self.total / len(self.values)
+
+    def push(self, timestamp: float, value: float) -> None:
+        """Append a value, evicting the oldest past size or max_age"""
+        self.expire(timestamp)
+        if len(self.values) >= self.size:
+            self._evict()
+
+        if self.values:
+            self._count_step(self.values[-1][1], value, 1)
+
+        self.values.append((timestamp, value))
+        self.total += value
+
+        seq = self._next_seq
+        self._next_seq += 1
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((seq, value))
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((seq, value))
+
+    def expire(self, now: float) -> None:
+        """Drop values older than max_age"""
+        while self.values and now - self.values[0][0] > self.max_age:
+            self._evict()
+
+    def _evict(self) -> None:
+        _, value = self.values.popleft()
+        self.total -= value
+        if self.values:
+            self._count_step(value, self.values[0][1], -1)
+
+        if self._min and self._min[0][0] == self._first_seq:
+            self._min.popleft()
+        if self._max and self._max[0][0] == self._first_seq:
+            self._max.popleft()
+        self._first_seq += 1
+
+        if not self.values:
+            self.total = 0.0  # No float drift carried across empty windows
+
+    def _count_step(self, before: float, after: float, sign: int) -> None:
+        if after > before:
+            self.ups += sign
+        elif after < before:
+            self.downs += sign
+
+    def to_list(self) -> List[List[float]]:
+        return [[timestamp, value] for timestamp, value in self.values]
+
+
+class ObserverPatternState:
+    """
+    Temperature and humidity windows of one observer
+    """
+
+    def __init__(self, size: int = WINDOW_SIZE, max_age: float = WINDOW_AGE):
+        self.temperature = RollingSeries(size, max_age)
+        self.humidity = RollingSeries(size, max_age)
+        # Row version of observer_pattern_state these windows were read
+        # from or last written as (0: no row)
+        self.version = 0
+
+    def push(self, timestamp: float, gesture: Optional[Dict]) -> None:
+        """
+        Add the readings of one phenomenon gesture
+
+        Readings are taken from the gesture itself or its 'readings'
+        object (the shape /observe stores).
+        """
+        if not isinstance(gesture, dict):
+            return
+        readings = gesture.get('readings')
+        if not isinstance(readings, dict):
+            readings = {}
+
+        for name, series in (('temperature', self.temperature), ('humidity', self.humidity)):
+            value = gesture.get(name, readings.get(name))
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                series.push(timestamp, float(value))
+            else:
+                series.expire(timestamp)
+
+    def detect(self) -> Dict[str, float]:
+        """Pattern strengths over the current windows (oldest to newest)"""
+        patterns = {}
+
+        temps = self.temperature
+        if len(temps) >= 3:
+            if temps.downs == 0 and temps.ups > 0:
+                patterns['warming_trend'] = 0.9
+            elif temps.ups == 0 and temps.downs > 0:
+                patterns['cooling_trend'] = 0.9
+            elif temps.maximum - temps.latest < 2 and temps.latest - temps.minimum < 2:
+                patterns['stable_temperature'] = 0.8
+            elif len(temps) >= 5 and abs(temps.ups - temps.downs) <= 1:
+                patterns['temperature_oscillation'] = 0.7
+
+        if len(self.humidity) >= 3:
+            avg_humidity = self.humidity.mean
+            if avg_humidity > 70:
+                patterns['high_humidity_period'] = 0.8
+            elif avg_humidity < 30:
+                patterns['low_humidity_period'] = 0.8
+
+        return patterns
+
+    def to_dict(self) -> Dict:
+        """JSON-serializable windows"""
+        return {
+            'temperature': self.temperature.to_list(),
+            'humidity': self.humidity.to_list()
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict, size: int = WINDOW_SIZE,
+                  max_age: float = WINDOW_AGE) -> "ObserverPatternState":
+        """Rebuild counters from persisted windows"""
+        state = cls(size, max_age)
+        for name in ('temperature', 'humidity'):
+            series = getattr(state, name)
+            for timestamp, value in data.get(name) or []:
+                series.push(float(timestamp), float(value))
+        return state
+
+
+"""
+Attribution: This project uses the services of Claude and Anthropic PBC
+to inform our decisions and recommendations.
+"""
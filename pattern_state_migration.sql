@@ -0,0 +1,49 @@
+-- ============================================================
+-- Pattern State Migration
+-- Persisted rolling windows for per-observer pattern recognition
+--
+-- check_for_patterns (phenomenological_db.py) used to re-read each
+-- observer's last 20 observations joined with phenomena on every
+-- observation. It now updates an in-memory ObserverPatternState
+-- (pattern_state.py) and saves its windows here, one small row per
+-- observer, so a restart or another app instance picks up where the
+-- windows left off instead of re-reading history.
+--
+-- Each row carries a version. An instance only writes state derived
+-- from the version it read (compare-and-set); if another instance wrote
+-- meanwhile, it re-reads the row and re-applies its reading, so app
+-- instances never overwrite each other's windows.
+--
+-- Also adds the index behind the "latest pattern of this type for this
+-- observer" lookup of _record_pattern, which scanned patterns.
+--
+-- Without this migration pattern state is kept in memory only and
+-- seeded from history once per observer and process.
+--
+-- Run once:
+--   psql "$DATABASE_URL" -f pattern_state_migration.sql
+--
+-- Attribution: This project uses the services of Claude and Anthropic PBC.
+-- ============================================================
+
+SET search_path TO phenomenological, public;
+
+CREATE TABLE IF NOT EXISTS phenomenological.observer_pattern_state (
+    observer_id uuid PRIMARY KEY
+        REFERENCES phenomenological.observers (id) ON DELETE CASCADE,
+    state jsonb NOT NULL,
+    version bigint NOT NULL DEFAULT 1,
+    updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+-- Tables created before versioning
+ALTER TABLE phenomenological.observer_pattern_state
+    ADD COLUMN IF NOT EXISTS version bigint NOT NULL DEFAULT 1;
+
+COMMENT ON TABLE phenomenological.observer_pattern_state IS
+    'Rolling temperature/humidity windows per observer ({"temperature": [[epoch, value], ...], "humidity": [...]})';
+
+CREATE INDEX IF NOT EXISTS idx_patterns_observer_type
+    ON phenomenological.patterns (observer_id, pattern_type, created_at DESC);
+
+ANALYZE phenomenological.patterns;
@@ -337,6 +337,12 @@ async def register_observer(
         
         logger.info(f"✓ Observer registered: {observer_id} (type: {observer_type.value})")
         
+        # Payments use the new wallet right away (resolved devices are cached)
+        device_id = (observer_data.external_identity or {}).get('device_id')
+        observation_service = getattr(request.app.state, 'observation_service', None)
+        if device_id and observation_service:
+            observation_service.invalidate_device(device_id)
+        
         # Build response with muxed wallet if generated
         response_data = {
             "success": True,
@@ -64,9 +64,9 @@ SENSOR_FIELDS = {
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage the phenomenological system lifecycle"""
-    logger.info("â•"â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•—")
+    logger.info("╔════════════════════════════════════════╗")
     logger.info("   Awakening Phenomenological Observer System v1.3.0")
-    logger.info("â•šâ•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•")
+    logger.info("╚════════════════════════════════════════╝")
     
     try:
         # Initialize phenomenological database
@@ -90,7 +90,7 @@ async def lifespan(app: FastAPI):
             try:
                 app.state.pheno_db = PhenomenologicalDB(conn_str)
                 await app.state.pheno_db.connect()
-                logger.info(f"âœ" Phenomenological database connected")
+                logger.info(f"✓ Phenomenological database connected")
                 connected = True
                 break
             except Exception as e:
@@ -102,15 +102,15 @@ async def lifespan(app: FastAPI):
         
         # Initialize pattern recognition engine
         app.state.pattern_engine = PatternRecognitionEngine(app.state.pheno_db)
-        logger.info("âœ" Pattern recognition engine initialized")
+        logger.info("✓ Pattern recognition engine initialized")
         
         # Initialize gift economy
         app.state.gift_economy = GiftEconomy(app.state.pheno_db)
-        logger.info("âœ" Gift economy activated")
+        logger.info("✓ Gift economy activated")
         
         # Initialize learning journey tracker
         app.state.journey_tracker = LearningJourneyTracker(app.state.pheno_db)
-        logger.info("âœ" Learning journey tracker ready")
+        logger.info("✓ Learning journey tracker ready")
         
         # Optional: Stellar blockchain for UBEC tokens
         try:
@@ -118,21 +118,21 @@ async def lifespan(app: FastAPI):
             app.state.stellar = StellarGiftNetwork()
             connected = await app.state.stellar.connect()
             if connected:
-                logger.info("âœ" Stellar gift network connected")
+                logger.info("✓ Stellar gift network connected")
                 if app.state.stellar.can_send_payments:
-                    logger.info("âœ" Stellar payments ENABLED")
+                    logger.info("✓ Stellar payments ENABLED")
                 else:
-                    logger.warning("âš  Stellar connected but payments DISABLED")
+                    logger.warning("⚠ Stellar connected but payments DISABLED")
             else:
-                logger.warning("âš¬ Stellar network connection failed")
+                logger.warning("⚬ Stellar network connection failed")
                 app.state.stellar = None
         except Exception as e:
-            logger.info(f"âš¬ Stellar network optional - running without blockchain")
+            logger.info(f"⚬ Stellar network optional - running without blockchain")
             app.state.stellar = None
         
-        logger.info("â•"â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•—")
+        logger.info("╔════════════════════════════════════════╗")
         logger.info("   System Ready for Observations")
-        logger.info("â•šâ•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•")
+        logger.info("╚════════════════════════════════════════╝")
         
     except Exception as e:
         logger.error(f"Failed to awaken system: {e}")
@@ -187,9 +187,9 @@ class PatternRecognitionEngine:
         self.db = db
         self.patterns = {}
         
-    async def analyze_observations(self, observer_id, phenomenon_id):
-        """Look for patterns in recent observations"""
-        await self.db.check_for_patterns(observer_id, phenomenon_id)
+    async def analyze_observations(self, observer_id, phenomenon_id, gesture=None):
+        """Look for patterns in recent observations (gesture: the new phenomenon's, if at hand)"""
+        await self.db.check_for_patterns(observer_id, phenomenon_id, gesture=gesture)
         
     async def get_emerging_patterns(self):
         """Return currently emerging patterns"""
@@ -267,10 +267,14 @@ def safe_get(obj, *keys, default=None):
 # PAYMENT HELPER FUNCTIONS
 # ============================================================
 
-async def send_stellar_payment(app, gift_id, observer_id, observation_id, amount=7.14):
+async def send_stellar_payment(app, gift_id, observer_id, observation_id, amount=7.14, observer=None):
     """
     Send Stellar payment for a gift
     
+    Args:
+        observer: Observer row (external_identity, essence) if already
+            loaded; otherwise it is looked up by observer_id
+    
     Returns:
         Dict with payment status and transaction hash if successful
     """
@@ -298,16 +302,17 @@ async def send_stellar_payment(app, gift_id, observer_id, observation_id, amount
         # Get observer's Stellar address from database
         stellar_address = None
         
-        async with app.state.pheno_db.pool.acquire() as conn:
-            observer_query = """
-                SELECT 
-                    id,
-                    external_identity,
-                    essence
-                FROM observers 
-                WHERE id = $1
-            """
-            observer_row = await conn.fetchrow(observer_query, observer_id)
+        if observer is None:
+            async with app.state.pheno_db.pool.acquire() as conn:
+                observer_query = """
+                    SELECT 
+                        id,
+                        external_identity,
+                        essence
+                    FROM observers 
+                    WHERE id = $1
+                """
+                observer_row = await conn.fetchrow(observer_query, observer_id)
             
             if not observer_row:
                 result["status"] = "observer_not_found"
@@ -316,25 +321,25 @@ async def send_stellar_payment(app, gift_id, observer_id, observation_id, amount
                 return result
             
             observer = dict(observer_row)
-            
-            # Extract Stellar address from JSONB fields
-            ext_id = safe_json_parse(observer.get('external_identity'))
-            essence = safe_json_parse(observer.get('essence'))
-            
-            if ext_id and isinstance(ext_id, dict):
-                stellar_address = (
-                    ext_id.get('stellar_address') or 
-                    ext_id.get('wallet') or
-                    ext_id.get('muxed_address')
-                )
-            
-            if not stellar_address and essence and isinstance(essence, dict):
-                stellar_address = (
-                    essence.get('stellar_address') or 
-                    essence.get('owner_stellar') or
-                    essence.get('device_muxed_wallet') or
-                    essence.get('muxed_address')
-                )
+        
+        # Extract Stellar address from JSONB fields
+        ext_id = safe_json_parse(observer.get('external_identity'))
+        essence = safe_json_parse(observer.get('essence'))
+        
+        if ext_id and isinstance(ext_id, dict):
+            stellar_address = (
+                ext_id.get('stellar_address') or 
+                ext_id.get('wallet') or
+                ext_id.get('muxed_address')
+            )
+        
+        if not stellar_address and essence and isinstance(essence, dict):
+            stellar_address = (
+                essence.get('stellar_address') or 
+                essence.get('owner_stellar') or
+                essence.get('device_muxed_wallet') or
+                essence.get('muxed_address')
+            )
         
         if not stellar_address:
             result["status"] = "no_stellar_address"
@@ -364,7 +369,7 @@ async def send_stellar_payment(app, gift_id, observer_id, observation_id, amount
             result["payment_sent"] = True
             result["status"] = "success"
             result["transaction_hash"] = tx_hash
-            logger.info(f"âœ" Payment sent: {amount} UBEC, TX: {tx_hash}")
+            logger.info(f"✓ Payment sent: {amount} UBEC, TX: {tx_hash}")
         else:
             result["status"] = "payment_failed"
             result["error"] = "Transaction submission failed"
@@ -533,7 +538,7 @@ async def create_observation_endpoint(request: FastAPIRequest):
                 detail="No sensor readings found. Include either 'readings' object, 'data' object, or flat sensor fields (temperature, humidity, etc.)"
             )
         
-        logger.info(f"âœ" Extracted {len(readings)} sensor readings via {extraction_method}")
+        logger.info(f"✓ Extracted {len(readings)} sensor readings via {extraction_method}")
         
         # ===== STEP 4: EXTRACT OPTIONAL FIELDS =====
         location = request_data.get('location', {})
@@ -543,26 +548,7 @@ async def create_observation_endpoint(request: FastAPIRequest):
             if field in request_data:
                 metadata[field] = request_data[field]
         
-        # ===== STEP 5: FIND OR CREATE OBSERVER =====
-        observer_id = request_data.get('observer_id')
-        
-        if not observer_id:
-            # Auto-create observer for this device
-            observer_id = await app.state.pheno_db.create_observer(
-                observer_type='device',
-                external_identity={
-                    'device_id': device_id,
-                    'first_seen': datetime.now(timezone.utc).isoformat()
-                },
-                essence={
-                    'created_at': datetime.now(timezone.utc).isoformat(),
-                    'auto_created': True,
-                    'extraction_method': extraction_method
-                }
-            )
-            logger.info(f"âœ" Auto-created observer {observer_id} for device {device_id}")
-        
-        # ===== STEP 6: CREATE PHENOMENON =====
+        # ===== STEP 5: PREPARE PHENOMENON, OBSERVATION AND GIFT =====
         phenomenon_gesture = {
             "type": "environmental_reading",
             "sensor_types": list(readings.keys()),
@@ -572,14 +558,6 @@ async def create_observation_endpoint(request: FastAPIRequest):
             "extraction_method": extraction_method
         }
         
-        phenomenon_id = await app.state.pheno_db.create_phenomenon(
-            moment=datetime.now(timezone.utc),
-            gesture=phenomenon_gesture,
-            mood=request_data.get('mood', 'observing'),
-            intensity=request_data.get('intensity', 0.8)
-        )
-        
-        # ===== STEP 7: CREATE OBSERVATION =====
         perception_data = {
             "readings": readings,
             "location": location,
@@ -592,46 +570,63 @@ async def create_observation_endpoint(request: FastAPIRequest):
         attention_quality = float(request_data.get('quality', 0.85))
         clarity = min(1.0, len(readings) / 5.0)
         
-        observation_id = await app.state.pheno_db.create_observation(
-            observer_id=observer_id,
-            phenomenon_id=phenomenon_id,
-            perception=perception_data,
-            attention_quality=attention_quality,
-            clarity=clarity
-        )
-        
-        logger.info(f"âœ" Created observation {observation_id}")
-        
-        # ===== STEP 8: CHECK FOR PATTERNS =====
-        try:
-            await app.state.pattern_engine.analyze_observations(observer_id, phenomenon_id)
-        except Exception as e:
-            logger.warning(f"Pattern analysis failed: {e}")
-        
-        # ===== STEP 9: CREATE GIFT & CALCULATE REWARD =====
         base_reward = 7.14
         sensor_bonus = len(readings) * 0.5
         quality_bonus = attention_quality * 0.5
         total_reward = base_reward + sensor_bonus + quality_bonus
         
-        gift_id = await app.state.gift_economy.offer_gift(
-            observer_id, 
-            'observation',
-            total_reward
-        )
+        # ===== STEP 6: WRITE OBSERVER, PHENOMENON, OBSERVATION AND GIFT =====
+        # One statement: the observer is resolved (or created for a new
+        # device) and all rows are written together or not at all
+        try:
+            recorded = await app.state.pheno_db.record_device_observation(
+                device_id=device_id,
+                observer_id=request_data.get('observer_id'),
+                observer_essence={
+                    'created_at': datetime.now(timezone.utc).isoformat(),
+                    'auto_created': True,
+                    'extraction_method': extraction_method
+                },
+                gesture=phenomenon_gesture,
+                mood=request_data.get('mood', 'observing'),
+                intensity=request_data.get('intensity', 0.8),
+                perception=perception_data,
+                attention_quality=attention_quality,
+                clarity=clarity,
+                gift_type='observation',
+                gift_amount=total_reward
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        
+        observer_id = recorded['observer_id']
+        phenomenon_id = recorded['phenomenon_id']
+        observation_id = recorded['observation_id']
+        gift_id = recorded['gift_id']
         
-        logger.info(f"âœ" Created gift {gift_id} worth {total_reward} UBEC")
+        if recorded['observer_created']:
+            logger.info(f"✓ Auto-created observer {observer_id} for device {device_id}")
+        logger.info(f"✓ Created observation {observation_id} and gift {gift_id} worth {total_reward} UBEC")
+        
+        # ===== STEP 7: CHECK FOR PATTERNS =====
+        try:
+            await app.state.pattern_engine.analyze_observations(
+                observer_id, phenomenon_id, gesture=phenomenon_gesture
+            )
+        except Exception as e:
+            logger.warning(f"Pattern analysis failed: {e}")
         
-        # ===== STEP 10: SEND STELLAR PAYMENT =====
+        # ===== STEP 8: SEND STELLAR PAYMENT =====
         payment_result = await send_stellar_payment(
             app=app,
             gift_id=gift_id,
             observer_id=observer_id,
             observation_id=observation_id,
-            amount=total_reward
+            amount=total_reward,
+            observer=recorded
         )
         
-        # ===== STEP 11: RETURN SUCCESS =====
+        # ===== STEP 9: RETURN SUCCESS =====
         response = {
             "success": True,
             "observation_id": str(observation_id),
@@ -648,11 +643,11 @@ async def create_observation_endpoint(request: FastAPIRequest):
                 "transaction_hash": payment_result["transaction_hash"],
                 "stellar_address": payment_result["stellar_address"]
             },
-            "message": f"âœ" Observation received - {len(readings)} sensor readings recorded",
+            "message": f"✓ Observation received - {len(readings)} sensor readings recorded",
             "timestamp": datetime.now(timezone.utc).isoformat()
         }
         
-        logger.info(f"âœ" Observation pipeline complete for device {device_id}")
+        logger.info(f"✓ Observation pipeline complete for device {device_id}")
         
         return response
         
@@ -661,7 +656,7 @@ async def create_observation_endpoint(request: FastAPIRequest):
         raise
         
     except Exception as e:
-        logger.error(f"âœ— Error in observation endpoint: {e}", exc_info=True)
+        logger.error(f"✗ Error in observation endpoint: {e}", exc_info=True)
         raise HTTPException(
             status_code=500,
             detail=f"Internal error processing observation: {str(e)}"
@@ -726,18 +721,18 @@ def main():
     """Main entry point"""
     
     print("""
-    â•"â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•—
-    â•'                                                          â•'
-    â•'       PHENOMENOLOGICAL OBSERVATION SYSTEM v1.3.0        â•'
-    â•'                 with UBEC Gift Economy                   â•'
-    â•'                         FIXED                            â•'
-    â•'                                                          â•'
-    â•'     "From Seeds to Blockchain: Growing the Future"      â•'
-    â•'                                                          â•'
-    â•'      Freie Waldorfschule Frankfurt (Oder)               â•'
-    â•'           Living Science Initiative                      â•'
-    â•'                                                          â•'
-    â•šâ•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•â•
+    ╔══════════════════════════════════════════════════════════╗
+    ║                                                          ║
+    ║       PHENOMENOLOGICAL OBSERVATION SYSTEM v1.3.0        ║
+    ║                 with UBEC Gift Economy                   ║
+    ║                         FIXED                            ║
+    ║                                                          ║
+    ║     "From Seeds to Blockchain: Growing the Future"      ║
+    ║                                                          ║
+    ║      Freie Waldorfschule Frankfurt (Oder)               ║
+    ║           Living Science Initiative                      ║
+    ║                                                          ║
+    ╚══════════════════════════════════════════════════════════╝
     
     Starting phenomenological observer with Stellar payments...
     """)
@@ -19,14 +19,138 @@ from decimal import Decimal
 import json
 import logging
 
+from lru_cache import TTLCache
+from metrics import InstrumentedPool
+from pattern_state import ObserverPatternState, PATTERN_THRESHOLD, WINDOW_SIZE
+
 logger = logging.getLogger(__name__)
 
 
+# Observer resolution (or creation on first contact), phenomenon,
+# observation and gift in one statement; see record_device_observation.
+# Every insert depends on the observer row, so an unknown observer_id
+# writes nothing.
+_DEVICE_OBSERVATION_SQL = """
+    WITH existing AS (
+        SELECT id, external_identity, essence, false AS created
+        FROM observers
+        WHERE id = $1::uuid
+        UNION ALL
+        (
+            SELECT id, external_identity, essence, false
+            FROM observers
+            WHERE $1::uuid IS NULL
+              AND external_identity->>'device_id' = $2
+            ORDER BY
+                COALESCE(essence->>'device_muxed_wallet', essence->>'owner_stellar') IS NULL,
+                created_at DESC
+            LIMIT 1
+        )
+    ),
+    new_observer AS (
+        INSERT INTO observers (
+            observer_type,
+            external_identity,
+            essence,
+            sensory_capacities,
+            presence_began,
+            presence_continues
+        )
+        SELECT 'device', $3::jsonb, $4::jsonb, $5::jsonb, NOW(), true
+        WHERE $1::uuid IS NULL AND NOT EXISTS (SELECT 1 FROM existing)
+        {on_conflict}
+        RETURNING id, external_identity, essence, (xmax = 0) AS created
+    ),
+    observer AS (
+        SELECT * FROM existing
+        UNION ALL
+        SELECT * FROM new_observer
+    ),
+    phenomenon AS (
+        INSERT INTO phenomena (
+            moment,
+            gesture,
+            mood,
+            intensity,
+            context_web
+        )
+        SELECT $6::timestamptz, $7::jsonb, $8::text, $9::numeric, '{{}}'::jsonb
+        WHERE EXISTS (SELECT 1 FROM observer)
+        RETURNING id
+    ),
+    observation AS (
+        INSERT INTO observations (
+            observer_id,
+            phenomenon_id,
+            perceived_at,
+            perception,
+            attention_quality,
+            clarity,
+            conditions
+        )
+        SELECT observer.id, phenomenon.id, $6::timestamptz, $10::jsonb,
+               $11::numeric, $12::numeric, '{{}}'::jsonb
+        FROM observer, phenomenon
+        RETURNING id
+    ),
+    gift AS (
+        INSERT INTO reciprocal_exchanges (
+            contributor_id,
+            exchange_type,
+            ubec_reciprocity_value,
+            value_provided,
+            value_received,
+            received_by,
+            offered_at,
+            reciprocity_score,
+            relevance,
+            beauty,
+            reciprocal_balance
+        )
+        SELECT observer.id, $13::text, $14::numeric, $15::jsonb, $16::jsonb,
+               '{{}}'::uuid[], NOW(), 0.8, 0.8, 0.6, $14::numeric
+        FROM observer
+        RETURNING id
+    )
+    SELECT
+        observer.id AS observer_id,
+        observer.created AS observer_created,
+        observer.external_identity,
+        observer.essence,
+        phenomenon.id AS phenomenon_id,
+        observation.id AS observation_id,
+        gift.id AS gift_id
+    FROM observer, phenomenon, observation, gift
+"""
+
+# Concurrent first contact settles on the unique device_id index
+# (observer_device_id_migration.sql)
+_OBSERVER_DEVICE_CONFLICT = """
+    ON CONFLICT ((external_identity->>'device_id'))
+        WHERE external_identity->>'device_id' IS NOT NULL
+    DO UPDATE SET presence_continues = true
+"""
+
+
 class PhenomenologicalDB:
     """Database interface for phenomenological observations with reciprocal economy"""
     
+    # Re-reads of an observer's pattern state when other instances keep writing it
+    PATTERN_STATE_WRITE_ATTEMPTS = 3
+    
+    # Old gift types -> reciprocal exchange types
+    GIFT_EXCHANGE_TYPES = {
+        'observation': 'data_contribution',
+        'insight': 'analysis_contribution',
+        'pattern': 'pattern_recognition',
+        'care': 'infrastructure_maintenance',
+        'question': 'inquiry_contribution',
+        'connection': 'network_contribution'
+    }
+    
     def __init__(self, database_url: str, schema: str = 'phenomenological', 
-                 search_path: str = 'phenomenological,ubec_sensors,public'):
+                 search_path: str = 'phenomenological,ubec_sensors,public',
+                 pattern_state_cache_size: int = 10000):
         """
         Initialize database connection.
         
@@ -34,11 +158,21 @@ class PhenomenologicalDB:
             database_url: PostgreSQL connection URL
             schema: Primary schema name (default: 'phenomenological')
             search_path: Comma-separated schema search path
+            pattern_state_cache_size: Observers whose pattern windows stay in memory
         """
         self.database_url = database_url
         self.schema = schema
         self.search_path = search_path
         self.pool = None
+        
+        # Off until observer_device_id_migration.sql adds the unique index
+        self._observer_upsert = True
+        
+        # Rolling pattern windows per observer; persisted once
+        # pattern_state_migration.sql has run. A cached entry is only
+        # trusted while its row version is current (see _save_pattern_state)
+        self._pattern_states = TTLCache(maxsize=pattern_state_cache_size, name="pattern_state")
+        self._pattern_state_persisted = True
     
     @staticmethod
     def _safe_json_parse(value):
@@ -65,8 +199,10 @@ class PhenomenologicalDB:
     async def connect(self):
         """
         Establish connection pool to database with schema configuration.
+        
+        The pool is wrapped so connection acquire wait shows up in /metrics.
         """
-        self.pool = await asyncpg.create_pool(
+        pool = await asyncpg.create_pool(
             self.database_url,
             min_size=5,
             max_size=20,
@@ -75,8 +211,15 @@ class PhenomenologicalDB:
                 'search_path': self.search_path
             }
         )
+        self.pool = InstrumentedPool(pool, name=self.schema)
         logger.info(f"Database connected with search_path: {self.search_path}")
     
+    def collect_metrics(self, registry) -> None:
+        """Report connection pool saturation (called per /metrics scrape)"""
+        if self.pool:
+            self.pool.collect_metrics(registry)
+        self._pattern_states.collect_metrics(registry)
+    
     async def close(self):
         """Close database connections"""
         if self.pool:
@@ -95,6 +238,11 @@ class PhenomenologicalDB:
         """
         Create a new observer entity (device or human)
         
+        An observer with a device_id is upserted: registering a device
+        again (e.g. with a new wallet) updates its existing observer, and
+        concurrent first contact cannot create it twice. The new
+        external_identity and essence keys are merged over the stored ones.
+        
         Args:
             observer_type: 'device' or 'human'
             external_identity: External identifiers (device_id, email, etc.)
@@ -102,14 +250,52 @@ class PhenomenologicalDB:
             sensory_capacities: What the observer can perceive
         
         Returns:
-            UUID of created observer
+            UUID of the created (or updated) observer
         """
         if sensory_capacities is None:
             sensory_capacities = self._default_capacities(observer_type)
         
         external_identity['type'] = observer_type
+        args = (
+            observer_type,
+            json.dumps(external_identity),
+            json.dumps(essence),
+            json.dumps(sensory_capacities)
+        )
         
         async with self.pool.acquire() as conn:
+            if external_identity.get('device_id') and self._observer_upsert:
+                try:
+                    row = await conn.fetchrow("""
+                        INSERT INTO observers (
+                            observer_type,
+                            external_identity,
+                            essence,
+                            sensory_capacities,
+                            presence_began,
+                            presence_continues
+                        ) VALUES ($1, $2, $3, $4, NOW(), true)
+                        ON CONFLICT ((external_identity->>'device_id'))
+                            WHERE external_identity->>'device_id' IS NOT NULL
+                        DO UPDATE SET
+                            observer_type = EXCLUDED.observer_type,
+                            external_identity = observers.external_identity || EXCLUDED.external_identity,
+                            essence = observers.essence || EXCLUDED.essence,
+                            sensory_capacities = EXCLUDED.sensory_capacities,
+                            presence_continues = true
+                        RETURNING id, (xmax = 0) AS created
+                    """, *args)
+                    verb = "Created" if row['created'] else "Updated"
+                    logger.info(f"{verb} {observer_type} observer: {row['id']}")
+                    return row['id']
+                except asyncpg.InvalidColumnReferenceError:
+                    # No unique device_id index to conflict on
+                    logger.warning(
+                        "Observer device_id index missing - devices may be registered twice "
+                        "(run observer_device_id_migration.sql)"
+                    )
+                    self._observer_upsert = False
+            
             observer_id = await conn.fetchval("""
                 INSERT INTO observers (
                     observer_type,
@@ -120,17 +306,12 @@ class PhenomenologicalDB:
                     presence_continues
                 ) VALUES ($1, $2, $3, $4, NOW(), true)
                 RETURNING id
-            """,
-                observer_type,
-                json.dumps(external_identity),
-                json.dumps(essence),
-                json.dumps(sensory_capacities)
-            )
+            """, *args)
             logger.info(f"Created {observer_type} observer: {observer_id}")
             return observer_id
     
     async def get_observer_by_device_id(self, device_id: str) -> Optional[Dict]:
-        """Get observer by legacy device ID"""
+        """Get observer by legacy device ID (idx_observers_device_id)"""
         async with self.pool.acquire() as conn:
             row = await conn.fetchrow("""
                 SELECT * FROM observers
@@ -208,6 +389,59 @@ class PhenomenologicalDB:
             logger.debug(f"Created phenomenon: {phenomenon_id}")
             return phenomenon_id
     
+    async def create_phenomena_bulk(self, phenomena: List[Dict]) -> List[UUID]:
+        """
+        Create many phenomena in one statement
+        
+        Rows are sent as arrays and expanded with unnest (one round trip,
+        one plan). COPY is not used here: the PostGIS location column has
+        no binary codec in asyncpg.
+        
+        Args:
+            phenomena: Dicts with the arguments of create_phenomenon
+                (moment required; location, gesture, mood, intensity,
+                context_web optional)
+        
+        Returns:
+            UUIDs of the created phenomena, in input order
+        """
+        if not phenomena:
+            return []
+        
+        ids = [uuid4() for _ in phenomena]
+        
+        async with self.pool.acquire() as conn:
+            await conn.execute("""
+                INSERT INTO phenomena (
+                    id,
+                    moment,
+                    location,
+                    gesture,
+                    mood,
+                    intensity,
+                    context_web
+                )
+                SELECT id, moment, location::geometry, gesture, mood, intensity, context_web
+                FROM unnest(
+                    $1::uuid[], $2::timestamptz[], $3::text[], $4::jsonb[],
+                    $5::text[], $6::numeric[], $7::jsonb[]
+                ) AS t (id, moment, location, gesture, mood, intensity, context_web)
+            """,
+                ids,
+                [p['moment'] for p in phenomena],
+                [
+                    f"POINT({p['location'][0]} {p['location'][1]})" if p.get('location') else None
+                    for p in phenomena
+                ],
+                [json.dumps(p.get('gesture') or {}) for p in phenomena],
+                [p.get('mood') for p in phenomena],
+                [Decimal(str(p.get('intensity', 0.5))) for p in phenomena],
+                [json.dumps(p.get('context_web') or {}) for p in phenomena]
+            )
+        
+        logger.debug(f"Created {len(ids)} phenomena")
+        return ids
+    
     # ============================================================
     # OBSERVATION RECORDING
     # ============================================================
@@ -260,35 +494,310 @@ class PhenomenologicalDB:
             logger.debug(f"Created observation: {observation_id}")
             return observation_id
     
+    async def create_observations_bulk(self, observations: List[Dict]) -> List[UUID]:
+        """
+        Record many observations with binary COPY
+        
+        Row ids are generated here (the table default would be
+        gen_random_uuid() as well), so they can be returned without
+        RETURNING, which COPY lacks. The batch is one statement: either
+        every row is written or none is.
+        
+        Args:
+            observations: Dicts with observer_id, phenomenon_id and
+                perception (dict, or JSON string); optional imagination,
+                attention_quality, clarity, conditions, perceived_at
+                (defaults to now for the whole batch), observation_id,
+                ipfs_hash, stellar_tx_hash
+        
+        Returns:
+            UUIDs (id column) of the created observations, in input order
+        """
+        if not observations:
+            return []
+        
+        now = datetime.now(timezone.utc)
+        ids = []
+        records = []
+        for obs in observations:
+            row_id = uuid4()
+            ids.append(row_id)
+            
+            perception = obs['perception']
+            imagination = obs.get('imagination')
+            records.append((
+                row_id,
+                obs['observer_id'],
+                obs['phenomenon_id'],
+                obs.get('perceived_at') or now,
+                perception if isinstance(perception, str) else json.dumps(perception),
+                json.dumps(imagination) if imagination else None,
+                Decimal(str(obs.get('attention_quality', 0.5))),
+                Decimal(str(obs.get('clarity', 0.5))),
+                json.dumps(obs.get('conditions') or {}),
+                obs.get('observation_id') or uuid4(),
+                obs.get('ipfs_hash'),
+                obs.get('stellar_tx_hash')
+            ))
+        
+        async with self.pool.acquire() as conn:
+            await conn.copy_records_to_table(
+                'observations',
+                schema_name=self.schema,
+                columns=[
+                    'id',
+                    'observer_id',
+                    'phenomenon_id',
+                    'perceived_at',
+                    'perception',
+                    'imagination',
+                    'attention_quality',
+                    'clarity',
+                    'conditions',
+                    'observation_id',
+                    'ipfs_hash',
+                    'stellar_tx_hash'
+                ],
+                records=records
+            )
+        
+        logger.debug(f"Created {len(ids)} observations")
+        return ids
+    
+    async def record_device_observation(self,
+                                        device_id: str,
+                                        perception: Dict,
+                                        gesture: Dict,
+                                        gift_amount: float,
+                                        observer_id: Optional[UUID] = None,
+                                        observer_essence: Optional[Dict] = None,
+                                        mood: Optional[str] = None,
+                                        intensity: float = 0.5,
+                                        attention_quality: float = 0.5,
+                                        clarity: float = 0.5,
+                                        gift_type: str = 'observation') -> Dict:
+        """
+        Record a device observation and its gift in one statement
+        
+        One data-modifying CTE resolves the observer (the given
+        observer_id, else the device's observer, created on first
+        contact), then inserts the phenomenon, the observation and the
+        reciprocal exchange (gift). One round trip instead of one per
+        row, and either everything is written or nothing is.
+        
+        Args:
+            device_id: Device identifier (external_identity->>'device_id')
+            perception: Raw sensory data
+            gesture: Qualitative expression of the phenomenon
+            gift_amount: UBECrc offered for the observation
+            observer_id: Use this observer instead of resolving the device
+            observer_essence: Essence of an observer created on first contact
+            mood: Atmospheric quality of the phenomenon
+            intensity: Strength of presence (0-1)
+            attention_quality: Quality of attention (0-1)
+            clarity: Clarity of observation (0-1)
+            gift_type: Gift type (mapped to an exchange type)
+        
+        Returns:
+            Dict with observer_id, observer_created, phenomenon_id,
+            observation_id, gift_id and the observer's external_identity
+            and essence (for the payment address)
+        
+        Raises:
+            ValueError: observer_id does not exist
+        """
+        moment = datetime.now(timezone.utc)
+        exchange_type = self.GIFT_EXCHANGE_TYPES.get(gift_type, gift_type)
+        gift_value = Decimal(str(gift_amount))
+        
+        args = (
+            observer_id,
+            device_id,
+            json.dumps({'device_id': device_id, 'type': 'device', 'first_seen': moment.isoformat()}),
+            json.dumps(observer_essence or {}),
+            json.dumps(self._default_capacities('device')),
+            moment,
+            json.dumps(gesture),
+            mood,
+            Decimal(str(intensity)),
+            json.dumps(perception),
+            Decimal(str(attention_quality)),
+            Decimal(str(clarity)),
+            exchange_type,
+            gift_value,
+            json.dumps({'type': exchange_type, 'timestamp': moment.isoformat()}),
+            json.dumps({'ubecrc_tokens': float(gift_value), 'type': 'utility_token'})
+        )
+        
+        async with self.pool.acquire() as conn:
+            if self._observer_upsert:
+                try:
+                    row = await conn.fetchrow(
+                        _DEVICE_OBSERVATION_SQL.format(on_conflict=_OBSERVER_DEVICE_CONFLICT), *args
+                    )
+                except asyncpg.InvalidColumnReferenceError:
+                    # No unique device_id index to conflict on
+                    logger.warning(
+                        "Observer device_id index missing - devices may be registered twice "
+                        "(run observer_device_id_migration.sql)"
+                    )
+                    self._observer_upsert = False
+            if not self._observer_upsert:
+                row = await conn.fetchrow(_DEVICE_OBSERVATION_SQL.format(on_conflict=""), *args)
+        
+        if row is None:
+            raise ValueError(f"Observer {observer_id} not found")
+        
+        result = dict(row)
+        result['external_identity'] = self._safe_json_parse(result['external_identity'])
+        result['essence'] = self._safe_json_parse(result['essence'])
+        if result['observer_created']:
+            logger.info(f"Created device observer: {result['observer_id']}")
+        logger.debug(
+            f"Recorded observation {result['observation_id']} with gift {result['gift_id']}"
+        )
+        return result
+    
     # ============================================================
     # PATTERN RECOGNITION
     # ============================================================
     
-    async def check_for_patterns(self, observer_id: UUID, phenomenon_id: UUID):
-        """Check if this observation reveals any patterns"""
+    async def check_for_patterns(self, observer_id: UUID, phenomenon_id: UUID,
+                                 gesture: Optional[Dict] = None,
+                                 moment: Optional[datetime] = None):
+        """
+        Check if this observation reveals any patterns
+        
+        The observer's rolling windows (pattern_state.py) take the new
+        readings in constant time; history is only read the first time an
+        observer is seen without persisted state. The windows are saved
+        only if no other app instance wrote them since they were read;
+        otherwise they are re-read and the reading is applied again.
+        
+        Args:
+            observer_id: The observer that made the observation
+            phenomenon_id: The phenomenon observed
+            gesture: The phenomenon's gesture, if at hand (else it is read)
+            moment: When the phenomenon occurred (default: now)
+        """
         async with self.pool.acquire() as conn:
-            # Get recent observations by this observer
+            if gesture is None:
+                row = await conn.fetchrow(
+                    "SELECT moment, gesture FROM phenomena WHERE id = $1", phenomenon_id
+                )
+                if not row:
+                    return
+                gesture = self._safe_json_parse(row['gesture'])
+                moment = moment or row['moment']
+            
+            timestamp = (moment or datetime.now(timezone.utc)).timestamp()
+            for _ in range(self.PATTERN_STATE_WRITE_ATTEMPTS):
+                state = await self._load_pattern_state(conn, observer_id, phenomenon_id)
+                state.push(timestamp, gesture)
+                patterns = state.detect()
+                
+                if not self._pattern_state_persisted or await self._save_pattern_state(
+                    conn, observer_id, state
+                ):
+                    break
+                
+                # Another instance wrote newer windows: re-read and re-apply
+                self._pattern_states.invalidate(observer_id)
+            else:
+                logger.warning(f"Pattern state of {observer_id} kept changing - reading not saved")
+                return
+        
+        for pattern_type, strength in patterns.items():
+            if strength > PATTERN_THRESHOLD:
+                await self._record_pattern(
+                    pattern_type, 
+                    observer_id,
+                    phenomenon_id, 
+                    strength
+                )
+    
+    async def _save_pattern_state(self, conn, observer_id: UUID,
+                                  state: ObserverPatternState) -> bool:
+        """
+        Write the windows if the row is still at the version they came from
+        
+        Returns:
+            True if written (state.version is then the new row version),
+            False if another instance changed the row since it was read
+        """
+        try:
+            version = await conn.fetchval("""
+                INSERT INTO observer_pattern_state (observer_id, state, version, updated_at)
+                VALUES ($1, $2, 1, NOW())
+                ON CONFLICT (observer_id) DO UPDATE
+                    SET state = EXCLUDED.state,
+                        version = observer_pattern_state.version + 1,
+                        updated_at = NOW()
+                    WHERE observer_pattern_state.version = $3
+                RETURNING version
+            """, observer_id, json.dumps(state.to_dict()), state.version)
+        except asyncpg.UndefinedColumnError:
+            logger.warning(
+                "observer_pattern_state has no version column - pattern state kept "
+                "in memory only (run pattern_state_migration.sql)"
+            )
+            self._pattern_state_persisted = False
+            return True
+        
+        if version is None:
+            return False
+        state.version = version
+        return True
+    
+    async def _load_pattern_state(self, conn, observer_id: UUID,
+                                  phenomenon_id: UUID) -> ObserverPatternState:
+        """
+        Pattern windows of an observer: memory, else persisted, else history
+        
+        The history seed leaves out the phenomenon being checked, which
+        is already stored but is pushed by the caller.
+        """
+        state = self._pattern_states.get(observer_id)
+        if state is not None:
+            return state
+        
+        row = None
+        if self._pattern_state_persisted:
+            try:
+                row = await conn.fetchrow(
+                    "SELECT state, version FROM observer_pattern_state WHERE observer_id = $1",
+                    observer_id
+                )
+            except (asyncpg.UndefinedTableError, asyncpg.UndefinedColumnError):
+                logger.warning(
+                    "observer_pattern_state missing or outdated - pattern state kept in "
+                    "memory only (run pattern_state_migration.sql)"
+                )
+                self._pattern_state_persisted = False
+        
+        if row is not None:
+            state = ObserverPatternState.from_dict(self._safe_json_parse(row['state']) or {})
+            state.version = row['version']
+        else:
             recent = await conn.fetch("""
-                SELECT o.*, p.gesture, p.mood
+                SELECT o.perceived_at, p.gesture
                 FROM observations o
                 JOIN phenomena p ON o.phenomenon_id = p.id
                 WHERE o.observer_id = $1
+                AND o.phenomenon_id <> $2
                 AND o.perceived_at > NOW() - INTERVAL '7 days'
                 ORDER BY o.perceived_at DESC
-                LIMIT 20
-            """, observer_id)
-            
-            # Analyze for patterns
-            if len(recent) >= 3:
-                patterns = self._analyze_patterns(recent)
-                for pattern_type, strength in patterns.items():
-                    if strength > 0.6:  # Pattern threshold
-                        await self._record_pattern(
-                            pattern_type, 
-                            observer_id,
-                            phenomenon_id, 
-                            strength
-                        )
+                LIMIT $3
+            """, observer_id, phenomenon_id, WINDOW_SIZE)
+            state = ObserverPatternState()
+            for row in reversed(recent):
+                state.push(row['perceived_at'].timestamp(), self._safe_json_parse(row['gesture']))
+        
+        # Another check for this observer may have loaded it meanwhile
+        if observer_id in self._pattern_states:
+            return self._pattern_states.get(observer_id)
+        self._pattern_states.set(observer_id, state)
+        return state
     
     # ============================================================
     # RECIPROCAL ECONOMY (Replaces Gift Economy)
@@ -475,17 +984,7 @@ class PhenomenologicalDB:
         """
         logger.warning("create_gift is deprecated - use create_reciprocal_exchange")
         
-        # Map old gift types to new exchange types
-        exchange_type_map = {
-            'observation': 'data_contribution',
-            'insight': 'analysis_contribution',
-            'pattern': 'pattern_recognition',
-            'care': 'infrastructure_maintenance',
-            'question': 'inquiry_contribution',
-            'connection': 'network_contribution'
-        }
-        
-        exchange_type = exchange_type_map.get(gift_type, gift_type)
+        exchange_type = self.GIFT_EXCHANGE_TYPES.get(gift_type, gift_type)
         
         return await self.create_reciprocal_exchange(
             contributor_id=giver_id,
@@ -624,95 +1123,43 @@ class PhenomenologicalDB:
     
     async def _record_pattern(self, pattern_type: str, observer_id: UUID,
                               phenomenon_id: UUID, strength: float):
-        """Record a recognized pattern"""
+        """Record a recognized pattern (update the latest of its type, else create it)"""
         async with self.pool.acquire() as conn:
-            # Check if pattern exists
-            existing = await conn.fetchval("""
-                SELECT id FROM patterns 
-                WHERE pattern_type = $1 AND observer_id = $2
-                ORDER BY created_at DESC LIMIT 1
-            """, pattern_type, observer_id)
-            
-            if existing:
-                # Update existing pattern
-                await conn.execute("""
+            created_id = await conn.fetchval("""
+                WITH updated AS (
                     UPDATE patterns 
-                    SET strength = $1,
+                    SET strength = $4,
                         last_seen_at = NOW(),
                         phenomenon_ids = array_append(
                             COALESCE(phenomenon_ids, ARRAY[]::uuid[]), 
-                            $2
+                            $3
                         ),
                         updated_at = NOW()
-                    WHERE id = $3
-                """, strength, phenomenon_id, existing)
-                logger.debug(f"Updated pattern {existing}: {pattern_type}")
-            else:
-                # Create new pattern
-                await conn.execute("""
-                    INSERT INTO patterns (
-                        pattern_type,
-                        observer_id,
-                        phenomenon_ids,
-                        strength,
-                        confidence,
-                        first_detected_at,
-                        last_seen_at
-                    ) VALUES ($1, $2, ARRAY[$3]::uuid[], $4, $5, NOW(), NOW())
-                """, pattern_type, observer_id, phenomenon_id, strength, 0.7)
+                    WHERE id = (
+                        SELECT id FROM patterns 
+                        WHERE pattern_type = $1 AND observer_id = $2
+                        ORDER BY created_at DESC LIMIT 1
+                    )
+                    RETURNING id
+                )
+                INSERT INTO patterns (
+                    pattern_type,
+                    observer_id,
+                    phenomenon_ids,
+                    strength,
+                    confidence,
+                    first_detected_at,
+                    last_seen_at
+                )
+                SELECT $1, $2, ARRAY[$3]::uuid[], $4, $5::numeric, NOW(), NOW()
+                WHERE NOT EXISTS (SELECT 1 FROM updated)
+                RETURNING id
+            """, pattern_type, observer_id, phenomenon_id, strength, 0.7)
+            
+            if created_id:
                 logger.info(f"New pattern detected: {pattern_type}")
-    
-    def _analyze_patterns(self, observations: List[Dict]) -> Dict[str, float]:
-        """
-        Analyze observations for patterns
-        """
-        patterns = {}
-        
-        # Parse all gesture fields first
-        parsed_observations = []
-        for o in observations:
-            gesture_raw = o.get('gesture')
-            gesture = self._safe_json_parse(gesture_raw)
-            if gesture:
-                parsed_observations.append(gesture)
-        
-        if not parsed_observations:
-            return patterns
-        
-        # Check for temperature trends
-        temps = [g.get('temperature') for g in parsed_observations 
-                if g.get('temperature') is not None]
-        
-        if len(temps) >= 3:
-            # Rising trend
-            if all(temps[i] <= temps[i+1] for i in range(len(temps)-1)):
-                patterns['warming_trend'] = 0.9
-            # Falling trend
-            elif all(temps[i] >= temps[i+1] for i in range(len(temps)-1)):
-                patterns['cooling_trend'] = 0.9
-            # Stable
-            elif all(abs(temps[i] - temps[0]) < 2 for i in range(len(temps))):
-                patterns['stable_temperature'] = 0.8
-            # Oscillation
-            elif len(temps) >= 5:
-                changes = [temps[i+1] - temps[i] for i in range(len(temps)-1)]
-                ups = sum(1 for c in changes if c > 0)
-                downs = sum(1 for c in changes if c < 0)
-                if abs(ups - downs) <= 1:
-                    patterns['temperature_oscillation'] = 0.7
-        
-        # Check humidity patterns
-        humidities = [g.get('humidity') for g in parsed_observations 
-                     if g.get('humidity') is not None]
-        
-        if len(humidities) >= 3:
-            avg_humidity = sum(humidities) / len(humidities)
-            if avg_humidity > 70:
-                patterns['high_humidity_period'] = 0.8
-            elif avg_humidity < 30:
-                patterns['low_humidity_period'] = 0.8
-        
-        return patterns
+            else:
+                logger.debug(f"Updated pattern {pattern_type} for observer {observer_id}")
 
 
 # ============================================================
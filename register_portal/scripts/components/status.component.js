@@ -14,7 +14,8 @@ class StatusComponent {
         this.loadingElement = null;
         this.contentElement = null;
         this.refreshInterval = null;
-        this.autoRefreshDelay = 30000; // 30 seconds
+        this.autoRefreshDelay = 30000; // 30 seconds (polling fallback)
+        this.eventSource = null;
     }
     
     /**
@@ -229,6 +230,48 @@ class StatusComponent {
         }, this.autoRefreshDelay);
     }
     
+    /**
+     * Receive statistics pushed by the server (Server-Sent Events).
+     * Falls back to polling if the browser or server does not support it.
+     */
+    startStream() {
+        this.stopStream();
+        
+        this.eventSource = this.apiService.openSystemStatsStream();
+        if (!this.eventSource) {
+            this.loadStats();
+            this.startAutoRefresh();
+            return;
+        }
+        
+        this.loadingElement.classList.add('active');
+        
+        this.eventSource.onmessage = (event) => {
+            this.loadingElement.classList.remove('active');
+            this.displayStats(JSON.parse(event.data));
+        };
+        
+        this.eventSource.onerror = () => {
+            // EventSource reconnects by itself; CLOSED means the server refused the stream
+            if (this.eventSource && this.eventSource.readyState === EventSource.CLOSED) {
+                this.debugService.log('⚠️ Stats stream unavailable, polling instead', 'warning');
+                this.stopStream();
+                this.loadStats();
+                this.startAutoRefresh();
+            }
+        };
+    }
+    
+    /**
+     * Close the statistics stream
+     */
+    stopStream() {
+        if (this.eventSource) {
+            this.eventSource.close();
+            this.eventSource = null;
+        }
+    }
+    
     /**
      * Stop auto-refresh
      */
@@ -243,14 +286,14 @@ class StatusComponent {
      * Show component (called when tab is activated)
      */
     show() {
-        this.loadStats();
-        // this.startAutoRefresh(); // Uncomment to enable auto-refresh
+        this.startStream();
     }
     
     /**
      * Hide component (called when tab is deactivated)
      */
     hide() {
+        this.stopStream();
         this.stopAutoRefresh();
     }
 }
@@ -196,6 +196,20 @@ class APIService {
         );
     }
     
+    /**
+     * Open the system statistics push stream (Server-Sent Events)
+     * @returns {EventSource|null} Stream, or null if the browser lacks EventSource
+     */
+    openSystemStatsStream() {
+        if (typeof EventSource === 'undefined') {
+            return null;
+        }
+        
+        const url = CONFIG.getApiEndpoint('system/stats/stream');
+        this.debugService.log(`📡 Stream: ${url}`, 'info');
+        return new EventSource(url);
+    }
+    
     /**
      * Health check
      * @returns {Promise<Object>} Health status
@@ -2,6 +2,11 @@
 """
 Service Registry - Central registration and discovery for all services
 
+The registry also owns the metrics registry every service reports into.
+Services record counters and histograms as events happen; point-in-time
+values (pool saturation, queue depths) are pulled from each service's
+collect_metrics() when /metrics is scraped.
+
 Design Principles Applied:
 - Principle #3: Service Registry for Dependencies
 - Principle #12: Method Singularity (single registry for all services)
@@ -13,6 +18,8 @@ import logging
 import asyncio
 from typing import Any, Optional, Dict
 
+from metrics import MetricsRegistry, metrics as default_metrics
+
 logger = logging.getLogger(__name__)
 
 
@@ -22,9 +29,20 @@ class ServiceRegistry:
     Provides service discovery and dependency injection.
     """
     
-    def __init__(self):
-        """Initialize the service registry"""
+    def __init__(self, metrics_registry: Optional[MetricsRegistry] = None):
+        """
+        Initialize the service registry
+        
+        Args:
+            metrics_registry: Metrics registry (default: process-wide registry)
+        """
         self._services: Dict[str, Any] = {}
+        self.metrics = metrics_registry or default_metrics
+        self._collect_errors = self.metrics.counter(
+            "ubec_metrics_collect_errors_total",
+            "Failures of a service's collect_metrics() during a scrape",
+            ["service"]
+        )
         logger.info("Service Registry initialized")
     
     def register(self, name: str, service: Any) -> None:
@@ -121,6 +139,41 @@ class ServiceRegistry:
         
         return health_status
     
+    async def collect_metrics(self) -> None:
+        """
+        Pull point-in-time metrics from every service that provides
+        collect_metrics(registry) (sync or async)
+        """
+        services = self.metrics.gauge(
+            "ubec_services_registered",
+            "Services registered in the service registry",
+            ["service"]
+        )
+        services.clear()
+        
+        for name, service in self._services.items():
+            services.set(1, service=name)
+            collect = getattr(service, 'collect_metrics', None)
+            if collect is None:
+                continue
+            try:
+                result = collect(self.metrics)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.warning(f"Metrics collection failed for '{name}': {e}")
+                self._collect_errors.inc(service=name)
+    
+    async def render_metrics(self) -> str:
+        """
+        Collect and render all metrics for a scrape
+        
+        Returns:
+            Prometheus text exposition format
+        """
+        await self.collect_metrics()
+        return self.metrics.render()
+    
     def __contains__(self, name: str) -> bool:
         """Check if a service is registered"""
         return name in self._services
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Stellar Channel Account Pool
+Parallel transaction submission for the UBECrc distributor
+
+A single source account serializes every payment through its sequence
+number. Channel accounts are funded accounts that only act as transaction
+source (they pay the fee and provide the sequence number); the payment
+operations keep the distributor as their source, and the distributor signs
+every transaction. With N channels, N payments can be in flight at once.
+
+Design Principles Applied:
+- Principle #5: Strict async operations
+- Principle #10: Clear separation of concerns
+
+Attribution: This project uses the services of Claude and Anthropic PBC.
+"""
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from stellar_sdk import Keypair
+
+from stellar_sequence import SequenceNumberManager
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ChannelAccount:
+    """One funded channel account with its own sequence allocator"""
+    keypair: Keypair
+    sequence_manager: SequenceNumberManager
+    submitted: int = 0
+
+    @property
+    def public_key(self) -> str:
+        """Channel account ID"""
+        return self.keypair.public_key
+
+
+class ChannelAccountPool:
+    """
+    Hands out idle channel accounts to payment submitters
+
+    A channel is held for the duration of one submit, so its sequence
+    numbers are used strictly in order.
+    """
+
+    def __init__(
+        self,
+        channel_secrets: List[str],
+        fetch_sequence: Callable[[str], Awaitable[Optional[int]]]
+    ):
+        """
+        Initialize channel pool
+
+        Args:
+            channel_secrets: Secret keys of funded channel accounts
+            fetch_sequence: Coroutine returning an account's current
+                sequence from Horizon (or None if unavailable)
+        """
+        self._fetch_sequence = fetch_sequence
+        self.channels: List[ChannelAccount] = []
+        for secret in channel_secrets:
+            keypair = Keypair.from_secret(secret)
+            self.channels.append(ChannelAccount(
+                keypair=keypair,
+                sequence_manager=SequenceNumberManager(keypair.public_key, fetch_sequence)
+            ))
+
+        self._idle: asyncio.Queue = asyncio.Queue()
+        for channel in self.channels:
+            self._idle.put_nowait(channel)
+
+        logger.info(f"Channel account pool initialized ({len(self.channels)} channels)")
+
+    def __len__(self) -> int:
+        return len(self.channels)
+
+    async def connect(self) -> int:
+        """
+        Load every channel's sequence and drop channels missing on the network
+
+        Returns:
+            Number of usable channels
+        """
+        sequences = await asyncio.gather(
+            *(self._fetch_sequence(channel.public_key) for channel in self.channels),
+            return_exceptions=True
+        )
+
+        usable = []
+        for channel, sequence in zip(self.channels, sequences):
+            if isinstance(sequence, Exception) or sequence is None:
+                logger.error(f"Channel account {channel.public_key[:8]}... not available - skipping")
+                continue
+            channel.sequence_manager.prime(sequence)
+            usable.append(channel)
+
+        self.channels = usable
+        self._idle = asyncio.Queue()
+        for channel in self.channels:
+            self._idle.put_nowait(channel)
+
+        return len(self.channels)
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[ChannelAccount]:
+        """Borrow an idle channel for one transaction submit"""
+        channel = await self._idle.get()
+        try:
+            yield channel
+        finally:
+            channel.submitted += 1
+            self._idle.put_nowait(channel)
+
+    def stats(self) -> Dict:
+        """Summary for health and status endpoints"""
+        return {
+            "channels": len(self.channels),
+            "idle": self._idle.qsize(),
+            "accounts": [
+                dict(channel.sequence_manager.stats(), submitted=channel.submitted)
+                for channel in self.channels
+            ]
+        }
+
+
+"""
+Attribution: This project uses the services of Claude and Anthropic PBC
+to inform our decisions and recommendations.
+"""
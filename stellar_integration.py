@@ -13,14 +13,43 @@ Attribution: This project uses the services of Claude and Anthropic PBC.
 
 import logging
 import asyncio
-from typing import Dict, Any, Optional
+import time
+from typing import Dict, Any, Optional, List, Tuple, Callable, Awaitable
 from decimal import Decimal
 import aiohttp
 from stellar_sdk import Server, Asset, TransactionBuilder, Network, Account, Keypair
 from stellar_sdk.exceptions import NotFoundError, BadRequestError
 
+from http_session import create_client_session
+from metrics import metrics
+from stellar_channels import ChannelAccountPool
+from stellar_sequence import SequenceNumberManager
+
 logger = logging.getLogger(__name__)
 
+# Payment throughput (outcome: success, bad_seq, failed, unknown)
+TRANSACTIONS_TOTAL = metrics.counter(
+    "ubec_stellar_transactions_total",
+    "Payment transactions submitted to Horizon",
+    ["outcome"]
+)
+OPERATIONS_TOTAL = metrics.counter(
+    "ubec_stellar_payment_operations_total",
+    "Payment operations submitted to Horizon",
+    ["outcome"]
+)
+_SUBMIT_OUTCOMES = {
+    outcome: (TRANSACTIONS_TOTAL.labels(outcome=outcome), OPERATIONS_TOTAL.labels(outcome=outcome))
+    for outcome in ("success", "bad_seq", "failed", "unknown")
+}
+
+# A transaction can be included until its max_time; ledger close times
+# trail the wall clock, so a missing transaction only counts as never
+# applied once this much longer has passed
+TIMEBOUND_GRACE_SECONDS = 15
+# Pause between lookups while a submit outcome is unknown
+CONFIRM_POLL_SECONDS = 2.0
+
 
 class StellarReciprocalNetwork:
     """
@@ -28,7 +57,7 @@ class StellarReciprocalNetwork:
     Manages UBECrc token distribution for environmental observations
     """
     
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any], session: Optional[aiohttp.ClientSession] = None):
         """
         Initialize Stellar network connection
         
@@ -40,6 +69,8 @@ class StellarReciprocalNetwork:
                 - ubecrc_issuer: Token issuer public key
                 - ubecrc_distributor: Distributor public key
                 - ubecrc_distributor_secret: Distributor secret key
+                - channel_secrets: Optional list of channel account secrets
+            session: Shared pooled HTTP session for Horizon (see http_session.py)
         """
         self.horizon_url = config.get('stellar_horizon_url', 'https://horizon.stellar.org')
         self.network = config.get('stellar_network', 'public')
@@ -73,14 +104,38 @@ class StellarReciprocalNetwork:
             self.ubecrc_asset
         )
         
+        # Optional channel accounts as transaction sources for parallel submits
+        channel_secrets = [secret for secret in config.get('channel_secrets', []) if secret]
+        self.channel_pool: Optional[ChannelAccountPool] = None
+        if channel_secrets and self.can_send_payments:
+            self.channel_pool = ChannelAccountPool(channel_secrets, self._fetch_sequence)
+        
         # Rate limiting
         self._rate_limit_semaphore = asyncio.Semaphore(5)
         
+        # Long-lived Horizon HTTP session (keep-alive, per-host limits, DNS cache)
+        self._session = session
+        
+        # Local sequence allocation for the distributor account
+        self.sequence_manager = SequenceNumberManager(
+            self.distributor_public or "",
+            self._fetch_sequence
+        )
+        
+        # Optional multi-operation payment batching (see enable_payment_batching)
+        self.payment_batcher: Optional["StellarPaymentBatcher"] = None
+        
         logger.info(f"Stellar network initialized ({self.network})")
         logger.info(f"  Can send payments: {self.can_send_payments}")
         if self.distributor_public:
             logger.info(f"  Distributor: {self.distributor_public[:8]}...{self.distributor_public[-8:]}")
     
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Shared HTTP session for Horizon (created lazily if none was injected)"""
+        if self._session is None or self._session.closed:
+            self._session = create_client_session(upstream="horizon")
+        return self._session
+    
     async def connect(self) -> None:
         """Initialize connection and check account status"""
         if not self.can_send_payments:
@@ -91,9 +146,21 @@ class StellarReciprocalNetwork:
             # Check distributor account
             account_info = await self.get_account_info(self.distributor_public)
             if account_info:
+                # Seed the sequence allocator from the same read
+                if account_info.get('sequence') is not None:
+                    self.sequence_manager.prime(int(account_info['sequence']))
+                
                 # Check UBECrc balance
                 balance = await self.get_ubecrc_balance(self.distributor_public)
                 logger.info(f"Distributor UBECrc balance: {balance}")
+                
+                if self.channel_pool:
+                    usable = await self.channel_pool.connect()
+                    if usable:
+                        logger.info(f"Channel accounts ready: {usable}")
+                    else:
+                        logger.warning("No channel accounts available - submitting from distributor")
+                        self.channel_pool = None
             else:
                 logger.error("Distributor account not found on network")
                 self.can_send_payments = False
@@ -115,16 +182,16 @@ class StellarReciprocalNetwork:
             async with self._rate_limit_semaphore:
                 # Use aiohttp for async request
                 url = f"{self.horizon_url}/accounts/{account_id}"
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(url) as response:
-                        if response.status == 200:
-                            return await response.json()
-                        elif response.status == 404:
-                            logger.debug(f"Account not found: {account_id}")
-                            return None
-                        else:
-                            logger.error(f"Failed to get account info: {response.status}")
-                            return None
+                session = self._get_session()
+                async with session.get(url) as response:
+                    if response.status == 200:
+                        return await response.json()
+                    elif response.status == 404:
+                        logger.debug(f"Account not found: {account_id}")
+                        return None
+                    else:
+                        logger.error(f"Failed to get account info: {response.status}")
+                        return None
         except Exception as e:
             logger.error(f"Error getting account info: {e}")
             return None
@@ -155,7 +222,8 @@ class StellarReciprocalNetwork:
         self,
         destination: str,
         amount: str,
-        memo: Optional[str] = None
+        memo: Optional[str] = None,
+        on_signed: Optional[Callable[[Dict], Awaitable[None]]] = None
     ) -> Optional[Dict]:
         """
         Send UBECrc tokens to a destination account
@@ -164,6 +232,7 @@ class StellarReciprocalNetwork:
             destination: Recipient's Stellar public key
             amount: Amount of UBECrc to send
             memo: Optional transaction memo
+            on_signed: Optional callback, see send_ubecrc_payments
             
         Returns:
             Transaction result dictionary or None if failed
@@ -172,78 +241,107 @@ class StellarReciprocalNetwork:
             logger.error("Cannot send payments - distributor not configured")
             return None
         
+        result = await self.send_ubecrc_payments(
+            [{"destination": destination, "amount": amount}],
+            memo=memo,
+            on_signed=on_signed
+        )
+        
+        if result.get("success"):
+            tx_hash = result["transaction_hash"]
+            logger.info(f"Payment sent: {amount} UBECrc to {destination[:8]}... (tx: {tx_hash[:8]}...)")
+            return {
+                "success": True,
+                "transaction_hash": tx_hash,
+                "amount": amount,
+                "destination": destination,
+                "ledger": result.get("ledger")
+            }
+        
+        failure = {
+            "success": False,
+            "error": result.get("error", "Unknown error")
+        }
+        if result.get("pending"):
+            failure.update(pending=True, transaction_hash=result.get("transaction_hash"))
+        return failure
+    
+    async def send_ubecrc_payments(
+        self,
+        payments: List[Dict[str, str]],
+        memo: Optional[str] = None,
+        on_signed: Optional[Callable[[Dict], Awaitable[None]]] = None
+    ) -> Dict:
+        """
+        Send several UBECrc payments in one transaction
+        
+        Each payment becomes one payment operation, so one submit serves
+        the whole list (Stellar allows 100 operations per transaction).
+        The sequence number comes from SequenceNumberManager; a tx_bad_seq
+        rejection triggers one resync and one retry.
+        
+        Only a definite rejection (HTTP 400) counts as failed. After a 5xx,
+        a timeout or an unreadable answer the transaction may still be
+        applied, so it is settled with confirm_transaction instead of being
+        rebuilt with a new sequence number.
+        
+        Args:
+            payments: List of {"destination": ..., "amount": ...} dicts
+            memo: Optional transaction memo shared by all operations
+            on_signed: Awaited with {"transaction_hash", "max_time"} of the
+                signed transaction before it is submitted, so the caller can
+                persist it; if it raises, nothing is submitted
+            
+        Returns:
+            Dict with success, transaction_hash and ledger, or on failure
+            error (Horizon result codes) and op_errors (per-operation codes).
+            pending=True (with transaction_hash and max_time) means the
+            outcome is still unknown: the payouts must not be sent again
+            before confirm_transaction reports the transaction as not applied.
+        """
+        if not self.can_send_payments:
+            return {"success": False, "error": "distributor not configured"}
+        
+        if not payments or len(payments) > StellarPaymentBatcher.MAX_OPERATIONS:
+            return {"success": False, "error": f"payment count must be 1-{StellarPaymentBatcher.MAX_OPERATIONS}"}
+        
         try:
-            async with self._rate_limit_semaphore:
-                # Get distributor account for sequence number
-                source_keypair = Keypair.from_secret(self.distributor_secret)
-                
-                # Get account info for sequence
-                url = f"{self.horizon_url}/accounts/{self.distributor_public}"
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(url) as response:
-                        if response.status != 200:
-                            logger.error("Failed to get source account")
-                            return None
-                        account_data = await response.json()
-                
-                # FIXED: Account constructor now takes just two positional arguments
-                # The first is the account ID, the second is the sequence number
-                source_account = Account(
-                    self.distributor_public,  # account ID (positional)
-                    int(account_data['sequence'])  # sequence (positional)
-                )
-                
-                # Build transaction
-                transaction = (
-                    TransactionBuilder(
-                        source_account=source_account,
-                        network_passphrase=self.network_passphrase,
-                        base_fee=100
-                    )
-                    .append_payment_op(
-                        destination=destination,
-                        asset=self.ubecrc_asset,
-                        amount=str(amount)
-                    )
-                    .set_timeout(30)
-                )
-                
-                # Add memo if provided
-                if memo:
-                    transaction.add_text_memo(memo[:28])  # Stellar memo limit
+            source_keypair = Keypair.from_secret(self.distributor_secret)
+            
+            for _ in range(2):
+                if self.channel_pool:
+                    # Channel mode: the pool size bounds concurrent submits
+                    async with self.channel_pool.acquire() as channel:
+                        sequence_manager = channel.sequence_manager
+                        sequence = await sequence_manager.next_sequence()
+                        result = await self._submit_payment_transaction(
+                            payments, memo, source_keypair, sequence,
+                            sequence_manager,
+                            channel_keypair=channel.keypair,
+                            on_signed=on_signed
+                        )
+                else:
+                    async with self._rate_limit_semaphore:
+                        # Sequence comes from the local allocator, not a Horizon read
+                        sequence_manager = self.sequence_manager
+                        sequence = await sequence_manager.next_sequence()
+                        result = await self._submit_payment_transaction(
+                            payments, memo, source_keypair, sequence,
+                            sequence_manager,
+                            on_signed=on_signed
+                        )
                 
-                # Build and sign
-                transaction = transaction.build()
-                transaction.sign(source_keypair)
+                if result.get("pending"):
+                    # Settled outside the channel, which other payouts can use meanwhile
+                    result = await self.confirm_transaction(result)
                 
-                # Submit transaction
-                submit_url = f"{self.horizon_url}/transactions"
-                tx_xdr = transaction.to_xdr()
+                if result.get("success") or not self._is_bad_sequence(result):
+                    return result
                 
-                async with aiohttp.ClientSession() as session:
-                    async with session.post(
-                        submit_url,
-                        data={'tx': tx_xdr},
-                        headers={'Content-Type': 'application/x-www-form-urlencoded'}
-                    ) as response:
-                        if response.status == 200:
-                            result = await response.json()
-                            tx_hash = result.get('hash')
-                            logger.info(f"Payment sent: {amount} UBECrc to {destination[:8]}... (tx: {tx_hash[:8]}...)")
-                            return {
-                                "success": True,
-                                "transaction_hash": tx_hash,
-                                "amount": amount,
-                                "destination": destination,
-                                "ledger": result.get('ledger')
-                            }
-                        else:
-                            error_data = await response.json()
-                            logger.error(f"Transaction failed: {error_data}")
-                            return {
-                                "success": False,
-                                "error": error_data.get('extras', {}).get('result_codes', 'Unknown error')
-                            }
+                # Another submitter (or a lost tx) moved the sequence - resync and retry once
+                await sequence_manager.resync(sequence)
+            
+            return result
                             
         except Exception as e:
             logger.error(f"Failed to send payment: {e}")
@@ -252,6 +350,275 @@ class StellarReciprocalNetwork:
                 "error": str(e)
             }
     
+    async def _submit_payment_transaction(
+        self,
+        payments: List[Dict[str, str]],
+        memo: Optional[str],
+        source_keypair: Keypair,
+        sequence: int,
+        sequence_manager: SequenceNumberManager,
+        channel_keypair: Optional[Keypair] = None,
+        on_signed: Optional[Callable[[Dict], Awaitable[None]]] = None
+    ) -> Dict:
+        """
+        Build, sign and submit one payment transaction at the given sequence
+        
+        With a channel_keypair the channel is the transaction source (fee and
+        sequence), the distributor stays the source of every payment
+        operation, and both sign. If on_signed raises, nothing is
+        submitted and the sequence is released back to sequence_manager.
+        """
+        tx_source = channel_keypair.public_key if channel_keypair else self.distributor_public
+        op_source = self.distributor_public if channel_keypair else None
+        
+        # FIXED: Account constructor now takes just two positional arguments
+        # The first is the account ID, the second is the sequence number
+        # (build() increments it, so pass the number before the allocated one)
+        source_account = Account(
+            tx_source,  # account ID (positional)
+            sequence - 1  # sequence (positional)
+        )
+        
+        # Build transaction
+        transaction = TransactionBuilder(
+            source_account=source_account,
+            network_passphrase=self.network_passphrase,
+            base_fee=100
+        )
+        for payment in payments:
+            transaction.append_payment_op(
+                destination=payment["destination"],
+                asset=self.ubecrc_asset,
+                amount=str(payment["amount"]),
+                source=op_source
+            )
+        transaction.set_timeout(30)
+        
+        # Add memo if provided
+        if memo:
+            transaction.add_text_memo(memo[:28])  # Stellar memo limit
+        
+        # Build and sign
+        transaction = transaction.build()
+        if channel_keypair:
+            transaction.sign(channel_keypair)
+        transaction.sign(source_keypair)
+        
+        envelope = {
+            "transaction_hash": transaction.hash_hex(),
+            "max_time": transaction.transaction.preconditions.time_bounds.max_time,
+            "envelope_xdr": transaction.to_xdr(),
+            "operation_count": len(payments)
+        }
+        
+        # Let the caller record the hash before anything can be applied
+        if on_signed:
+            try:
+                await on_signed({
+                    "transaction_hash": envelope["transaction_hash"],
+                    "max_time": envelope["max_time"]
+                })
+            except Exception:
+                # The number is never submitted - do not leave a gap that
+                # fails every later transaction from this source with tx_bad_seq
+                await sequence_manager.release(sequence)
+                raise
+        
+        return await self._post_transaction(envelope)
+    
+    async def _post_transaction(self, envelope: Dict) -> Dict:
+        """
+        Submit a signed envelope and classify Horizon's answer
+        
+        Horizon answers 400 only for transactions it or stellar-core
+        rejected, which are never applied. Any other failure (5xx, a 504
+        timeout, a dropped connection, an unreadable body) leaves the
+        outcome unknown and is returned with pending=True and the envelope.
+        """
+        tx_hash = envelope["transaction_hash"]
+        operation_count = envelope["operation_count"]
+        
+        try:
+            session = self._get_session()
+            async with session.post(
+                f"{self.horizon_url}/transactions",
+                data={'tx': envelope["envelope_xdr"]},
+                headers={'Content-Type': 'application/x-www-form-urlencoded'}
+            ) as response:
+                status = response.status
+                body = await response.json(content_type=None)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            status, body = None, repr(e)
+        
+        if status == 200:
+            self._count_submit("success", operation_count)
+            return {
+                "success": True,
+                "transaction_hash": tx_hash,
+                "ledger": body.get('ledger') if isinstance(body, dict) else None,
+                "operation_count": operation_count
+            }
+        
+        if status != 400 or not isinstance(body, dict):
+            logger.warning(f"Submit of tx {tx_hash[:8]}... has no definite outcome ({status}: {body})")
+            self._count_submit("unknown", operation_count)
+            return {"success": False, "pending": True, "error": "outcome_unknown", **envelope}
+        
+        logger.error(f"Transaction failed: {body}")
+        result_codes = body.get('extras', {}).get('result_codes', 'Unknown error')
+        op_errors = []
+        if isinstance(result_codes, dict):
+            op_errors = result_codes.get('operations', [])
+        result = {
+            "success": False,
+            "error": result_codes,
+            "op_errors": op_errors
+        }
+        self._count_submit(
+            "bad_seq" if self._is_bad_sequence(result) else "failed",
+            operation_count
+        )
+        return result
+    
+    async def confirm_transaction(self, envelope: Dict, wait: bool = True) -> Dict:
+        """
+        Settle a payment transaction whose submit outcome is unknown
+        
+        Looks the transaction up by hash. While it is missing and could
+        still be included, the same envelope is resubmitted if its XDR is
+        given (Horizon treats a duplicate submit as idempotent). It only
+        counts as not applied once its timebound has passed without it
+        reaching the ledger, or once a resubmit was rejected outright.
+        
+        Args:
+            envelope: transaction_hash and max_time, plus envelope_xdr and
+                operation_count to allow resubmits
+            wait: Poll until the outcome is known (at most until the
+                timebound has passed); otherwise check once
+            
+        Returns:
+            success with transaction_hash and ledger if applied, a failure
+            without pending if it never will be, or pending=True if the
+            outcome is still unknown
+        """
+        tx_hash = envelope["transaction_hash"]
+        expires = (envelope.get("max_time") or 0) + TIMEBOUND_GRACE_SECONDS
+        
+        while True:
+            known, record = await self._lookup_transaction(tx_hash)
+            if known and record:
+                return self._settled_result(envelope, record)
+            
+            if known and time.time() > expires:
+                logger.info(f"Tx {tx_hash[:8]}... expired without being applied")
+                return {"success": False, "error": "tx_too_late", "op_errors": []}
+            
+            if known and envelope.get("envelope_xdr"):
+                result = await self._post_transaction(envelope)
+                if result.get("success"):
+                    return result
+                if not result.get("pending"):
+                    # A rejected duplicate may mean it was applied meanwhile
+                    known, record = await self._lookup_transaction(tx_hash)
+                    if known:
+                        return self._settled_result(envelope, record) if record else result
+            
+            if not wait or time.time() > expires:
+                return {
+                    "success": False,
+                    "pending": True,
+                    "error": "outcome_unknown",
+                    "transaction_hash": tx_hash,
+                    "max_time": envelope.get("max_time")
+                }
+            await asyncio.sleep(CONFIRM_POLL_SECONDS)
+    
+    async def _lookup_transaction(self, tx_hash: str) -> Tuple[bool, Optional[Dict]]:
+        """
+        Read a transaction from Horizon
+        
+        Returns:
+            (True, record) if found, (True, None) if Horizon does not know
+            it, (False, None) if Horizon could not answer
+        """
+        try:
+            session = self._get_session()
+            async with session.get(f"{self.horizon_url}/transactions/{tx_hash}") as response:
+                if response.status == 404:
+                    return True, None
+                if response.status == 200:
+                    return True, await response.json()
+                logger.warning(f"Lookup of tx {tx_hash[:8]}... failed: {response.status}")
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            logger.warning(f"Lookup of tx {tx_hash[:8]}... failed: {e!r}")
+        return False, None
+    
+    @staticmethod
+    def _settled_result(envelope: Dict, record: Dict) -> Dict:
+        """Result of a transaction found in the ledger"""
+        if record.get("successful", True):
+            return {
+                "success": True,
+                "transaction_hash": envelope["transaction_hash"],
+                "ledger": record.get("ledger"),
+                "operation_count": envelope.get("operation_count")
+            }
+        # Included but failed: sequence and fee consumed, no payment made
+        return {"success": False, "error": {"transaction": "tx_failed"}, "op_errors": []}
+    
+    @staticmethod
+    def _count_submit(outcome: str, operation_count: int) -> None:
+        """Record one submitted transaction in the throughput counters"""
+        transactions, operations = _SUBMIT_OUTCOMES[outcome]
+        transactions.inc()
+        operations.inc(operation_count)
+    
+    @staticmethod
+    def _is_bad_sequence(result: Dict) -> bool:
+        """Check if a failed submit was rejected for its sequence number"""
+        error = result.get("error")
+        return isinstance(error, dict) and error.get("transaction") == "tx_bad_seq"
+    
+    async def _fetch_sequence(self, account_id: str) -> Optional[int]:
+        """
+        Read an account's current sequence from Horizon
+        
+        Used by SequenceNumberManager on first use and after tx_bad_seq.
+        Deliberately bypasses the rate-limit semaphore, which the caller
+        may already hold.
+        """
+        url = f"{self.horizon_url}/accounts/{account_id}"
+        session = self._get_session()
+        async with session.get(url) as response:
+            if response.status != 200:
+                logger.error(f"Failed to get source account {account_id[:8]}...")
+                return None
+            account_data = await response.json()
+            return int(account_data['sequence'])
+    
+    def enable_payment_batching(
+        self,
+        max_batch_size: int = 100,
+        window_seconds: float = 2.0
+    ) -> "StellarPaymentBatcher":
+        """
+        Collect payouts into multi-operation transactions
+        
+        Args:
+            max_batch_size: Operations per transaction (capped at 100)
+            window_seconds: Longest time a payout waits for its batch
+            
+        Returns:
+            The active StellarPaymentBatcher
+        """
+        if not self.payment_batcher:
+            self.payment_batcher = StellarPaymentBatcher(
+                self,
+                max_batch_size=max_batch_size,
+                window_seconds=window_seconds
+            )
+        return self.payment_batcher
+    
     async def create_trustline(self, account_secret: str) -> bool:
         """
         Create a trustline for UBECrc token
@@ -304,19 +671,19 @@ class StellarReciprocalNetwork:
             submit_url = f"{self.horizon_url}/transactions"
             tx_xdr = transaction.to_xdr()
             
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    submit_url,
-                    data={'tx': tx_xdr},
-                    headers={'Content-Type': 'application/x-www-form-urlencoded'}
-                ) as response:
-                    if response.status == 200:
-                        logger.info(f"Trustline created for {account_id[:8]}...")
-                        return True
-                    else:
-                        error = await response.json()
-                        logger.error(f"Failed to create trustline: {error}")
-                        return False
+            session = self._get_session()
+            async with session.post(
+                submit_url,
+                data={'tx': tx_xdr},
+                headers={'Content-Type': 'application/x-www-form-urlencoded'}
+            ) as response:
+                if response.status == 200:
+                    logger.info(f"Trustline created for {account_id[:8]}...")
+                    return True
+                else:
+                    error = await response.json()
+                    logger.error(f"Failed to create trustline: {error}")
+                    return False
                         
         except Exception as e:
             logger.error(f"Error creating trustline: {e}")
@@ -334,23 +701,49 @@ class StellarReciprocalNetwork:
         """
         try:
             url = f"{self.horizon_url}/transactions/{tx_hash}"
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        return await response.json()
-                    return None
+            session = self._get_session()
+            async with session.get(url) as response:
+                if response.status == 200:
+                    return await response.json()
+                return None
         except Exception as e:
             logger.error(f"Error getting transaction: {e}")
             return None
     
+    async def get_transaction_operations(self, tx_hash: str) -> Optional[List[Dict]]:
+        """
+        Get the operations of a transaction in application order
+        
+        Horizon's transaction resource has no operations; they are a
+        separate collection (at most 100 per transaction, one page).
+        
+        Args:
+            tx_hash: Transaction hash
+            
+        Returns:
+            List of operation records (type, from, to, to_muxed, amount,
+            asset_code, ...), or None if unavailable
+        """
+        try:
+            url = f"{self.horizon_url}/transactions/{tx_hash}/operations"
+            session = self._get_session()
+            async with session.get(url, params={"order": "asc", "limit": "200"}) as response:
+                if response.status == 200:
+                    body = await response.json()
+                    return body.get("_embedded", {}).get("records", [])
+                return None
+        except Exception as e:
+            logger.error(f"Error getting transaction operations: {e}")
+            return None
+    
     async def health_check(self) -> Dict:
         """Check Stellar service health"""
         try:
             # Check horizon server
             url = f"{self.horizon_url}"
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, timeout=aiohttp.ClientTimeout(total=5)) as response:
-                    horizon_healthy = response.status == 200
+            session = self._get_session()
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=5)) as response:
+                horizon_healthy = response.status == 200
             
             # Check distributor balance if configured
             distributor_balance = "0"
@@ -364,7 +757,9 @@ class StellarReciprocalNetwork:
                 "horizon_available": horizon_healthy,
                 "can_send_payments": self.can_send_payments,
                 "distributor_ubecrc_balance": str(distributor_balance),
-                "asset_code": self.asset_code
+                "asset_code": self.asset_code,
+                "sequence": self.sequence_manager.stats() if self.can_send_payments else None,
+                "channels": self.channel_pool.stats() if self.channel_pool else None
             }
             
         except Exception as e:
@@ -375,11 +770,262 @@ class StellarReciprocalNetwork:
                 "can_send_payments": False
             }
     
+    def collect_metrics(self, registry) -> None:
+        """Report payout backlog and channel usage (called per /metrics scrape)"""
+        if self.payment_batcher:
+            registry.gauge(
+                "ubec_stellar_payment_batch_pending",
+                "Payouts waiting for a batched transaction"
+            ).set(self.payment_batcher.pending_count)
+        
+        if self.channel_pool:
+            stats = self.channel_pool.stats()
+            channels = registry.gauge(
+                "ubec_stellar_channels",
+                "Channel accounts by state",
+                ["state"]
+            )
+            channels.set(stats["channels"] - stats["idle"], state="busy")
+            channels.set(stats["idle"], state="idle")
+        
+        if self.can_send_payments:
+            registry.gauge(
+                "ubec_stellar_sequence_resyncs",
+                "Sequence number resyncs after tx_bad_seq (distributor account)"
+            ).set(self.sequence_manager.resyncs)
+    
     async def close(self) -> None:
-        """Close connections (compatibility method)"""
+        """Flush batched payments and close the HTTP session"""
+        if self.payment_batcher:
+            await self.payment_batcher.close()
+        if self._session and not self._session.closed:
+            await self._session.close()
         logger.info("Stellar service closing")
 
 
+class StellarPaymentBatcher:
+    """
+    Collects pending UBECrc payouts into multi-operation transactions
+    
+    Payouts are gathered until the batch reaches max_batch_size or the
+    oldest payout has waited window_seconds, then sent as one transaction
+    with one payment operation per payout. Each caller receives the shared
+    transaction hash and the index of its own operation.
+    
+    If Horizon rejects the transaction because of individual operations
+    (e.g. a destination without trustline), those payouts fail with their
+    operation code and the rest are resubmitted once. If the outcome of a
+    submit stays unknown, every payout gets pending=True with the shared
+    hash and its op_index instead of a failure, so none is paid again
+    before the transaction is settled.
+    """
+    
+    MAX_OPERATIONS = 100  # Stellar protocol limit per transaction
+    
+    def __init__(
+        self,
+        stellar: StellarReciprocalNetwork,
+        max_batch_size: int = 100,
+        window_seconds: float = 2.0
+    ):
+        """
+        Initialize payment batcher
+        
+        Args:
+            stellar: StellarReciprocalNetwork used to submit transactions
+            max_batch_size: Operations per transaction (capped at 100)
+            window_seconds: Longest time a payout waits for its batch
+        """
+        self.stellar = stellar
+        self.max_batch_size = max(1, min(max_batch_size, self.MAX_OPERATIONS))
+        self.window_seconds = window_seconds
+        
+        self._pending: List[Tuple[Dict[str, str], asyncio.Future]] = []
+        self._batch_ready = asyncio.Event()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._inflight: set = set()
+        
+        logger.info(
+            f"Payment batching enabled ({self.max_batch_size} ops/tx, "
+            f"{self.window_seconds}s window)"
+        )
+    
+    async def submit(
+        self,
+        destination: str,
+        amount: str,
+        memo: Optional[str] = None,
+        on_signed: Optional[Callable[[Dict], Awaitable[None]]] = None
+    ) -> Dict:
+        """
+        Queue a payout and wait for its batch to be submitted
+        
+        Args:
+            destination: Recipient address (G... or muxed M...)
+            amount: Amount of UBECrc to send
+            memo: Per-payout reference (kept in the result; the transaction
+                memo is shared by the whole batch)
+            on_signed: Awaited with {"transaction_hash", "max_time",
+                "op_index"} before the batch transaction is submitted
+            
+        Returns:
+            Dict with success, transaction_hash, op_index, batch_size,
+            amount, destination and ledger (or error on failure; with
+            pending=True the payout may still be applied)
+        """
+        future = asyncio.get_running_loop().create_future()
+        payment = {
+            "destination": destination,
+            "amount": str(amount),
+            "reference": memo,
+            "on_signed": on_signed
+        }
+        self._pending.append((payment, future))
+        
+        if len(self._pending) >= self.max_batch_size:
+            self._batch_ready.set()
+        
+        if not self._flush_task or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+        
+        return await future
+    
+    @property
+    def pending_count(self) -> int:
+        """Number of payouts waiting for a batch"""
+        return len(self._pending)
+    
+    async def _flush_loop(self) -> None:
+        """Send batches until no payouts are pending"""
+        while self._pending:
+            try:
+                await asyncio.wait_for(self._batch_ready.wait(), timeout=self.window_seconds)
+            except asyncio.TimeoutError:
+                pass
+            
+            self._batch_ready.clear()
+            batch = self._pending[:self.max_batch_size]
+            del self._pending[:self.max_batch_size]
+            if len(self._pending) >= self.max_batch_size:
+                self._batch_ready.set()
+            
+            if batch:
+                task = asyncio.create_task(self._send_batch(batch))
+                self._inflight.add(task)
+                task.add_done_callback(self._inflight.discard)
+    
+    async def _send_batch(
+        self,
+        batch: List[Tuple[Dict[str, str], asyncio.Future]],
+        retry_on_op_failure: bool = True
+    ) -> None:
+        """Submit one batch and resolve each payout's future"""
+        # A payout whose caller has gone (e.g. an ingest worker cancelled at
+        # shutdown) is not sent: nobody would record it, and the observation
+        # is still pending, so it would be paid again on recovery
+        batch = [(payment, future) for payment, future in batch if not future.cancelled()]
+        if not batch:
+            return
+        
+        started = time.monotonic()
+        payments = [payment for payment, _ in batch]
+        
+        async def on_signed(envelope: Dict) -> None:
+            # Each payout records the shared hash with its own operation
+            await asyncio.gather(*(
+                payment["on_signed"](dict(envelope, op_index=op_index))
+                for op_index, payment in enumerate(payments)
+                if payment.get("on_signed")
+            ))
+        
+        try:
+            result = await self.stellar.send_ubecrc_payments(
+                payments,
+                memo=f"obs-batch:{len(payments)}",
+                on_signed=on_signed
+            )
+        except Exception as e:
+            # Never leave a caller waiting on a batch that could not be sent;
+            # it may have been submitted, so its payouts stay unconfirmed
+            logger.error(f"Batch payment of {len(batch)} ops failed: {e}", exc_info=True)
+            for _, future in batch:
+                if not future.done():
+                    future.set_result({"success": False, "pending": True, "error": str(e)})
+            return
+        
+        if result.get("pending"):
+            tx_hash = result["transaction_hash"]
+            logger.warning(
+                f"Batch tx {tx_hash[:8]}... ({len(batch)} ops) still unconfirmed - "
+                f"payouts left pending"
+            )
+            for op_index, (_, future) in enumerate(batch):
+                if not future.done():
+                    future.set_result({
+                        "success": False,
+                        "pending": True,
+                        "error": result.get("error"),
+                        "transaction_hash": tx_hash,
+                        "op_index": op_index,
+                        "batch_size": len(batch)
+                    })
+            return
+        
+        if result.get("success"):
+            tx_hash = result["transaction_hash"]
+            logger.info(
+                f"Batch payment sent: {len(batch)} ops in tx {tx_hash[:8]}... "
+                f"({time.monotonic() - started:.2f}s)"
+            )
+            for op_index, (payment, future) in enumerate(batch):
+                if not future.done():
+                    future.set_result({
+                        "success": True,
+                        "transaction_hash": tx_hash,
+                        "op_index": op_index,
+                        "batch_size": len(batch),
+                        "amount": payment["amount"],
+                        "destination": payment["destination"],
+                        "ledger": result.get("ledger")
+                    })
+            return
+        
+        op_errors = result.get("op_errors") or []
+        failed = [
+            index for index, code in enumerate(op_errors)
+            if code not in ("op_success", None)
+        ]
+        
+        if retry_on_op_failure and failed and len(failed) < len(batch):
+            # Fail only the offending payouts and resubmit the rest once
+            remaining = []
+            for index, (payment, future) in enumerate(batch):
+                if index in failed:
+                    if not future.done():
+                        future.set_result({"success": False, "error": op_errors[index]})
+                else:
+                    remaining.append((payment, future))
+            
+            logger.warning(f"Batch had {len(failed)} failing ops - resubmitting {len(remaining)}")
+            await self._send_batch(remaining, retry_on_op_failure=False)
+            return
+        
+        for index, (_, future) in enumerate(batch):
+            if not future.done():
+                error = op_errors[index] if index < len(op_errors) else result.get("error")
+                future.set_result({"success": False, "error": error})
+    
+    async def close(self) -> None:
+        """Flush pending payouts and wait for in-flight batches"""
+        if self._pending:
+            self._batch_ready.set()
+        if self._flush_task:
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        logger.info("Payment batcher closed")
+
+
 """
 Attribution: This project uses the services of Claude and Anthropic PBC
 to inform our decisions and recommendations.
@@ -40,6 +40,8 @@ from stellar_sdk import (
 )
 from stellar_sdk.exceptions import NotFoundError, BadRequestError
 
+from http_session import create_client_session
+
 logger = logging.getLogger(__name__)
 
 
@@ -63,7 +65,8 @@ class StellarOnboardingService:
         ubecrc_asset_code: str,
         ubecrc_issuer: str,
         min_funding_amount: float = 5.5,
-        database = None
+        database = None,
+        session: Optional[aiohttp.ClientSession] = None
     ):
         """
         Initialize the onboarding service
@@ -76,6 +79,7 @@ class StellarOnboardingService:
             ubecrc_issuer: Issuer public key for UBECrc
             min_funding_amount: Minimum XLM to fund accounts with
             database: Database connection for logging (optional)
+            session: Shared pooled HTTP session for Horizon (see http_session.py)
         """
         self.stellar_service = stellar_service
         self.funding_public = funding_account_public
@@ -98,11 +102,20 @@ class StellarOnboardingService:
         # Rate limiting
         self._rate_limit_semaphore = asyncio.Semaphore(2)  # Max 2 concurrent ops
         
+        # Long-lived Horizon HTTP session (keep-alive, per-host limits, DNS cache)
+        self._session = session
+        
         logger.info(f"Stellar Onboarding Service initialized")
         logger.info(f"  Network: {self.network}")
         logger.info(f"  Funding account: {self.funding_public[:8]}...")
         logger.info(f"  Min funding: {self.min_funding_amount} XLM")
     
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Shared HTTP session for Horizon (created lazily if none was injected)"""
+        if self._session is None or self._session.closed:
+            self._session = create_client_session(upstream="horizon")
+        return self._session
+    
     async def create_and_fund_account(
         self,
         steward_email: str,
@@ -251,12 +264,12 @@ class StellarOnboardingService:
                 
                 # Get source account info for sequence number
                 url = f"{self.horizon_url}/accounts/{self.funding_public}"
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(url) as response:
-                        if response.status != 200:
-                            logger.error("Failed to get funding account")
-                            return {'success': False, 'error': 'Cannot access funding account'}
-                        account_data = await response.json()
+                session = self._get_session()
+                async with session.get(url) as response:
+                    if response.status != 200:
+                        logger.error("Failed to get funding account")
+                        return {'success': False, 'error': 'Cannot access funding account'}
+                    account_data = await response.json()
                 
                 # Create source account object
                 source_account = Account(
@@ -336,12 +349,12 @@ class StellarOnboardingService:
             public_key = account_keypair.public_key
             url = f"{self.horizon_url}/accounts/{public_key}"
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status != 200:
-                        logger.error("New account not found for metadata")
-                        return False
-                    account_data = await response.json()
+            session = self._get_session()
+            async with session.get(url) as response:
+                if response.status != 200:
+                    logger.error("New account not found for metadata")
+                    return False
+                account_data = await response.json()
             
             # Create source account object
             source_account = Account(
@@ -479,12 +492,12 @@ class StellarOnboardingService:
         """
         try:
             url = f"{self.horizon_url}/accounts/{public_key}"
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        return await response.json()
-                    else:
-                        return None
+            session = self._get_session()
+            async with session.get(url) as response:
+                if response.status == 200:
+                    return await response.json()
+                else:
+                    return None
         except Exception as e:
             logger.error(f"Error getting account info: {e}")
             return None
@@ -620,14 +633,14 @@ class StellarOnboardingService:
         try:
             # Check current account data entries
             url = f"{self.horizon_url}/accounts/{public_key}"
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url) as response:
-                    if response.status != 200:
-                        return {
-                            'verified': False,
-                            'error': 'Account not found'
-                        }
-                    account_data = await response.json()
+            session = self._get_session()
+            async with session.get(url) as response:
+                if response.status != 200:
+                    return {
+                        'verified': False,
+                        'error': 'Account not found'
+                    }
+                account_data = await response.json()
             
             # Extract UBEC metadata entries
             data_entries = account_data.get('data', {})
@@ -643,21 +656,21 @@ class StellarOnboardingService:
             tx_url = f"{self.horizon_url}/accounts/{public_key}/transactions"
             tx_params = {'order': 'asc', 'limit': 1}
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(tx_url, params=tx_params) as response:
-                    if response.status == 200:
-                        tx_data = await response.json()
-                        records = tx_data.get('_embedded', {}).get('records', [])
-                        if records:
-                            creation_tx = records[0]
-                            creation_memo = creation_tx.get('memo', '')
-                            has_creation_memo = creation_memo.startswith('UBEC:')
-                        else:
-                            creation_memo = ''
-                            has_creation_memo = False
+            session = self._get_session()
+            async with session.get(tx_url, params=tx_params) as response:
+                if response.status == 200:
+                    tx_data = await response.json()
+                    records = tx_data.get('_embedded', {}).get('records', [])
+                    if records:
+                        creation_tx = records[0]
+                        creation_memo = creation_tx.get('memo', '')
+                        has_creation_memo = creation_memo.startswith('UBEC:')
                     else:
                         creation_memo = ''
                         has_creation_memo = False
+                else:
+                    creation_memo = ''
+                    has_creation_memo = False
             
             # Wallet is verified if either check passes
             verified = has_metadata or has_creation_memo
@@ -724,9 +737,9 @@ class StellarOnboardingService:
             logger.warning(f"Failed to log wallet creation: {e}")
     
     async def close(self):
-        """Cleanup resources"""
-        # Nothing to cleanup currently
-        pass
+        """Close the HTTP session"""
+        if self._session and not self._session.closed:
+            await self._session.close()
 
 
 """
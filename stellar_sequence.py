@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Stellar Sequence Number Manager
+In-process sequence allocation for a transaction source account
+
+Every Stellar transaction must carry the source account's next sequence
+number. Reading it from Horizon before each payment costs a round trip and
+lets two concurrent payments pick the same number (one then fails with
+tx_bad_seq). The manager reads the sequence once, hands out increasing
+numbers under an asyncio lock, and re-reads Horizon only after a
+tx_bad_seq result.
+
+Design Principles Applied:
+- Principle #5: Strict async operations
+- Principle #10: Clear separation of concerns
+
+Attribution: This project uses the services of Claude and Anthropic PBC.
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SequenceNumberManager:
+    """
+    Allocates sequence numbers for one Stellar source account
+
+    Usage:
+        sequence = await manager.next_sequence()
+        account = Account(account_id, sequence - 1)  # build() adds 1
+        ... submit ...
+        if result_code == "tx_bad_seq":
+            await manager.resync(sequence)
+
+        # Transaction abandoned before it was submitted:
+        await manager.release(sequence)
+    """
+
+    def __init__(
+        self,
+        account_id: str,
+        fetch_sequence: Callable[[str], Awaitable[Optional[int]]]
+    ):
+        """
+        Initialize sequence manager
+
+        Args:
+            account_id: Stellar public key of the transaction source
+            fetch_sequence: Coroutine returning the account's current
+                sequence from Horizon (or None if unavailable)
+        """
+        self.account_id = account_id
+        self._fetch_sequence = fetch_sequence
+        self._lock = asyncio.Lock()
+        self._current: Optional[int] = None
+        # Highest number handed out (or read from Horizon) at the last
+        # sync; a tx_bad_seq at or below it is already answered by that sync
+        self._stale_through: Optional[int] = None
+
+        # Counters for status reporting
+        self.allocated = 0
+        self.resyncs = 0
+
+    def prime(self, sequence: int) -> None:
+        """
+        Seed the manager with a sequence already read from Horizon
+
+        Args:
+            sequence: Current account sequence (last used number)
+        """
+        if self._current is None:
+            self._current = int(sequence)
+            self._stale_through = self._current
+
+    async def next_sequence(self) -> int:
+        """
+        Allocate the next sequence number
+
+        Returns:
+            Sequence number to use for the next transaction
+
+        Raises:
+            RuntimeError: If the sequence cannot be read from Horizon
+        """
+        async with self._lock:
+            if self._current is None:
+                await self._sync()
+
+            self._current += 1
+            self.allocated += 1
+            return self._current
+
+    async def resync(self, failed_sequence: int) -> None:
+        """
+        Re-read the sequence after a tx_bad_seq result
+
+        Only numbers handed out since the last sync trigger a refresh, so a
+        burst of concurrent failures causes a single Horizon read and no
+        number is handed out twice by back-to-back resyncs.
+
+        Args:
+            failed_sequence: Sequence number of the rejected transaction
+        """
+        async with self._lock:
+            if self._stale_through is not None and failed_sequence <= self._stale_through:
+                return
+
+            logger.warning(
+                f"Sequence out of sync for {self.account_id[:8]}... "
+                f"(tx_bad_seq at {failed_sequence}) - resyncing"
+            )
+            handed_out = self._current
+            self._current = None
+            await self._sync()
+            if handed_out is not None:
+                self._stale_through = max(self._stale_through, handed_out)
+            self.resyncs += 1
+
+    async def release(self, sequence: int) -> None:
+        """
+        Give back a number whose transaction was never submitted
+
+        The latest number is simply handed out again. Behind later
+        allocations the gap cannot be closed locally, so the sequence is
+        re-read at once instead of after every later transaction from the
+        account has failed with tx_bad_seq.
+
+        Args:
+            sequence: Sequence number allocated for the unsent transaction
+        """
+        async with self._lock:
+            if self._current == sequence:
+                self._current -= 1
+                return
+
+        await self.resync(sequence)
+
+    async def _sync(self) -> None:
+        """Load the current sequence from Horizon (caller holds the lock)"""
+        sequence = await self._fetch_sequence(self.account_id)
+        if sequence is None:
+            raise RuntimeError(f"Could not load sequence for {self.account_id[:8]}...")
+
+        self._current = int(sequence)
+        self._stale_through = self._current
+        logger.debug(f"Sequence for {self.account_id[:8]}... synced at {self._current}")
+
+    def stats(self) -> dict:
+        """Summary for health and status endpoints"""
+        return {
+            "account": f"{self.account_id[:8]}...",
+            "current": self._current,
+            "allocated": self.allocated,
+            "resyncs": self.resyncs
+        }
+
+
+"""
+Attribution: This project uses the services of Claude and Anthropic PBC
+to inform our decisions and recommendations.
+"""
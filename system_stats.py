@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+System Stats Service - System-wide counts served from memory
+Snapshot behind /api/v2/system/stats
+
+Every open status page polls /api/v2/system/stats. Instead of counting
+rows per request, this service keeps one snapshot in process and
+refreshes it in the background every refresh_interval seconds; the
+endpoint returns the snapshot as is.
+
+Live viewers subscribe instead (/api/v2/system/stats/stream, Server-Sent
+Events): after a refresh that changed any count, the one snapshot is
+pushed to every subscriber. Pushes therefore happen at most once per
+refresh_interval, and the cost of a refresh does not depend on the
+number of viewers. A slow subscriber only ever holds the latest
+snapshot.
+
+The snapshot is read from phenomenological.system_counters
+(system_stats_migration.sql), whose trigger-maintained counters make a
+refresh a handful of primary key reads however large observations
+grows. Without the migration the service falls back to COUNT(*)
+queries, still once per interval rather than once per request.
+
+Design Principles Applied:
+- Principle #2: Service pattern - no standalone execution
+- Principle #5: Strict async operations
+- Principle #10: Clear separation of concerns
+
+Attribution: This project uses the services of Claude and Anthropic PBC.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# UBEC distributed per observation
+UBEC_PER_OBSERVATION = 7.14
+
+# Pushed to every subscriber on close(): ends its event stream
+_CLOSED = object()
+
+_COUNTERS_SQL = """
+    SELECT name, SUM(value)::bigint AS value
+    FROM phenomenological.system_counters
+    GROUP BY name
+"""
+
+# Fallback without system_stats_migration.sql; tables may be missing
+_COUNT_QUERIES = {
+    "observers": "SELECT COUNT(*) FROM phenomenological.observers",
+    "devices": "SELECT COUNT(*) FROM phenomenological.observers WHERE observer_type = 'device'",
+    "observations": "SELECT COUNT(*) FROM phenomenological.observations",
+    "patterns": "SELECT COUNT(*) FROM phenomenological.patterns",
+    "wallets_created": "SELECT COUNT(*) FROM phenomenological.wallet_security_log",
+    "blocked_attempts": "SELECT COUNT(*) FROM phenomenological.wallet_failed_attempts",
+    "pending_approvals": (
+        "SELECT COUNT(*) FROM phenomenological.wallet_approval_queue WHERE status = 'pending'"
+    ),
+}
+
+
+def build_stats(counts: Dict[str, int], as_of: Optional[str] = None) -> dict:
+    """Shape counter values as the /api/v2/system/stats response"""
+    observations = counts.get("observations", 0)
+    return {
+        "total_observers": counts.get("observers", 0),
+        "total_observations": observations,
+        "total_devices": counts.get("devices", 0),
+        "total_ubec": round(observations * UBEC_PER_OBSERVATION, 2),
+        "active_patterns": counts.get("patterns", 0),
+        "security_stats": {
+            "total_wallets_created": counts.get("wallets_created", 0),
+            "total_blocked_attempts": counts.get("blocked_attempts", 0),
+            "pending_approvals": counts.get("pending_approvals", 0)
+        },
+        "as_of": as_of
+    }
+
+
+def _counts_changed(previous: dict, current: dict) -> bool:
+    """True if any count differs (as_of is ignored)"""
+    return {k: v for k, v in previous.items() if k != "as_of"} != \
+        {k: v for k, v in current.items() if k != "as_of"}
+
+
+class SystemStatsService:
+    """
+    In-process snapshot of system-wide counts, refreshed in the background
+    """
+
+    def __init__(
+        self,
+        database: Any,
+        refresh_interval: float = 5.0,
+        max_subscribers: int = 1000,
+        keepalive_interval: float = 15.0
+    ):
+        """
+        Initialize system stats
+
+        Args:
+            database: PhenomenologicalDB instance (uses its pool)
+            refresh_interval: Seconds between snapshot refreshes (and the
+                shortest gap between two pushes)
+            max_subscribers: Concurrent stream subscribers accepted
+            keepalive_interval: Seconds between keepalive comments on idle streams
+        """
+        self.db = database
+        self.refresh_interval = refresh_interval
+        self.max_subscribers = max_subscribers
+        self.keepalive_interval = keepalive_interval
+
+        self._snapshot = build_stats({})
+        self._worker: Optional[asyncio.Task] = None
+        self._running = False
+        self._use_counters: Optional[bool] = None
+        self._subscribers: Set[asyncio.Queue] = set()
+
+        self.refreshes = 0
+        self.pushes = 0
+        self.rejected_subscribers = 0
+        self.refresh_failures = 0
+        self.last_refresh_at: Optional[float] = None
+        self.last_refresh_duration = 0.0
+        self.last_error: Optional[str] = None
+
+        logger.info(f"System stats initialized (refresh every {refresh_interval}s)")
+
+    async def start(self) -> None:
+        """Take the first snapshot, then refresh every refresh_interval"""
+        if self._running:
+            return
+
+        self._running = True
+        try:
+            await self.refresh()
+        except Exception as e:
+            self.refresh_failures += 1
+            self.last_error = str(e)
+            logger.error(f"Initial system stats refresh failed: {e}")
+        self._worker = asyncio.create_task(self._run())
+
+    def snapshot(self) -> dict:
+        """Current stats (no I/O)"""
+        return self._snapshot
+
+    @property
+    def age(self) -> Optional[float]:
+        """Seconds since the last successful refresh"""
+        if self.last_refresh_at is None:
+            return None
+        return time.time() - self.last_refresh_at
+
+    async def refresh(self) -> dict:
+        """Read the counts and replace the snapshot"""
+        started = time.perf_counter()
+        async with self.db.pool.acquire() as conn:
+            if self._use_counters is None:
+                self._use_counters = bool(await conn.fetchval(
+                    "SELECT to_regclass('phenomenological.system_counters')"
+                ))
+                if not self._use_counters:
+                    logger.warning(
+                        "⚠️  system_counters missing - stats use COUNT(*), "
+                        "run system_stats_migration.sql"
+                    )
+
+            if self._use_counters:
+                counts = {row["name"]: row["value"] for row in await conn.fetch(_COUNTERS_SQL)}
+            else:
+                counts = await self._count_rows(conn)
+
+        self.last_refresh_at = time.time()
+        self.last_refresh_duration = time.perf_counter() - started
+        self.last_error = None
+        self.refreshes += 1
+
+        previous = self._snapshot
+        self._snapshot = build_stats(
+            counts, datetime.fromtimestamp(self.last_refresh_at, timezone.utc).isoformat()
+        )
+        if _counts_changed(previous, self._snapshot):
+            self._publish(self._snapshot)
+        return self._snapshot
+
+    async def _count_rows(self, conn) -> Dict[str, int]:
+        """Fallback: count each table directly"""
+        counts = {}
+        for name, query in _COUNT_QUERIES.items():
+            try:
+                counts[name] = await conn.fetchval(query)
+            except Exception:
+                counts[name] = 0  # Table does not exist yet
+        return counts
+
+    # ============================================================
+    # PUSH CHANNEL
+    # ============================================================
+
+    def subscribe(self) -> Optional[asyncio.Queue]:
+        """
+        Register a stream subscriber
+
+        Returns:
+            Queue holding the latest unsent snapshot (starts with the
+            current one), or None when max_subscribers is reached
+        """
+        if len(self._subscribers) >= self.max_subscribers:
+            self.rejected_subscribers += 1
+            return None
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        queue.put_nowait(self._snapshot)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        """Remove a stream subscriber"""
+        self._subscribers.discard(queue)
+
+    async def events(self, queue: asyncio.Queue) -> AsyncIterator[str]:
+        """
+        Server-Sent Events for one subscriber (unsubscribes when closed)
+
+        Yields a data event per pushed snapshot and a comment line after
+        keepalive_interval seconds without one, so proxies keep the
+        connection open. Ends when the service is closed, so open streams
+        do not hold up shutdown.
+        """
+        try:
+            yield f"retry: {int(self.refresh_interval * 1000)}\n\n"
+            while self._running:
+                try:
+                    snapshot = await asyncio.wait_for(queue.get(), timeout=self.keepalive_interval)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if snapshot is _CLOSED:
+                    return
+                yield f"data: {json.dumps(snapshot)}\n\n"
+        finally:
+            self.unsubscribe(queue)
+
+    def _publish(self, snapshot: dict) -> None:
+        """Hand the snapshot to every subscriber, replacing any unsent one"""
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(snapshot)
+        if self._subscribers:
+            self.pushes += 1
+
+    def stats(self) -> dict:
+        """Refresh counters since start"""
+        return {
+            "running": self._running,
+            "source": "counters" if self._use_counters else "count",
+            "refresh_interval": self.refresh_interval,
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+            "age_seconds": self.age,
+            "last_refresh_duration": self.last_refresh_duration,
+            "last_error": self.last_error,
+            "subscribers": len(self._subscribers),
+            "pushes": self.pushes,
+            "rejected_subscribers": self.rejected_subscribers
+        }
+
+    async def collect_metrics(self, registry) -> None:
+        """Report snapshot age and refresh cost (called per /metrics scrape)"""
+        if self.last_refresh_at is not None:
+            registry.gauge(
+                "ubec_system_stats_age_seconds",
+                "Seconds since the system stats snapshot was refreshed"
+            ).set(self.age)
+        registry.gauge(
+            "ubec_system_stats_refresh_duration_seconds",
+            "Duration of the last system stats refresh"
+        ).set(self.last_refresh_duration)
+        registry.gauge(
+            "ubec_system_stats_subscribers",
+            "Open /api/v2/system/stats/stream connections"
+        ).set(len(self._subscribers))
+
+    async def health_check(self) -> dict:
+        """Healthy while the snapshot is no older than three refresh intervals"""
+        age = self.age
+        fresh = age is not None and age <= 3 * self.refresh_interval
+        return {
+            "status": "healthy" if self._running and fresh else "unhealthy",
+            "service": "system_stats",
+            **self.stats()
+        }
+
+    async def _run(self) -> None:
+        """Refresh loop"""
+        while self._running:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.refresh_failures += 1
+                self.last_error = str(e)
+                logger.error(f"System stats refresh failed: {e}")
+
+    async def close(self) -> None:
+        """Stop the refresh loop and end open streams"""
+        self._running = False
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(_CLOSED)
+        self._subscribers.clear()
+        if self._worker:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+        logger.info("System stats service closed")
+
+
+"""
+Attribution: This project uses the services of Claude and Anthropic PBC
+to inform our decisions and recommendations.
+"""
@@ -0,0 +1,242 @@
+-- ============================================================
+-- System Stats Migration
+-- Row counts kept by triggers instead of COUNT(*) per request
+--
+-- /api/v2/system/stats used to run up to seven COUNT(*) queries over
+-- observers, observations, patterns and the wallet security tables on
+-- every call, and every open status page calls it every 30 seconds.
+-- Those scans grow with the observations table.
+--
+-- This migration adds phenomenological.system_counters, maintained by
+-- statement-level triggers (one counter update per statement, not per
+-- row). Each counter is split into 16 shards chosen by backend pid, so
+-- concurrent writers do not queue on a single counter row; a reader
+-- sums at most 16 rows per counter.
+--
+--   observers           observers
+--   devices             observers WHERE observer_type = 'device'
+--   observations        observations
+--   patterns            patterns
+--   wallets_created     wallet_security_log
+--   blocked_attempts    wallet_failed_attempts
+--   pending_approvals   wallet_approval_queue WHERE status = 'pending'
+--
+-- Wallet security tables that do not exist yet are skipped; run this
+-- file again after creating them. The same applies after
+-- observations_partitioning_migration.sql, which replaces the
+-- observations table (and its triggers). Running it again recounts.
+--
+-- refresh_system_counters() recounts everything exactly (full scans);
+-- detach_observation_partitions() subtracts the rows it detaches.
+-- SystemStatsService (system_stats.py) reads the counters.
+--
+-- Run (takes SHARE locks, so writes wait while the tables are counted):
+--   psql "$DATABASE_URL" -f system_stats_migration.sql
+--
+-- Attribution: This project uses the services of Claude and Anthropic PBC.
+-- ============================================================
+
+\set ON_ERROR_STOP on
+
+SET search_path TO phenomenological, public;
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS phenomenological.system_counters (
+    name text NOT NULL,
+    shard smallint NOT NULL,
+    value bigint NOT NULL DEFAULT 0,
+    PRIMARY KEY (name, shard)
+);
+
+COMMENT ON TABLE phenomenological.system_counters IS
+    'Trigger-maintained row counts for /api/v2/system/stats; sum value per name';
+
+-- ------------------------------------------------------------
+-- 1. Counter functions
+-- ------------------------------------------------------------
+
+CREATE OR REPLACE FUNCTION phenomenological.bump_system_counter(p_name text, p_delta bigint)
+RETURNS void
+LANGUAGE sql AS $$
+    INSERT INTO phenomenological.system_counters (name, shard, value)
+    SELECT p_name, pg_backend_pid() % 16, p_delta
+    WHERE p_delta <> 0
+    ON CONFLICT (name, shard) DO UPDATE
+        SET value = phenomenological.system_counters.value + EXCLUDED.value;
+$$;
+
+-- Plain row count; TG_ARGV[0] is the counter name
+CREATE OR REPLACE FUNCTION phenomenological.count_rows()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    delta bigint;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT count(*) INTO delta FROM new_rows;
+    ELSE
+        SELECT -count(*) INTO delta FROM old_rows;
+    END IF;
+    PERFORM phenomenological.bump_system_counter(TG_ARGV[0], delta);
+    RETURN NULL;
+END $$;
+
+CREATE OR REPLACE FUNCTION phenomenological.count_observers()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    added bigint := 0;
+    added_devices bigint := 0;
+    removed bigint := 0;
+    removed_devices bigint := 0;
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        SELECT count(*), count(*) FILTER (WHERE observer_type = 'device')
+        INTO added, added_devices
+        FROM new_rows;
+    END IF;
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        SELECT count(*), count(*) FILTER (WHERE observer_type = 'device')
+        INTO removed, removed_devices
+        FROM old_rows;
+    END IF;
+    PERFORM phenomenological.bump_system_counter('observers', added - removed);
+    PERFORM phenomenological.bump_system_counter('devices', added_devices - removed_devices);
+    RETURN NULL;
+END $$;
+
+CREATE OR REPLACE FUNCTION phenomenological.count_pending_approvals()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    added bigint := 0;
+    removed bigint := 0;
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        SELECT count(*) INTO added FROM new_rows WHERE status = 'pending';
+    END IF;
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        SELECT count(*) INTO removed FROM old_rows WHERE status = 'pending';
+    END IF;
+    PERFORM phenomenological.bump_system_counter('pending_approvals', added - removed);
+    RETURN NULL;
+END $$;
+
+-- TRUNCATE zeroes the counters named in TG_ARGV
+CREATE OR REPLACE FUNCTION phenomenological.reset_system_counters()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    DELETE FROM phenomenological.system_counters WHERE name = ANY (TG_ARGV);
+    RETURN NULL;
+END $$;
+
+-- Exact recount of every counter whose table exists
+CREATE OR REPLACE FUNCTION phenomenological.refresh_system_counters()
+RETURNS void
+LANGUAGE plpgsql AS $$
+DECLARE
+    source record;
+    total bigint;
+BEGIN
+    DELETE FROM phenomenological.system_counters;
+
+    FOR source IN
+        SELECT * FROM (VALUES
+            ('observers', 'observers', 'true'),
+            ('devices', 'observers', 'observer_type = ''device'''),
+            ('observations', 'observations', 'true'),
+            ('patterns', 'patterns', 'true'),
+            ('wallets_created', 'wallet_security_log', 'true'),
+            ('blocked_attempts', 'wallet_failed_attempts', 'true'),
+            ('pending_approvals', 'wallet_approval_queue', 'status = ''pending''')
+        ) AS s (name, table_name, condition)
+    LOOP
+        IF to_regclass('phenomenological.' || source.table_name) IS NOT NULL THEN
+            EXECUTE format(
+                'SELECT count(*) FROM phenomenological.%I WHERE %s',
+                source.table_name, source.condition
+            ) INTO total;
+            INSERT INTO phenomenological.system_counters (name, shard, value)
+            VALUES (source.name, 0, total);
+        END IF;
+    END LOOP;
+END $$;
+
+-- ------------------------------------------------------------
+-- 2. Triggers (transition tables need one trigger per event)
+-- ------------------------------------------------------------
+
+DO $$
+DECLARE
+    source record;
+BEGIN
+    FOR source IN
+        SELECT * FROM (VALUES
+            ('observers', 'count_observers', '', ARRAY['observers', 'devices'], true),
+            ('observations', 'count_rows', '''observations''', ARRAY['observations'], false),
+            ('patterns', 'count_rows', '''patterns''', ARRAY['patterns'], false),
+            ('wallet_security_log', 'count_rows', '''wallets_created''', ARRAY['wallets_created'], false),
+            ('wallet_failed_attempts', 'count_rows', '''blocked_attempts''', ARRAY['blocked_attempts'], false),
+            ('wallet_approval_queue', 'count_pending_approvals', '', ARRAY['pending_approvals'], true)
+        ) AS s (table_name, function_name, args, counters, on_update)
+    LOOP
+        IF to_regclass('phenomenological.' || source.table_name) IS NULL THEN
+            RAISE NOTICE 'Skipping % (table does not exist)', source.table_name;
+            CONTINUE;
+        END IF;
+
+        EXECUTE format('LOCK TABLE phenomenological.%I IN SHARE MODE', source.table_name);
+
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_count_insert ON phenomenological.%I',
+                       source.table_name, source.table_name);
+        EXECUTE format(
+            'CREATE TRIGGER trg_%s_count_insert
+             AFTER INSERT ON phenomenological.%I
+             REFERENCING NEW TABLE AS new_rows
+             FOR EACH STATEMENT EXECUTE FUNCTION phenomenological.%I(%s)',
+            source.table_name, source.table_name, source.function_name, source.args
+        );
+
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_count_delete ON phenomenological.%I',
+                       source.table_name, source.table_name);
+        EXECUTE format(
+            'CREATE TRIGGER trg_%s_count_delete
+             AFTER DELETE ON phenomenological.%I
+             REFERENCING OLD TABLE AS old_rows
+             FOR EACH STATEMENT EXECUTE FUNCTION phenomenological.%I(%s)',
+            source.table_name, source.table_name, source.function_name, source.args
+        );
+
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_count_update ON phenomenological.%I',
+                       source.table_name, source.table_name);
+        IF source.on_update THEN
+            EXECUTE format(
+                'CREATE TRIGGER trg_%s_count_update
+                 AFTER UPDATE ON phenomenological.%I
+                 REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+                 FOR EACH STATEMENT EXECUTE FUNCTION phenomenological.%I(%s)',
+                source.table_name, source.table_name, source.function_name, source.args
+            );
+        END IF;
+
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_count_truncate ON phenomenological.%I',
+                       source.table_name, source.table_name);
+        EXECUTE format(
+            'CREATE TRIGGER trg_%s_count_truncate
+             AFTER TRUNCATE ON phenomenological.%I
+             FOR EACH STATEMENT EXECUTE FUNCTION phenomenological.reset_system_counters(%s)',
+            source.table_name, source.table_name,
+            (SELECT string_agg(quote_literal(c), ', ') FROM unnest(source.counters) AS c)
+        );
+    END LOOP;
+END $$;
+
+-- ------------------------------------------------------------
+-- 3. Seed (the SHARE locks above keep the counts and triggers in step)
+-- ------------------------------------------------------------
+
+SELECT phenomenological.refresh_system_counters();
+
+COMMIT;
@@ -0,0 +1,70 @@
+"""
+Shared pytest setup - the services are top-level modules in the repo root
+
+The `ledger` fixture serves LocalHorizon in-process with a funded
+distributor and a connected StellarReciprocalNetwork.
+"""
+
+import os
+import sys
+from decimal import Decimal
+
+import pytest_asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp.test_utils import TestServer  # noqa: E402
+from stellar_sdk import Keypair  # noqa: E402
+
+from local_horizon import LocalHorizon  # noqa: E402
+from stellar_integration import StellarReciprocalNetwork  # noqa: E402
+
+ASSET_CODE = "UBECrc"
+
+
+class Ledger:
+    """Emulator, accounts and a connected Stellar service for one test"""
+
+    def __init__(self):
+        self.horizon = LocalHorizon(seed=1)
+        self.issuer = Keypair.random()
+        self.distributor = Keypair.random()
+        self.asset = (ASSET_CODE, self.issuer.public_key)
+        self.horizon.create_account(self.issuer.public_key)
+        self.horizon.create_account(self.distributor.public_key, assets={self.asset: "1000000"})
+        self.server = TestServer(self.horizon.build_app())
+        self.stellar = None
+
+    def recipient(self, trustline: bool = True) -> str:
+        account = Keypair.random().public_key
+        self.horizon.create_account(account, assets={self.asset: "0"} if trustline else None)
+        return account
+
+    def received(self, account_id: str) -> Decimal:
+        return self.horizon.accounts[account_id].balances.get(self.asset, Decimal(0))
+
+    async def start(self) -> None:
+        await self.server.start_server()
+        self.stellar = StellarReciprocalNetwork({
+            "stellar_horizon_url": str(self.server.make_url("")).rstrip("/"),
+            "stellar_network": "testnet",
+            "ubecrc_asset_code": ASSET_CODE,
+            "ubecrc_issuer": self.issuer.public_key,
+            "ubecrc_distributor": self.distributor.public_key,
+            "ubecrc_distributor_secret": self.distributor.secret
+        })
+        await self.stellar.connect()
+        assert self.stellar.can_send_payments
+
+    async def close(self) -> None:
+        if self.stellar:
+            await self.stellar.close()
+        await self.server.close()
+
+
+@pytest_asyncio.fixture
+async def ledger():
+    ledger = Ledger()
+    await ledger.start()
+    yield ledger
+    await ledger.close()
@@ -0,0 +1,63 @@
+"""
+Tests for ipfs_cid - local CIDs must match what Pinata/Kubo return
+"""
+
+from ipfs_cid import (
+    MAX_RAW_BLOCK_SIZE,
+    canonical_json_bytes,
+    compute_cid,
+    compute_json_cid,
+    split_observation_ref,
+    verify_json_cid,
+)
+
+# `ipfs add --cid-version 1 --raw-leaves` of the empty file and of "hello world"
+EMPTY_CID = "bafkreihdwdcefgh4dqkjv67uzcmw7ojee6xedzdetojuzjevtenxquvyku"
+HELLO_WORLD_CID = "bafkreifzjut3te2nhyekklss27nh3k72ysco7y32koao5eei66wof36n5e"
+
+OBSERVATION = {"value": 21.5, "sensor": "temp", "ort": "Bernau ü"}
+OBSERVATION_BYTES = '{"ort":"Bernau ü","sensor":"temp","value":21.5}'.encode("utf-8")
+OBSERVATION_CID = "bafkreicg3saczikldn6fibds6p4wdh5bn76yyqb2prvfghdiz7uum35mei"
+
+
+def test_compute_cid_matches_kubo_vectors():
+    assert compute_cid(b"") == EMPTY_CID
+    assert compute_cid(b"hello world") == HELLO_WORLD_CID
+
+
+def test_canonical_json_sorts_keys_and_keeps_utf8():
+    assert canonical_json_bytes(OBSERVATION) == OBSERVATION_BYTES
+
+
+def test_compute_json_cid_vector():
+    assert compute_json_cid(OBSERVATION) == OBSERVATION_CID
+    assert compute_json_cid(dict(reversed(list(OBSERVATION.items())))) == OBSERVATION_CID
+
+
+def test_content_over_one_block_has_no_cid():
+    assert compute_cid(b"x" * MAX_RAW_BLOCK_SIZE) is not None
+    assert compute_cid(b"x" * (MAX_RAW_BLOCK_SIZE + 1)) is None
+    assert compute_json_cid({"blob": "x" * MAX_RAW_BLOCK_SIZE}) is None
+
+
+def test_verify_json_cid():
+    assert verify_json_cid(OBSERVATION_CID, OBSERVATION) is True
+    assert verify_json_cid(OBSERVATION_CID, {**OBSERVATION, "value": 21.6}) is False
+
+
+def test_verify_json_cid_is_undecided_for_non_raw_cids():
+    # CIDv0 (dag-pb) and CIDv1 dag-pb references are not locally computable
+    assert verify_json_cid("QmYwAPJzv5CZsnA625s3Xf2nemtYgPpHdWEz79ojWnPbdG", OBSERVATION) is None
+    assert verify_json_cid("bafybeigdyrzt5sfp7udm7hu76uh7y26nf3efuylqabf3oclgtqy55fbzdi", OBSERVATION) is None
+
+
+def test_verify_json_cid_is_undecided_for_oversized_content():
+    assert verify_json_cid(OBSERVATION_CID, {"blob": "x" * MAX_RAW_BLOCK_SIZE}) is None
+
+
+def test_split_observation_ref():
+    assert split_observation_ref(OBSERVATION_CID) == (OBSERVATION_CID, None)
+    assert split_observation_ref(f"{OBSERVATION_CID}#0") == (OBSERVATION_CID, 0)
+    assert split_observation_ref(f"{OBSERVATION_CID}#17") == (OBSERVATION_CID, 17)
+    assert split_observation_ref(f"{OBSERVATION_CID}#") == (OBSERVATION_CID, None)
+    assert split_observation_ref(f"{OBSERVATION_CID}#-1") == (OBSERVATION_CID, None)
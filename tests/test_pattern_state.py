@@ -0,0 +1,126 @@
+"""
+Tests for pattern_state - rolling windows and pattern detection
+"""
+
+import pytest
+
+from pattern_state import ObserverPatternState, RollingSeries
+
+HOUR = 3600.0
+
+
+def push_all(series, values, start=0.0, step=HOUR):
+    for i, value in enumerate(values):
+        series.push(start + i * step, value)
+
+
+def brute_steps(values):
+    pairs = list(zip(values, values[1:]))
+    return sum(b > a for a, b in pairs), sum(b < a for a, b in pairs)
+
+
+def test_counts_track_window_on_size_eviction():
+    series = RollingSeries(size=4, max_age=1e9)
+    values = [5, 1, 3, 3, 9, 2, 7, 7, 0]
+    for i, value in enumerate(values):
+        series.push(float(i), float(value))
+        window = values[max(0, i - 3):i + 1]
+        assert len(series) == len(window)
+        assert (series.ups, series.downs) == brute_steps(window)
+        assert series.minimum == min(window)
+        assert series.maximum == max(window)
+        assert series.mean == pytest.approx(sum(window) / len(window))
+
+
+def test_age_eviction_drops_old_values_and_their_steps():
+    series = RollingSeries(size=20, max_age=10 * HOUR)
+    push_all(series, [30.0, 10.0, 20.0])  # t = 0h, 1h, 2h
+
+    series.push(11.5 * HOUR, 15.0)  # 0h and 1h are now too old
+
+    assert [value for _, value in series.values] == [20.0, 15.0]
+    assert (series.ups, series.downs) == (0, 1)
+    assert (series.minimum, series.maximum) == (15.0, 20.0)
+    assert series.total == pytest.approx(35.0)
+
+
+def test_expire_can_empty_the_window():
+    series = RollingSeries(size=20, max_age=HOUR)
+    push_all(series, [1.0, 2.0])
+    series.expire(10 * HOUR)
+    assert len(series) == 0
+    assert (series.ups, series.downs, series.total) == (0, 0, 0.0)
+
+    series.push(10 * HOUR, 4.0)
+    assert (series.minimum, series.maximum, series.mean) == (4.0, 4.0, 4.0)
+
+
+def test_round_trip_through_dict():
+    state = ObserverPatternState(size=5)
+    for i, temp in enumerate([18.0, 19.5, 19.0, 21.0, 22.5, 20.0, 23.0]):
+        state.push(i * HOUR, {'temperature': temp, 'humidity': 40.0 + i})
+
+    restored = ObserverPatternState.from_dict(state.to_dict(), size=5)
+
+    assert restored.to_dict() == state.to_dict()
+    for name in ('temperature', 'humidity'):
+        original, copy = getattr(state, name), getattr(restored, name)
+        assert (copy.ups, copy.downs) == (original.ups, original.downs)
+        assert (copy.minimum, copy.maximum) == (original.minimum, original.maximum)
+        assert copy.mean == pytest.approx(original.mean)
+    assert restored.detect() == state.detect()
+
+
+def test_from_dict_tolerates_missing_series():
+    state = ObserverPatternState.from_dict({'temperature': [[0, 20]]})
+    assert len(state.temperature) == 1
+    assert len(state.humidity) == 0
+
+
+def detect(temperatures=(), humidities=()):
+    state = ObserverPatternState()
+    for i, temp in enumerate(temperatures):
+        state.push(i * HOUR, {'temperature': temp})
+    for i, humidity in enumerate(humidities):
+        state.push(i * HOUR, {'humidity': humidity})
+    return state.detect()
+
+
+@pytest.mark.parametrize("temperatures, expected", [
+    ([15.0, 16.0], {}),
+    ([15.0, 16.0, 16.0, 18.0], {'warming_trend': 0.9}),
+    ([18.0, 17.0, 17.0, 15.0], {'cooling_trend': 0.9}),
+    ([20.0, 20.0, 20.0], {'stable_temperature': 0.8}),
+    ([20.0, 21.0, 20.5, 21.5], {'stable_temperature': 0.8}),
+    ([10.0, 20.0, 10.0, 20.0, 10.0], {'temperature_oscillation': 0.7}),
+    ([10.0, 20.0, 10.0, 20.0], {}),
+])
+def test_detect_temperature_patterns(temperatures, expected):
+    assert detect(temperatures=temperatures) == expected
+
+
+@pytest.mark.parametrize("humidities, expected", [
+    ([80.0, 75.0], {}),
+    ([80.0, 75.0, 72.0], {'high_humidity_period': 0.8}),
+    ([20.0, 25.0, 28.0], {'low_humidity_period': 0.8}),
+    ([50.0, 55.0, 60.0], {}),
+])
+def test_detect_humidity_patterns(humidities, expected):
+    assert detect(humidities=humidities) == expected
+
+
+def test_push_reads_nested_readings():
+    state = ObserverPatternState()
+    state.push(0.0, {'readings': {'temperature': 20, 'humidity': 50}})
+    state.push(HOUR, {'temperature': 21.0, 'readings': {'temperature': 99}})
+
+    assert [value for _, value in state.temperature.values] == [20.0, 21.0]
+    assert [value for _, value in state.humidity.values] == [50.0]
+
+
+def test_push_ignores_non_numeric_readings():
+    state = ObserverPatternState()
+    state.push(0.0, None)
+    state.push(0.0, {'temperature': True, 'humidity': '50'})
+    assert len(state.temperature) == 0
+    assert len(state.humidity) == 0
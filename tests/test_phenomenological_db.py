@@ -0,0 +1,254 @@
+"""
+Tests for PhenomenologicalDB.record_device_observation and the
+phenomenological /observe endpoint against PostgreSQL
+
+Needs a database: set TEST_DATABASE_URL (any PostgreSQL 13+ the user
+may create schemas in). Each test works in its own throwaway schema
+holding the four tables the statement writes.
+"""
+
+import asyncio
+import os
+import uuid
+
+import httpx
+import pytest
+import pytest_asyncio
+
+asyncpg = pytest.importorskip("asyncpg")
+
+from phenomenological_db import PhenomenologicalDB  # noqa: E402
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+
+TABLES = """
+    CREATE TABLE observers (
+        id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+        observer_type varchar(50) NOT NULL,
+        external_identity jsonb DEFAULT '{}'::jsonb,
+        essence jsonb DEFAULT '{}'::jsonb,
+        sensory_capacities jsonb,
+        presence_began timestamptz DEFAULT now(),
+        presence_continues boolean DEFAULT true,
+        created_at timestamptz DEFAULT now(),
+        updated_at timestamptz DEFAULT now()
+    );
+    CREATE TABLE phenomena (
+        id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+        moment timestamptz NOT NULL,
+        gesture jsonb NOT NULL,
+        mood varchar(100),
+        intensity numeric(5,4),
+        context_web jsonb DEFAULT '{}'::jsonb,
+        created_at timestamptz DEFAULT now()
+    );
+    CREATE TABLE observations (
+        id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+        observer_id uuid NOT NULL REFERENCES observers (id),
+        phenomenon_id uuid NOT NULL REFERENCES phenomena (id),
+        perceived_at timestamptz DEFAULT now(),
+        perception jsonb NOT NULL,
+        attention_quality numeric(5,4),
+        clarity numeric(5,4),
+        conditions jsonb DEFAULT '{}'::jsonb,
+        created_at timestamptz DEFAULT now(),
+        observation_id uuid DEFAULT gen_random_uuid()
+    );
+    CREATE TABLE reciprocal_exchanges (
+        id uuid PRIMARY KEY DEFAULT gen_random_uuid(),
+        contributor_id uuid REFERENCES observers (id),
+        exchange_type varchar(50) NOT NULL,
+        reciprocity_score numeric(5,4),
+        relevance numeric(5,4),
+        beauty numeric(5,4),
+        received_by uuid[],
+        ubec_reciprocity_value numeric(20,7),
+        offered_at timestamptz DEFAULT now(),
+        value_provided jsonb DEFAULT '{}'::jsonb,
+        value_received jsonb DEFAULT '{}'::jsonb,
+        reciprocal_balance numeric(20,8) DEFAULT 0
+    );
+"""
+
+# observer_device_id_migration.sql
+DEVICE_ID_INDEX = """
+    CREATE UNIQUE INDEX idx_observers_device_id
+        ON observers ((external_identity->>'device_id'))
+        WHERE external_identity->>'device_id' IS NOT NULL
+"""
+
+
+async def make_db(device_id_index: bool):
+    schema = f"test_pheno_{uuid.uuid4().hex[:12]}"
+    conn = await asyncpg.connect(TEST_DATABASE_URL)
+    try:
+        await conn.execute(f"CREATE SCHEMA {schema}")
+        await conn.execute(f"SET search_path TO {schema}")
+        await conn.execute(TABLES)
+        if device_id_index:
+            await conn.execute(DEVICE_ID_INDEX)
+    finally:
+        await conn.close()
+
+    db = PhenomenologicalDB(TEST_DATABASE_URL, schema=schema, search_path=f"{schema},public")
+    await db.connect()
+    return db, schema
+
+
+async def drop_db(db, schema):
+    await db.close()
+    conn = await asyncpg.connect(TEST_DATABASE_URL)
+    try:
+        await conn.execute(f"DROP SCHEMA {schema} CASCADE")
+    finally:
+        await conn.close()
+
+
+@pytest_asyncio.fixture
+async def db():
+    db, schema = await make_db(device_id_index=True)
+    yield db
+    await drop_db(db, schema)
+
+
+@pytest_asyncio.fixture
+async def db_without_index():
+    db, schema = await make_db(device_id_index=False)
+    yield db
+    await drop_db(db, schema)
+
+
+async def record(db, device_id, **kwargs):
+    return await db.record_device_observation(
+        device_id=device_id,
+        perception={"readings": {"temperature": 21.5}},
+        gesture={"type": "environmental_reading", "readings": {"temperature": 21.5}},
+        gift_amount=8.0,
+        observer_essence={"auto_created": True},
+        mood="observing",
+        intensity=0.8,
+        attention_quality=0.85,
+        clarity=0.2,
+        **kwargs
+    )
+
+
+async def row_counts(db):
+    async with db.pool.acquire() as conn:
+        return {
+            table: await conn.fetchval(f"SELECT count(*) FROM {table}")
+            for table in ("observers", "phenomena", "observations", "reciprocal_exchanges")
+        }
+
+
+@pytest.mark.asyncio
+async def test_first_contact_creates_the_observer_and_all_rows(db):
+    recorded = await record(db, "sensebox-1")
+
+    assert recorded["observer_created"] is True
+    assert recorded["external_identity"]["device_id"] == "sensebox-1"
+    assert recorded["essence"] == {"auto_created": True}
+    assert await row_counts(db) == {
+        "observers": 1, "phenomena": 1, "observations": 1, "reciprocal_exchanges": 1
+    }
+
+    async with db.pool.acquire() as conn:
+        observation = await conn.fetchrow(
+            "SELECT observer_id, phenomenon_id FROM observations WHERE id = $1",
+            recorded["observation_id"]
+        )
+        gift = await conn.fetchrow(
+            "SELECT contributor_id, exchange_type, ubec_reciprocity_value "
+            "FROM reciprocal_exchanges WHERE id = $1",
+            recorded["gift_id"]
+        )
+    assert observation["observer_id"] == recorded["observer_id"]
+    assert observation["phenomenon_id"] == recorded["phenomenon_id"]
+    assert gift["contributor_id"] == recorded["observer_id"]
+    assert gift["exchange_type"] == "data_contribution"
+    assert float(gift["ubec_reciprocity_value"]) == 8.0
+
+
+@pytest.mark.asyncio
+async def test_existing_device_reuses_its_observer(db):
+    first = await record(db, "sensebox-1")
+    second = await record(db, "sensebox-1")
+    by_id = await record(db, "ignored", observer_id=first["observer_id"])
+
+    assert second["observer_created"] is False
+    assert second["observer_id"] == first["observer_id"]
+    assert by_id["observer_created"] is False
+    assert by_id["observer_id"] == first["observer_id"]
+    assert await row_counts(db) == {
+        "observers": 1, "phenomena": 3, "observations": 3, "reciprocal_exchanges": 3
+    }
+
+
+@pytest.mark.asyncio
+async def test_unknown_observer_id_writes_nothing(db):
+    with pytest.raises(ValueError):
+        await record(db, "sensebox-1", observer_id=uuid.uuid4())
+
+    assert await row_counts(db) == {
+        "observers": 0, "phenomena": 0, "observations": 0, "reciprocal_exchanges": 0
+    }
+
+
+@pytest.mark.asyncio
+async def test_concurrent_first_contact_settles_on_one_observer(db):
+    results = await asyncio.gather(*(record(db, "sensebox-1") for _ in range(5)))
+
+    assert len({result["observer_id"] for result in results}) == 1
+    assert sum(result["observer_created"] for result in results) == 1
+    assert db._observer_upsert is True
+    assert await row_counts(db) == {
+        "observers": 1, "phenomena": 5, "observations": 5, "reciprocal_exchanges": 5
+    }
+
+
+@pytest.mark.asyncio
+async def test_missing_device_id_index_falls_back_to_plain_insert(db_without_index):
+    db = db_without_index
+    first = await record(db, "sensebox-1")
+
+    assert db._observer_upsert is False
+    assert first["observer_created"] is True
+
+    second = await record(db, "sensebox-1")
+    assert second["observer_id"] == first["observer_id"]
+    assert await row_counts(db) == {
+        "observers": 1, "phenomena": 2, "observations": 2, "reciprocal_exchanges": 2
+    }
+
+
+@pytest.mark.asyncio
+async def test_observe_endpoint_writes_through_one_statement(db):
+    import phenomenological_app
+    app = phenomenological_app.app
+    app.state.pheno_db = db
+    app.state.pattern_engine = phenomenological_app.PatternRecognitionEngine(db)
+    app.state.stellar = None
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        created = await client.post("/observe", json={
+            "device_id": "sensebox-1", "readings": {"temperature": 21.5, "humidity": 60}
+        })
+        assert created.status_code == 200, created.text
+        body = created.json()
+        assert body["readings_count"] == 2
+        assert body["payment"]["status"] == "stellar_not_configured"
+
+        unknown = await client.post("/observe", json={
+            "device_id": "sensebox-1", "observer_id": str(uuid.uuid4()),
+            "readings": {"temperature": 21.5}
+        })
+        assert unknown.status_code == 404
+
+    assert await row_counts(db) == {
+        "observers": 1, "phenomena": 1, "observations": 1, "reciprocal_exchanges": 1
+    }
+    async with db.pool.acquire() as conn:
+        observer_id = await conn.fetchval("SELECT observer_id FROM observations")
+    assert str(observer_id) == body["observer_id"]
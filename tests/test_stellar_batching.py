@@ -0,0 +1,171 @@
+"""
+Tests for multi-operation payouts against the Horizon emulator
+
+Each test runs StellarReciprocalNetwork (and its StellarPaymentBatcher)
+against LocalHorizon served in-process, then checks the emulated ledger:
+every payout that reports success must have been paid exactly once.
+"""
+
+import asyncio
+from decimal import Decimal
+
+import pytest
+
+PAYOUT = Decimal("7.14")
+
+
+async def submit_all(batcher, destinations):
+    return await asyncio.gather(*(
+        batcher.submit(destination=destination, amount=str(PAYOUT), memo=f"obs:{index}")
+        for index, destination in enumerate(destinations)
+    ))
+
+
+@pytest.mark.asyncio
+async def test_failing_operation_fails_only_its_payout(ledger):
+    paid = [ledger.recipient(), ledger.recipient()]
+    untrusted = ledger.recipient(trustline=False)
+    batcher = ledger.stellar.enable_payment_batching(max_batch_size=3, window_seconds=0.05)
+
+    results = await submit_all(batcher, [paid[0], untrusted, paid[1]])
+
+    assert results[1] == {"success": False, "error": "op_no_trust"}
+    assert ledger.received(untrusted) == 0
+
+    resubmitted = [results[0], results[2]]
+    assert all(result["success"] for result in resubmitted)
+    tx_hash = resubmitted[0]["transaction_hash"]
+    assert {result["transaction_hash"] for result in resubmitted} == {tx_hash}
+    assert [result["op_index"] for result in resubmitted] == [0, 1]
+    assert all(result["batch_size"] == 2 for result in resubmitted)
+
+    # The rejected batch consumed its sequence but paid nothing
+    for destination in paid:
+        assert ledger.received(destination) == PAYOUT
+    assert ledger.horizon.counts["failed"] == 1
+    assert ledger.horizon.counts["successful"] == 1
+    assert ledger.horizon.transactions[tx_hash]["memo"] == "obs-batch:2"
+    assert ledger.horizon.transactions[tx_hash]["operation_count"] == 2
+
+
+@pytest.mark.asyncio
+async def test_applied_batch_behind_timeout_is_settled_by_hash(ledger):
+    destinations = [ledger.recipient() for _ in range(3)]
+    batcher = ledger.stellar.enable_payment_batching(max_batch_size=3, window_seconds=0.05)
+    signed = []
+
+    async def on_signed(envelope):
+        signed.append(envelope)
+
+    ledger.horizon.fail_next("timeout")
+    results = await asyncio.gather(*(
+        batcher.submit(destination=destination, amount=str(PAYOUT), on_signed=on_signed)
+        for destination in destinations
+    ))
+
+    tx_hash = results[0]["transaction_hash"]
+    assert all(result["success"] for result in results)
+    assert {result["transaction_hash"] for result in results} == {tx_hash}
+    assert sorted(envelope["op_index"] for envelope in signed) == [0, 1, 2]
+    assert {envelope["transaction_hash"] for envelope in signed} == {tx_hash}
+
+    # Settled by lookup: no second submit, each payout applied once
+    assert ledger.horizon.counts["submitted"] == 1
+    assert ledger.horizon.counts["successful"] == 1
+    for destination in destinations:
+        assert ledger.received(destination) == PAYOUT
+
+
+@pytest.mark.asyncio
+async def test_failed_on_signed_releases_the_sequence(ledger):
+    destination = ledger.recipient()
+    distributor = ledger.distributor.public_key
+
+    async def unrecorded(envelope):
+        raise RuntimeError("database unavailable")
+
+    result = await ledger.stellar.send_ubecrc_payments(
+        [{"destination": destination, "amount": str(PAYOUT)}], on_signed=unrecorded
+    )
+    assert result == {"success": False, "error": "database unavailable"}
+
+    result = await ledger.stellar.send_ubecrc_payments(
+        [{"destination": destination, "amount": str(PAYOUT)}]
+    )
+
+    assert result["success"]
+    assert ledger.horizon.counts["submitted"] == 1
+    assert ledger.horizon.counts["bad_seq"] == 0
+    assert ledger.stellar.sequence_manager.stats()["current"] == ledger.horizon.accounts[distributor].sequence
+    assert ledger.received(destination) == PAYOUT
+
+
+@pytest.mark.asyncio
+async def test_bad_sequence_resyncs_once_and_retries(ledger):
+    destinations = [ledger.recipient(), ledger.recipient()]
+    distributor = ledger.distributor.public_key
+
+    # Another client used the distributor account: the local sequence is stale
+    ledger.horizon.bump_sequence(distributor)
+    result = await ledger.stellar.send_ubecrc_payments(
+        [{"destination": destination, "amount": str(PAYOUT)} for destination in destinations],
+        memo="obs-batch:2"
+    )
+
+    assert result["success"]
+    assert result["operation_count"] == 2
+    assert ledger.horizon.counts["bad_seq"] == 1
+    assert ledger.horizon.counts["successful"] == 1
+    assert ledger.stellar.sequence_manager.resyncs == 1
+    assert ledger.stellar.sequence_manager.stats()["current"] == ledger.horizon.accounts[distributor].sequence
+    for destination in destinations:
+        assert ledger.received(destination) == PAYOUT
+
+
+@pytest.mark.asyncio
+async def test_burst_of_bad_sequences_resyncs_once(ledger, monkeypatch):
+    destinations = [ledger.recipient() for _ in range(5)]
+    distributor = ledger.distributor.public_key
+    manager = ledger.stellar.sequence_manager
+    reads, allocated = [], []
+
+    fetch_sequence = manager._fetch_sequence
+    next_sequence = manager.next_sequence
+
+    async def counting_fetch(account_id):
+        reads.append(account_id)
+        return await fetch_sequence(account_id)
+
+    async def recording_next():
+        sequence = await next_sequence()
+        allocated.append(sequence)
+        return sequence
+
+    monkeypatch.setattr(manager, "_fetch_sequence", counting_fetch)
+    monkeypatch.setattr(manager, "next_sequence", recording_next)
+
+    # A number handed out earlier never reached the ledger, so every
+    # transaction of the burst (all allocated before the first rejection
+    # arrives) is answered with tx_bad_seq above Horizon's sequence
+    ledger.horizon.submit_latency = 0.05
+    first = manager.stats()["current"]
+    ledger.horizon.accounts[distributor].sequence -= 1
+    results = await asyncio.gather(*(
+        ledger.stellar.send_ubecrc_payments([{"destination": destination, "amount": str(PAYOUT)}])
+        for destination in destinations
+    ))
+
+    assert ledger.horizon.counts["bad_seq"] >= len(destinations)
+    assert reads == [distributor]
+    assert manager.resyncs == 1
+
+    burst, retries = allocated[:len(destinations)], allocated[len(destinations):]
+    assert burst == list(range(first + 1, first + 1 + len(destinations)))
+    assert len(retries) == len(set(retries)) == len(destinations)
+
+    # Each payout is paid at most once and the allocator agrees with the ledger
+    succeeded = [result for result in results if result["success"]]
+    assert len({result["transaction_hash"] for result in succeeded}) == len(succeeded)
+    for destination, result in zip(destinations, results):
+        assert ledger.received(destination) == (PAYOUT if result["success"] else 0)
+    assert manager.stats()["current"] == ledger.horizon.accounts[distributor].sequence
@@ -0,0 +1,47 @@
+"""
+Tests for SequenceNumberManager allocation, resync and release
+"""
+
+import pytest
+
+from stellar_sequence import SequenceNumberManager
+
+
+class FakeHorizon:
+    def __init__(self, sequence):
+        self.sequence = sequence
+        self.reads = 0
+
+    async def fetch_sequence(self, account_id):
+        self.reads += 1
+        return self.sequence
+
+
+@pytest.mark.asyncio
+async def test_release_of_latest_number_hands_it_out_again():
+    horizon = FakeHorizon(100)
+    manager = SequenceNumberManager("GACCOUNT", horizon.fetch_sequence)
+
+    sequence = await manager.next_sequence()
+    await manager.release(sequence)
+
+    assert await manager.next_sequence() == sequence
+    assert horizon.reads == 1
+
+
+@pytest.mark.asyncio
+async def test_release_behind_later_numbers_resyncs_at_once():
+    horizon = FakeHorizon(100)
+    manager = SequenceNumberManager("GACCOUNT", horizon.fetch_sequence)
+
+    unsent = await manager.next_sequence()
+    later = await manager.next_sequence()
+    await manager.release(unsent)
+
+    assert horizon.reads == 2
+    assert manager.resyncs == 1
+    assert await manager.next_sequence() == unsent
+
+    # The later number fails behind the gap; that resync was already done
+    await manager.resync(later)
+    assert horizon.reads == 2
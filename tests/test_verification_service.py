@@ -0,0 +1,103 @@
+"""
+Tests for VerificationService against payouts made on the Horizon emulator
+"""
+
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+
+from ipfs_cid import compute_json_cid
+from verification_service import VerificationService
+
+PAYOUT = Decimal("7.14")
+
+
+class StoredObservations:
+    """IPFS content by CID and the database record of each observation"""
+
+    def __init__(self):
+        self.content = {}
+        self.records = {}
+
+    def add(self, destination: str) -> str:
+        observation_id = str(uuid.uuid4())
+        document = {
+            "observation_id": observation_id,
+            "device_id": "sensebox-test",
+            "recorded_at": (datetime.now(timezone.utc) - timedelta(seconds=1)).isoformat(),
+            "sensor_data": {"temperature": 21.5},
+            "ubec_amount": float(PAYOUT)
+        }
+        cid = compute_json_cid(document)
+        self.content[cid] = document
+        self.records[observation_id] = {
+            "ipfs_cid": cid,
+            "muxed_address": destination,
+            "tokens_distributed": str(PAYOUT)
+        }
+        return observation_id
+
+    async def get_json(self, cid):
+        return self.content.get(cid)
+
+    async def get_observation_status(self, observation_id):
+        return self.records.get(observation_id)
+
+
+@pytest.mark.asyncio
+async def test_batched_payout_verifies_by_operation_index(ledger):
+    stored = StoredObservations()
+    destinations = [ledger.recipient() for _ in range(3)]
+    observation_ids = [stored.add(destination) for destination in destinations]
+    batcher = ledger.stellar.enable_payment_batching(max_batch_size=3, window_seconds=0.05)
+
+    results = await asyncio.gather(*(
+        batcher.submit(destination=destination, amount=str(PAYOUT))
+        for destination in destinations
+    ))
+    for observation_id, result in zip(observation_ids, results):
+        stored.records[observation_id].update(
+            stellar_tx_hash=result["transaction_hash"], stellar_op_index=result["op_index"]
+        )
+
+    verifier = VerificationService(stored, ledger.stellar, database=stored)
+    for observation_id, result in zip(observation_ids, results):
+        verification = await verifier.verify_observation(observation_id)
+        assert verification.is_valid, verification.details
+        stellar = verification.details["stellar"]
+        assert stellar["op_index"] == result["op_index"]
+        assert stellar["destination"] == destinations[result["op_index"]]
+        assert stellar["payment_amount"] == float(PAYOUT)
+
+    # Another payout's operation in the same transaction does not verify
+    record = stored.records[observation_ids[0]]
+    record["stellar_op_index"] = (record["stellar_op_index"] + 1) % len(destinations)
+    verification = await verifier.verify_observation(observation_ids[0])
+    assert not verification.is_valid
+    assert verification.details["stellar"]["mismatches"] == ["destination_mismatch"]
+
+    record["stellar_op_index"] = len(destinations)
+    verification = await verifier.verify_observation(observation_ids[0])
+    assert verification.details["stellar"]["error"] == f"No payment operation at index {len(destinations)}"
+
+
+@pytest.mark.asyncio
+async def test_single_payout_verifies_by_memo(ledger):
+    stored = StoredObservations()
+    destination = ledger.recipient()
+    observation_id = stored.add(destination)
+
+    result = await ledger.stellar.send_ubecrc_payment(
+        destination=destination, amount=str(PAYOUT), memo=f"obs:{observation_id[:8]}"
+    )
+    stored.records[observation_id]["stellar_tx_hash"] = result["transaction_hash"]
+
+    verifier = VerificationService(stored, ledger.stellar, database=stored)
+    verification = await verifier.verify_observation(observation_id)
+
+    assert verification.is_valid, verification.details
+    assert verification.details["stellar"]["destination"] == destination
+    assert verification.details["cross_verification"]["valid"]
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Verification Cache - Two-tier cache of verification results
+Avoids re-fetching immutable IPFS content and Stellar transactions
+
+An observation verified against a given IPFS CID and Stellar transaction
+hash stays verified: both references are content-addressed and cannot
+change. Results are therefore keyed on
+(observation_id, ipfs_cid, stellar_tx_hash) - a new reference is a new
+key - and expire only by policy (re-verify every N days).
+
+Tiers:
+1. In-memory LRU (TTLCache) - microsecond repeat lookups
+2. PostgreSQL (verification_cache_migration.sql) - survives restarts and
+   is shared between processes
+
+Only successful verifications are cached; failures may be transient
+(gateway or Horizon outage) and are always re-checked. Expired rows are
+purged from the persistent tier every purge_interval seconds once
+start() is called.
+
+Design Principles Applied:
+- Principle #5: Strict async operations
+- Principle #10: Clear separation of concerns
+
+Attribution: This project uses the services of Claude and Anthropic PBC.
+"""
+
+import asyncio
+import json
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional, Tuple
+
+from lru_cache import TTLCache
+from verification_service import VerificationResult
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str, str]
+
+
+class VerificationCache:
+    """
+    Memory + Postgres cache for VerificationResult objects
+    """
+
+    def __init__(
+        self,
+        database: Optional[Any] = None,
+        memory_size: int = 10000,
+        reverify_after_days: float = 30.0,
+        purge_interval: float = 3600.0
+    ):
+        """
+        Initialize verification cache
+
+        Args:
+            database: PhenomenologicalDB instance for the persistent tier
+                (memory only if None)
+            memory_size: Entries kept in the in-memory tier
+            reverify_after_days: Policy expiry - results older than this
+                are verified again
+            purge_interval: Seconds between purges of expired rows
+        """
+        self.db = database
+        self.ttl_seconds = reverify_after_days * 86400
+        self.purge_interval = purge_interval
+        self.memory = TTLCache(maxsize=memory_size, ttl=self.ttl_seconds, name="verification")
+
+        # observation_id -> key, for observations whose references are final
+        # (both CID and tx hash set), so repeat reports skip the lookup
+        self.references = TTLCache(maxsize=memory_size, ttl=self.ttl_seconds)
+
+        self._persistent = database is not None and hasattr(database, "pool")
+
+        self._worker: Optional[asyncio.Task] = None
+        self._running = False
+
+        self.persistent_hits = 0
+        self.purged = 0
+
+        logger.info(
+            f"Verification cache initialized (memory {memory_size}, "
+            f"re-verify after {reverify_after_days} days, "
+            f"postgres {'on' if self._persistent else 'off'})"
+        )
+
+    @staticmethod
+    def make_key(
+        observation_id: str,
+        ipfs_cid: Optional[str],
+        stellar_tx_hash: Optional[str]
+    ) -> CacheKey:
+        """Build the cache key from the verified references"""
+        return (str(observation_id), ipfs_cid or "", stellar_tx_hash or "")
+
+    def key_for(self, observation_id: str) -> Optional[CacheKey]:
+        """Cached key of an observation with final references, if known"""
+        return self.references.get(str(observation_id))
+
+    async def get(self, key: CacheKey) -> Optional[VerificationResult]:
+        """
+        Look up a cached verification
+
+        Args:
+            key: Key from make_key()
+
+        Returns:
+            Cached VerificationResult, or None on miss or expiry
+        """
+        result = self.memory.get(key)
+        if result is not None:
+            return result
+
+        if not self._persistent:
+            return None
+
+        try:
+            async with self.db.pool.acquire() as conn:
+                row = await conn.fetchrow("""
+                    SELECT result, expires_at
+                    FROM phenomenological.verification_cache
+                    WHERE observation_id = $1
+                      AND ipfs_cid = $2
+                      AND stellar_tx_hash = $3
+                      AND expires_at > now()
+                """, uuid.UUID(key[0]), key[1], key[2])
+        except Exception as e:
+            self._handle_db_error(e)
+            return None
+
+        if not row:
+            return None
+
+        data = row["result"]
+        if isinstance(data, str):
+            data = json.loads(data)
+        result = VerificationResult.from_dict(data)
+
+        # Promote to memory for the remaining policy lifetime
+        remaining = (row["expires_at"] - datetime.now(timezone.utc)).total_seconds()
+        self.memory.set(key, result, ttl=max(remaining, 0))
+        self.persistent_hits += 1
+
+        return result
+
+    async def put(self, key: CacheKey, result: VerificationResult) -> None:
+        """
+        Cache a successful verification
+
+        Args:
+            key: Key from make_key()
+            result: Verification result (ignored unless valid)
+        """
+        if not result.is_valid:
+            return
+
+        self.memory.set(key, result)
+        if key[1] and key[2]:
+            self.references.set(key[0], key)
+
+        if not self._persistent:
+            return
+
+        expires_at = result.verified_at + timedelta(seconds=self.ttl_seconds)
+        try:
+            async with self.db.pool.acquire() as conn:
+                await conn.execute("""
+                    INSERT INTO phenomenological.verification_cache (
+                        observation_id, ipfs_cid, stellar_tx_hash,
+                        result, verified_at, expires_at
+                    ) VALUES ($1, $2, $3, $4::jsonb, $5, $6)
+                    ON CONFLICT (observation_id, ipfs_cid, stellar_tx_hash) DO UPDATE
+                    SET result = EXCLUDED.result,
+                        verified_at = EXCLUDED.verified_at,
+                        expires_at = EXCLUDED.expires_at
+                """,
+                uuid.UUID(key[0]), key[1], key[2],
+                json.dumps(result.to_dict(), default=str),
+                result.verified_at, expires_at
+                )
+        except Exception as e:
+            self._handle_db_error(e)
+
+    async def invalidate(self, key: CacheKey) -> None:
+        """Force re-verification of one entry (both tiers)"""
+        self.memory.invalidate(key)
+        self.references.invalidate(key[0])
+
+        if not self._persistent:
+            return
+
+        try:
+            async with self.db.pool.acquire() as conn:
+                await conn.execute("""
+                    DELETE FROM phenomenological.verification_cache
+                    WHERE observation_id = $1 AND ipfs_cid = $2 AND stellar_tx_hash = $3
+                """, uuid.UUID(key[0]), key[1], key[2])
+        except Exception as e:
+            self._handle_db_error(e)
+
+    async def purge_expired(self) -> int:
+        """
+        Delete expired rows from the persistent tier
+
+        Returns:
+            Number of rows deleted
+        """
+        if not self._persistent:
+            return 0
+
+        try:
+            async with self.db.pool.acquire() as conn:
+                status = await conn.execute("""
+                    DELETE FROM phenomenological.verification_cache
+                    WHERE expires_at <= now()
+                """)
+            return int(status.split()[-1])
+        except Exception as e:
+            self._handle_db_error(e)
+            return 0
+
+    async def start(self) -> None:
+        """Purge expired rows every purge_interval (persistent tier only)"""
+        if self._running or not self._persistent:
+            return
+
+        self._running = True
+        self._worker = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        """Purge loop"""
+        while self._running:
+            deleted = await self.purge_expired()
+            if deleted:
+                self.purged += deleted
+                logger.info(f"Verification cache: purged {deleted} expired results")
+            await asyncio.sleep(self.purge_interval)
+
+    def stats(self) -> dict:
+        """Hit counters for status endpoints"""
+        return {
+            "memory": self.memory.stats(),
+            "persistent_enabled": self._persistent,
+            "persistent_hits": self.persistent_hits,
+            "purged": self.purged
+        }
+
+    def _handle_db_error(self, error: Exception) -> None:
+        """Log a persistent-tier error; go memory-only if the table is missing"""
+        if getattr(error, "sqlstate", None) == "42P01":  # undefined_table
+            if self._persistent:
+                logger.warning(
+                    "Verification cache table missing - using memory tier only "
+                    "(run verification_cache_migration.sql)"
+                )
+            self._persistent = False
+        else:
+            logger.error(f"Verification cache database error: {error}")
+
+    async def close(self) -> None:
+        """Stop the purge loop"""
+        self._running = False
+        if self._worker:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+        logger.info("Verification cache closed")
+
+
+"""
+Attribution: This project uses the services of Claude and Anthropic PBC
+to inform our decisions and recommendations.
+"""
@@ -0,0 +1,34 @@
+-- ============================================================
+-- Verification Cache Migration
+-- Persistent tier of the verification result cache
+-- (see verification_cache.py)
+--
+-- Entries are keyed on the immutable references an observation was
+-- verified against; a new CID or transaction hash is a new key.
+-- They expire only by policy (re-verify every N days).
+--
+-- Run once:
+--   psql "$DATABASE_URL" -f verification_cache_migration.sql
+--
+-- Attribution: This project uses the services of Claude and Anthropic PBC.
+-- ============================================================
+
+SET search_path TO phenomenological, public;
+
+CREATE TABLE IF NOT EXISTS phenomenological.verification_cache (
+    observation_id  uuid NOT NULL,
+    ipfs_cid        text NOT NULL DEFAULT '',
+    stellar_tx_hash text NOT NULL DEFAULT '',
+    result          jsonb NOT NULL,
+    verified_at     timestamptz NOT NULL,
+    expires_at      timestamptz NOT NULL,
+
+    PRIMARY KEY (observation_id, ipfs_cid, stellar_tx_hash)
+);
+
+COMMENT ON TABLE phenomenological.verification_cache IS
+    'Successful verification results keyed on (observation_id, ipfs_cid, stellar_tx_hash); re-verified after expires_at';
+
+-- Purge of expired entries
+CREATE INDEX IF NOT EXISTS idx_verification_cache_expires
+    ON phenomenological.verification_cache (expires_at);
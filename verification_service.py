@@ -27,13 +27,24 @@ assistance of Claude and Anthropic PBC.
 Version: 2.0.0 (Production)
 """
 
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Iterable, AsyncIterable, AsyncIterator, Callable, Union
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
+import asyncio
 import logging
+import time
 import hashlib
 import json
 
+from ipfs_cid import (
+    MAX_RAW_BLOCK_SIZE,
+    RAW_SHA256_CID_PREFIX,
+    canonical_json_bytes,
+    compute_json_cid,
+    split_observation_ref,
+    verify_json_cid
+)
+
 logger = logging.getLogger(__name__)
 
 
@@ -73,6 +84,19 @@ class VerificationResult:
             "message": self._generate_message()
         }
     
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "VerificationResult":
+        """Rebuild a result from to_dict() output (e.g. a cached entry)."""
+        return cls(
+            is_valid=data["valid"],
+            observation_id=data["observation_id"],
+            checks_performed=data.get("checks_performed", []),
+            failures=data.get("failures", []),
+            verified_at=datetime.fromisoformat(data["verified_at"]),
+            details=data.get("details", {}),
+            confidence=data.get("confidence", 1.0)
+        )
+    
     def _generate_message(self) -> str:
         """Generate human-readable verification message."""
         if self.is_valid:
@@ -81,6 +105,55 @@ class VerificationResult:
             return f"Verification failed: {', '.join(self.failures)}"
 
 
+@dataclass
+class VerificationProgress:
+    """
+    Progress of a streaming verification run.
+    
+    Results arrive out of order, so the resume point is a watermark:
+    every input before `cursor` (position) / `cursor_id` (observation ID)
+    has been verified. Restarting with start_offset=cursor (or, for
+    archive audits, start_after=cursor_id) skips only finished work.
+    
+    Attributes:
+        total: Number of inputs, if known in advance
+        processed: Results yielded so far
+        valid: Results that verified
+        invalid: Results that failed verification
+        errors: Verifications that raised an exception
+        cursor: Count of inputs verified without gaps from the start
+        cursor_id: Observation ID at the watermark
+        started_at: Monotonic start time
+    """
+    total: Optional[int] = None
+    processed: int = 0
+    valid: int = 0
+    invalid: int = 0
+    errors: int = 0
+    cursor: int = 0
+    cursor_id: Optional[str] = None
+    started_at: float = field(default_factory=time.monotonic)
+    
+    @property
+    def rate(self) -> float:
+        """Verifications per second"""
+        elapsed = time.monotonic() - self.started_at
+        return self.processed / elapsed if elapsed > 0 else 0.0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for logs and API responses."""
+        return {
+            "total": self.total,
+            "processed": self.processed,
+            "valid": self.valid,
+            "invalid": self.invalid,
+            "errors": self.errors,
+            "cursor": self.cursor,
+            "cursor_id": self.cursor_id,
+            "rate_per_second": round(self.rate, 2)
+        }
+
+
 class VerificationService:
     """
     Provides cryptographic verification of observation integrity.
@@ -98,7 +171,10 @@ class VerificationService:
         self,
         ipfs_service: Any,
         stellar_service: Any,
-        database: Optional[Any] = None
+        database: Optional[Any] = None,
+        max_concurrency: int = 20,
+        cache: Optional[Any] = None,
+        archive_db: Optional[Any] = None
     ):
         """
         Initialize verification service.
@@ -106,11 +182,22 @@ class VerificationService:
         Args:
             ipfs_service: IPFS storage service for content verification
             stellar_service: Stellar blockchain service for transaction checks
-            database: Optional database for cache queries (faster but not required)
+            database: Optional ObservationService (or anything with
+                get_observation_status) for reference lookups - faster
+                but not required
+            max_concurrency: Default number of observations verified at once
+                in batch and streaming mode
+            cache: Optional VerificationCache (see verification_cache.py)
+            archive_db: Optional PhenomenologicalDB (anything with an
+                asyncpg pool) paged by audit_archive; defaults to the
+                pool behind database
         """
         self.ipfs = ipfs_service
         self.stellar = stellar_service
         self.db = database
+        self.max_concurrency = max(1, max_concurrency)
+        self.cache = cache
+        self.archive_db = archive_db
         
         logger.info("Verification Service initialized (Read-Only Mode)")
     
@@ -118,7 +205,9 @@ class VerificationService:
         self,
         observation_id: str,
         ipfs_cid: Optional[str] = None,
-        stellar_tx_hash: Optional[str] = None
+        stellar_tx_hash: Optional[str] = None,
+        use_cache: bool = True,
+        stellar_op_index: Optional[int] = None
     ) -> VerificationResult:
         """
         Complete verification of observation authenticity and integrity.
@@ -132,6 +221,10 @@ class VerificationService:
             observation_id: UUID of the observation to verify
             ipfs_cid: Optional IPFS CID (will lookup if not provided)
             stellar_tx_hash: Optional Stellar tx hash (will lookup if not provided)
+            use_cache: Return a cached result for the same references
+                (set False to force a fresh check)
+            stellar_op_index: Optional operation index of the payout within
+                a batched transaction (will lookup if not provided)
         
         Returns:
             VerificationResult with detailed check results
@@ -151,10 +244,19 @@ class VerificationService:
         failures = []
         details = {}
         confidence = 1.0
+        payment = {"op_index": stellar_op_index}
         
         logger.info(f"Starting verification for observation {observation_id}")
         
         try:
+            # Step 0: Observations with final references skip the lookup
+            if use_cache and self.cache and not (ipfs_cid or stellar_tx_hash):
+                known_key = self.cache.key_for(observation_id)
+                if known_key:
+                    cached = await self.cache.get(known_key)
+                    if cached:
+                        return cached
+            
             # Step 1: Lookup observation data if not provided
             if not ipfs_cid or not stellar_tx_hash:
                 lookup_result = await self._lookup_observation(observation_id)
@@ -173,10 +275,21 @@ class VerificationService:
                 
                 ipfs_cid = ipfs_cid or lookup_result.get("ipfs_cid")
                 stellar_tx_hash = stellar_tx_hash or lookup_result.get("stellar_tx_hash")
+                payment = self._expected_payment(lookup_result, stellar_op_index)
                 details["lookup"] = "success"
             
             checks_performed.append("lookup")
             
+            # Content-addressed references cannot change - reuse a prior result
+            cache_key = None
+            if self.cache:
+                cache_key = self.cache.make_key(observation_id, ipfs_cid, stellar_tx_hash)
+                if use_cache:
+                    cached = await self.cache.get(cache_key)
+                    if cached:
+                        logger.debug(f"Verification cache hit for {observation_id}")
+                        return cached
+            
             # Step 2: Verify IPFS content integrity
             ipfs_check = await self._verify_ipfs_content(
                 observation_id=observation_id,
@@ -192,7 +305,10 @@ class VerificationService:
             # Step 3: Verify Stellar blockchain record
             stellar_check = await self._verify_stellar_transaction(
                 observation_id=observation_id,
-                stellar_tx_hash=stellar_tx_hash
+                stellar_tx_hash=stellar_tx_hash,
+                op_index=payment.get("op_index"),
+                destination=payment.get("destination"),
+                amount=payment.get("amount")
             )
             checks_performed.append("stellar_record")
             details["stellar"] = stellar_check
@@ -204,7 +320,7 @@ class VerificationService:
             # Step 4: Cross-verify IPFS and Stellar data match
             cross_check = await self._cross_verify(
                 ipfs_data=ipfs_check.get("content"),
-                stellar_data=stellar_check.get("transaction")
+                stellar_data=stellar_check if stellar_check["valid"] else None
             )
             checks_performed.append("cross_verification")
             details["cross_verification"] = cross_check
@@ -228,7 +344,7 @@ class VerificationService:
             # Step 6: Verify timestamp consistency
             timestamp_check = await self._verify_timestamps(
                 ipfs_data=ipfs_check.get("content"),
-                stellar_data=stellar_check.get("transaction")
+                stellar_data=stellar_check if stellar_check["valid"] else None
             )
             checks_performed.append("timestamp_consistency")
             details["timestamps"] = timestamp_check
@@ -246,7 +362,7 @@ class VerificationService:
                 f"(confidence: {confidence:.0%})"
             )
             
-            return VerificationResult(
+            result = VerificationResult(
                 is_valid=is_valid,
                 observation_id=observation_id,
                 checks_performed=checks_performed,
@@ -256,6 +372,11 @@ class VerificationService:
                 confidence=confidence
             )
             
+            if cache_key:
+                await self.cache.put(cache_key, result)
+            
+            return result
+            
         except Exception as e:
             logger.error(f"Verification error for {observation_id}: {e}", exc_info=True)
             return VerificationResult(
@@ -270,45 +391,24 @@ class VerificationService:
     
     async def verify_batch(
         self,
-        observation_ids: List[str]
+        observation_ids: List[str],
+        concurrency: Optional[int] = None
     ) -> Dict[str, VerificationResult]:
         """
-        Verify multiple observations in parallel.
+        Verify multiple observations with bounded concurrency.
         
         Args:
             observation_ids: List of observation UUIDs to verify
+            concurrency: Observations verified at once (default: max_concurrency)
         
         Returns:
             Dictionary mapping observation_id → VerificationResult
         """
-        import asyncio
-        
         logger.info(f"Starting batch verification of {len(observation_ids)} observations")
         
-        # Verify all observations concurrently
-        tasks = [
-            self.verify_observation(obs_id)
-            for obs_id in observation_ids
-        ]
-        
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        # Build results dictionary
         verification_map = {}
-        for obs_id, result in zip(observation_ids, results):
-            if isinstance(result, Exception):
-                logger.error(f"Batch verification failed for {obs_id}: {result}")
-                verification_map[obs_id] = VerificationResult(
-                    is_valid=False,
-                    observation_id=obs_id,
-                    checks_performed=[],
-                    failures=["exception"],
-                    verified_at=datetime.now(timezone.utc),
-                    details={"error": str(result)},
-                    confidence=0.0
-                )
-            else:
-                verification_map[obs_id] = result
+        async for result in self.verify_stream(observation_ids, concurrency=concurrency):
+            verification_map[result.observation_id] = result
         
         valid_count = sum(1 for r in verification_map.values() if r.is_valid)
         logger.info(
@@ -317,6 +417,220 @@ class VerificationService:
         
         return verification_map
     
+    async def verify_stream(
+        self,
+        observation_ids: Union[Iterable[str], AsyncIterable[str]],
+        concurrency: Optional[int] = None,
+        start_offset: int = 0,
+        total: Optional[int] = None,
+        progress_callback: Optional[Callable[[VerificationProgress], Any]] = None,
+        progress_every: int = 100
+    ) -> AsyncIterator[VerificationResult]:
+        """
+        Verify observations as a stream, yielding results as they finish.
+        
+        At most `concurrency` verifications run at once and IDs are pulled
+        from the input only as slots free up, so memory stays constant no
+        matter how many observations are audited.
+        
+        Args:
+            observation_ids: IDs to verify (list, generator or async iterator)
+            concurrency: Observations verified at once (default: max_concurrency)
+            start_offset: Skip this many inputs (resume from a previous cursor)
+            total: Number of inputs, for progress reporting
+            progress_callback: Called with VerificationProgress every
+                `progress_every` results and once at the end (may be async)
+            progress_every: Results between progress reports
+        
+        Yields:
+            VerificationResult for each observation, in completion order
+        
+        Example:
+            async for result in verifier.verify_stream(ids, concurrency=50):
+                if not result.is_valid:
+                    print(result.observation_id, result.failures)
+        """
+        limit = max(1, concurrency or self.max_concurrency)
+        if total is None and hasattr(observation_ids, "__len__"):
+            total = len(observation_ids)
+        
+        progress = VerificationProgress(total=total, cursor=start_offset)
+        inputs = self._iterate_ids(observation_ids, start_offset)
+        
+        in_flight: Dict[asyncio.Task, tuple] = {}
+        finished_positions: Dict[int, str] = {}
+        exhausted = False
+        
+        try:
+            while True:
+                # Top up to the concurrency limit
+                while not exhausted and len(in_flight) < limit:
+                    try:
+                        position, obs_id = await inputs.__anext__()
+                    except StopAsyncIteration:
+                        exhausted = True
+                        break
+                    task = asyncio.create_task(self.verify_observation(obs_id))
+                    in_flight[task] = (position, obs_id)
+                
+                if not in_flight:
+                    break
+                
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                
+                for task in done:
+                    position, obs_id = in_flight.pop(task)
+                    error = task.exception()
+                    
+                    if error:
+                        logger.error(f"Batch verification failed for {obs_id}: {error}")
+                        result = VerificationResult(
+                            is_valid=False,
+                            observation_id=obs_id,
+                            checks_performed=[],
+                            failures=["exception"],
+                            verified_at=datetime.now(timezone.utc),
+                            details={"error": str(error)},
+                            confidence=0.0
+                        )
+                        progress.errors += 1
+                    else:
+                        result = task.result()
+                    
+                    progress.processed += 1
+                    if result.is_valid:
+                        progress.valid += 1
+                    else:
+                        progress.invalid += 1
+                    
+                    # Advance the resume watermark over contiguous finished inputs
+                    finished_positions[position] = obs_id
+                    while progress.cursor in finished_positions:
+                        progress.cursor_id = finished_positions.pop(progress.cursor)
+                        progress.cursor += 1
+                    
+                    if progress_callback and progress.processed % progress_every == 0:
+                        await self._report_progress(progress_callback, progress)
+                    
+                    yield result
+            
+            if progress_callback:
+                await self._report_progress(progress_callback, progress)
+            
+            logger.info(f"Verification stream finished: {progress.to_dict()}")
+        
+        finally:
+            # Consumer stopped early - do not leave verifications running
+            for task in in_flight:
+                task.cancel()
+    
+    async def audit_archive(
+        self,
+        start_after: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        page_size: int = 1000,
+        progress_callback: Optional[Callable[[VerificationProgress], Any]] = None,
+        progress_every: int = 1000
+    ) -> AsyncIterator[VerificationResult]:
+        """
+        Stream-verify every recorded observation in observation_id order.
+        
+        IDs are paged from the archive database's pool (archive_db, or
+        the pool behind database) with keyset pagination, so a
+        full-archive audit runs in constant memory. To resume an
+        interrupted audit, pass the last reported progress.cursor_id as
+        start_after.
+        
+        Args:
+            start_after: Resume after this observation ID
+            concurrency: Observations verified at once (default: max_concurrency)
+            page_size: IDs fetched per database round trip
+            progress_callback: See verify_stream
+            progress_every: See verify_stream
+        
+        Yields:
+            VerificationResult for each observation, in completion order
+        
+        Raises:
+            RuntimeError: If no database pool is available
+        """
+        pool = self._archive_pool()
+        if pool is None:
+            raise RuntimeError("Archive audit requires a database")
+        
+        async for result in self.verify_stream(
+            self._iter_archive_ids(pool, start_after, page_size),
+            concurrency=concurrency,
+            progress_callback=progress_callback,
+            progress_every=progress_every
+        ):
+            yield result
+    
+    def _archive_pool(self) -> Optional[Any]:
+        """Resolve the asyncpg pool used to page the archive"""
+        for source in (self.archive_db, self.db):
+            if source is None:
+                continue
+            # PhenomenologicalDB exposes .pool; ObservationService wraps one in .db
+            pool = (getattr(source, "pool", None)
+                    or getattr(getattr(source, "db", None), "pool", None))
+            if pool is not None:
+                return pool
+        return None
+    
+    @staticmethod
+    async def _iter_archive_ids(
+        pool: Any,
+        start_after: Optional[str],
+        page_size: int
+    ) -> AsyncIterator[str]:
+        """Page observation IDs in ascending order (keyset pagination)"""
+        last_id = start_after
+        while True:
+            async with pool.acquire() as conn:
+                rows = await conn.fetch("""
+                    SELECT observation_id::text AS observation_id
+                    FROM phenomenological.observations
+                    WHERE ($1::uuid IS NULL OR observation_id > $1::uuid)
+                    ORDER BY observation_id
+                    LIMIT $2
+                """, last_id, page_size)
+            
+            if not rows:
+                return
+            
+            for row in rows:
+                yield row["observation_id"]
+            last_id = rows[-1]["observation_id"]
+    
+    @staticmethod
+    async def _iterate_ids(
+        observation_ids: Union[Iterable[str], AsyncIterable[str]],
+        start_offset: int
+    ) -> AsyncIterator[tuple]:
+        """Yield (position, observation_id), skipping the first start_offset"""
+        position = 0
+        if hasattr(observation_ids, "__aiter__"):
+            async for obs_id in observation_ids:
+                if position >= start_offset:
+                    yield position, obs_id
+                position += 1
+        else:
+            for obs_id in observation_ids:
+                if position >= start_offset:
+                    yield position, obs_id
+                position += 1
+    
+    @staticmethod
+    async def _report_progress(
+        callback: Callable[[VerificationProgress], Any],
+        progress: VerificationProgress
+    ) -> None:
+        """Invoke a sync or async progress callback"""
+        outcome = callback(progress)
+        if asyncio.iscoroutine(outcome):
+            await outcome
+    
     async def get_verification_report(
         self,
         observation_id: str
@@ -387,7 +701,7 @@ class VerificationService:
         # Try cache first
         if self.db:
             try:
-                cached = await self.db.get_observation(observation_id)
+                cached = await self.db.get_observation_status(observation_id)
                 if cached:
                     logger.debug(f"Found {observation_id} in database cache")
                     return cached
@@ -408,6 +722,38 @@ class VerificationService:
         logger.warning(f"Could not find {observation_id} in any storage")
         return None
     
+    @staticmethod
+    def _expected_payment(
+        record: Dict[str, Any],
+        op_index: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Payout recorded for an observation (operation index, destination, amount).
+        
+        The pipeline keeps these next to stellar_tx_hash in the record's
+        perception payload; top-level keys take precedence.
+        """
+        perception = record.get("perception")
+        if isinstance(perception, str):
+            try:
+                perception = json.loads(perception)
+            except ValueError:
+                perception = None
+        if not isinstance(perception, dict):
+            perception = {}
+        
+        def recorded(key):
+            value = record.get(key)
+            return value if value is not None else perception.get(key)
+        
+        if op_index is None:
+            op_index = recorded("stellar_op_index")
+        return {
+            "op_index": int(op_index) if op_index is not None else None,
+            "destination": recorded("muxed_address"),
+            "amount": recorded("tokens_distributed")
+        }
+    
     async def _verify_ipfs_content(
         self,
         observation_id: str,
@@ -474,7 +820,10 @@ class VerificationService:
     async def _verify_stellar_transaction(
         self,
         observation_id: str,
-        stellar_tx_hash: str
+        stellar_tx_hash: str,
+        op_index: Optional[int] = None,
+        destination: Optional[str] = None,
+        amount: Optional[Any] = None
     ) -> Dict[str, Any]:
         """
         Verify Stellar blockchain transaction.
@@ -482,8 +831,12 @@ class VerificationService:
         Checks:
         1. Transaction exists on blockchain
         2. Transaction was successful
-        3. Memo contains observation reference
-        4. Payment amount is reasonable
+        3. The observation's payment operation: the operation at op_index
+           for batched payouts (whose memo is shared by the batch),
+           otherwise the first payment, with the memo containing the
+           observation reference
+        4. Destination and amount match the recorded payout, if known
+        5. Payment amount is reasonable
         """
         try:
             # Get transaction from Stellar
@@ -505,29 +858,66 @@ class VerificationService:
                     "transaction": transaction
                 }
             
-            # Verify memo contains observation reference
             memo = transaction.get("memo")
-            obs_ref = observation_id[:8]  # First 8 chars
+            operations = await self.stellar.get_transaction_operations(stellar_tx_hash)
+            if operations is None:
+                return {
+                    "valid": False,
+                    "error": "Transaction operations not available",
+                    "tx_hash": stellar_tx_hash
+                }
+            
+            if op_index is not None:
+                # Batched payout - the operation, not the memo, identifies it
+                if not 0 <= op_index < len(operations) or \
+                        operations[op_index].get("type") != "payment":
+                    return {
+                        "valid": False,
+                        "error": f"No payment operation at index {op_index}",
+                        "tx_hash": stellar_tx_hash,
+                        "op_index": op_index
+                    }
+                payment_op = operations[op_index]
+            else:
+                # Verify memo contains observation reference
+                obs_ref = observation_id[:8]  # First 8 chars
+                
+                if memo and obs_ref not in str(memo):
+                    logger.warning(
+                        f"Memo mismatch: expected '{obs_ref}' in '{memo}'"
+                    )
+                    # Not fatal - memo might use different format
+                
+                payment_ops = [op for op in operations if op.get("type") == "payment"]
+                
+                if not payment_ops:
+                    return {
+                        "valid": False,
+                        "error": "No payment operation found",
+                        "tx_hash": stellar_tx_hash
+                    }
+                payment_op = payment_ops[0]
             
-            if memo and obs_ref not in str(memo):
-                logger.warning(
-                    f"Memo mismatch: expected '{obs_ref}' in '{memo}'"
-                )
-                # Not fatal - memo might use different format
+            payment_amount = float(payment_op.get("amount", 0))
+            payment_destination = payment_op.get("to_muxed") or payment_op.get("to")
             
-            # Extract payment amount
-            operations = transaction.get("operations", [])
-            payment_ops = [op for op in operations if op.get("type") == "payment"]
+            mismatches = []
+            if destination and destination not in (payment_op.get("to_muxed"), payment_op.get("to")):
+                mismatches.append("destination_mismatch")
+            if amount is not None and abs(float(amount) - payment_amount) > 1e-7:
+                mismatches.append("amount_mismatch")
             
-            if not payment_ops:
+            if mismatches:
                 return {
                     "valid": False,
-                    "error": "No payment operation found",
-                    "tx_hash": stellar_tx_hash
+                    "error": "Payment operation does not match the recorded payout",
+                    "mismatches": mismatches,
+                    "tx_hash": stellar_tx_hash,
+                    "op_index": op_index,
+                    "expected": {"destination": destination, "amount": str(amount)},
+                    "found": {"destination": payment_destination, "amount": payment_op.get("amount")}
                 }
             
-            payment_amount = float(payment_ops[0].get("amount", 0))
-            
             # Verify payment amount is reasonable (0.1 to 100 UBECrc)
             if not (0.1 <= payment_amount <= 100):
                 logger.warning(f"Unusual payment amount: {payment_amount} UBECrc")
@@ -537,6 +927,8 @@ class VerificationService:
                 "tx_hash": stellar_tx_hash,
                 "transaction": transaction,
                 "memo": memo,
+                "op_index": op_index,
+                "destination": payment_destination,
                 "payment_amount": payment_amount,
                 "timestamp": transaction.get("created_at")
             }
@@ -570,11 +962,12 @@ class VerificationService:
         
         mismatches = []
         
-        # Check observation ID
+        # Check observation ID (batched payouts share one memo; their
+        # operation was already matched by index, destination and amount)
         ipfs_obs_id = ipfs_data.get("observation_id")
-        stellar_memo = stellar_data.get("memo", "")
+        stellar_memo = stellar_data.get("memo") or ""
         
-        if ipfs_obs_id and stellar_memo:
+        if ipfs_obs_id and stellar_memo and stellar_data.get("op_index") is None:
             if ipfs_obs_id[:8] not in stellar_memo:
                 mismatches.append("observation_id_mismatch")
         
@@ -617,6 +1010,8 @@ class VerificationService:
         
         IPFS CIDs are content-addressed - the CID IS the hash.
         If content changes, CID changes. This is cryptographically guaranteed.
+        A batch reference's CID covers the whole batch document, which is
+        fetched so it can be re-hashed.
         """
         if not ipfs_data:
             return {
@@ -624,20 +1019,115 @@ class VerificationService:
                 "error": "No data to verify"
             }
         
+        batch_cid, index = split_observation_ref(ipfs_cid)
+        batch_document = None
+        if index is not None:
+            try:
+                batch_document = await self.ipfs.get_json(batch_cid)
+            except Exception as e:
+                logger.error(f"Batch document retrieval failed for {batch_cid}: {e}")
+        
+        return self.verify_content_offline(ipfs_cid, ipfs_data, batch_document)
+    
+    def verify_content_offline(
+        self,
+        ipfs_cid: str,
+        content: Dict[str, Any],
+        batch_document: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Recompute the CID of observation content and compare it.
+        
+        Works on any copy of the content (gateway response, database
+        record, device log) without a network round trip. Observations
+        are pinned as canonical JSON with a raw-codec CIDv1, so the CID
+        can be recomputed exactly (see ipfs_cid.py).
+        
+        For a "<batch_cid>#<index>" reference the CID is recomputed from
+        the batch document, and entry <index> of that document must equal
+        the content.
+        
+        Args:
+            ipfs_cid: Stored CID (or "<batch_cid>#<index>" reference)
+            content: Observation document to check
+            batch_document: Full batch document (required for batch references)
+        
+        Returns:
+            Dict with valid flag, recomputed CID and the method used
+        """
+        cid, index = split_observation_ref(ipfs_cid)
+        
         # Calculate hash of current content
-        content_json = json.dumps(ipfs_data, sort_keys=True)
+        content_json = json.dumps(content, sort_keys=True)
         content_hash = hashlib.sha256(content_json.encode()).hexdigest()
         
-        # IPFS CIDs are base58-encoded multihashes
-        # If we got the data from IPFS, it's already verified
-        # (IPFS verifies CID matches content on retrieval)
+        hashed = content
+        method = "local_cid_recompute"
+        
+        if index is not None:
+            method = "batch_recompute"
+            if not isinstance(batch_document, dict):
+                return {
+                    "valid": False,
+                    "cid": ipfs_cid,
+                    "content_hash": content_hash,
+                    "error": "Batch document not available - the CID covers the whole batch",
+                    "method": method
+                }
+            
+            entries = batch_document.get("observations") or []
+            if not 0 <= index < len(entries) or \
+                    canonical_json_bytes(entries[index]) != canonical_json_bytes(content):
+                return {
+                    "valid": False,
+                    "cid": ipfs_cid,
+                    "content_hash": content_hash,
+                    "error": f"Content does not match entry {index} of the batch document",
+                    "method": method
+                }
+            hashed = batch_document
+        
+        matches = verify_json_cid(cid, hashed)
+        computed_cid = compute_json_cid(hashed)
+        
+        if matches is None and computed_cid is None and cid.startswith(RAW_SHA256_CID_PREFIX):
+            # A raw-codec CID is one block; larger content was chunked by
+            # IPFS and cannot be the content this CID was computed from
+            return {
+                "valid": False,
+                "cid": ipfs_cid,
+                "content_hash": content_hash,
+                "error": f"Content exceeds one IPFS block ({MAX_RAW_BLOCK_SIZE} bytes) "
+                         "and cannot match a raw-codec CID",
+                "method": method
+            }
+        
+        if matches is None:
+            # Legacy CID (not canonical raw-codec content) - cannot recompute,
+            # rely on the gateway's content addressing
+            return {
+                "valid": True,
+                "cid": ipfs_cid,
+                "content_hash": content_hash,
+                "method": "ipfs_content_addressing",
+                "note": "IPFS guarantees content integrity via CID"
+            }
+        
+        if not matches:
+            return {
+                "valid": False,
+                "cid": ipfs_cid,
+                "computed_cid": computed_cid,
+                "error": "Content does not match CID",
+                "method": method
+            }
         
         return {
             "valid": True,
             "cid": ipfs_cid,
+            "computed_cid": computed_cid,
             "content_hash": content_hash,
-            "method": "ipfs_content_addressing",
-            "note": "IPFS guarantees content integrity via CID"
+            "method": method
         }
     
     async def _verify_timestamps(